@@ -0,0 +1,83 @@
+# app/crud/catalog_version.py
+
+from datetime import datetime
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.models.catalog_version import CatalogVersion
+from app.models.category import ProductCategory
+from app.models.product import Product
+from app.models.product_image import ProductImage
+from app.models.types import new_id
+from app.crud.utils import upsert_statement
+from app.services.catalog_cache import catalog_cache
+
+# Models cujas escritas mudam as respostas do catálogo (estoque entra pelo
+# Product.stock_quantity alterado junto com cada movimentação)
+CATALOG_MODELS = (Product, ProductImage, ProductCategory)
+
+# Chave em Session.info: empresa -> versão gravada na transação atual
+_BUMPED_INFO_KEY = "catalog_versions_bumped"
+
+
+# =========================
+# Incremento
+# =========================
+def bump_catalog_version(db: Session, company_id: str) -> int:
+    """
+    Incrementa a versão do catálogo da empresa na transação da sessão
+    (cria a linha na primeira escrita) e devolve o novo valor. Escritas
+    fora do ORM (INSERT/UPDATE em massa) devem chamar isto antes do commit.
+    """
+    now = datetime.utcnow()
+    table = CatalogVersion.__table__
+    # Conexão da transação no banco (shard) do catálogo; SQL core, sem eventos ORM
+    conn = db.connection(bind_arguments={"mapper": CatalogVersion.__mapper__})
+    conn.execute(upsert_statement(
+        conn.dialect.name,
+        table,
+        dict(id=new_id(), company_id=company_id, version=1, created_at=now, updated_at=now),
+        conflict_columns=["company_id"],
+        update_values={"version": table.c.version + 1, "updated_at": now},
+    ))
+    version = conn.execute(select(table.c.version).where(table.c.company_id == company_id)).scalar_one()
+    # Publicado no cache deste processo no commit (_publish_catalog_versions)
+    db.info.setdefault(_BUMPED_INFO_KEY, {})[company_id] = version
+    return version
+
+
+def _changed_companies(session: Session) -> set:
+    companies = set()
+    for obj in (*session.new, *session.deleted):
+        if isinstance(obj, CATALOG_MODELS):
+            companies.add(obj.company_id)
+    for obj in session.dirty:
+        if isinstance(obj, CATALOG_MODELS) and session.is_modified(obj, include_collections=False):
+            companies.add(obj.company_id)
+    companies.discard(None)
+    return companies
+
+
+# =========================
+# Eventos da sessão
+# =========================
+@event.listens_for(Session, "after_flush")
+def _bump_on_catalog_writes(session: Session, flush_context) -> None:
+    # Uma vez por transação e empresa; o after_flush ainda vê new/dirty/deleted
+    bumped = session.info.get(_BUMPED_INFO_KEY, {})
+    for company_id in _changed_companies(session) - bumped.keys():
+        bump_catalog_version(session, company_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_catalog_versions(session: Session) -> None:
+    # Invalida o cache deste processo na hora; os outros workers veem na
+    # próxima releitura (CATALOG_VERSION_REFRESH_SECONDS)
+    for company_id, version in session.info.pop(_BUMPED_INFO_KEY, {}).items():
+        catalog_cache.observe(company_id, version)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_catalog_versions(session: Session) -> None:
+    session.info.pop(_BUMPED_INFO_KEY, None)
@@ -5,7 +5,12 @@ from sqlalchemy.exc import IntegrityError
 from app.models.category import ProductCategory
 from app.schemas.category import ProductCategoryCreate, ProductCategoryUpdate
 from app.security.tenant import Tenant
-from uuid import uuid4
+from app.crud.utils import async_version
+from app.crud.statements import get_for_tenant
+from app.crud.tenant_scope import bind_tenant
+from app.crud import catalog_version  # noqa: F401  (versão do catálogo a cada escrita)
+from app.crud.pagination import DEFAULT_PAGE_SIZE, Page, keyset_paginate
+from app.models.types import new_id
 from typing import List, Optional
 
 # =========================
@@ -15,8 +20,9 @@ def create_category(db: Session, category_data: ProductCategoryCreate, tenant: T
     """
     Cria uma nova categoria de produto vinculada ao tenant.
     """
+    bind_tenant(db, tenant)
     db_category = ProductCategory(
-        id=str(uuid4()),
+        id=new_id(),
         name=category_data.name,
         description=category_data.description,
         code=category_data.code,
@@ -40,32 +46,20 @@ def get_category(db: Session, category_id: str, tenant: Tenant) -> Optional[Prod
     """
     Retorna uma categoria pelo ID, dentro do tenant.
     """
-    return (
-        db.query(ProductCategory)
-        .filter(
-            ProductCategory.id == category_id,
-            ProductCategory.company_id == tenant.company_id,
-            ProductCategory.store_id == tenant.store_id
-        )
-        .first()
-    )
+    return get_for_tenant(db, ProductCategory, category_id, tenant)
 
-def get_categories(db: Session, tenant: Tenant, skip: int = 0, limit: int = 100) -> List[ProductCategory]:
+def get_categories(
+    db: Session,
+    tenant: Tenant,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Page:
     """
-    Retorna uma lista de categorias do tenant, com paginação e ordenação por nome.
+    Retorna as categorias ativas do tenant, paginadas por (name, id).
     """
-    return (
-        db.query(ProductCategory)
-        .filter(
-            ProductCategory.company_id == tenant.company_id,
-            ProductCategory.store_id == tenant.store_id,
-            ProductCategory.is_active == True  # filtra apenas ativas
-        )
-        .order_by(ProductCategory.name.asc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    bind_tenant(db, tenant)
+    query = db.query(ProductCategory).filter(ProductCategory.is_active == True)  # filtra apenas ativas
+    return keyset_paginate(query, ProductCategory.name, ProductCategory.id, cursor, limit)
 
 # =========================
 # UPDATE
@@ -74,15 +68,7 @@ def update_category(db: Session, category_id: str, category_data: ProductCategor
     """
     Atualiza os dados de uma categoria existente, apenas no tenant.
     """
-    db_category = (
-        db.query(ProductCategory)
-        .filter(
-            ProductCategory.id == category_id,
-            ProductCategory.company_id == tenant.company_id,
-            ProductCategory.store_id == tenant.store_id
-        )
-        .first()
-    )
+    db_category = get_for_tenant(db, ProductCategory, category_id, tenant)
     if not db_category:
         return None
 
@@ -104,15 +90,7 @@ def delete_category(db: Session, category_id: str, tenant: Tenant, soft_delete:
     Por padrão, realiza soft delete (marca is_active = False).
     Para exclusão física, use soft_delete=False.
     """
-    db_category = (
-        db.query(ProductCategory)
-        .filter(
-            ProductCategory.id == category_id,
-            ProductCategory.company_id == tenant.company_id,
-            ProductCategory.store_id == tenant.store_id
-        )
-        .first()
-    )
+    db_category = get_for_tenant(db, ProductCategory, category_id, tenant)
     if not db_category:
         return None
 
@@ -125,3 +103,12 @@ def delete_category(db: Session, category_id: str, tenant: Tenant, soft_delete:
         db.commit()
 
     return db_category
+
+# =========================
+# Versões assíncronas (AsyncSession)
+# =========================
+create_category_async = async_version(create_category)
+get_category_async = async_version(get_category)
+get_categories_async = async_version(get_categories)
+update_category_async = async_version(update_category)
+delete_category_async = async_version(delete_category)
@@ -7,40 +7,31 @@ from app.models.category import ProductCategory
 from app.models.order import Order
 from app.models.customer import Customer
 from app.security.tenant import Tenant  # nosso objeto tenant
+from app.crud.utils import async_version
+from app.crud.tenant_scope import bind_tenant
 
 def get_dashboard_data(db: Session, tenant: Tenant):
     """
     Retorna estatísticas do dashboard filtradas por tenant (company_id e store_id),
     de forma otimizada e segura para produção.
     """
-    # ----------------------
-    # Filtros multi-tenant
-    # ----------------------
-    product_filter = [Product.company_id == tenant.company_id, Product.is_active == True]
-    category_filter = [ProductCategory.company_id == tenant.company_id, ProductCategory.is_active == True]
-    order_filter = [Order.company_id == tenant.company_id]
-    customer_filter = [Customer.company_id == tenant.company_id]
-
-    if tenant.store_id:
-        product_filter.append(Product.store_id == tenant.store_id)
-        category_filter.append(ProductCategory.store_id == tenant.store_id)
-        order_filter.append(Order.store_id == tenant.store_id)
-        customer_filter.append(Customer.store_id == tenant.store_id)
+    # Filtro multi-tenant vem do escopo da sessão
+    bind_tenant(db, tenant)
 
     # ----------------------
     # Totais
     # ----------------------
-    total_products = db.query(func.count(Product.id)).filter(*product_filter).scalar()
-    total_categories = db.query(func.count(ProductCategory.id)).filter(*category_filter).scalar()
-    total_orders = db.query(func.count(Order.id)).filter(*order_filter).scalar()
-    total_customers = db.query(func.count(Customer.id)).filter(*customer_filter).scalar()
+    total_products = db.query(func.count(Product.id)).filter(Product.is_active == True).scalar()
+    total_categories = db.query(func.count(ProductCategory.id)).filter(ProductCategory.is_active == True).scalar()
+    total_orders = db.query(func.count(Order.id)).scalar()
+    total_customers = db.query(func.count(Customer.id)).scalar()
 
     # ----------------------
     # Produtos com estoque baixo
     # ----------------------
     low_stock_products_query = (
         db.query(Product.id, Product.name, Product.stock_quantity)
-        .filter(Product.stock_quantity <= Product.stock_minimum, *product_filter)
+        .filter(Product.stock_quantity <= Product.stock_minimum, Product.is_active == True)
         .all()
     )
 
@@ -68,3 +59,8 @@ def get_dashboard_data(db: Session, tenant: Tenant):
         "stats": stats,
         "low_stock_products": low_stock_products
     }
+
+# =========================
+# Versões assíncronas (AsyncSession)
+# =========================
+get_dashboard_data_async = async_version(get_dashboard_data)
@@ -0,0 +1,210 @@
+# app/crud/export.py
+
+from datetime import datetime
+from typing import AsyncIterator, Callable, NamedTuple, Optional
+
+from sqlalchemy import Enum, Numeric, Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.tenant_scope import bind_tenant
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product
+from app.models.product_image import IMAGE_READY, ProductImage
+from app.models.stock import StockMovement, StockMovementType
+from app.security.tenant import Tenant
+
+# =========================
+# Filtros
+# =========================
+class ExportFilters(NamedTuple):
+    created_from: Optional[datetime] = None  # inclusive
+    created_to: Optional[datetime] = None    # exclusivo
+    status: Optional[str] = None
+    category_id: Optional[str] = None
+    product_id: Optional[str] = None
+
+
+class ExportDataset(NamedTuple):
+    columns: tuple                      # colunas exportadas, na ordem do arquivo
+    statement: Callable[[ExportFilters], Select]
+    statuses: tuple                     # valores aceitos em ?status=
+    filters: frozenset = frozenset()    # filtros além de data e status
+    images: bool = False                # última coluna do SELECT: image_url (agrupada)
+
+    @property
+    def names(self) -> list[str]:
+        return [column.key for column in self.columns] + (["images"] if self.images else [])
+
+
+def _created(stmt: Select, column, filters: ExportFilters) -> Select:
+    # Intervalo em created_at: com particionamento mensal, só as partições do período
+    if filters.created_from is not None:
+        stmt = stmt.where(column >= filters.created_from)
+    if filters.created_to is not None:
+        stmt = stmt.where(column < filters.created_to)
+    return stmt
+
+# =========================
+# Produtos
+# =========================
+# Mesmos nomes de campo de ProductCreate: o CSV exportado pode ser reimportado
+_PRODUCT_COLUMNS = (
+    Product.sku, Product.name, Product.description, Product.price,
+    Product.stock_quantity, Product.stock_minimum, Product.price_promotion,
+    Product.is_active, Product.is_combo, Product.show_in_promotion, Product.no_stock_control,
+    Product.category_id, Product.icms, Product.ipi, Product.pis, Product.cofins,
+    Product.effective_price, Product.id, Product.created_at, Product.updated_at,
+)
+
+
+def _products(filters: ExportFilters) -> Select:
+    # Uma linha por imagem (LEFT JOIN): as linhas de cada produto chegam
+    # juntas pela ordenação e são agrupadas no streaming, sem uma segunda
+    # query na conexão ocupada pelo cursor
+    stmt = select(*_PRODUCT_COLUMNS, ProductImage.image_url).outerjoin(
+        ProductImage, (ProductImage.product_id == Product.id) & (ProductImage.status == IMAGE_READY)
+    )
+    if filters.status is not None:
+        stmt = stmt.where(Product.is_active == (filters.status == "active"))
+    if filters.category_id is not None:
+        stmt = stmt.where(Product.category_id == filters.category_id)
+    return _created(stmt, Product.created_at, filters).order_by(Product.name, Product.id)
+
+# =========================
+# Pedidos e itens
+# =========================
+_ORDER_COLUMNS = (
+    Order.id, Order.user_id, Order.customer_id, Order.status, Order.total,
+    Order.created_at, Order.updated_at,
+)
+
+
+def _orders(filters: ExportFilters) -> Select:
+    stmt = select(*_ORDER_COLUMNS)
+    if filters.status is not None:
+        stmt = stmt.where(Order.status == OrderStatus(filters.status))
+    # (created_at, id): mesma ordem do índice idx_order_tenant_created
+    return _created(stmt, Order.created_at, filters).order_by(Order.created_at, Order.id)
+
+
+_ORDER_ITEM_COLUMNS = (
+    OrderItem.id, OrderItem.order_id, OrderItem.product_id,
+    OrderItem.quantity, OrderItem.unit_price, OrderItem.subtotal, OrderItem.created_at,
+)
+
+
+def _order_items(filters: ExportFilters) -> Select:
+    stmt = select(*_ORDER_ITEM_COLUMNS)
+    if filters.status is not None:
+        stmt = stmt.join(Order, Order.id == OrderItem.order_id).where(
+            Order.status == OrderStatus(filters.status)
+        )
+    if filters.product_id is not None:
+        stmt = stmt.where(OrderItem.product_id == filters.product_id)
+    # Itens gravam o created_at do pedido: o filtro de data poda as partições dos dois
+    return _created(stmt, OrderItem.created_at, filters).order_by(OrderItem.created_at, OrderItem.id)
+
+# =========================
+# Movimentos de estoque
+# =========================
+_STOCK_MOVEMENT_COLUMNS = (
+    StockMovement.id, StockMovement.product_id, StockMovement.movement_type,
+    StockMovement.quantity, StockMovement.created_at,
+)
+
+
+def _stock_movements(filters: ExportFilters) -> Select:
+    stmt = select(*_STOCK_MOVEMENT_COLUMNS)
+    if filters.status is not None:
+        stmt = stmt.where(StockMovement.movement_type == StockMovementType(filters.status))
+    if filters.product_id is not None:
+        stmt = stmt.where(StockMovement.product_id == filters.product_id)
+    return _created(stmt, StockMovement.created_at, filters).order_by(
+        StockMovement.created_at, StockMovement.id
+    )
+
+
+_ORDER_STATUSES = tuple(status.value for status in OrderStatus)
+
+EXPORT_DATASETS = {
+    "products": ExportDataset(
+        _PRODUCT_COLUMNS, _products, ("active", "inactive"), frozenset({"category_id"}), images=True
+    ),
+    "orders": ExportDataset(_ORDER_COLUMNS, _orders, _ORDER_STATUSES),
+    "order_items": ExportDataset(_ORDER_ITEM_COLUMNS, _order_items, _ORDER_STATUSES, frozenset({"product_id"})),
+    "stock_movements": ExportDataset(
+        _STOCK_MOVEMENT_COLUMNS, _stock_movements,
+        tuple(kind.value for kind in StockMovementType), frozenset({"product_id"}),
+    ),
+}
+
+
+def validate_filters(dataset: str, filters: ExportFilters) -> None:
+    """Recusa (ValueError) filtros que o conjunto não aceita, antes do streaming começar."""
+    spec = EXPORT_DATASETS[dataset]
+    if filters.status is not None and filters.status not in spec.statuses:
+        raise ValueError(f"status inválido para {dataset}: use {', '.join(spec.statuses)}")
+    for name in ("category_id", "product_id"):
+        if getattr(filters, name) is not None and name not in spec.filters:
+            raise ValueError(f"{name} não se aplica a {dataset}")
+    if filters.created_from and filters.created_to and filters.created_from >= filters.created_to:
+        raise ValueError("created_from deve ser anterior a created_to")
+
+# =========================
+# Streaming
+# =========================
+def _converters(columns: tuple) -> list:
+    # Enum -> valor (o que a API expõe); Numeric (Decimal) -> float
+    converters = []
+    for index, column in enumerate(columns):
+        if isinstance(column.type, Enum):
+            converters.append((index, lambda value: value.value))
+        elif isinstance(column.type, Numeric) and column.type.asdecimal:
+            converters.append((index, float))
+    return converters
+
+
+async def stream_export(
+    db: AsyncSession,
+    tenant: Tenant,
+    dataset: str,
+    filters: ExportFilters,
+    batch_size: int,
+) -> AsyncIterator[list[dict]]:
+    """
+    Linhas do tenant em lotes de até `batch_size` dicts, lidas por um
+    cursor do lado do servidor (yield_per -> stream_results): só um lote
+    fica em memória, qualquer que seja o total. A conexão fica presa ao
+    cursor até o fim da iteração (ou até o gerador ser fechado).
+    """
+    spec = EXPORT_DATASETS[dataset]
+    bind_tenant(db, tenant)
+    names = [column.key for column in spec.columns]
+    converters = _converters(spec.columns)
+    width = len(names)
+    id_index = names.index("id")
+
+    result = await db.stream(spec.statement(filters).execution_options(yield_per=batch_size))
+    pending: Optional[dict] = None
+    async for partition in result.partitions():
+        batch = []
+        for row in partition:
+            values = list(row[:width])
+            for index, convert in converters:
+                if values[index] is not None:
+                    values[index] = convert(values[index])
+            if not spec.images:
+                batch.append(dict(zip(names, values)))
+                continue
+            image_url = row[width]
+            if pending is not None and pending["id"] == values[id_index]:
+                pending["images"].append(image_url)
+                continue
+            if pending is not None:
+                batch.append(pending)
+            pending = dict(zip(names, values))
+            pending["images"] = [image_url] if image_url is not None else []
+        if batch:
+            yield batch
+    if pending is not None:
+        yield [pending]
@@ -0,0 +1,226 @@
+# app/crud/image_blob.py
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event, func, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, attributes
+
+from app.crud.catalog_version import bump_catalog_version
+from app.crud.utils import async_version, upsert_statement
+from app.models.image_blob import BLOB_PROCESSING, ImageBlob
+from app.models.product_image import IMAGE_FAILED, IMAGE_PENDING, IMAGE_READY, ProductImage
+from app.services.images import blob_hash_from_url
+
+_BLOBS = ImageBlob.__table__
+_IMAGES = ProductImage.__table__
+
+# Campos do resultado copiados do blob para as ProductImage
+_RESULT_FIELDS = ("status", "variants", "placeholder", "width", "height", "error")
+
+
+def _connection(db: Session) -> Connection:
+    # Conexão da transação no shard do tenant da sessão; SQL core, sem eventos ORM
+    return db.connection(bind_arguments={"mapper": ImageBlob.__mapper__})
+
+
+# =========================
+# Contagem de referências
+# =========================
+def adjust_refcounts(db: Session, deltas: dict) -> None:
+    """
+    Soma `deltas` (hash -> +n/-n) ao refcount dos blobs na transação da
+    sessão. Escritas em product_images fora do ORM (INSERT/DELETE em
+    massa) devem chamar isto; as do ORM passam pelo after_flush abaixo.
+    """
+    by_delta: dict = {}
+    for blob_hash, delta in deltas.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(blob_hash)
+    if not by_delta:
+        return
+    conn = _connection(db)
+    now = datetime.utcnow()
+    for delta, hashes in by_delta.items():
+        conn.execute(
+            update(_BLOBS)
+            .where(_BLOBS.c.hash.in_(hashes))
+            .values(refcount=_BLOBS.c.refcount + delta, updated_at=now)
+        )
+
+
+def _refcount_deltas(session: Session) -> dict:
+    deltas: dict = {}
+
+    def add(blob_hash, delta):
+        if blob_hash is not None:
+            deltas[blob_hash] = deltas.get(blob_hash, 0) + delta
+
+    for obj in session.new:
+        if isinstance(obj, ProductImage):
+            add(obj.blob_hash, 1)
+    for obj in session.deleted:
+        if isinstance(obj, ProductImage):
+            add(obj.blob_hash, -1)
+    for obj in session.dirty:
+        if isinstance(obj, ProductImage):
+            history = attributes.get_history(obj, "blob_hash")
+            for blob_hash in history.added:
+                add(blob_hash, 1)
+            for blob_hash in history.deleted:
+                add(blob_hash, -1)
+    return deltas
+
+
+@event.listens_for(Session, "after_flush")
+def _count_image_references(session: Session, flush_context) -> None:
+    adjust_refcounts(session, _refcount_deltas(session))
+
+
+def linked_blobs(db: Session, urls) -> dict:
+    """
+    URL -> hash das URLs que apontam para um blob pronto deste shard (ex.:
+    CSV exportado e reimportado): a ProductImage criada passa a contar
+    como referência, e o arquivo não é coletado enquanto ela existir.
+    """
+    candidates = {url: blob_hash_from_url(url) for url in urls}
+    hashes = {blob_hash for blob_hash in candidates.values() if blob_hash is not None}
+    if not hashes:
+        return {}
+    ready = set(_connection(db).scalars(
+        select(_BLOBS.c.hash).where(_BLOBS.c.hash.in_(hashes), _BLOBS.c.status == IMAGE_READY)
+    ))
+    return {url: blob_hash for url, blob_hash in candidates.items() if blob_hash in ready}
+
+# =========================
+# Upload e processamento
+# =========================
+def register_upload(db: Session, blob_hash: str) -> tuple[dict, bool]:
+    """
+    Registra um upload do conteúdo `blob_hash` na transação da sessão:
+    cria o blob (pending) se não existe e o reivindica para processamento.
+    Devolve (campos do resultado do blob, reivindicado?): só quem reivindica
+    grava o bruto e gera os arquivos; os demais reaproveitam o resultado
+    pronto ou esperam o processamento em andamento, que atualiza também as
+    ProductImage deles.
+
+    O upsert sempre toca a linha (updated_at): segura o lock da linha até o
+    commit, então o fim do processamento (finish_blob) não passa à frente
+    de uma ProductImage pending ainda não commitada, e o coletor não apaga
+    um blob que acabou de ganhar referência.
+    """
+    conn = _connection(db)
+    now = datetime.utcnow()
+    conn.execute(upsert_statement(
+        conn.dialect.name,
+        _BLOBS,
+        dict(hash=blob_hash, status=IMAGE_PENDING, refcount=0, created_at=now, updated_at=now),
+        conflict_columns=["hash"],
+        update_values={"updated_at": now},
+    ))
+    claimed = conn.execute(
+        update(_BLOBS)
+        .where(_BLOBS.c.hash == blob_hash, _BLOBS.c.status == IMAGE_PENDING)
+        .values(status=BLOB_PROCESSING, updated_at=now)
+    ).rowcount == 1
+    row = conn.execute(
+        select(*(_BLOBS.c[name] for name in _RESULT_FIELDS)).where(_BLOBS.c.hash == blob_hash)
+    ).one()
+    return row._asdict(), claimed
+
+
+register_upload_async = async_version(register_upload)
+
+
+def finish_blob(db: Session, blob_hash: str, result: Optional[dict], error: Optional[str]) -> bool:
+    """
+    Grava o resultado do processamento no blob e em todas as ProductImage
+    pending que apontam para ele (de qualquer tenant do shard), e
+    incrementa a versão do catálogo das empresas afetadas. False se o blob
+    não existe mais. Não faz commit.
+    """
+    if result is None:
+        values = dict(status=IMAGE_FAILED, error=error)
+    else:
+        values = dict(status=IMAGE_READY, error=None, **result)
+    conn = _connection(db)
+    now = datetime.utcnow()
+    updated = conn.execute(
+        update(_BLOBS).where(_BLOBS.c.hash == blob_hash).values(**values, updated_at=now)
+    ).rowcount
+    if not updated:
+        return False
+
+    waiting = (_IMAGES.c.blob_hash == blob_hash, _IMAGES.c.status == IMAGE_PENDING)
+    companies = conn.scalars(select(_IMAGES.c.company_id).where(*waiting).distinct()).all()
+    if companies:
+        conn.execute(update(_IMAGES).where(*waiting).values(**values, updated_at=now))
+        for company_id in companies:
+            bump_catalog_version(db, company_id)
+    return True
+
+
+def pending_blob_jobs(conn: Connection) -> list[tuple]:
+    """(hash, company_id, store_id) dos blobs ainda sem resultado, com uma imagem que os referencia."""
+    rows = conn.execute(
+        select(_BLOBS.c.hash, _IMAGES.c.company_id, _IMAGES.c.store_id)
+        .join(_IMAGES, _IMAGES.c.blob_hash == _BLOBS.c.hash)
+        .where(_BLOBS.c.status.in_((IMAGE_PENDING, BLOB_PROCESSING)))
+    )
+    jobs = {}
+    for blob_hash, company_id, store_id in rows:
+        jobs.setdefault(blob_hash, (blob_hash, company_id, store_id))
+    return list(jobs.values())
+
+# =========================
+# Coleta
+# =========================
+def collectable_blobs(conn: Connection, cutoff: datetime, limit: int) -> list[str]:
+    """Blobs sem referência desde antes de `cutoff` (índice refcount, updated_at)."""
+    return list(conn.scalars(
+        select(_BLOBS.c.hash)
+        .where(_BLOBS.c.refcount <= 0, _BLOBS.c.updated_at < cutoff)
+        .limit(limit)
+    ))
+
+
+def image_references(conn: Connection, hashes: list[str]) -> dict:
+    """hash -> quantas ProductImage do banco apontam para ele (só os referenciados)."""
+    return dict(conn.execute(
+        select(_IMAGES.c.blob_hash, func.count())
+        .where(_IMAGES.c.blob_hash.in_(hashes))
+        .group_by(_IMAGES.c.blob_hash)
+    ).all())
+
+
+def existing_blobs(conn: Connection, hashes: list[str]) -> set:
+    return set(conn.scalars(select(_BLOBS.c.hash).where(_BLOBS.c.hash.in_(hashes))))
+
+
+def repair_refcounts(conn: Connection, counts: dict) -> None:
+    """Corrige refcounts zerados de blobs que ainda têm referências (escritas que não contaram)."""
+    now = datetime.utcnow()
+    for blob_hash, count in counts.items():
+        conn.execute(
+            update(_BLOBS)
+            .where(_BLOBS.c.hash == blob_hash, _BLOBS.c.refcount <= 0)
+            .values(refcount=count, updated_at=now)
+        )
+
+
+def delete_blobs(conn: Connection, hashes: list[str], cutoff: datetime) -> list[str]:
+    """
+    Apaga os blobs que continuam sem referência e fora da carência (um
+    upload concorrente toca updated_at) e devolve os apagados.
+    """
+    deleted = []
+    for blob_hash in hashes:
+        result = conn.execute(
+            _BLOBS.delete().where(
+                _BLOBS.c.hash == blob_hash, _BLOBS.c.refcount <= 0, _BLOBS.c.updated_at < cutoff
+            )
+        )
+        if result.rowcount:
+            deleted.append(blob_hash)
+    return deleted
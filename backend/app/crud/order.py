@@ -1,11 +1,18 @@
 # app/crud/order.py
 
-from sqlalchemy.orm import Session
+from datetime import datetime
+
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy.exc import IntegrityError
-from app.models.order import Order, OrderItem
+from app.models.order import Order, OrderItem, OrderStatus
 from app.schemas.order import OrderCreate, OrderStatusUpdate
 from app.models.product import Product
 from app.security.tenant import Tenant  # objeto tenant do usuário logado
+from app.crud.utils import async_version
+from app.crud.statements import get_for_tenant
+from app.crud.tenant_scope import bind_tenant
+from app.crud.pagination import DEFAULT_PAGE_SIZE, Page, keyset_paginate, keyset_paginate_partitioned
+from app.services.partitions import partition_manager
 
 # =========================
 # Criar pedido
@@ -14,25 +21,21 @@ def create_order(db: Session, order_data: OrderCreate, tenant: Tenant) -> Order:
     """
     Cria um pedido com itens e atualiza o estoque dos produtos.
     """
+    # Pedido e itens com o mesmo created_at: ficam na mesma partição mensal
+    created_at = datetime.utcnow()
     db_order = Order(
         user_id=order_data.user_id,
+        created_at=created_at,
         company_id=tenant.company_id,
         store_id=tenant.store_id,
-        status="pending"  # status inicial
+        status=OrderStatus.PENDING  # status inicial
     )
     total = 0.0
 
     try:
         for item in order_data.items:
-            subtotal = item.quantity * item.unit_price
-
             # Busca o produto e atualiza estoque
-            product = db.query(Product).filter(
-                Product.id == item.product_id,
-                Product.company_id == tenant.company_id,
-                Product.store_id == tenant.store_id,
-                Product.is_active == True
-            ).first()
+            product = get_for_tenant(db, Product, item.product_id, tenant, active_only=True)
 
             if not product:
                 raise ValueError(f"Produto {item.product_id} não encontrado ou inativo")
@@ -43,12 +46,17 @@ def create_order(db: Session, order_data: OrderCreate, tenant: Tenant) -> Order:
             product.stock_quantity -= item.quantity
             db.add(product)
 
+            # Preço vem do cadastro do produto, nunca do cliente
+            unit_price = product.price
+            subtotal = item.quantity * unit_price
+
             # Cria item do pedido
             db_item = OrderItem(
                 product_id=item.product_id,
                 quantity=item.quantity,
-                unit_price=item.unit_price,
+                unit_price=unit_price,
                 subtotal=subtotal,
+                created_at=created_at,
                 company_id=tenant.company_id,
                 store_id=tenant.store_id
             )
@@ -72,11 +80,7 @@ def update_order_status(db: Session, order_id: str, status_data: OrderStatusUpda
     """
     Atualiza o status de um pedido específico.
     """
-    order = db.query(Order).filter(
-        Order.id == order_id,
-        Order.company_id == tenant.company_id,
-        Order.store_id == tenant.store_id
-    ).first()
+    order = get_for_tenant(db, Order, order_id, tenant)
 
     if order:
         order.status = status_data.status
@@ -91,11 +95,7 @@ def delete_order(db: Session, order_id: str, tenant: Tenant) -> dict:
     """
     Deleta um pedido (físico). Considerar soft delete em produção se necessário.
     """
-    order = db.query(Order).filter(
-        Order.id == order_id,
-        Order.company_id == tenant.company_id,
-        Order.store_id == tenant.store_id
-    ).first()
+    order = get_for_tenant(db, Order, order_id, tenant)
 
     if order:
         db.delete(order)
@@ -104,16 +104,39 @@ def delete_order(db: Session, order_id: str, tenant: Tenant) -> dict:
     return {"deleted": False, "message": "Pedido não encontrado"}
 
 # =========================
-# Listar todos os pedidos
+# Listar pedidos
 # =========================
-def list_orders(db: Session, tenant: Tenant) -> list[Order]:
+def list_orders(
+    db: Session,
+    tenant: Tenant,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Page:
     """
-    Retorna todos os pedidos do tenant.
+    Retorna os pedidos do tenant, do mais recente para o mais antigo,
+    paginados por (created_at, id).
     """
-    return db.query(Order).filter(
-        Order.company_id == tenant.company_id,
-        Order.store_id == tenant.store_id
-    ).all()
+    bind_tenant(db, tenant)
+    query = db.query(Order)
+    boundaries = partition_manager.boundaries(Order.__tablename__)
+    if boundaries is None:
+        return keyset_paginate(query, Order.created_at, Order.id, cursor, limit, descending=True)
+    return keyset_paginate_partitioned(
+        query, Order.created_at, Order.id, boundaries, cursor, limit, per_window=_items_in_window
+    )
+
+
+def _items_in_window(query, lo: datetime | None, hi: datetime | None):
+    """
+    Carrega os itens só das partições da janela: cada item tem o
+    created_at do seu pedido.
+    """
+    criteria = []
+    if lo is not None:
+        criteria.append(OrderItem.created_at >= lo)
+    if hi is not None:
+        criteria.append(OrderItem.created_at < hi)
+    return query.options(selectinload(Order.items.and_(*criteria))) if criteria else query
 
 # =========================
 # Obter pedido por ID
@@ -122,8 +145,13 @@ def get_order(db: Session, order_id: str, tenant: Tenant) -> Order | None:
     """
     Retorna um pedido específico pelo ID do tenant.
     """
-    return db.query(Order).filter(
-        Order.id == order_id,
-        Order.company_id == tenant.company_id,
-        Order.store_id == tenant.store_id
-    ).first()
+    return get_for_tenant(db, Order, order_id, tenant)
+
+# =========================
+# Versões assíncronas (AsyncSession)
+# =========================
+create_order_async = async_version(create_order)
+update_order_status_async = async_version(update_order_status)
+delete_order_async = async_version(delete_order)
+list_orders_async = async_version(list_orders)
+get_order_async = async_version(get_order)
@@ -0,0 +1,189 @@
+# app/crud/pagination.py
+
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, NamedTuple, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+# =========================
+# Limites de página
+# =========================
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Header com o cursor da próxima página (o corpo continua sendo a lista)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    """Cursor malformado ou adulterado."""
+
+
+class Page(NamedTuple):
+    items: list
+    next_cursor: Optional[str]
+
+
+# =========================
+# Cursor opaco
+# =========================
+def encode_cursor(sort_value: Any, last_id: str) -> str:
+    """
+    Codifica (chave de ordenação, id) da última linha da página. Decimal
+    vai como string: float no JSON perderia a igualdade exata que o
+    desempate por id exige.
+    """
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    elif isinstance(sort_value, Decimal):
+        sort_value = str(sort_value)
+    raw = json.dumps([sort_value, str(last_id)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_column) -> tuple[Any, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, last_id = json.loads(raw)
+        python_type = sort_column.type.python_type
+        if python_type is datetime:
+            sort_value = datetime.fromisoformat(sort_value)
+        elif python_type is Decimal and sort_value is not None:
+            sort_value = Decimal(str(sort_value))
+            if not sort_value.is_finite():
+                raise ValueError(sort_value)
+        return sort_value, str(last_id)
+    except (ValueError, TypeError, ArithmeticError) as e:
+        raise InvalidCursor("Cursor de paginação inválido") from e
+
+
+# =========================
+# Paginação por keyset
+# =========================
+def keyset_paginate(
+    query: Query,
+    sort_column,
+    id_column,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    descending: bool = False,
+) -> Page:
+    """
+    Pagina uma query por (sort_column, id) em vez de offset/limit.
+
+    A próxima página começa logo depois da última linha vista
+    (`WHERE (sort, id) > (:sort, :id)`), então com um índice composto
+    terminando em (sort_column, id) a página N custa o mesmo que a
+    primeira — nada é lido e descartado.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = _after_cursor(query, sort_column, id_column, cursor, descending)
+
+    # Uma linha a mais só para saber se existe próxima página
+    rows = _ordered(query, sort_column, id_column, descending).limit(limit + 1).all()
+    return _page(rows, sort_column, id_column, limit)
+
+
+def keyset_paginate_partitioned(
+    query: Query,
+    sort_column,
+    id_column,
+    boundaries: list[datetime],
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    per_window: Optional[Callable[[Query, Optional[datetime], Optional[datetime]], Query]] = None,
+) -> Page:
+    """
+    keyset_paginate descendente para tabelas particionadas por faixa de
+    `sort_column` (`boundaries`: limites superiores das partições, em
+    ordem crescente).
+
+    Em vez de uma query que toca o índice de todas as partições, lê janelas
+    `lo <= sort < hi` alinhadas às partições, do mês mais recente para o
+    mais antigo, até completar a página. Cada janela é podada pelo MySQL;
+    elas dobram de tamanho a cada passo, então tenants com pouco histórico
+    recente custam O(log partições) queries. `per_window` aplica a mesma
+    faixa a cargas de relacionamento (ex.: itens do pedido).
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    upper = decode_cursor(cursor, sort_column)[0] if cursor else None
+    query = _after_cursor(query, sort_column, id_column, cursor, descending=True)
+
+    rows: list = []
+    for lo, hi in partition_windows(boundaries, upper):
+        window = query
+        if lo is not None:
+            window = window.filter(sort_column >= lo)
+        if hi is not None:
+            window = window.filter(sort_column < hi)
+        if per_window is not None:
+            window = per_window(window, lo, hi)
+        window = _ordered(window, sort_column, id_column, descending=True)
+        rows.extend(window.limit(limit + 1 - len(rows)).all())
+        if len(rows) > limit:
+            break
+    return _page(rows, sort_column, id_column, limit)
+
+
+def partition_windows(boundaries: list[datetime], upper: Optional[datetime] = None):
+    """
+    Faixas (lo, hi) que cobrem (-inf, +inf) de cima para baixo, em limites
+    de partição: a primeira junta tudo a partir da partição de `upper`
+    (ou da atual), as seguintes dobram de tamanho; None = sem limite.
+    """
+    if upper is None:
+        upper = datetime.utcnow()
+    # Limites abaixo do valor de início, do mais recente para o mais antigo
+    below = [b for b in reversed(boundaries) if b <= upper]
+    hi, index, size = None, 0, 1
+    while index < len(below):
+        lo = below[index]
+        yield lo, hi
+        hi = lo
+        index += size
+        size *= 2
+    yield None, hi
+
+
+def _after_cursor(query: Query, sort_column, id_column, cursor: Optional[str], descending: bool) -> Query:
+    if not cursor:
+        return query
+    sort_value, last_id = decode_cursor(cursor, sort_column)
+    if descending:
+        return query.filter(or_(
+            sort_column < sort_value,
+            and_(sort_column == sort_value, id_column < last_id),
+        ))
+    return query.filter(or_(
+        sort_column > sort_value,
+        and_(sort_column == sort_value, id_column > last_id),
+    ))
+
+
+def _ordered(query: Query, sort_column, id_column, descending: bool) -> Query:
+    if descending:
+        return query.order_by(sort_column.desc(), id_column.desc())
+    return query.order_by(sort_column.asc(), id_column.asc())
+
+
+def _page(rows: list, sort_column, id_column, limit: int) -> Page:
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return Page(rows, next_cursor)
+
+
+def page_response(response, page: Page) -> list:
+    """
+    Coloca o cursor da próxima página no header da resposta e devolve
+    os itens, para que o corpo das rotas de listagem continue sendo uma lista.
+    """
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
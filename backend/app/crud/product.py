@@ -1,11 +1,27 @@
 # app/crud/product.py
 
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import NamedTuple
+from sqlalchemy import and_, case, delete, event, func, insert, or_, select
+from sqlalchemy.orm import Session, attributes
 from sqlalchemy.exc import IntegrityError
-from app.models.product import Product, ProductImage
+from app.models.product import Product
+from app.models.product_image import IMAGE_READY, ProductImage
+from app.models.category import ProductCategory
+from app.models.order import OrderItem
+from app.models.stock import StockMovement
+from app.models.partitioning import DB_PARTITIONING
+from fastapi import HTTPException
 from app.schemas import product as schemas
 from app.security.tenant import Tenant
-from uuid import uuid4
+from app.crud.utils import async_version, upsert_statement
+from app.crud.statements import get_for_tenant
+from app.crud.tenant_scope import bind_tenant, tenant_predicate
+from app.crud.catalog_version import bump_catalog_version
+from app.crud.image_blob import adjust_refcounts, linked_blobs
+from app.crud.pagination import DEFAULT_PAGE_SIZE, Page, keyset_paginate
+from app.models.types import new_id
+from app.services.search import product_search
 import os
 
 # =========================
@@ -15,6 +31,7 @@ def create_product(db: Session, product_data: schemas.ProductCreate, tenant: Ten
     """
     Cria um produto vinculado ao tenant do usuário (company_id + store_id) e suas imagens.
     """
+    bind_tenant(db, tenant)
     images_data = getattr(product_data, "images", [])
     product_dict = product_data.dict(exclude={"images"})
     product_dict["company_id"] = tenant.company_id
@@ -27,12 +44,14 @@ def create_product(db: Session, product_data: schemas.ProductCreate, tenant: Ten
         db.commit()
         db.refresh(db_product)
 
-        # Cria registros de imagens vinculadas
+        # Cria registros de imagens vinculadas (URLs de blob contam como referência)
+        blobs = linked_blobs(db, images_data) if images_data else {}
         for img_url in images_data:
             db_image = ProductImage(
-                id=str(uuid4()),
+                id=new_id(),
                 product_id=db_product.id,
                 image_url=img_url,
+                blob_hash=blobs.get(img_url),
                 company_id=tenant.company_id,
                 store_id=tenant.store_id
             )
@@ -42,6 +61,7 @@ def create_product(db: Session, product_data: schemas.ProductCreate, tenant: Ten
             db.commit()
             db.refresh(db_product)
 
+        product_search.product_saved(tenant, db_product)
         return db_product
 
     except IntegrityError as e:
@@ -55,22 +75,358 @@ def get_product(db: Session, product_id: str, tenant: Tenant) -> Product | None:
     """
     Retorna um produto específico do tenant.
     """
-    return db.query(Product).filter(
-        Product.id == product_id,
-        Product.company_id == tenant.company_id,
-        Product.store_id == tenant.store_id
-    ).first()
+    return get_for_tenant(db, Product, product_id, tenant)
 
 
-def get_products(db: Session, tenant: Tenant, skip: int = 0, limit: int = 100) -> list[Product]:
+def get_products(
+    db: Session,
+    tenant: Tenant,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Page:
     """
-    Retorna todos os produtos do tenant, com paginação.
+    Retorna os produtos ativos do tenant, paginados por (name, id).
     """
-    return db.query(Product).filter(
-        Product.company_id == tenant.company_id,
-        Product.store_id == tenant.store_id,
-        Product.is_active == True  # filtra apenas produtos ativos
-    ).offset(skip).limit(limit).all()
+    bind_tenant(db, tenant)
+    query = db.query(Product).filter(Product.is_active == True)  # filtra apenas produtos ativos
+    return keyset_paginate(query, Product.name, Product.id, cursor, limit)
+
+# Colunas do catálogo, na ordem dos campos de schemas.ProductResponse
+_CATALOG_COLUMNS = (
+    Product.name, Product.description, Product.price, Product.sku,
+    Product.stock_quantity, Product.stock_minimum, Product.price_promotion,
+    Product.is_active, Product.is_combo, Product.show_in_promotion, Product.no_stock_control,
+    Product.category_id, Product.icms, Product.ipi, Product.pis, Product.cofins,
+    Product.id, Product.created_at, Product.updated_at, Product.effective_price,
+)
+# Colunas Numeric (Decimal) que a resposta expõe como float
+_DECIMAL_FIELDS = ("icms", "ipi", "pis", "cofins", "effective_price")
+
+# Limites das faixas de preço das facetas, em ordem crescente:
+# "25,50" -> [0, 25), [25, 50), [50, ∞)
+CATALOG_PRICE_BUCKETS = sorted(
+    float(bound) for bound in os.getenv("CATALOG_PRICE_BUCKETS", "25,50,100,200,500,1000").split(",") if bound.strip()
+)
+
+
+# Ordenações do catálogo: (coluna, decrescente); cada uma tem um índice
+# (company_id, store_id, is_active, coluna, id) para o keyset
+CATALOG_SORTS = {
+    "name": (Product.name, False),
+    "price": (Product.effective_price, False),
+    "-price": (Product.effective_price, True),
+}
+
+
+class CatalogFilters(NamedTuple):
+    category_id: str | None = None
+    min_price: float | None = None
+    max_price: float | None = None
+    show_in_promotion: bool | None = None
+    in_stock: bool | None = None
+    is_combo: bool | None = None
+
+
+def _flag(column, value: bool):
+    # NULL conta como False (colunas antigas sem default)
+    return column.is_(True) if value else column.is_not(True)
+
+
+def _in_stock(value: bool):
+    # Produto sem controle de estoque está sempre disponível
+    available = or_(Product.stock_quantity > 0, Product.no_stock_control.is_(True))
+    if value:
+        return available
+    return and_(func.coalesce(Product.stock_quantity, 0) <= 0, Product.no_stock_control.is_not(True))
+
+
+def _price_range(filters: CatalogFilters) -> list:
+    criteria = []
+    if filters.min_price is not None:
+        criteria.append(Product.effective_price >= filters.min_price)
+    if filters.max_price is not None:
+        criteria.append(Product.effective_price <= filters.max_price)
+    return criteria
+
+
+def _unfaceted(filters: CatalogFilters) -> list:
+    """Filtros que não viram faceta: valem para a listagem e para as contagens."""
+    criteria = [Product.is_active == True]
+    if filters.in_stock is not None:
+        criteria.append(_in_stock(filters.in_stock))
+    if filters.is_combo is not None:
+        criteria.append(_flag(Product.is_combo, filters.is_combo))
+    return criteria
+
+
+def _catalog_criteria(filters: CatalogFilters) -> list:
+    criteria = _unfaceted(filters) + _price_range(filters)
+    if filters.category_id is not None:
+        criteria.append(Product.category_id == filters.category_id)
+    if filters.show_in_promotion is not None:
+        criteria.append(_flag(Product.show_in_promotion, filters.show_in_promotion))
+    return criteria
+
+
+def get_catalog_page(
+    db: Session,
+    tenant: Tenant,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    filters: CatalogFilters | None = None,
+    sort: str = "name",
+) -> Page:
+    """
+    Mesma listagem de get_products, para leitura: só as colunas da
+    resposta (sem montar objetos ORM nem o identity map) e as imagens da
+    página numa única query. Os itens são dicts prontos para
+    schemas.catalog_json. `filters` restringe por categoria, faixa de
+    preço de venda, promoção, disponibilidade e combo; `sort` é uma chave
+    de CATALOG_SORTS.
+    """
+    bind_tenant(db, tenant)
+    sort_column, descending = CATALOG_SORTS[sort]
+    query = db.query(*_CATALOG_COLUMNS).filter(*_catalog_criteria(filters or CatalogFilters()))
+    page = keyset_paginate(query, sort_column, Product.id, cursor, limit, descending=descending)
+
+    items = []
+    images: dict = {}
+    for row in page.items:
+        item = row._asdict()
+        for field in _DECIMAL_FIELDS:
+            if item[field] is not None:
+                item[field] = float(item[field])
+        item["images"] = images.setdefault(item["id"], [])
+        items.append(item)
+
+    if images:
+        rows = db.query(ProductImage.product_id, ProductImage.image_url).filter(
+            ProductImage.product_id.in_(list(images)), ProductImage.status == IMAGE_READY
+        )
+        for product_id, image_url in rows:
+            images[product_id].append(image_url)
+    return Page(items, page.next_cursor)
+
+
+def get_catalog_facets(db: Session, tenant: Tenant, filters: CatalogFilters | None = None) -> dict:
+    """
+    Contagens para o painel de filtros do catálogo: por categoria, por
+    faixa de preço de venda (CATALOG_PRICE_BUCKETS) e promoção sim/não.
+
+    Uma única query agrupada por (categoria, faixa, promoção, dentro da
+    faixa de preço pedida) traz tudo; as facetas saem somando esses grupos.
+    Cada faceta ignora o próprio filtro e respeita os demais (a contagem
+    de uma categoria é o que a listagem traria ao escolhê-la).
+    """
+    filters = filters or CatalogFilters()
+    bind_tenant(db, tenant)
+
+    bounds = CATALOG_PRICE_BUCKETS
+    bucket = case(*((Product.effective_price < bound, index) for index, bound in enumerate(bounds)), else_=len(bounds))
+    promoted = case((Product.show_in_promotion.is_(True), 1), else_=0)
+    groups = [Product.category_id, ProductCategory.name, bucket, promoted]
+    price_range = _price_range(filters)
+    if price_range:
+        groups.append(case((and_(*price_range), 1), else_=0))
+
+    rows = db.execute(
+        select(*groups, func.count())
+        .outerjoin(ProductCategory, ProductCategory.id == Product.category_id)
+        .where(*_unfaceted(filters))
+        .group_by(*groups)
+    ).all()
+
+    total = 0
+    categories: dict = {}
+    buckets = [0] * (len(bounds) + 1)
+    promotion = {True: 0, False: 0}
+    for category_id, name, bucket_index, is_promoted, *rest, count in rows:
+        in_range = bool(rest[0]) if rest else True
+        is_promoted = bool(is_promoted)
+        category_ok = filters.category_id is None or category_id == filters.category_id
+        promotion_ok = filters.show_in_promotion is None or is_promoted == filters.show_in_promotion
+        if category_ok and promotion_ok and in_range:
+            total += count
+        if promotion_ok and in_range:
+            entry = categories.setdefault(category_id, {"category_id": category_id, "name": name, "count": 0})
+            entry["count"] += count
+        if category_ok and promotion_ok:
+            buckets[bucket_index] += count
+        if category_ok and in_range:
+            promotion[is_promoted] += count
+
+    edges = [0.0, *bounds, None]
+    return {
+        "total": total,
+        "categories": sorted(
+            (entry for entry in categories.values() if entry["count"]),
+            key=lambda entry: (-entry["count"], entry["name"] or ""),
+        ),
+        "price_buckets": [
+            {"min": edges[index], "max": edges[index + 1], "count": count}
+            for index, count in enumerate(buckets)
+        ],
+        "promotion": [{"value": value, "count": promotion[value]} for value in (True, False)],
+    }
+
+def get_products_by_ids(db: Session, product_ids: list[str], tenant: Tenant) -> list[Product]:
+    """
+    Produtos ativos do tenant com esses IDs, na ordem da lista
+    (resultados da busca já ordenados por relevância).
+    """
+    if not product_ids:
+        return []
+    bind_tenant(db, tenant)
+    found = {
+        p.id: p for p in db.query(Product).filter(Product.id.in_(product_ids), Product.is_active == True)
+    }
+    return [found[pid] for pid in product_ids if pid in found]
+
+# =========================
+# IMPORTAÇÃO EM MASSA
+# =========================
+class UpsertResult(NamedTuple):
+    inserted: int
+    updated: int
+    errors: list  # (número da linha, mensagem)
+
+
+_UPSERT_FIELDS = tuple(name for name in schemas.ProductCreate.model_fields if name != "images")
+
+# Colunas que o índice de busca usa (ProductSearch.products_saved)
+_SEARCH_COLUMNS = (
+    Product.id, Product.name, Product.description, Product.sku,
+    Product.category_id, Product.effective_price, Product.is_active,
+)
+
+# Chave em Session.info: (tenant, linhas) gravados em lote na transação atual
+_SEARCH_INFO_KEY = "search_rows_saved"
+
+
+def upsert_products(db: Session, rows: list, tenant: Tenant) -> UpsertResult:
+    """
+    Grava um lote de (número da linha, ProductCreate) validados: cria ou
+    atualiza por (company_id, sku) com INSERT ... ON DUPLICATE KEY UPDATE
+    de várias linhas (executemany) e troca as imagens dos produtos que
+    trazem `images`, também em lote. Não faz commit (o chamador decide o lote);
+    o índice de busca recebe os produtos gravados no commit.
+
+    Linhas que não podem ser gravadas (categoria de outro tenant, SKU já
+    usado em outra loja da empresa) voltam em `errors`; se o mesmo SKU
+    aparece mais de uma vez no lote, vale a última.
+    """
+    bind_tenant(db, tenant)
+    products = Product.__table__
+    images = ProductImage.__table__
+    conn = db.connection(bind_arguments={"mapper": Product.__mapper__})
+    now = datetime.utcnow()
+
+    latest = {}
+    for row_number, product in rows:
+        latest[product.sku] = (row_number, product)
+
+    existing = {
+        sku: (product_id, store_id)
+        for sku, product_id, store_id in conn.execute(
+            select(products.c.sku, products.c.id, products.c.store_id).where(
+                products.c.company_id == tenant.company_id, products.c.sku.in_(list(latest))
+            )
+        )
+    }
+    category_ids = {str(p.category_id) for _, p in latest.values() if p.category_id is not None}
+    known_categories = set(conn.scalars(
+        select(ProductCategory.id).where(
+            ProductCategory.id.in_(category_ids),
+            tenant_predicate(ProductCategory, tenant.store_id is not None, tenant.company_id, tenant.store_id),
+        )
+    )) if category_ids else set()
+
+    errors, values, with_images = [], [], {}
+    for sku, (row_number, product) in latest.items():
+        data = product.model_dump(include=set(_UPSERT_FIELDS))
+        if data["category_id"] is not None:
+            data["category_id"] = str(data["category_id"])
+            if data["category_id"] not in known_categories:
+                errors.append((row_number, "category_id: categoria não encontrada"))
+                continue
+        current = existing.get(sku)
+        if current is not None and current[1] != tenant.store_id:
+            errors.append((row_number, "sku: já cadastrado em outra loja da empresa"))
+            continue
+        data.update(
+            id=current[0] if current else new_id(),
+            company_id=tenant.company_id,
+            store_id=tenant.store_id,
+            created_at=now,
+            updated_at=now,
+        )
+        values.append(data)
+        if product.images:
+            with_images[sku] = product.images
+
+    if values:
+        conn.execute(upsert_statement(
+            conn.dialect.name,
+            products,
+            None,
+            conflict_columns=["company_id", "sku"],
+            update_columns=[*_UPSERT_FIELDS, "updated_at"],
+        ), values)
+
+    if with_images:
+        # IDs reais (um SKU pode ter sido criado por outra request no meio)
+        ids = dict(conn.execute(
+            select(products.c.sku, products.c.id).where(
+                products.c.company_id == tenant.company_id, products.c.sku.in_(list(with_images))
+            )
+        ).all())
+        replaced = images.c.product_id.in_(list(ids.values()))
+        # Refcount dos blobs: -1 por imagem trocada, +1 por URL de blob nova
+        refcounts = dict(conn.execute(
+            select(images.c.blob_hash, -func.count())
+            .where(replaced, images.c.blob_hash.is_not(None))
+            .group_by(images.c.blob_hash)
+        ).all())
+        blobs = linked_blobs(db, {url for urls in with_images.values() for url in urls})
+        conn.execute(delete(images).where(replaced))
+        new_images = [
+            dict(
+                id=new_id(), product_id=ids[sku], image_url=url, blob_hash=blobs.get(url),
+                company_id=tenant.company_id, store_id=tenant.store_id,
+                created_at=now, updated_at=now,
+            )
+            for sku, urls in with_images.items()
+            for url in urls
+        ]
+        conn.execute(insert(images), new_images)
+        for row in new_images:
+            if row["blob_hash"] is not None:
+                refcounts[row["blob_hash"]] = refcounts.get(row["blob_hash"], 0) + 1
+        adjust_refcounts(db, refcounts)
+
+    if values:
+        bump_catalog_version(db, tenant.company_id)
+        # Releitura: effective_price é calculado pelo banco e o id pode ser o
+        # de uma linha criada por outra request; o índice recebe no commit
+        saved = conn.execute(
+            select(*_SEARCH_COLUMNS).where(
+                Product.company_id == tenant.company_id,
+                Product.sku.in_([data["sku"] for data in values]),
+            )
+        ).all()
+        db.info.setdefault(_SEARCH_INFO_KEY, []).append((tenant, saved))
+    inserted = sum(1 for data in values if data["sku"] not in existing)
+    return UpsertResult(inserted, len(values) - inserted, errors)
+
+@event.listens_for(Session, "after_commit")
+def _publish_saved_products(session: Session) -> None:
+    for tenant, saved in session.info.pop(_SEARCH_INFO_KEY, []):
+        product_search.products_saved(tenant, saved)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_saved_products(session: Session) -> None:
+    session.info.pop(_SEARCH_INFO_KEY, None)
 
 # =========================
 # UPDATE
@@ -79,11 +435,7 @@ def update_product(db: Session, product_id: str, product_data: schemas.ProductUp
     """
     Atualiza um produto existente, incluindo imagens, somente dentro do tenant.
     """
-    db_product = db.query(Product).filter(
-        Product.id == product_id,
-        Product.company_id == tenant.company_id,
-        Product.store_id == tenant.store_id
-    ).first()
+    db_product = get_for_tenant(db, Product, product_id, tenant)
 
     if not db_product:
         return None
@@ -97,18 +449,20 @@ def update_product(db: Session, product_id: str, product_data: schemas.ProductUp
 
         # Atualiza imagens se fornecidas
         if hasattr(product_data, "images") and product_data.images is not None:
+            # Arquivos ficam no blob (compartilhado): o flush decrementa o
+            # refcount e o coletor apaga quando ninguém mais usa
             old_images = db.query(ProductImage).filter(ProductImage.product_id == product_id).all()
             for img in old_images:
-                if os.path.exists(img.image_url):
-                    os.remove(img.image_url)
                 db.delete(img)
             db.commit()
 
+            blobs = linked_blobs(db, product_data.images)
             for img_url in product_data.images:
                 db_image = ProductImage(
-                    id=str(uuid4()),
+                    id=new_id(),
                     product_id=product_id,
                     image_url=img_url,
+                    blob_hash=blobs.get(img_url),
                     company_id=tenant.company_id,
                     store_id=tenant.store_id
                 )
@@ -116,6 +470,7 @@ def update_product(db: Session, product_id: str, product_data: schemas.ProductUp
             db.commit()
             db.refresh(db_product)
 
+        product_search.product_saved(tenant, db_product)
         return db_product
 
     except Exception as e:
@@ -129,26 +484,44 @@ def delete_product(db: Session, product_id: str, tenant: Tenant) -> Product | No
     """
     Deleta um produto e suas imagens, apenas dentro do tenant.
     """
-    db_product = db.query(Product).filter(
-        Product.id == product_id,
-        Product.company_id == tenant.company_id,
-        Product.store_id == tenant.store_id
-    ).first()
+    db_product = get_for_tenant(db, Product, product_id, tenant)
 
     if not db_product:
         return None
 
+    # Tabelas particionadas não têm FK: o RESTRICT de order_items.product_id
+    # passa a ser verificado aqui
+    if DB_PARTITIONING and db.query(OrderItem.id).filter(OrderItem.product_id == product_id).first():
+        raise HTTPException(status_code=409, detail="Produto possui pedidos; desative em vez de excluir")
+
     try:
+        # Arquivos ficam no blob: só o refcount cai (flush), o coletor apaga
         images = db.query(ProductImage).filter(ProductImage.product_id == product_id).all()
         for img in images:
-            if os.path.exists(img.image_url):
-                os.remove(img.image_url)
             db.delete(img)
 
+        # O cascade delete-orphan percorre stock_movements (lazy="select"):
+        # carregado numa query explícita, não num lazy load no flush
+        movements = db.query(StockMovement).filter(StockMovement.product_id == product_id).all()
+        attributes.set_committed_value(db_product, "stock_movements", movements)
+
         db.delete(db_product)
         db.commit()
+        product_search.product_deleted(tenant, product_id)
         return db_product
 
     except Exception as e:
         db.rollback()
         raise e
+
+# =========================
+# Versões assíncronas (AsyncSession)
+# =========================
+create_product_async = async_version(create_product)
+get_product_async = async_version(get_product)
+get_products_async = async_version(get_products)
+get_catalog_page_async = async_version(get_catalog_page)
+get_catalog_facets_async = async_version(get_catalog_facets)
+get_products_by_ids_async = async_version(get_products_by_ids)
+update_product_async = async_version(update_product)
+delete_product_async = async_version(delete_product)
@@ -0,0 +1,132 @@
+# app/crud/statements.py
+
+import threading
+from collections import Counter
+from typing import Callable, Optional, Type, TypeVar
+
+from sqlalchemy import Select, bindparam, event, select
+from sqlalchemy.engine import Engine, default
+from sqlalchemy.orm import Session
+
+from app.crud.tenant_scope import SKIP_TENANT_SCOPE, bind_tenant, tenant_predicate
+from app.security.tenant import Tenant
+
+T = TypeVar("T")
+
+
+# =========================
+# Cache de statements prontos
+# =========================
+class StatementCache:
+    """
+    Statements montados uma única vez, com bindparams no lugar dos valores.
+
+    Reusar o mesmo objeto `Select` evita reconstruir a query ORM a cada
+    chamada, e o SQL compilado sai do cache da engine. `hits`/`misses`
+    contam reuso por statement; `compiled` conta, para todas as queries
+    executadas, se o SQL compilado veio do cache.
+    """
+    def __init__(self):
+        self._statements: dict[tuple, Select] = {}
+        self._lock = threading.Lock()
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self.compiled: Counter = Counter()
+
+    def get(self, key: tuple, build: Callable[[], Select]) -> Select:
+        stmt = self._statements.get(key)
+        if stmt is not None:
+            self.hits[key] += 1
+            return stmt
+        with self._lock:
+            stmt = self._statements.get(key)
+            if stmt is None:
+                stmt = self._statements[key] = build()
+                self.misses[key] += 1
+            else:
+                self.hits[key] += 1
+        return stmt
+
+    def snapshot(self) -> dict:
+        lookups = {}
+        for key in sorted(set(self.hits) | set(self.misses), key=str):
+            hits, misses = self.hits[key], self.misses[key]
+            lookups[":".join(str(k) for k in key)] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 4),
+            }
+        hit, miss = self.compiled["hit"], self.compiled["miss"]
+        return {
+            "lookups": lookups,
+            "compiled_cache": {
+                **dict(self.compiled),
+                "hit_rate": round(hit / (hit + miss), 4) if hit + miss else None,
+            },
+        }
+
+
+statements = StatementCache()
+
+# Resultado do cache de compilação registrado pela engine em cada execução
+_CACHE_LABELS = {
+    default.CACHE_HIT: "hit",
+    default.CACHE_MISS: "miss",
+    default.CACHING_DISABLED: "disabled",
+    default.NO_CACHE_KEY: "no_cache_key",
+    default.NO_DIALECT_SUPPORT: "no_dialect_support",
+}
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    result = getattr(context, "cache_hit", None)
+    if result is not None:
+        statements.compiled[_CACHE_LABELS.get(result, "other")] += 1
+
+
+def install() -> None:
+    """
+    Conta hits do cache de SQL compilado em todas as engines. Idempotente.
+    """
+    if not event.contains(Engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# =========================
+# Busca de uma linha no tenant
+# =========================
+def tenant_lookup_stmt(model: Type[T], scoped_store: bool, active_only: bool = False) -> Select:
+    """
+    `SELECT ... WHERE id = :id AND <predicado do tenant> [AND is_active]
+    LIMIT 1` do model, montado uma vez.
+
+    O predicado é o mesmo do escopo automático (app.crud.tenant_scope),
+    já com bindparams; por isso o statement dispensa o escopo da sessão.
+    """
+    def build() -> Select:
+        stmt = select(model).where(model.id == bindparam("id"), tenant_predicate(model, scoped_store))
+        if active_only:
+            stmt = stmt.where(model.is_active == True)  # noqa: E712
+        return stmt.limit(1).execution_options(**{SKIP_TENANT_SCOPE: True})
+
+    return statements.get((model.__name__, "tenant", scoped_store, active_only), build)
+
+
+def get_for_tenant(
+    db: Session,
+    model: Type[T],
+    object_id: str,
+    tenant: Tenant,
+    active_only: bool = False,
+) -> Optional[T]:
+    """
+    Linha `object_id` do model, se pertencer ao tenant (e vincula a sessão
+    ao tenant), sem montar a query a cada chamada.
+    """
+    bind_tenant(db, tenant)
+    scoped_store = tenant.store_id is not None
+    params = {"id": object_id, "company_id": tenant.company_id}
+    if scoped_store:
+        params["store_id"] = tenant.store_id
+    stmt = tenant_lookup_stmt(model, scoped_store, active_only)
+    return db.scalars(stmt, params).first()
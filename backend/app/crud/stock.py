@@ -4,7 +4,13 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from app.models.stock import StockMovement, StockMovementType
 from app.models.product import Product
+from app.database import TenantMoving
 from app.security.tenant import Tenant  # objeto tenant do usuário logado
+from app.crud.utils import async_version
+from app.crud.statements import get_for_tenant
+from app.crud.tenant_scope import bind_tenant
+from app.crud.pagination import DEFAULT_PAGE_SIZE, Page, keyset_paginate, keyset_paginate_partitioned
+from app.services.partitions import partition_manager
 
 # =========================
 # Adicionar estoque (entrada)
@@ -13,11 +19,7 @@ def add_stock(db: Session, product_id: str, quantity: float, tenant: Tenant) ->
     """
     Adiciona estoque a um produto e registra o movimento (IN) para o tenant.
     """
-    product = db.query(Product).filter(
-        Product.id == product_id,
-        Product.company_id == tenant.company_id,
-        Product.store_id == tenant.store_id
-    ).first()
+    product = get_for_tenant(db, Product, product_id, tenant)
 
     if not product:
         raise HTTPException(status_code=404, detail="Produto não encontrado ou fora do seu tenant")
@@ -44,6 +46,9 @@ def add_stock(db: Session, product_id: str, quantity: float, tenant: Tenant) ->
         db.refresh(stock_entry)
         return stock_entry
 
+    except TenantMoving:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro ao adicionar estoque: {str(e)}")
@@ -55,11 +60,7 @@ def remove_stock(db: Session, product_id: str, quantity: float, tenant: Tenant)
     """
     Remove estoque de um produto e registra o movimento (OUT) para o tenant.
     """
-    product = db.query(Product).filter(
-        Product.id == product_id,
-        Product.company_id == tenant.company_id,
-        Product.store_id == tenant.store_id
-    ).first()
+    product = get_for_tenant(db, Product, product_id, tenant)
 
     if not product:
         raise HTTPException(status_code=404, detail="Produto não encontrado ou fora do seu tenant")
@@ -89,6 +90,9 @@ def remove_stock(db: Session, product_id: str, quantity: float, tenant: Tenant)
         db.refresh(stock_exit)
         return stock_exit
 
+    except TenantMoving:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro ao remover estoque: {str(e)}")
@@ -96,17 +100,31 @@ def remove_stock(db: Session, product_id: str, quantity: float, tenant: Tenant)
 # =========================
 # Listar movimentos de um produto
 # =========================
-def get_stock_movements(db: Session, product_id: str, tenant: Tenant) -> list[StockMovement]:
+def get_stock_movements(
+    db: Session,
+    product_id: str,
+    tenant: Tenant,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Page:
     """
-    Retorna todos os movimentos de estoque de um produto filtrados pelo tenant.
+    Retorna os movimentos de estoque de um produto filtrados pelo tenant,
+    do mais recente para o mais antigo, paginados por (created_at, id).
     """
-    return (
-        db.query(StockMovement)
-        .filter(
-            StockMovement.product_id == product_id,
-            StockMovement.company_id == tenant.company_id,
-            StockMovement.store_id == tenant.store_id
+    bind_tenant(db, tenant)
+    query = db.query(StockMovement).filter(StockMovement.product_id == product_id)
+    boundaries = partition_manager.boundaries(StockMovement.__tablename__)
+    if boundaries is None:
+        return keyset_paginate(
+            query, StockMovement.created_at, StockMovement.id, cursor, limit, descending=True
         )
-        .order_by(StockMovement.created_at.desc())
-        .all()
+    return keyset_paginate_partitioned(
+        query, StockMovement.created_at, StockMovement.id, boundaries, cursor, limit
     )
+
+# =========================
+# Versões assíncronas (AsyncSession)
+# =========================
+add_stock_async = async_version(add_stock)
+remove_stock_async = async_version(remove_stock)
+get_stock_movements_async = async_version(get_stock_movements)
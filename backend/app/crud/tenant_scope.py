@@ -0,0 +1,97 @@
+# app/crud/tenant_scope.py
+
+from typing import Optional, Union
+
+from sqlalchemy import bindparam, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session, with_loader_criteria
+
+from app.models.tenant import TenantScoped
+from app.security.tenant import Tenant
+
+# Chaves em Session.info: o Tenant e o filtro já montado para ele
+TENANT_INFO_KEY = "tenant"
+CRITERIA_INFO_KEY = "tenant_criteria"
+
+# execution_options(skip_tenant_scope=True): consulta entre tenants
+# (manutenção, scripts), mesmo numa sessão vinculada
+SKIP_TENANT_SCOPE = "skip_tenant_scope"
+
+
+# =========================
+# Vínculo sessão -> tenant
+# =========================
+def bind_tenant(db: Union[Session, AsyncSession], tenant: Tenant) -> None:
+    """
+    Vincula a sessão ao tenant: a partir daqui as queries ORM dos models
+    TenantScoped só enxergam as linhas dele. Idempotente; vincular a
+    sessão a outro tenant é erro de programação.
+    """
+    current = db.info.get(TENANT_INFO_KEY)
+    if current is None:
+        db.info[TENANT_INFO_KEY] = tenant
+    elif (current.company_id, current.store_id) != (tenant.company_id, tenant.store_id):
+        raise RuntimeError("Sessão já vinculada a outro tenant")
+
+
+def session_tenant(db: Union[Session, AsyncSession]) -> Optional[Tenant]:
+    return db.info.get(TENANT_INFO_KEY)
+
+
+# =========================
+# Filtro automático
+# =========================
+def tenant_predicate(model, scoped_store: bool, company_id=None, store_id=None):
+    """
+    O único formato de filtro de tenant: `company_id = :company_id AND
+    store_id = :store_id`, ou `store_id IS NULL` para usuários sem loja
+    (nível empresa). Casa com o prefixo dos índices (company_id, store_id, ...).
+    Sem valores, usa bindparams nomeados (statements pré-montados).
+    """
+    company = model.company_id == (bindparam("company_id") if company_id is None else company_id)
+    if not scoped_store:
+        return company & model.store_id.is_(None)
+    return company & (model.store_id == (bindparam("store_id") if store_id is None else store_id))
+
+
+def tenant_criteria(tenant: Tenant):
+    """
+    Opção ORM que aplica `tenant_predicate` a todos os models TenantScoped
+    da query (inclusive joins e aliases). A lambda é analisada uma vez e
+    entra no cache de SQL compilado; os ids do tenant viram parâmetros.
+    """
+    company_id = tenant.company_id
+    store_id = tenant.store_id
+    if store_id is None:
+        return with_loader_criteria(
+            TenantScoped,
+            lambda cls: tenant_predicate(cls, False, company_id),
+            include_aliases=True,
+        )
+    return with_loader_criteria(
+        TenantScoped,
+        lambda cls: tenant_predicate(cls, True, company_id, store_id),
+        include_aliases=True,
+    )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _add_tenant_criteria(state: ORMExecuteState) -> None:
+    # Lazy loads herdam o filtro da query do objeto pai
+    # (propagate_to_loaders) e recargas de coluna são por PK de objeto
+    # já carregado
+    if state.is_column_load or state.is_relationship_load:
+        return
+    if not (state.is_select or state.is_update or state.is_delete):
+        return
+    if state.execution_options.get(SKIP_TENANT_SCOPE):
+        return
+
+    info = state.session.info
+    tenant = info.get(TENANT_INFO_KEY)
+    if tenant is None:
+        return
+    criteria = info.get(CRITERIA_INFO_KEY)
+    if criteria is None:
+        criteria = info[CRITERIA_INFO_KEY] = tenant_criteria(tenant)
+    state.statement = state.statement.options(criteria)
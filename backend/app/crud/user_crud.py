@@ -3,9 +3,11 @@
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from app.models.user import User
-from app.schemas.user_schema import UserCreate, UserUpdate
-from passlib.hash import bcrypt
-from uuid import uuid4
+from app.schemas.user import UserCreate, UserUpdate
+from app.crud.utils import async_version
+from app.crud.pagination import DEFAULT_PAGE_SIZE, Page, keyset_paginate
+from app.services.passwords import hash_password
+from app.models.types import new_id
 
 # =========================
 # Criar usuário
@@ -14,9 +16,9 @@ def create_user(db: Session, user_in: UserCreate, company_id: str = None, store_
     """
     Cria um usuário vinculado ao tenant (company_id + store_id), com senha criptografada.
     """
-    hashed_password = bcrypt.hash(user_in.password)
+    hashed_password = hash_password(user_in.password)
     user = User(
-        id=str(uuid4()),
+        id=new_id(),
         name=user_in.name,
         email=user_in.email,
         password=hashed_password,
@@ -64,16 +66,22 @@ def get_user_by_email(db: Session, email: str, company_id: str = None, store_id:
 # =========================
 # Listar usuários
 # =========================
-def list_users(db: Session, company_id: str = None, store_id: str = None, skip: int = 0, limit: int = 100) -> list[User]:
+def list_users(
+    db: Session,
+    company_id: str = None,
+    store_id: str = None,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Page:
     """
-    Lista usuários do tenant, com paginação.
+    Lista usuários do tenant, paginados por (email, id).
     """
     query = db.query(User)
     if company_id:
         query = query.filter(User.company_id == company_id)
     if store_id:
         query = query.filter(User.store_id == store_id)
-    return query.offset(skip).limit(limit).all()
+    return keyset_paginate(query, User.email, User.id, cursor, limit)
 
 # =========================
 # Atualizar usuário
@@ -87,9 +95,11 @@ def update_user(db: Session, user_id: str, user_in: UserUpdate, company_id: str
         return None
 
     try:
+        # Role/tenant alterado: os tokens emitidos antes deixam de valer no
+        # commit (app.services.token_versions)
         for key, value in user_in.dict(exclude_unset=True).items():
             if key == "password":
-                setattr(user, key, bcrypt.hash(value))
+                setattr(user, key, hash_password(value))
             else:
                 setattr(user, key, value)
         db.commit()
@@ -104,7 +114,8 @@ def update_user(db: Session, user_id: str, user_in: UserUpdate, company_id: str
 # =========================
 def delete_user(db: Session, user_id: str, company_id: str = None, store_id: str = None) -> User | None:
     """
-    Deleta um usuário do tenant.
+    Deleta um usuário do tenant; os tokens dele deixam de valer em todos os
+    workers (app.services.token_versions).
     """
     user = get_user(db, user_id, company_id, store_id)
     if not user:
@@ -117,3 +128,8 @@ def delete_user(db: Session, user_id: str, company_id: str = None, store_id: str
     except Exception as e:
         db.rollback()
         raise ValueError(f"Erro ao deletar usuário: {str(e)}") from e
+
+# =========================
+# Versões assíncronas (AsyncSession)
+# =========================
+list_users_async = async_version(list_users)
@@ -1,24 +1,55 @@
 # app/crud/utils.py
-from sqlalchemy.orm import Query
-from app.security.tenant import Tenant
-from typing import Type
+from functools import wraps
+from sqlalchemy import Table
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Awaitable, Callable, Iterable, Optional
 
-def apply_tenant_filter(query: Query, model: Type, tenant: Tenant) -> Query:
+_UPSERT_DIALECTS = {"mysql": mysql, "postgresql": postgresql, "sqlite": sqlite}
+
+def async_version(fn: Callable[..., Any]) -> Callable[..., Awaitable[Any]]:
+    """
+    Gera a versão assíncrona de uma função CRUD síncrona.
+
+    A função original roda via AsyncSession.run_sync: o I/O do banco é
+    aguardado no event loop (greenlet), sem ocupar threads, e a lógica
+    das queries continua existindo em um único lugar.
     """
-    Aplica filtro multi-tenant em qualquer query.
+    @wraps(fn)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        return await db.run_sync(fn, *args, **kwargs)
 
-    Args:
-        query (Query): Query SQLAlchemy a ser filtrada.
-        model (Type): Modelo SQLAlchemy que contém company_id e opcionalmente store_id.
-        tenant (Tenant): Tenant do usuário logado (company_id + store_id).
+    wrapper.__name__ = f"{fn.__name__}_async"
+    wrapper.__qualname__ = wrapper.__name__
+    return wrapper
 
-    Returns:
-        Query: Query filtrada pelo tenant.
+
+def upsert_statement(
+    dialect: str,
+    table: Table,
+    values: Optional[dict],
+    conflict_columns: Iterable[str],
+    update_columns: Iterable[str] = (),
+    update_values: Optional[dict] = None,
+):
     """
-    filters = [model.company_id == tenant.company_id]
+    INSERT que, se a chave única `conflict_columns` já existir, atualiza a
+    linha: `update_columns` recebem o valor enviado e `update_values`
+    expressões próprias (ex.: contador + 1).
 
-    # Aplica store_id se o modelo tiver este atributo e tenant.store_id existir
-    if hasattr(model, "store_id") and tenant.store_id:
-        filters.append(model.store_id == tenant.store_id)
+    Com `values=None`, execute com uma lista de dicts: o statement é um só
+    (fica no cache de SQL compilado) e o driver junta as linhas num INSERT
+    de várias linhas (executemany do PyMySQL/mysql-connector).
 
-    return query.filter(*filters)
+    MySQL: ON DUPLICATE KEY UPDATE (vale para qualquer chave única da
+    tabela); SQLite/PostgreSQL: ON CONFLICT (conflict_columns) DO UPDATE.
+    """
+    stmt = _UPSERT_DIALECTS[dialect].insert(table)
+    if values is not None:
+        stmt = stmt.values(values)
+    incoming = stmt.inserted if dialect == "mysql" else stmt.excluded
+    changes = {name: incoming[name] for name in update_columns}
+    changes.update(update_values or {})
+    if dialect == "mysql":
+        return stmt.on_duplicate_key_update(changes)
+    return stmt.on_conflict_do_update(index_elements=list(conflict_columns), set_=changes)
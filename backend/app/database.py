@@ -1,12 +1,23 @@
 # app/database.py
 
+import itertools
+import logging
 import os
+import threading
 import time
-from typing import Generator
+from typing import AsyncGenerator, Callable, Generator, Optional
 
-from sqlalchemy import create_engine, text
+from fastapi import Request
+from sqlalchemy import Delete, Insert, Select, Update, create_engine, event, inspect, select, text
+from sqlalchemy.engine import Connection, Engine, make_url
+from sqlalchemy.schema import CreateIndex, CreateTable
 from sqlalchemy.exc import OperationalError
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+
+from app.services.pool_metrics import TimedAsyncQueuePool, TimedQueuePool, instrument
+
+logger = logging.getLogger(__name__)
 
 # ============================
 # Configurações de ambiente
@@ -18,32 +29,420 @@ DB_USER = os.getenv("DB_USER", "renitech_user")
 DB_PASS = os.getenv("DB_PASS", "user123")
 DB_NAME = os.getenv("DB_NAME", "renitech_db")
 
-DATABASE_URL = (
-    f"mysql+pymysql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"mysql+pymysql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}",
 )
 
+# Driver assíncrono equivalente para cada backend suportado
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """
+    Converte uma URL síncrona (pymysql, mysqlconnector, sqlite)
+    na URL do driver assíncrono equivalente.
+    """
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(DATABASE_URL))
+
+# Pool de conexões (valem para primário e réplicas, por engine)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Conexões emprestadas há mais tempo que isso aparecem em /health/ready
+DB_POOL_LONG_HELD_SECONDS = float(os.getenv("DB_POOL_LONG_HELD_SECONDS", "5"))
+
+POOL_OPTIONS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
+
+# Réplicas de leitura (opcional): URLs separadas por vírgula
+DB_REPLICA_URLS = [
+    url.strip() for url in os.getenv("DB_REPLICA_URLS", "").split(",") if url.strip()
+]
+# Réplicas com atraso acima deste limite (segundos) são ignoradas
+DB_REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "5"))
+# Intervalo entre medições de atraso das réplicas (segundos)
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "5"))
+
+# Shards de tenants (opcional): "nome=URL" separados por vírgula. O banco de
+# DATABASE_URL é o diretório (usuários, empresas, lojas, mapa de shards) e
+# também o shard "default".
+DB_SHARD_URLS = dict(
+    item.strip().split("=", 1) for item in os.getenv("DB_SHARD_URLS", "").split(",") if "=" in item
+)
+# Shard das empresas sem linha em tenant_shards
+DB_DEFAULT_SHARD = os.getenv("DB_DEFAULT_SHARD", "default")
+# Intervalo de releitura do mapa empresa -> shard (segundos)
+DB_SHARD_MAP_REFRESH_SECONDS = float(os.getenv("DB_SHARD_MAP_REFRESH_SECONDS", "5"))
+
 # ============================
 # SQLAlchemy Engine
 # ============================
 
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    future=True,
-)
+
+def make_engine(url: str, name: str) -> Engine:
+    """
+    Cria um engine síncrono com o pool configurado e instrumentado.
+    """
+    db_engine = create_engine(url, poolclass=TimedQueuePool, future=True, **POOL_OPTIONS)
+    instrument(db_engine.pool, name)
+    return db_engine
+
+
+def make_async_engine(url: str, name: str) -> AsyncEngine:
+    """
+    Cria um engine assíncrono com o pool configurado e instrumentado.
+    """
+    db_engine = create_async_engine(url, poolclass=TimedAsyncQueuePool, **POOL_OPTIONS)
+    instrument(db_engine.sync_engine.pool, name)
+    return db_engine
+
+
+engine = make_engine(DATABASE_URL, "primary")
+
+# Engine assíncrono: as rotas aguardam o banco no event loop,
+# sem ocupar uma thread do threadpool do AnyIO por request.
+async_engine = make_async_engine(ASYNC_DATABASE_URL, "primary-async")
+
+# ============================
+# Réplicas de leitura
+# ============================
+
+
+def mysql_replica_lag(replica_engine: Engine) -> Optional[float]:
+    """
+    Mede o atraso de replicação (segundos) de uma réplica MySQL.
+    Retorna None se a replicação estiver parada. Bancos que não são
+    réplicas MySQL (ex.: SQLite em testes) são considerados sem atraso.
+    """
+    if replica_engine.dialect.name != "mysql":
+        return 0.0
+
+    with replica_engine.connect() as conn:
+        row = conn.execute(text("SHOW REPLICA STATUS")).mappings().first()
+
+    if row is None:
+        return 0.0
+    lag = row.get("Seconds_Behind_Source")
+    return float(lag) if lag is not None else None
+
+
+class Replica:
+    """
+    Uma réplica de leitura: engine síncrono, engine assíncrono e
+    o último atraso medido (None = desconhecido ou fora do ar).
+    """
+    def __init__(
+        self,
+        name: str,
+        engine: Engine,
+        async_engine: Optional[AsyncEngine] = None,
+        lag_probe: Callable[[Engine], Optional[float]] = mysql_replica_lag,
+    ):
+        self.name = name
+        self.engine = engine
+        self.async_engine = async_engine
+        self.lag_probe = lag_probe
+        self.lag: Optional[float] = None
+
+    def check(self) -> None:
+        try:
+            self.lag = self.lag_probe(self.engine)
+        except Exception:
+            self.lag = None
+
+
+class ReplicaSet:
+    """
+    Conjunto de réplicas com monitoramento de atraso.
+
+    O atraso é medido fora do caminho da request (thread de monitoramento
+    ou chamada explícita a refresh()); a escolha da réplica só lê o valor
+    em cache. Sem nenhuma réplica saudável, as leituras vão para o primário.
+    """
+    def __init__(self, replicas: list[Replica], max_lag: float, check_interval: float):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._cycle = itertools.count()
+        self._monitor: Optional[threading.Thread] = None
+
+    def refresh(self) -> None:
+        for replica in self.replicas:
+            replica.check()
+
+    def healthy(self) -> list[Replica]:
+        return [
+            r for r in self.replicas
+            if r.lag is not None and r.lag <= self.max_lag
+        ]
+
+    def choose(self) -> Optional[Replica]:
+        """Round-robin entre as réplicas saudáveis."""
+        candidates = self.healthy()
+        if not candidates:
+            return None
+        return candidates[next(self._cycle) % len(candidates)]
+
+    def start_monitor(self) -> None:
+        if not self.replicas or self._monitor is not None:
+            return
+
+        self.refresh()
+
+        def loop():
+            while True:
+                time.sleep(self.check_interval)
+                self.refresh()
+
+        self._monitor = threading.Thread(target=loop, name="replica-lag-monitor", daemon=True)
+        self._monitor.start()
+
+
+def build_replica_set(urls: list[str]) -> ReplicaSet:
+    replicas = []
+    for index, url in enumerate(urls):
+        name = f"replica-{index}"
+        replicas.append(Replica(
+            name=name,
+            engine=make_engine(url, name),
+            async_engine=make_async_engine(to_async_url(url), f"{name}-async"),
+        ))
+    return ReplicaSet(replicas, DB_REPLICA_MAX_LAG, DB_REPLICA_CHECK_INTERVAL)
+
+
+replicas = build_replica_set(DB_REPLICA_URLS)
+
+# ============================
+# Shards de tenants
+# ============================
+
+DEFAULT_SHARD = "default"
+
+# Tabelas globais: ficam só no diretório (DATABASE_URL), nunca nos shards
+DIRECTORY_TABLES = frozenset({
+    "users", "companies", "stores", "revoked_tokens", "user_token_versions", "tenant_shards",
+})
+
+# Chave em Session.info com o Tenant (app.crud.tenant_scope.TENANT_INFO_KEY)
+_TENANT_INFO_KEY = "tenant"
+
+
+class TenantMoving(Exception):
+    """Escrita em um tenant que está mudando de shard (somente leitura)."""
+    def __init__(self, company_id: str, retry_after: int):
+        super().__init__(f"Empresa {company_id} em migração de shard")
+        self.company_id = company_id
+        self.retry_after = retry_after
+
+
+class Shard:
+    """Um banco de dados de tenants: engine síncrono e assíncrono."""
+    def __init__(self, name: str, engine: Engine, async_engine: Optional[AsyncEngine] = None):
+        self.name = name
+        self.engine = engine
+        self.async_engine = async_engine
+
+
+class ShardMap:
+    """
+    Mapa empresa -> shard, lido da tabela tenant_shards do diretório e
+    mantido em memória (releitura periódica em background).
+
+    As sessões escolhem o banco por model: tabelas de DIRECTORY_TABLES vão
+    para o diretório; as dos tenants, para o shard da empresa com que a
+    sessão foi vinculada (app.crud.tenant_scope.bind_tenant). Com um único
+    banco (sem DB_SHARD_URLS) nada disso roda.
+    """
+    def __init__(self, shards: dict[str, Shard], default: str, refresh_interval: float):
+        if default not in shards:
+            raise RuntimeError(f"DB_DEFAULT_SHARD desconhecido: {default}")
+        self.shards = shards
+        self.default = default
+        self.refresh_interval = refresh_interval
+        self.enabled = len(shards) > 1
+        self._assignments: dict[str, str] = {}
+        self._read_only: set[str] = set()
+        self._monitor: Optional[threading.Thread] = None
+        self.last_refresh: Optional[float] = None
+
+    def shard_for(self, company_id: Optional[str]) -> Shard:
+        return self.shards[self._assignments.get(company_id, self.default)]
+
+    def is_read_only(self, company_id: Optional[str]) -> bool:
+        return company_id in self._read_only
+
+    def refresh(self) -> None:
+        table = Base.metadata.tables.get("tenant_shards")
+        if table is None:
+            return  # models ainda não importados
+        with engine.connect() as conn:
+            rows = conn.execute(select(table.c.company_id, table.c.shard, table.c.status)).all()
+        self._assignments = {company_id: shard for company_id, shard, _ in rows if shard in self.shards}
+        self._read_only = {company_id for company_id, _, status in rows if status == "read_only"}
+        self.last_refresh = time.time()
+
+    def start_monitor(self) -> None:
+        if not self.enabled or self._monitor is not None:
+            return
+
+        self.refresh()
+
+        def loop():
+            while True:
+                time.sleep(self.refresh_interval)
+                try:
+                    self.refresh()
+                except Exception:
+                    # Diretório fora do ar: mantém o último mapa
+                    logger.exception("Falha ao atualizar o mapa de shards")
+
+        self._monitor = threading.Thread(target=loop, name="shard-map-refresh", daemon=True)
+        self._monitor.start()
+
+    def snapshot(self) -> dict:
+        tenants = {name: 0 for name in self.shards}
+        for shard in self._assignments.values():
+            tenants[shard] += 1
+        return {
+            "shards": list(self.shards),
+            "default": self.default,
+            "assigned_tenants": tenants,
+            "read_only_tenants": len(self._read_only),
+            "last_refresh": self.last_refresh,
+        }
+
+
+def build_shard_map(urls: dict[str, str]) -> ShardMap:
+    shards = {DEFAULT_SHARD: Shard(DEFAULT_SHARD, engine, async_engine)}
+    for name, url in urls.items():
+        shards[name] = Shard(
+            name,
+            make_engine(url, f"shard-{name}"),
+            make_async_engine(to_async_url(url), f"shard-{name}-async"),
+        )
+    return ShardMap(shards, DB_DEFAULT_SHARD, DB_SHARD_MAP_REFRESH_SECONDS)
+
+
+shard_map = build_shard_map(DB_SHARD_URLS)
+
+
+def create_shard_schema(conn: Connection) -> None:
+    """
+    Cria em um shard as tabelas dos tenants que faltam, sem as FKs para
+    tabelas do diretório (que ficam em outro banco).
+    """
+    existing = set(inspect(conn).get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name in DIRECTORY_TABLES or table.name in existing:
+            continue
+        local_fks = [
+            fk for fk in table.foreign_key_constraints
+            if fk.referred_table.name not in DIRECTORY_TABLES
+        ]
+        conn.execute(CreateTable(table, include_foreign_key_constraints=local_fks))
+        for index in table.indexes:
+            conn.execute(CreateIndex(index))
 
 # ============================
 # Session
 # ============================
 
+
+class RoutingSession(Session):
+    """
+    Session que envia SELECTs de sessões somente-leitura para uma réplica.
+
+    - Sessões normais (escrita) usam sempre o primário.
+    - Sessões marcadas com info["read_only"] leem de uma réplica saudável,
+      até a primeira escrita: a partir daí tudo vai para o primário
+      (read-your-writes dentro da sessão).
+    - SELECT ... FOR UPDATE sempre vai para o primário.
+    - Com shards (DB_SHARD_URLS), models de tenant de uma sessão vinculada
+      a um tenant vão para o shard da empresa; as réplicas valem só para o
+      shard "default" (o próprio diretório).
+    """
+    def get_bind(self, mapper=None, clause=None, **kw):
+        writing = self._flushing or isinstance(clause, (Insert, Update, Delete))
+        if shard_map.enabled:
+            shard = self._tenant_shard(mapper, writing)
+            if shard is not None and shard.name != DEFAULT_SHARD:
+                if writing:
+                    self.info["wrote"] = True
+                if self.info.get("async"):
+                    return shard.async_engine.sync_engine
+                return shard.engine
+
+        if writing:
+            self.info["wrote"] = True
+        elif (
+            self.info.get("read_only")
+            and not self.info.get("wrote")
+            and isinstance(clause, Select)
+            and clause._for_update_arg is None
+        ):
+            replica = replicas.choose()
+            if replica is not None:
+                if self.info.get("async"):
+                    return replica.async_engine.sync_engine
+                return replica.engine
+
+        return super().get_bind(mapper, clause=clause, **kw)
+
+    def _tenant_shard(self, mapper, writing: bool) -> Optional[Shard]:
+        """Shard do tenant vinculado, para models de tenant; None = diretório."""
+        tenant = self.info.get(_TENANT_INFO_KEY)
+        if tenant is None or mapper is None or mapper.local_table.name in DIRECTORY_TABLES:
+            return None
+        if writing and shard_map.is_read_only(tenant.company_id):
+            raise TenantMoving(tenant.company_id, retry_after=int(shard_map.refresh_interval * 2) + 1)
+        return shard_map.shard_for(tenant.company_id)
+
+
+@event.listens_for(RoutingSession, "before_flush")
+def _require_tenant_for_shard_writes(session, flush_context, instances):
+    # Com shards, gravar model de tenant numa sessão sem tenant iria para
+    # o shard errado (o diretório)
+    if not shard_map.enabled or session.info.get(_TENANT_INFO_KEY) is not None:
+        return
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(type(obj), "__table__", None)
+        if table is not None and table.name not in DIRECTORY_TABLES:
+            raise RuntimeError(f"Sessão sem tenant gravando {type(obj).__name__}: use bind_tenant")
+
+
 SessionLocal = sessionmaker(
     bind=engine,
+    class_=RoutingSession,
     autocommit=False,
     autoflush=False,
     expire_on_commit=False,
 )
 
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+    info={"async": True},
+)
+
 # ============================
 # Base central do projeto
 # ============================
@@ -56,12 +455,58 @@ Base = declarative_base()
 
 
 def get_db() -> Generator:
+    """
+    Sessão da request. Começa no diretório; quando o CRUD a vincula ao
+    tenant autenticado (bind_tenant), os models de tenant passam a ir para
+    o shard da empresa (ShardMap).
+    """
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Versão assíncrona de get_db, usada pelas rotas `async def`.
+    A concorrência passa a ser limitada pelo pool do banco, não por threads.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def wants_primary(request: Request) -> bool:
+    """
+    Requests que escrevem, ou que pedem explicitamente read-your-writes
+    (header `X-Read-Your-Writes: 1`, ex.: logo após um POST), ficam no primário.
+    """
+    return (
+        request.method not in ("GET", "HEAD")
+        or request.headers.get("X-Read-Your-Writes") == "1"
+    )
+
+
+def get_read_db(request: Request) -> Generator:
+    """
+    Sessão para rotas de leitura: SELECTs vão para uma réplica saudável.
+    """
+    db = SessionLocal()
+    db.info["read_only"] = not wants_primary(request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Versão assíncrona de get_read_db.
+    """
+    async with AsyncSessionLocal() as db:
+        db.info["read_only"] = not wants_primary(request)
+        yield db
+
 # ============================
 # Esperar o banco subir
 # ============================
@@ -1,10 +1,13 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import jwt, JWTError
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
+from app.services.principal_cache import Principal, principal_cache
+from app.services.revocation import revocation_list
+from app.services.token_versions import token_versions
 
 # ====== Configuração JWT ======
 # ⚠️ Em produção, use variável de ambiente
@@ -14,32 +17,92 @@ ALGORITHM = "HS256"
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 # =========================
-# Função para pegar o usuário logado
+# Usuário logado (Principal)
 # =========================
-def get_current_user(
+def _decode_token(token: str) -> dict:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token inválido",
+        )
+    if not payload.get("sub"):  # "sub" = subject (id do usuário)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token inválido",
+        )
+    return payload
+
+
+async def get_token_payload(token: str = Depends(oauth2_scheme)) -> dict:
+    """
+    Claims do token da request (decodificado uma vez por request).
+    """
+    return _decode_token(token)
+
+
+async def get_current_principal(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
+    payload: dict = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
     """
-    Retorna o usuário logado a partir do token JWT.
+    Role e tenant do usuário logado. Depois da primeira request com um
+    token, as seguintes saem do cache em memória sem consultar o banco
+    (a AsyncSession só abre conexão se for usada). Tokens encerrados por
+    logout são recusados pela lista de revogação em memória, e os de
+    usuários rebaixados ou removidos pelas versões de token compartilhadas.
     """
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str | None = payload.get("sub")  # "sub" = subject (id do usuário)
+    jti = payload.get("jti")
+    cache_key = jti or token  # tokens antigos não têm jti
 
-        if not user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token inválido",
-            )
+    # Logout: na maioria dos tokens custa uma sondagem no Bloom filter
+    if jti and revocation_list.is_revoked(jti):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revogado",
+        )
 
-    except JWTError:
+    # Role/tenant mudou ou usuário removido, em qualquer worker: vale também
+    # para o Principal já em cache
+    if token_versions.is_stale(payload["sub"], payload.get("ver", 0)):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token inválido",
+            detail="Token revogado",
+        )
+
+    principal = principal_cache.get(cache_key)
+    if principal is not None:
+        return principal
+
+    user = await db.get(User, payload["sub"])
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuário não encontrado",
+        )
+    # Role/tenant mudaram (ou usuário foi recriado) depois da emissão do token
+    if (user.token_version or 0) != payload.get("ver", 0):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revogado",
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    principal = Principal.from_user(user)
+    principal_cache.put(cache_key, principal)
+    return principal
+
+
+async def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """
+    Retorna o usuário logado completo (para rotas que leem ou alteram o
+    próprio cadastro). Checagens de role/tenant usam get_current_principal.
+    """
+    user = await db.get(User, principal.id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -52,13 +115,13 @@ def get_current_user(
 # Dependências de permissão por role
 # =========================
 
-def require_user(current_user: User = Depends(get_current_user)) -> User:
+async def require_user(current_user: Principal = Depends(get_current_principal)) -> Principal:
     """
     Qualquer usuário autenticado.
     """
     return current_user
 
-def require_staff(current_user: User = Depends(get_current_user)) -> User:
+async def require_staff(current_user: Principal = Depends(get_current_principal)) -> Principal:
     """
     Usuário com role 'staff', 'admin' ou 'superadmin'.
     """
@@ -69,7 +132,7 @@ def require_staff(current_user: User = Depends(get_current_user)) -> User:
         )
     return current_user
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
+async def require_admin(current_user: Principal = Depends(get_current_principal)) -> Principal:
     """
     Apenas 'admin' ou 'superadmin'.
     """
@@ -80,7 +143,7 @@ def require_admin(current_user: User = Depends(get_current_user)) -> User:
         )
     return current_user
 
-def require_superadmin(current_user: User = Depends(get_current_user)) -> User:
+async def require_superadmin(current_user: Principal = Depends(get_current_principal)) -> Principal:
     """
     Apenas 'superadmin'.
     """
@@ -92,7 +155,7 @@ def require_superadmin(current_user: User = Depends(get_current_user)) -> User:
     return current_user
 
 
-def require_staff(current_user: User = Depends(get_current_user)) -> User:
+async def require_staff(current_user: Principal = Depends(get_current_principal)) -> Principal:
     """
     Usuário com role 'admin', 'superadmin', ou 'vendedor'
     """
@@ -1,15 +1,45 @@
 # app/main.py
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 import os
+from sqlalchemy import text
 
 # ============================
 # IMPORTANTE: garante que todos os models sejam registrados
 # ============================
 from app import models  # noqa: F401
 
-from app.database import Base, engine, wait_for_db, SessionLocal
+from app.database import (
+    Base,
+    engine,
+    async_engine,
+    wait_for_db,
+    SessionLocal,
+    replicas,
+    shard_map,
+    create_shard_schema,
+    DEFAULT_SHARD,
+    TenantMoving,
+    DB_POOL_LONG_HELD_SECONDS,
+)
+from app.services.pool_metrics import pools_report
+from app.services.principal_cache import principal_cache
+from app.services.passwords import PasswordHashingBusy, password_hasher
+from app.services.images import ImageProcessingBusy, image_pipeline
+from app.services.image_gc import blob_collector
+from app.services.revocation import revocation_list
+from app.services.token_versions import token_versions
+from app.services.partitions import partition_manager
+from app.services.search import product_search
+from app.services.catalog_cache import catalog_cache
+from app.crud.pagination import InvalidCursor, NEXT_CURSOR_HEADER
+from app.services import sql_metrics
+from app.crud import statements as crud_statements
+from app.middleware.sql_metrics import SQLMetricsMiddleware, SQL_METRICS_HEADER_NAMES
+from app.middleware.concurrency import ConcurrencyLimitMiddleware
+from app.services.concurrency import CONCURRENCY_LIMIT_ENABLED, concurrency_limiter
 
 # ============================
 # IMPORTAR ROTAS
@@ -21,6 +51,7 @@ from app.routes import (
     categories as categories_routes, # 🌐 público + admin
     stock as stock_routes,           # 🔒 admin
     orders as orders_routes,         # 🔒 admin
+    exports as exports_routes,       # 🔒 admin
 )
 
 # ============================
@@ -48,6 +79,14 @@ os.makedirs(UPLOADS_DIR, exist_ok=True)
 app.mount("/assets", StaticFiles(directory=ASSETS_DIR), name="assets")
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
+# ============================
+# LIMITE DE CONCORRÊNCIA POR TENANT
+# ============================
+# Registrado antes do CORS para ficar dentro dele (os 503 levam os
+# headers de CORS e o preflight não consome vaga)
+if CONCURRENCY_LIMIT_ENABLED:
+    app.add_middleware(ConcurrencyLimitMiddleware)
+
 # ============================
 # CORS (FRONTEND VUE)
 # ============================
@@ -57,8 +96,44 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Retry-After", "ETag", *SQL_METRICS_HEADER_NAMES],
 )
 
+# ============================
+# MÉTRICAS DE SQL POR REQUEST (N+1, lazy loads)
+# ============================
+if sql_metrics.SQL_METRICS_ENABLED:
+    sql_metrics.install()
+    app.add_middleware(SQLMetricsMiddleware)
+
+# Hit rate do cache de SQL compilado (exposto em /health/ready)
+crud_statements.install()
+
+# ============================
+# ERROS
+# ============================
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+@app.exception_handler(PasswordHashingBusy)
+async def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusy):
+    # Fila de hashing cheia (rajada de logins): recusa rápido em vez de enfileirar
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
+@app.exception_handler(ImageProcessingBusy)
+async def image_processing_busy_handler(request: Request, exc: ImageProcessingBusy):
+    # Fila de imagens cheia: o cliente reenvia o upload depois
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"})
+
+
+@app.exception_handler(TenantMoving)
+async def tenant_moving_handler(request: Request, exc: TenantMoving):
+    # Empresa mudando de shard: escritas voltam assim que a cópia terminar
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": str(exc.retry_after)})
+
 # ============================
 # REGISTRAR ROTAS
 # ============================
@@ -70,6 +145,7 @@ app.include_router(categories_routes.router)  # público + admin
 app.include_router(dashboard_routes.router)
 app.include_router(stock_routes.router)
 app.include_router(orders_routes.router)
+app.include_router(exports_routes.router)
 
 # ============================
 # DEPENDÊNCIA DB
@@ -94,12 +170,101 @@ def startup_event():
 
     print("Criando tabelas...")
     Base.metadata.create_all(bind=engine)
+    for shard in shard_map.shards.values():
+        if shard.name != DEFAULT_SHARD:
+            with shard.engine.begin() as conn:
+                create_shard_schema(conn)
+
+    # Mede o atraso das réplicas de leitura (se configuradas) em background
+    replicas.start_monitor()
+
+    # Carrega os tokens revogados (logout) e mantém a lista atualizada
+    revocation_list.start_monitor()
+
+    # Usuários rebaixados ou removidos em qualquer worker (versões de token)
+    token_versions.start_monitor()
+
+    # Mapa empresa -> shard (só com DB_SHARD_URLS)
+    shard_map.start_monitor()
+
+    # Partições mensais à frente e retenção (DB_PARTITIONING, só MySQL)
+    partition_manager.start_monitor()
+
+    # Índices de busca de produtos carregados: mudanças de outros workers
+    product_search.start_monitor()
+
+    # Versões do catálogo alteradas por outros workers (invalida o cache)
+    catalog_cache.start_monitor()
+
+    # Blobs de imagem sem referência (arquivos compartilhados por conteúdo)
+    blob_collector.start_monitor()
 
     print("API pronta para uso!")
 
+
+@app.on_event("startup")
+async def resume_image_processing():
+    # Uploads aceitos antes de uma queda/deploy e ainda sem variantes
+    resumed = await image_pipeline.resume()
+    if resumed:
+        print(f"{resumed} imagens pendentes reenfileiradas")
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    # Encerra os processos dos pools de hashing de senha e de imagens
+    password_hasher.shutdown()
+    image_pipeline.shutdown()
+
 # ============================
 # HEALTH CHECK
 # ============================
 @app.get("/", tags=["Root"])
 def root():
     return {"status": "ok", "message": "Renitech API rodando", "docs": "/docs"}
+
+
+@app.get("/health/ready", tags=["Root"])
+async def readiness():
+    """
+    Readiness: o banco primário responde? Inclui o estado dos pools
+    (conexões emprestadas/ociosas, histograma de espera no checkout e
+    conexões presas há mais de DB_POOL_LONG_HELD_SECONDS, com a pilha se
+    DB_POOL_CAPTURE_STACKS)
+    e o atraso das réplicas de leitura, além do hit rate dos statements
+    pré-montados e do cache de SQL compilado, e o tamanho e a taxa de
+    falso positivo do filtro de tokens revogados, as filas por tenant do
+    limitador de concorrência, as partições das tabelas de histórico, o
+    mapa de shards, os índices de busca de produtos, o hit rate do cache
+    de respostas do catálogo, a fila de processamento de imagens e a
+    coleta dos blobs de imagem sem referência.
+    """
+    database_ok = True
+    try:
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except Exception:
+        database_ok = False
+
+    body = {
+        "status": "ok" if database_ok else "unavailable",
+        "database": database_ok,
+        "pools": pools_report(DB_POOL_LONG_HELD_SECONDS),
+        "replicas": [
+            {"name": r.name, "lag_seconds": r.lag, "healthy": r in replicas.healthy()}
+            for r in replicas.replicas
+        ],
+        "statements": crud_statements.statements.snapshot(),
+        "principal_cache": principal_cache.snapshot(),
+        "password_hashing": password_hasher.snapshot(),
+        "token_revocation": revocation_list.snapshot(),
+        "token_versions": token_versions.snapshot(),
+        "concurrency": concurrency_limiter.snapshot(),
+        "partitions": partition_manager.snapshot(),
+        "shards": shard_map.snapshot(),
+        "product_search": product_search.snapshot(),
+        "catalog_cache": catalog_cache.snapshot(),
+        "image_processing": image_pipeline.snapshot(),
+        "image_blobs": blob_collector.snapshot(),
+    }
+    return JSONResponse(body, status_code=200 if database_ok else 503)
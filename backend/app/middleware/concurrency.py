@@ -0,0 +1,124 @@
+# app/middleware/concurrency.py
+import json
+import time
+
+from jose import JWTError, jwt
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.dependencies import ALGORITHM, SECRET_KEY
+from app.services.concurrency import (
+    ANONYMOUS_TENANT,
+    CONCURRENCY_BULK_PATHS,
+    CONCURRENCY_EXEMPT_PATHS,
+    AdaptiveConcurrencyLimiter,
+    Overloaded,
+    concurrency_limiter,
+    tenant_key,
+)
+
+
+def resolve_tenant(scope: Scope) -> str:
+    """
+    Tenant da request a partir das claims assinadas do JWT (sem banco).
+    Token ausente/inválido cai em ANONYMOUS_TENANT; a rota responde 401.
+    """
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                break
+            try:
+                claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            except JWTError:
+                break
+            return tenant_key(claims.get("company_id"), claims.get("store_id"))
+    return ANONYMOUS_TENANT
+
+
+def _path_matcher(paths: list[str]):
+    """Casa o path exato ou os abaixo dele ("/" só exato)."""
+    exact = set(paths)
+    prefixes = tuple(p.rstrip("/") + "/" for p in paths if p != "/")
+    return lambda path: path in exact or path.startswith(prefixes)
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    Middleware ASGI que passa cada request pelo limitador de concorrência
+    por tenant. Requests recusadas recebem 503 + Retry-After na hora, sem
+    chegar às rotas, ao threadpool ou ao pool de conexões. Health checks e
+    docs (CONCURRENCY_EXEMPT_PATHS) não passam pelo limitador; exportações
+    e importações (CONCURRENCY_BULK_PATHS) só pelo teto de rotas longas.
+
+    A latência que ajusta o limite vai até o início da resposta
+    (http.response.start): o tempo de envio de um corpo grande ou lento
+    depende do cliente, não da carga do servidor.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: AdaptiveConcurrencyLimiter = concurrency_limiter,
+        exempt_paths: list[str] = CONCURRENCY_EXEMPT_PATHS,
+        bulk_paths: list[str] = CONCURRENCY_BULK_PATHS,
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.exempt = _path_matcher(exempt_paths)
+        self.bulk = _path_matcher(bulk_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or self.exempt(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        if self.bulk(scope["path"]):
+            await self._call_bulk(scope, receive, send)
+            return
+
+        key = resolve_tenant(scope)
+        try:
+            await self.limiter.acquire(key)
+        except Overloaded as exc:
+            await self._reject(send, exc)
+            return
+
+        started = time.perf_counter()
+        first_byte = None
+
+        async def send_timed(message: Message) -> None:
+            nonlocal first_byte
+            if message["type"] == "http.response.start" and first_byte is None:
+                first_byte = time.perf_counter() - started
+            await send(message)
+
+        latency = None
+        try:
+            await self.app(scope, receive, send_timed)
+            latency = first_byte
+        finally:
+            # Requests que falharam não entram na média de latência
+            self.limiter.release(key, latency)
+
+    async def _call_bulk(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            self.limiter.acquire_bulk()
+        except Overloaded as exc:
+            await self._reject(send, exc)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.release_bulk()
+
+    async def _reject(self, send: Send, exc: Overloaded) -> None:
+        body = json.dumps({"detail": f"Servidor sobrecarregado: {exc.reason}"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(exc.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
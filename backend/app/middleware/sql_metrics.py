@@ -0,0 +1,73 @@
+# app/middleware/sql_metrics.py
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.sql_metrics import (
+    SQL_METRICS_HEADERS,
+    SQL_NPLUSONE_THRESHOLD,
+    SQL_STRICT,
+    SQL_STRICT_MAX_QUERIES,
+    report,
+    track_queries,
+)
+
+# Headers com as métricas da request (quando SQL_METRICS_HEADERS)
+SQL_METRICS_HEADER_NAMES = [
+    "X-DB-Query-Count",
+    "X-DB-Time-Ms",
+    "X-DB-Max-Repeat",
+    "X-DB-Lazy-Loads",
+]
+
+
+class SQLMetricsMiddleware:
+    """
+    Middleware ASGI que mede as queries de cada request: quantidade,
+    tempo total no banco e SQL repetido (N+1). Resultado vai para o log
+    e, opcionalmente, para headers X-DB-*.
+
+    No modo estrito, passar de `max_queries` ou disparar um lazy load
+    implícito levanta QueryBudgetExceeded (a request falha com 500).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        headers: bool = SQL_METRICS_HEADERS,
+        strict: bool = SQL_STRICT,
+        max_queries: int = SQL_STRICT_MAX_QUERIES,
+        nplusone_threshold: int = SQL_NPLUSONE_THRESHOLD,
+    ):
+        self.app = app
+        self.headers = headers
+        self.strict = strict
+        self.max_queries = max_queries
+        self.nplusone_threshold = nplusone_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        label = f"{scope['method']} {scope['path']}"
+        with track_queries(
+            label,
+            max_queries=self.max_queries if self.strict else None,
+            allow_lazy_loads=not self.strict,
+        ) as stats:
+
+            async def send_with_metrics(message: Message) -> None:
+                # As rotas já terminaram de consultar o banco quando o
+                # início da resposta é enviado
+                if message["type"] == "http.response.start" and self.headers:
+                    headers = MutableHeaders(scope=message)
+                    headers["X-DB-Query-Count"] = str(stats.queries)
+                    headers["X-DB-Time-Ms"] = f"{stats.total_time * 1000:.2f}"
+                    headers["X-DB-Max-Repeat"] = str(max(stats.shapes.values(), default=0))
+                    headers["X-DB-Lazy-Loads"] = str(len(stats.lazy_loads))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_metrics)
+            finally:
+                report(stats, self.nplusone_threshold)
@@ -10,6 +10,11 @@ from .user import User
 from .category import ProductCategory
 from .product import Product
 from .product_image import ProductImage
+from .image_blob import ImageBlob
 from .stock import StockMovement, StockMovementType
 from .customer import Customer
-from .order import Order, OrderItem
\ No newline at end of file
+from .order import Order, OrderItem
+from .revoked_token import RevokedToken
+from .user_token_version import UserTokenVersion
+from .tenant_shard import TenantShard, TenantShardStatus
+from .catalog_version import CatalogVersion
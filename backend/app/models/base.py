@@ -1,7 +1,7 @@
 # app/models/base.py
 from sqlalchemy.ext.declarative import as_declarative, declared_attr
-from sqlalchemy import Column, DateTime, func, String
-import uuid
+from sqlalchemy import Column, DateTime, func
+from app.models.types import IdType, new_id
 
 @as_declarative()
 class Base:
@@ -14,7 +14,7 @@ class Base:
         return cls.__name__.lower() + "s"
 
     # PK padrão UUID
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
+    id = Column(IdType(), primary_key=True, default=new_id, index=True)
 
     # Timestamps padronizados
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
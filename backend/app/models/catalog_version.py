@@ -0,0 +1,30 @@
+# app/models/catalog_version.py
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer
+from app.database import Base
+from app.models.types import IdType, new_id
+from datetime import datetime
+
+# =========================
+# Versão do catálogo por empresa
+# =========================
+class CatalogVersion(Base):
+    """
+    Contador incrementado na mesma transação de qualquer escrita em
+    produtos, imagens ou categorias da empresa (app.crud.catalog_version).
+    O cache de respostas do catálogo (app.services.catalog_cache) só serve
+    entradas montadas com a versão atual.
+    """
+    __tablename__ = "catalog_versions"
+
+    id = Column(IdType(), primary_key=True, default=new_id)
+    company_id = Column(IdType(), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False, unique=True)
+    version = Column(Integer, nullable=False, default=1)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Marca d'água da releitura incremental feita por cada worker
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("idx_catalog_version_updated_at", "updated_at"),
+    )
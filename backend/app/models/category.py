@@ -1,23 +1,23 @@
 # app/models/category.py
 
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
-import uuid
+from app.models.types import IdType, new_id
+from app.models.tenant import TenantScoped
 
 # =========================
 # ProductCategory
 # =========================
-class ProductCategory(Base):
+class ProductCategory(TenantScoped, Base):
     __tablename__ = "product_categories"
 
     # Identificador único da categoria (UUID)
     id = Column(
-        String(36),
+        IdType(),
         primary_key=True,
-        default=lambda: str(uuid.uuid4()),
-        index=True
+        default=new_id,
     )
 
     # Nome da categoria
@@ -39,13 +39,14 @@ class ProductCategory(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     # Multi-tenant
-    company_id = Column(String(36), ForeignKey("companies.id", ondelete="SET NULL"), nullable=True)
-    store_id = Column(String(36), ForeignKey("stores.id", ondelete="SET NULL"), nullable=True)
+    company_id = Column(IdType(), ForeignKey("companies.id", ondelete="SET NULL"), nullable=True)
+    store_id = Column(IdType(), ForeignKey("stores.id", ondelete="SET NULL"), nullable=True)
 
     # =========================
     # Relacionamentos
     # =========================
-    products = relationship("Product", back_populates="category")
+    # selectin: a resposta da API inclui os produtos da categoria
+    products = relationship("Product", back_populates="category", lazy="selectin")
 
     # =========================
     # Métodos auxiliares
@@ -66,3 +67,15 @@ class ProductCategory(Base):
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
+
+# =========================
+# Índices para paginação por keyset (ordenação por nome)
+# =========================
+Index(
+    "idx_category_tenant_name",
+    ProductCategory.company_id,
+    ProductCategory.store_id,
+    ProductCategory.is_active,
+    ProductCategory.name,
+    ProductCategory.id,
+)
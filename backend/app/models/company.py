@@ -3,8 +3,8 @@
 from sqlalchemy import Column, String, DateTime
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.types import IdType, new_id
 from datetime import datetime
-import uuid
 
 class Company(Base):
     __tablename__ = "companies"
@@ -12,7 +12,7 @@ class Company(Base):
     # =========================
     # Primary Key
     # =========================
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
+    id = Column(IdType(), primary_key=True, default=new_id)
 
     # =========================
     # Dados da empresa
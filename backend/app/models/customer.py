@@ -1,23 +1,25 @@
 # app/models/customer.py
 
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.types import IdType, new_id
+from app.models.tenant import TenantScoped
 from datetime import datetime
-import uuid
 
-class Customer(Base):
+class Customer(TenantScoped, Base):
     __tablename__ = "customers"
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
+    id = Column(IdType(), primary_key=True, default=new_id)
     name = Column(String(255), nullable=False)
     email = Column(String(255), unique=True, nullable=True)
 
     # =========================
     # Multi-tenant
     # =========================
-    company_id = Column(String(36), ForeignKey("companies.id", ondelete="SET NULL"), nullable=True, index=True)
-    store_id = Column(String(36), ForeignKey("stores.id", ondelete="SET NULL"), nullable=True, index=True)
+    # company_id: coberto por idx_customer_tenant (prefixo)
+    company_id = Column(IdType(), ForeignKey("companies.id", ondelete="SET NULL"), nullable=True)
+    store_id = Column(IdType(), ForeignKey("stores.id", ondelete="SET NULL"), nullable=True, index=True)
 
     company = relationship("Company", back_populates="customers")
     store = relationship("Store", back_populates="customers")
@@ -46,3 +48,9 @@ class Customer(Base):
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
+
+# =========================
+# Índices
+# =========================
+# Clientes do tenant (contagem do dashboard)
+Index("idx_customer_tenant", Customer.company_id, Customer.store_id)
@@ -0,0 +1,42 @@
+# app/models/image_blob.py
+
+from sqlalchemy import Column, DateTime, Index, Integer, JSON, String
+from app.database import Base
+from app.models.product_image import IMAGE_PENDING
+from datetime import datetime
+
+# Além dos estados de ProductImage: um upload já está gerando os arquivos
+BLOB_PROCESSING = "processing"
+
+# =========================
+# Imagem por conteúdo
+# =========================
+class ImageBlob(Base):
+    """
+    Arquivos de imagem endereçados pelo sha256 do upload original: o WEBP
+    e as variantes ficam em static/blobs/ (app.services.images) e servem
+    todas as ProductImage com o mesmo conteúdo, de qualquer produto ou
+    tenant do shard. `refcount` conta as ProductImage que apontam para o
+    blob (app.crud.image_blob); zerado há mais que a carência, o coletor
+    apaga a linha e, sem referência em nenhum shard, os arquivos.
+    """
+    __tablename__ = "image_blobs"
+
+    hash = Column(String(64), primary_key=True)
+    status = Column(String(20), nullable=False, default=IMAGE_PENDING)
+    refcount = Column(Integer, nullable=False, default=0)
+
+    # Resultado do processamento, copiado para as ProductImage
+    variants = Column(JSON, nullable=True)
+    placeholder = Column(String(1000), nullable=True)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    error = Column(String(255), nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Último upload/mudança de refcount: a carência do coletor conta daqui
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("idx_image_blob_refcount_updated", "refcount", "updated_at"),
+    )
@@ -1,10 +1,12 @@
 # app/models/order.py
 
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Enum, Index
+from sqlalchemy import Column, Float, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.types import IdType, new_id
+from app.models.tenant import TenantScoped
+from app.models.partitioning import PartitionSpec, partition_by
 from datetime import datetime
-import uuid
 import enum
 
 # =========================
@@ -19,14 +21,15 @@ class OrderStatus(str, enum.Enum):
 # =========================
 # Pedido
 # =========================
-class Order(Base):
+class Order(TenantScoped, Base):
     __tablename__ = "orders"
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
-    user_id = Column(String(36), ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
-    customer_id = Column(String(36), ForeignKey("customers.id", ondelete="SET NULL"), nullable=True, index=True)
-    company_id = Column(String(36), ForeignKey("companies.id", ondelete="SET NULL"), nullable=True, index=True)
-    store_id = Column(String(36), ForeignKey("stores.id", ondelete="SET NULL"), nullable=True, index=True)
+    id = Column(IdType(), primary_key=True, default=new_id)
+    user_id = Column(IdType(), ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    customer_id = Column(IdType(), ForeignKey("customers.id", ondelete="SET NULL"), nullable=True, index=True)
+    # company_id: coberto por idx_order_tenant_created (prefixo)
+    company_id = Column(IdType(), ForeignKey("companies.id", ondelete="SET NULL"), nullable=True)
+    store_id = Column(IdType(), ForeignKey("stores.id", ondelete="SET NULL"), nullable=True, index=True)
 
     total = Column(Float, default=0.0, nullable=False)
     status = Column(Enum(OrderStatus, name="order_status_enum"), default=OrderStatus.PENDING, nullable=False)
@@ -36,7 +39,7 @@ class Order(Base):
     customer = relationship("Customer", back_populates="orders")
     company = relationship("Company", back_populates="orders")
     store = relationship("Store", back_populates="orders")
-    items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
+    items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan", lazy="selectin")
 
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -69,14 +72,15 @@ class Order(Base):
 # =========================
 # Item do Pedido
 # =========================
-class OrderItem(Base):
+class OrderItem(TenantScoped, Base):
     __tablename__ = "order_items"
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
-    order_id = Column(String(36), ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
-    product_id = Column(String(36), ForeignKey("products.id", ondelete="RESTRICT"), nullable=False, index=True)
-    company_id = Column(String(36), ForeignKey("companies.id", ondelete="SET NULL"), nullable=True, index=True)
-    store_id = Column(String(36), ForeignKey("stores.id", ondelete="SET NULL"), nullable=True, index=True)
+    id = Column(IdType(), primary_key=True, default=new_id)
+    order_id = Column(IdType(), ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
+    product_id = Column(IdType(), ForeignKey("products.id", ondelete="RESTRICT"), nullable=False, index=True)
+    # company_id: coberto por idx_order_item_company_store (prefixo)
+    company_id = Column(IdType(), ForeignKey("companies.id", ondelete="SET NULL"), nullable=True)
+    store_id = Column(IdType(), ForeignKey("stores.id", ondelete="SET NULL"), nullable=True, index=True)
 
     quantity = Column(Float, nullable=False)
     unit_price = Column(Float, nullable=False)
@@ -119,5 +123,15 @@ class OrderItem(Base):
 # =========================
 # Índices adicionais para consultas multi-tenant
 # =========================
-Index("idx_order_company_store", Order.company_id, Order.store_id)
 Index("idx_order_item_company_store", OrderItem.company_id, OrderItem.store_id)
+
+# Paginação por keyset: pedidos do tenant do mais recente para o mais antigo
+# (também atende a contagem por tenant do dashboard)
+Index("idx_order_tenant_created", Order.company_id, Order.store_id, Order.created_at, Order.id)
+
+# =========================
+# Particionamento por mês (opcional, MySQL — migrations/partitioning.py)
+# =========================
+# Os itens gravam o mesmo created_at do pedido e caem no mesmo mês
+partition_by(Order, PartitionSpec())
+partition_by(OrderItem, PartitionSpec())
@@ -0,0 +1,82 @@
+# app/models/partitioning.py
+
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+# =========================
+# Configuração
+# =========================
+
+# Opt-in (só MySQL): tabelas de histórico particionadas por mês de created_at.
+# Converter um banco existente exige migrations/partitioning.py.
+DB_PARTITIONING = os.getenv("DB_PARTITIONING", "false").lower() in ("1", "true", "yes")
+
+# Subpartições por hash (KEY) de company_id dentro de cada mês; 0 = desligado.
+# Exige company_id NOT NULL (passa a fazer parte da PK).
+DB_PARTITION_COMPANY_BUCKETS = int(os.getenv("DB_PARTITION_COMPANY_BUCKETS", "0"))
+
+# Partições mensais criadas à frente do mês atual
+DB_PARTITION_MONTHS_AHEAD = int(os.getenv("DB_PARTITION_MONTHS_AHEAD", "3"))
+
+# Meses de histórico mantidos na tabela; 0 = nunca remove partições
+DB_PARTITION_RETENTION_MONTHS = int(os.getenv("DB_PARTITION_RETENTION_MONTHS", "0"))
+
+# Partições vencidas: "exchange" move para uma tabela de arquivo, "drop" apaga
+DB_PARTITION_RETENTION_MODE = os.getenv("DB_PARTITION_RETENTION_MODE", "exchange")
+
+# Chave em Table.info com o PartitionSpec
+PARTITION_INFO_KEY = "partitioning"
+
+
+# =========================
+# Declaração nos models
+# =========================
+@dataclass(frozen=True)
+class PartitionSpec:
+    """
+    Como a tabela é particionada no MySQL:
+    `PARTITION BY RANGE COLUMNS(<column>)` com uma partição por mês e,
+    com DB_PARTITION_COMPANY_BUCKETS > 0, `SUBPARTITION BY KEY(<key_column>)`.
+
+    As consultas por tenant do CRUD sempre limitam `column` a uma faixa de
+    meses (app.crud.pagination.keyset_paginate_partitioned), para o MySQL
+    podar as partições fora dela.
+    """
+    column: str = "created_at"
+    key_column: Optional[str] = "company_id"
+
+    @property
+    def company_buckets(self) -> int:
+        return DB_PARTITION_COMPANY_BUCKETS if self.key_column else 0
+
+
+def partition_by(model, spec: PartitionSpec) -> None:
+    model.__table__.info[PARTITION_INFO_KEY] = spec
+
+
+def partitioned_tables(metadata) -> dict:
+    """{nome da tabela: (Table, PartitionSpec)} dos models que declararam partição."""
+    return {
+        table.name: (table, table.info[PARTITION_INFO_KEY])
+        for table in metadata.sorted_tables
+        if PARTITION_INFO_KEY in table.info
+    }
+
+
+# =========================
+# Meses
+# =========================
+def month_floor(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    index = value.year * 12 + value.month - 1 + months
+    return value.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month_start: datetime) -> str:
+    """Nome da partição que guarda o mês: p202601 = [2026-01-01, 2026-02-01)."""
+    return month_start.strftime("p%Y%m")
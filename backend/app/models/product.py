@@ -1,21 +1,36 @@
 # app/models/product.py
 
-from sqlalchemy import Column, String, Float, Boolean, Numeric, ForeignKey, DateTime
+from sqlalchemy import Column, Computed, String, Float, Boolean, Numeric, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.types import IdType, new_id
+from app.models.tenant import TenantScoped
 from datetime import datetime
-import uuid
+
+# =========================
+# Preço de venda
+# =========================
+# Preço em promoção (show_in_promotion com price_promotion) ou cheio, mais
+# os impostos (percentuais). Coluna gerada: o banco recalcula em qualquer
+# escrita (ORM, upsert da importação, SQL direto) e ordena/filtra pelo índice.
+EFFECTIVE_PRICE_SQL = (
+    "ROUND("
+    "(CASE WHEN show_in_promotion = 1 AND price_promotion IS NOT NULL THEN price_promotion ELSE price END)"
+    " * (100 + COALESCE(icms, 0) + COALESCE(ipi, 0) + COALESCE(pis, 0) + COALESCE(cofins, 0)) / 100"
+    ", 2)"
+)
+
 
 # =========================
 # Produto
 # =========================
-class Product(Base):
+class Product(TenantScoped, Base):
     __tablename__ = "products"
 
     # =========================
     # Primary Key
     # =========================
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
+    id = Column(IdType(), primary_key=True, default=new_id)
 
     # =========================
     # Dados básicos do produto
@@ -23,7 +38,8 @@ class Product(Base):
     name = Column(String(255), nullable=False)
     description = Column(String(1000), nullable=True)
     price = Column(Float, nullable=False)
-    sku = Column(String(100), unique=True, index=True, nullable=False)
+    # Único por empresa (uq_product_company_sku)
+    sku = Column(String(100), nullable=False)
     stock_quantity = Column(Float, default=0)
     stock_minimum = Column(Float, default=0)
     price_promotion = Column(Float, nullable=True)
@@ -35,8 +51,9 @@ class Product(Base):
     # =========================
     # Multi-Tenant
     # =========================
-    company_id = Column(String(36), ForeignKey("companies.id", ondelete="SET NULL"), nullable=True, index=True)
-    store_id = Column(String(36), ForeignKey("stores.id", ondelete="SET NULL"), nullable=True, index=True)
+    # company_id: coberto por idx_product_tenant_name (prefixo)
+    company_id = Column(IdType(), ForeignKey("companies.id", ondelete="SET NULL"), nullable=True)
+    store_id = Column(IdType(), ForeignKey("stores.id", ondelete="SET NULL"), nullable=True, index=True)
 
     company = relationship("Company", back_populates="products")
     store = relationship("Store", back_populates="products")
@@ -44,7 +61,7 @@ class Product(Base):
     # =========================
     # Categoria
     # =========================
-    category_id = Column(String(36), ForeignKey("product_categories.id"), nullable=True)
+    category_id = Column(IdType(), ForeignKey("product_categories.id"), nullable=True)
     category = relationship("ProductCategory", back_populates="products")
 
     # =========================
@@ -55,10 +72,16 @@ class Product(Base):
     pis = Column(Numeric(10, 2), nullable=True)
     cofins = Column(Numeric(10, 2), nullable=True)
 
+    # Preço de venda com impostos (EFFECTIVE_PRICE_SQL); somente leitura.
+    # DECIMAL exato: empates no keyset (sort=price) comparam valores iguais
+    effective_price = Column(Numeric(12, 2), Computed(EFFECTIVE_PRICE_SQL, persisted=True))
+
     # =========================
     # Relacionamentos
     # =========================
-    images = relationship("ProductImage", back_populates="product", cascade="all, delete-orphan")
+    # selectin: imagens são sempre serializadas junto do produto e o
+    # carregamento precisa funcionar também dentro da AsyncSession
+    images = relationship("ProductImage", back_populates="product", cascade="all, delete-orphan", lazy="selectin")
     stock_movements = relationship("StockMovement", back_populates="product", cascade="all, delete-orphan")
 
     # =========================
@@ -100,6 +123,34 @@ class Product(Base):
             "ipi": float(self.ipi) if self.ipi else None,
             "pis": float(self.pis) if self.pis else None,
             "cofins": float(self.cofins) if self.cofins else None,
+            "effective_price": float(self.effective_price) if self.effective_price is not None else None,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
+
+# =========================
+# Índices para paginação por keyset (catálogo ordenado por nome)
+# =========================
+# Também atende contagens e o "estoque baixo" do dashboard (prefixo
+# company_id, store_id, is_active)
+Index("idx_product_tenant_name", Product.company_id, Product.store_id, Product.is_active, Product.name, Product.id)
+
+# Catálogo filtrado por categoria (GET /products/?category_id=), mesma
+# ordenação por (name, id) do keyset
+Index(
+    "idx_product_tenant_category_name",
+    Product.company_id, Product.store_id, Product.is_active, Product.category_id, Product.name, Product.id,
+)
+
+# Catálogo ordenado/filtrado por preço de venda (GET /products/?sort=price)
+Index(
+    "idx_product_tenant_price",
+    Product.company_id, Product.store_id, Product.is_active, Product.effective_price, Product.id,
+)
+
+# SKU único por empresa: chave do upsert da importação em massa e, com
+# shards, a única unicidade que cada banco consegue garantir
+Index("uq_product_company_sku", Product.company_id, Product.sku, unique=True)
+
+# Produtos de uma categoria (selectin de ProductCategory.products)
+Index("idx_product_category", Product.category_id)
@@ -1,32 +1,39 @@
 # app/models/product_image.py
 
-from sqlalchemy import Column, String, ForeignKey, DateTime
+from sqlalchemy import Column, String, ForeignKey, DateTime, Integer, JSON
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.types import IdType, new_id
+from app.models.tenant import TenantScoped
 from datetime import datetime
-import uuid
+
+# =========================
+# Estado do processamento (app.services.images)
+# =========================
+IMAGE_PENDING = "pending"  # arquivo bruto gravado, variantes ainda não geradas
+IMAGE_READY = "ready"
+IMAGE_FAILED = "failed"    # arquivo não decodificou; motivo em `error`
 
 # =========================
 # Imagem de Produto
 # =========================
-class ProductImage(Base):
+class ProductImage(TenantScoped, Base):
     __tablename__ = "product_images"
 
     # =========================
     # Primary Key
     # =========================
     id = Column(
-        String(36),
+        IdType(),
         primary_key=True,
-        default=lambda: str(uuid.uuid4()),
-        index=True
+        default=new_id,
     )
 
     # =========================
     # Relacionamento com Produto
     # =========================
     product_id = Column(
-        String(36),
+        IdType(),
         ForeignKey("products.id", ondelete="CASCADE"),
         nullable=False,
         index=True
@@ -36,13 +43,22 @@ class ProductImage(Base):
     # =========================
     # Dados da imagem
     # =========================
-    image_url = Column(String(500), nullable=False)
+    image_url = Column(String(500), nullable=False)  # WEBP original
+    # ImageBlob com os arquivos (sem FK: o blob é por shard e o coletor só
+    # apaga arquivos sem referência em nenhum shard); nulo = URL externa
+    blob_hash = Column(String(64), nullable=True, index=True)
+    status = Column(String(20), default=IMAGE_READY, server_default=IMAGE_READY, nullable=False)
+    variants = Column(JSON, nullable=True)            # nome -> URL (thumb, medium, large)
+    placeholder = Column(String(1000), nullable=True)  # data URI minúsculo (LQIP)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    error = Column(String(255), nullable=True)
 
     # =========================
     # Multi-Tenant
     # =========================
-    company_id = Column(String(36), ForeignKey("companies.id"), nullable=True, index=True)
-    store_id = Column(String(36), ForeignKey("stores.id"), nullable=True, index=True)
+    company_id = Column(IdType(), ForeignKey("companies.id"), nullable=True, index=True)
+    store_id = Column(IdType(), ForeignKey("stores.id"), nullable=True, index=True)
 
     # =========================
     # Auditoria
@@ -65,6 +81,13 @@ class ProductImage(Base):
             "id": self.id,
             "product_id": self.product_id,
             "image_url": self.image_url,
+            "blob_hash": self.blob_hash,
+            "status": self.status,
+            "variants": self.variants,
+            "placeholder": self.placeholder,
+            "width": self.width,
+            "height": self.height,
+            "error": self.error,
             "company_id": self.company_id,
             "store_id": self.store_id,
             "tenant_id": self.tenant_id,
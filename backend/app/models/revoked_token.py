@@ -0,0 +1,31 @@
+# app/models/revoked_token.py
+
+from sqlalchemy import Column, String, DateTime, Index
+from app.database import Base
+from app.models.types import IdType, new_id
+from datetime import datetime
+
+# =========================
+# Token revogado (logout)
+# =========================
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    id = Column(IdType(), primary_key=True, default=new_id)
+
+    # Claim "jti" do token revogado
+    jti = Column(String(64), unique=True, nullable=False)
+    user_id = Column(IdType(), nullable=True)
+
+    # "exp" do token: depois disso a linha pode ser apagada
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    # Marca d'água da atualização incremental do filtro em memória
+    revoked_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("idx_revoked_token_revoked_at", "revoked_at"),
+    )
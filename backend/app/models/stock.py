@@ -1,9 +1,11 @@
 # app/models/stock.py
 
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Float, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
-import uuid
+from app.models.types import IdType, new_id
+from app.models.tenant import TenantScoped
+from app.models.partitioning import PartitionSpec, partition_by
 import enum
 from datetime import datetime
 
@@ -17,18 +19,19 @@ class StockMovementType(str, enum.Enum):
 # =========================
 # Movimento de estoque
 # =========================
-class StockMovement(Base):
+class StockMovement(TenantScoped, Base):
     __tablename__ = "stock_movements"
 
     # =========================
     # Primary Key
     # =========================
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
+    id = Column(IdType(), primary_key=True, default=new_id)
 
     # =========================
     # Relacionamento com Produto
     # =========================
-    product_id = Column(String(36), ForeignKey("products.id", ondelete="CASCADE"), nullable=False, index=True)
+    # product_id: coberto por idx_stock_movement_product_created (prefixo)
+    product_id = Column(IdType(), ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
     product = relationship("Product", back_populates="stock_movements")
 
     # =========================
@@ -40,8 +43,8 @@ class StockMovement(Base):
     # =========================
     # Multi-Tenant
     # =========================
-    company_id = Column(String(36), ForeignKey("companies.id"), nullable=True, index=True)
-    store_id = Column(String(36), ForeignKey("stores.id"), nullable=True, index=True)
+    company_id = Column(IdType(), ForeignKey("companies.id"), nullable=True, index=True)
+    store_id = Column(IdType(), ForeignKey("stores.id"), nullable=True, index=True)
 
     # =========================
     # Auditoria
@@ -74,3 +77,20 @@ class StockMovement(Base):
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
+
+# =========================
+# Índices para paginação por keyset (histórico do produto por data)
+# =========================
+Index(
+    "idx_stock_movement_product_created",
+    StockMovement.product_id,
+    StockMovement.company_id,
+    StockMovement.store_id,
+    StockMovement.created_at,
+    StockMovement.id,
+)
+
+# =========================
+# Particionamento por mês (opcional, MySQL — migrations/partitioning.py)
+# =========================
+partition_by(StockMovement, PartitionSpec())
@@ -3,8 +3,8 @@
 from sqlalchemy import Column, String, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.types import IdType, new_id
 from datetime import datetime
-import uuid
 
 class Store(Base):
     __tablename__ = "stores"
@@ -12,7 +12,7 @@ class Store(Base):
     # ==========================
     # IDENTIFICAÇÃO
     # ==========================
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
+    id = Column(IdType(), primary_key=True, default=new_id)
 
     # ==========================
     # DADOS DA LOJA
@@ -23,7 +23,7 @@ class Store(Base):
     # ==========================
     # MULTI-TENANT
     # ==========================
-    company_id = Column(String(36), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False, index=True)
+    company_id = Column(IdType(), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False, index=True)
     company = relationship("Company", back_populates="stores")
 
     # ==========================
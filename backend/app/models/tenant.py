@@ -0,0 +1,21 @@
+# app/models/tenant.py
+
+from sqlalchemy import Column
+
+from app.models.types import IdType
+
+
+# =========================
+# Marcador de model multi-tenant
+# =========================
+class TenantScoped:
+    """
+    Models com `company_id`/`store_id` que pertencem a um tenant. Em uma
+    sessão vinculada a um Tenant (app.crud.tenant_scope), todo SELECT,
+    UPDATE e DELETE ORM desses models recebe o filtro do tenant.
+
+    As colunas abaixo só servem para o filtro (lambda) ser analisado uma
+    vez sobre o mixin; cada model declara as suas, com as FKs próprias.
+    """
+    company_id = Column(IdType(), nullable=True)
+    store_id = Column(IdType(), nullable=True)
@@ -0,0 +1,37 @@
+# app/models/tenant_shard.py
+
+from sqlalchemy import Column, String, DateTime, Enum, ForeignKey
+from app.database import Base
+from app.models.types import IdType
+from datetime import datetime
+import enum
+
+# =========================
+# Estado do tenant no mapa de shards
+# =========================
+class TenantShardStatus(str, enum.Enum):
+    ACTIVE = "active"
+    # Mudança de shard em andamento: leituras seguem, escritas recebem 503
+    READ_ONLY = "read_only"
+
+# =========================
+# Mapa empresa -> shard (banco diretório)
+# =========================
+class TenantShard(Base):
+    """
+    Em qual shard ficam os dados de uma empresa. Empresas sem linha aqui
+    ficam no shard padrão (DB_DEFAULT_SHARD). Lido em memória por
+    app.database.shard_map; alterado por migrations/move_tenant.py.
+    """
+    __tablename__ = "tenant_shards"
+
+    company_id = Column(IdType(), ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True)
+    shard = Column(String(64), nullable=False)
+    status = Column(
+        Enum(TenantShardStatus, name="tenant_shard_status_enum"),
+        default=TenantShardStatus.ACTIVE,
+        nullable=False,
+    )
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
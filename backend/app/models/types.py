@@ -0,0 +1,109 @@
+# app/models/types.py
+
+import os
+import secrets
+import threading
+import time
+import uuid
+from typing import Optional
+
+from sqlalchemy import BINARY, String
+from sqlalchemy.types import TypeDecorator
+
+# =========================
+# Configuração
+# =========================
+
+# Opt-in: chaves UUIDv7 armazenadas como BINARY(16) em vez de String(36).
+# Mudar em um banco existente exige a migração em migrations/compact_ids.py.
+DB_COMPACT_IDS = os.getenv("DB_COMPACT_IDS", "false").lower() in ("1", "true", "yes")
+
+# =========================
+# UUID v7 (RFC 9562)
+# =========================
+
+_uuid7_lock = threading.Lock()
+_uuid7_last = (0, 0)  # (timestamp_ms, contador de 12 bits)
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Gera um UUID v7: 48 bits de timestamp Unix em ms + 74 bits aleatórios.
+
+    Dentro do mesmo milissegundo, os 12 bits de rand_a funcionam como
+    contador, então IDs gerados por este processo são estritamente crescentes
+    e as inserções caem no fim do índice clusterizado do InnoDB.
+    """
+    global _uuid7_last
+
+    with _uuid7_lock:
+        timestamp_ms = time.time_ns() // 1_000_000
+        last_ms, counter = _uuid7_last
+        if timestamp_ms <= last_ms:
+            timestamp_ms = last_ms
+            counter += 1
+            if counter > 0xFFF:
+                timestamp_ms += 1
+                counter = 0
+        else:
+            counter = secrets.randbits(11)
+        _uuid7_last = (timestamp_ms, counter)
+
+    value = (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76
+    value |= counter << 64
+    value |= 0b10 << 62
+    value |= secrets.randbits(62)
+    return uuid.UUID(int=value)
+
+
+def new_id() -> str:
+    """
+    Default das chaves primárias: UUIDv7 no modo compacto, UUIDv4 no legado.
+    A API sempre recebe e devolve a forma canônica em string.
+    """
+    return str(uuid7() if DB_COMPACT_IDS else uuid.uuid4())
+
+
+# =========================
+# Tipo de coluna para IDs
+# =========================
+
+
+class IdType(TypeDecorator):
+    """
+    Tipo de todas as chaves primárias e estrangeiras.
+
+    - Modo legado: String(36), exatamente o layout atual.
+    - Modo compacto (DB_COMPACT_IDS): BINARY(16), convertido de/para a
+      string canônica do UUID, então models, schemas e rotas não mudam.
+    """
+    impl = String(36)
+    cache_ok = True
+
+    def __init__(self, compact: Optional[bool] = None):
+        super().__init__()
+        self.compact = DB_COMPACT_IDS if compact is None else compact
+
+    def load_dialect_impl(self, dialect):
+        if self.compact:
+            return dialect.type_descriptor(BINARY(16))
+        return dialect.type_descriptor(String(36))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, uuid.UUID):
+            return value.bytes if self.compact else str(value)
+        if not self.compact:
+            return value
+        try:
+            return uuid.UUID(value).bytes
+        except ValueError:
+            # ID malformado: nunca casa com um BINARY(16) válido
+            return str(value).encode()
+
+    def process_result_value(self, value, dialect):
+        if value is None or not self.compact:
+            return value
+        return str(uuid.UUID(bytes=bytes(value)))
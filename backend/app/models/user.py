@@ -1,10 +1,10 @@
 # app/models/user.py
 
-from sqlalchemy import Column, String, Numeric, DateTime, ForeignKey
+from sqlalchemy import Column, String, Numeric, DateTime, ForeignKey, Integer
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.types import IdType, new_id
 from datetime import datetime
-import uuid
 
 class User(Base):
     __tablename__ = "users"
@@ -12,7 +12,7 @@ class User(Base):
     # ==========================
     # IDENTIFICAÇÃO
     # ==========================
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(IdType(), primary_key=True, default=new_id)
     name = Column(String(100), nullable=False)
     email = Column(String(150), unique=True, nullable=False, index=True)
     password = Column(String(255), nullable=False)  # hashed
@@ -29,11 +29,15 @@ class User(Base):
     # cliente | vendedor | admin | superadmin
     role = Column(String(50), default="cliente", nullable=False)
 
+    # Versão dos tokens: incrementada quando role/tenant mudam ou o usuário
+    # é removido, invalidando os tokens emitidos antes (claim "ver")
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
+
     # ==========================
     # MULTI-TENANT
     # ==========================
-    company_id = Column(String(36), ForeignKey("companies.id", ondelete="SET NULL"), nullable=True)
-    store_id = Column(String(36), ForeignKey("stores.id", ondelete="SET NULL"), nullable=True)
+    company_id = Column(IdType(), ForeignKey("companies.id", ondelete="SET NULL"), nullable=True)
+    store_id = Column(IdType(), ForeignKey("stores.id", ondelete="SET NULL"), nullable=True)
 
     company = relationship("app.models.company.Company", back_populates="users")
     store = relationship("app.models.store.Store", back_populates="users")
@@ -0,0 +1,30 @@
+# app/models/user_token_version.py
+
+from sqlalchemy import Column, DateTime, Index, Integer
+from app.database import Base
+from app.models.types import IdType, new_id
+from datetime import datetime
+
+# =========================
+# Versão dos tokens por usuário (compartilhada entre workers)
+# =========================
+class UserTokenVersion(Base):
+    """
+    Última `users.token_version` de cada usuário cujo role/tenant mudou ou
+    que foi removido (app.services.token_versions). Cada worker relê as
+    linhas alteradas e recusa, mesmo com o Principal em cache, tokens com
+    "ver" menor. Sem FK para users: a linha sobrevive à remoção do usuário.
+    """
+    __tablename__ = "user_token_versions"
+
+    id = Column(IdType(), primary_key=True, default=new_id)
+    user_id = Column(IdType(), nullable=False, unique=True)
+    version = Column(Integer, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Marca d'água da releitura incremental feita por cada worker
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("idx_user_token_version_updated_at", "updated_at"),
+    )
@@ -1,18 +1,20 @@
 # app/routes/categories.py
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from uuid import UUID
 
 # CRUD
 from app.crud.category import (
-    create_category,
-    get_category,
-    get_categories,
-    update_category,
-    delete_category
+    create_category_async,
+    get_category_async,
+    get_categories_async,
+    update_category_async,
+    delete_category_async
 )
+from app.crud.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
 
 from app.schemas.category import (
     ProductCategory,
@@ -20,9 +22,9 @@ from app.schemas.category import (
     ProductCategoryUpdate
 )
 
-from app.database import get_db
-from app.models.user import User
-from app.security import get_current_user
+from app.database import get_async_db, get_async_read_db
+from app.security import get_current_principal, get_current_tenant, Tenant, Principal
+from app.services.catalog_cache import catalog_cache
 
 # ==============================
 # Router
@@ -32,74 +34,95 @@ router = APIRouter(prefix="/categories", tags=["Categories"])
 # ==============================
 # DEPENDÊNCIAS DE PERMISSÃO
 # ==============================
-def require_admin(user: User = Depends(get_current_user)):
+async def require_admin(user: Principal = Depends(get_current_principal)):
     """Permite acesso apenas a admins e superadmins"""
     if user.role not in ["admin", "superadmin"]:
         raise HTTPException(status_code=403, detail="Acesso negado")
     return user
 
 # =========================
-# ROTAS PÚBLICAS
+# ROTAS DE LEITURA (TENANT)
 # =========================
 
+# Serialização das respostas em cache (mesma validação do response_model)
+_CATEGORY_LIST = TypeAdapter(List[ProductCategory])
+
+
 @router.get("/{category_id}", response_model=ProductCategory)
-def get_category_endpoint(
+async def get_category_endpoint(
+    request: Request,
     category_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db),
+    tenant: Tenant = Depends(get_current_tenant),
 ):
-    """Obter uma categoria específica (público)"""
-    db_category = get_category(db=db, category_id=str(category_id))
-    if db_category is None:
-        raise HTTPException(status_code=404, detail="Category not found")
-    return db_category
+    """Obter uma categoria específica do tenant"""
+    async def build():
+        db_category = await get_category_async(db, str(category_id), tenant)
+        if db_category is None:
+            raise HTTPException(status_code=404, detail="Category not found")
+        return ProductCategory.model_validate(db_category).model_dump_json().encode(), {}
+
+    return await catalog_cache.respond(request, db, tenant, build)
 
 @router.get("/", response_model=List[ProductCategory])
-def list_categories_endpoint(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+async def list_categories_endpoint(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db),
+    tenant: Tenant = Depends(get_current_tenant),
 ):
-    """Listar todas as categorias (público)"""
-    return get_categories(db=db, skip=skip, limit=limit)
+    """Listar as categorias do tenant (próxima página no header X-Next-Cursor)"""
+    async def build():
+        page = await get_categories_async(db, tenant, cursor=cursor, limit=limit)
+        headers = {NEXT_CURSOR_HEADER: page.next_cursor} if page.next_cursor else {}
+        categories = _CATEGORY_LIST.validate_python(page.items, from_attributes=True)
+        return _CATEGORY_LIST.dump_json(categories), headers
+
+    return await catalog_cache.respond(request, db, tenant, build)
 
 # =========================
 # ROTAS ADMIN
 # =========================
 
 @router.post("/", response_model=ProductCategory)
-def create_category_endpoint(
+async def create_category_endpoint(
     category_data: ProductCategoryCreate,
-    db: Session = Depends(get_db),
-    user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(require_admin),
+    tenant: Tenant = Depends(get_current_tenant),
 ):
     """Criar uma nova categoria"""
-    return create_category(db=db, category_data=category_data)
+    return await create_category_async(db, category_data, tenant)
 
 @router.put("/{category_id}", response_model=ProductCategory)
-def update_category_endpoint(
+async def update_category_endpoint(
     category_id: UUID,
     category_data: ProductCategoryUpdate,
-    db: Session = Depends(get_db),
-    user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(require_admin),
+    tenant: Tenant = Depends(get_current_tenant),
 ):
     """Atualizar uma categoria existente"""
-    db_category = update_category(
-        db=db,
-        category_id=str(category_id),
-        category_data=category_data
+    db_category = await update_category_async(
+        db,
+        str(category_id),
+        category_data,
+        tenant
     )
     if db_category is None:
         raise HTTPException(status_code=404, detail="Category not found")
     return db_category
 
 @router.delete("/{category_id}", response_model=ProductCategory)
-def delete_category_endpoint(
+async def delete_category_endpoint(
     category_id: UUID,
-    db: Session = Depends(get_db),
-    user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(require_admin),
+    tenant: Tenant = Depends(get_current_tenant),
 ):
     """Excluir uma categoria"""
-    db_category = delete_category(db=db, category_id=str(category_id))
+    db_category = await delete_category_async(db, str(category_id), tenant)
     if db_category is None:
         raise HTTPException(status_code=404, detail="Category not found")
     return db_category
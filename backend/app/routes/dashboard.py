@@ -1,17 +1,12 @@
 # app/routes/dashboard.py
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.schemas.dashboard import (
-    DashboardResponse,
-    DashboardStats,
-    LowStockProduct
-)
-from app.crud.dashboard import get_dashboard_data
-from app.models.user import User
-from app.security import get_current_user
+from app.database import get_async_read_db
+from app.schemas.dashboard import DashboardResponse
+from app.crud.dashboard import get_dashboard_data_async
+from app.security import get_current_principal, get_current_tenant, Tenant, Principal
 
 # ==============================
 # Router
@@ -21,7 +16,7 @@ router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 # ==============================
 # DEPENDÊNCIA DE PERMISSÃO
 # ==============================
-def require_admin(user: User = Depends(get_current_user)):
+async def require_admin(user: Principal = Depends(get_current_principal)):
     if user.role not in ["admin", "superadmin"]:
         raise HTTPException(status_code=403, detail="Acesso negado")
     return user
@@ -30,30 +25,11 @@ def require_admin(user: User = Depends(get_current_user)):
 # Função do Dashboard (ADMIN)
 # ==============================
 @router.get("/", response_model=DashboardResponse)
-def get_dashboard(
-    db: Session = Depends(get_db),
-    user: User = Depends(require_admin),
+async def get_dashboard(
+    db: AsyncSession = Depends(get_async_read_db),
+    user: Principal = Depends(require_admin),
+    tenant: Tenant = Depends(get_current_tenant),
 ):
-    dashboard_data = get_dashboard_data(db)
-
-    low_stock_products = [
-        LowStockProduct(
-            product_id=product.id,
-            product_name=product.name,
-            stock_quantity=product.stock_quantity
-        )
-        for product in dashboard_data["low_stock_products"]
-    ]
-
-    stats = DashboardStats(
-        total_products=dashboard_data["total_products"],
-        total_categories=dashboard_data["total_categories"],
-        total_orders=dashboard_data["total_orders"],
-        total_customers=dashboard_data["total_customers"],
-        low_stock_products_count=len(low_stock_products),
-    )
-
-    return DashboardResponse(
-        stats=stats,
-        low_stock_products=low_stock_products
-    )
+    # O CRUD já devolve o formato de DashboardResponse (stats + low_stock_products)
+    dashboard_data = await get_dashboard_data_async(db, tenant)
+    return DashboardResponse(**dashboard_data)
@@ -0,0 +1,66 @@
+# app/routes/exports.py
+
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.crud.export import ExportFilters
+from app.services.exports import ExportUnavailable, open_export
+from app.services.principal_cache import Principal
+
+# ✅ AUTH CENTRALIZADA
+from app.dependencies import require_admin
+from app.security.tenant import get_current_tenant, Tenant
+
+# ==============================
+# Conjuntos exportáveis
+# ==============================
+class ExportDataset(str, Enum):
+    PRODUCTS = "products"
+    ORDERS = "orders"
+    ORDER_ITEMS = "order_items"
+    STOCK_MOVEMENTS = "stock_movements"
+
+# ==============================
+# Router
+# ==============================
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+# =========================
+# EXPORTAR (ADMIN)
+# =========================
+@router.get("/{dataset}")
+async def export_dataset(
+    dataset: ExportDataset,
+    format: str = Query("csv", pattern="^(csv|ndjson|parquet)$"),
+    created_from: Optional[datetime] = Query(None, description="created_at >= (inclusive)"),
+    created_to: Optional[datetime] = Query(None, description="created_at < (exclusivo)"),
+    status: Optional[str] = Query(
+        None, description="products: active|inactive; orders/order_items: status do pedido; stock_movements: IN|OUT"
+    ),
+    category_id: Optional[str] = Query(None, description="só products"),
+    product_id: Optional[str] = Query(None, description="order_items e stock_movements"),
+    user: Principal = Depends(require_admin),  # 🔒 Só admin
+    tenant: Tenant = Depends(get_current_tenant),
+):
+    """
+    Exporta todas as linhas do tenant em CSV, NDJSON ou Parquet, em
+    streaming: a memória não cresce com o total de linhas e a conexão com o
+    banco só fica ocupada enquanto o arquivo é enviado.
+    """
+    filters = ExportFilters(created_from, created_to, status, category_id, product_id)
+    try:
+        export = open_export(dataset.value, format, tenant, filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExportUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+    return StreamingResponse(
+        export.body,
+        media_type=export.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{export.filename}"'},
+    )
@@ -1,20 +1,20 @@
 # app/routes/orders.py
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
 from app.crud.order import (
-    create_order,
-    update_order_status,
-    delete_order,
-    list_orders,
-    get_order
+    create_order_async,
+    update_order_status_async,
+    delete_order_async,
+    list_orders_async,
+    get_order_async
 )
+from app.crud.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, page_response
 from app.schemas.order import OrderCreate, Order, OrderStatusUpdate
-from app.database import get_db
-from app.models.user import User
-from app.security import get_current_user
+from app.database import get_async_db, get_async_read_db
+from app.security import get_current_principal, get_current_tenant, Tenant, Principal
 
 # ==============================
 # Router
@@ -24,12 +24,12 @@ router = APIRouter(prefix="/orders", tags=["Orders"])
 # ==============================
 # DEPENDÊNCIAS DE PERMISSÃO
 # ==============================
-def require_staff(user: User = Depends(get_current_user)):
+async def require_staff(user: Principal = Depends(get_current_principal)):
     if user.role not in ["vendedor", "admin", "superadmin"]:
         raise HTTPException(status_code=403, detail="Acesso negado")
     return user
 
-def require_admin(user: User = Depends(get_current_user)):
+async def require_admin(user: Principal = Depends(get_current_principal)):
     if user.role not in ["admin", "superadmin"]:
         raise HTTPException(status_code=403, detail="Acesso negado")
     return user
@@ -38,27 +38,33 @@ def require_admin(user: User = Depends(get_current_user)):
 # Criar pedido (STAFF)
 # ==============================
 @router.post("/", response_model=Order)
-def create_order_endpoint(
+async def create_order_endpoint(
     order: OrderCreate,
-    db: Session = Depends(get_db),
-    user: User = Depends(require_staff),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(require_staff),
+    tenant: Tenant = Depends(get_current_tenant),
 ):
-    return create_order(db=db, order=order)
+    try:
+        return await create_order_async(db, order, tenant)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 # ==============================
 # Atualizar status do pedido (STAFF)
 # ==============================
 @router.put("/{order_id}/status", response_model=Order)
-def update_order_status_endpoint(
+async def update_order_status_endpoint(
     order_id: str,
     status: OrderStatusUpdate,
-    db: Session = Depends(get_db),
-    user: User = Depends(require_staff),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(require_staff),
+    tenant: Tenant = Depends(get_current_tenant),
 ):
-    updated_order = update_order_status(
-        db=db,
-        order_id=order_id,
-        status=status
+    updated_order = await update_order_status_async(
+        db,
+        order_id,
+        status,
+        tenant
     )
     if not updated_order:
         raise HTTPException(status_code=404, detail="Order not found")
@@ -68,13 +74,14 @@ def update_order_status_endpoint(
 # Deletar pedido (ADMIN)
 # ==============================
 @router.delete("/{order_id}")
-def delete_order_endpoint(
+async def delete_order_endpoint(
     order_id: str,
-    db: Session = Depends(get_db),
-    user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(require_admin),
+    tenant: Tenant = Depends(get_current_tenant),
 ):
-    deleted = delete_order(db=db, order_id=order_id)
-    if not deleted:
+    deleted = await delete_order_async(db, order_id, tenant)
+    if not deleted["deleted"]:
         raise HTTPException(status_code=404, detail="Order not found")
     return {"success": True}
 
@@ -82,22 +89,28 @@ def delete_order_endpoint(
 # Listar pedidos (STAFF)
 # ==============================
 @router.get("/", response_model=List[Order])
-def list_orders_endpoint(
-    db: Session = Depends(get_db),
-    user: User = Depends(require_staff),
+async def list_orders_endpoint(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db),
+    user: Principal = Depends(require_staff),
+    tenant: Tenant = Depends(get_current_tenant),
 ):
-    return list_orders(db=db)
+    page = await list_orders_async(db, tenant, cursor=cursor, limit=limit)
+    return page_response(response, page)
 
 # ==============================
 # Obter pedido por ID (STAFF)
 # ==============================
 @router.get("/{order_id}", response_model=Order)
-def get_order_endpoint(
+async def get_order_endpoint(
     order_id: str,
-    db: Session = Depends(get_db),
-    user: User = Depends(require_staff),
+    db: AsyncSession = Depends(get_async_read_db),
+    user: Principal = Depends(require_staff),
+    tenant: Tenant = Depends(get_current_tenant),
 ):
-    order = get_order(db=db, order_id=order_id)
+    order = await get_order_async(db, order_id, tenant)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return order
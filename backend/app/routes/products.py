@@ -1,33 +1,40 @@
 # app/routes/products.py
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from pydantic_core import to_json
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from app import crud
-from app.database import get_db
+from typing import List, Optional
+from app.crud import product as crud
+from app.crud import image_blob as crud_blobs
+from app.crud.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+from app.crud.tenant_scope import bind_tenant
+from app.database import get_async_db, get_async_read_db, get_db
 from app.schemas.product import (
+    CatalogFacets,
     ProductCreate,
     ProductUpdate,
     Product,
+    catalog_json,
     product_to_schema
 )
-from app.models.product_image import ProductImage
-from app.models.user import User
+from app.models.image_blob import BLOB_PROCESSING
+from app.models.product_image import IMAGE_FAILED, IMAGE_PENDING, IMAGE_READY, ProductImage
+from app.models.types import new_id
+from app.services import product_import
+from app.services import images
+from app.services.images import ImageJob, image_pipeline
+from app.services.catalog_cache import catalog_cache
+from app.services.search import product_search
 
 # ✅ PADRÃO ÚNICO DE AUTH
-from app.security import get_current_user
-
-import os
-import hashlib
-from PIL import Image
-from io import BytesIO
+from app.security import get_current_principal, get_current_tenant, Tenant, Principal
 
 # ==============================
 # Uploads
 # ==============================
-UPLOAD_DIR = "static/uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-ALLOWED_IMAGE_TYPES = ["JPEG", "PNG", "WEBP"]  # 🔒 opcional para segurança
 MAX_IMAGE_SIZE_MB = 5
 
 # ==============================
@@ -38,7 +45,7 @@ router = APIRouter(prefix="/products", tags=["Products"])
 # ==============================
 # DEPENDÊNCIA DE PERMISSÃO
 # ==============================
-def require_admin(user: User = Depends(get_current_user)):
+async def require_admin(user: Principal = Depends(get_current_principal)):
     if user.role not in ["admin", "superadmin"]:
         raise HTTPException(status_code=403, detail="Acesso negado")
     return user
@@ -46,76 +53,181 @@ def require_admin(user: User = Depends(get_current_user)):
 # ==============================
 # PRODUTOS (ROTAS PROTEGIDAS)
 # ==============================
+def catalog_filters(
+    category_id: Optional[str] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    show_in_promotion: Optional[bool] = None,
+    in_stock: Optional[bool] = None,
+    is_combo: Optional[bool] = None,
+) -> crud.CatalogFilters:
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(status_code=400, detail="min_price maior que max_price")
+    return crud.CatalogFilters(category_id, min_price, max_price, show_in_promotion, in_stock, is_combo)
+
+
 @router.get("/", response_model=List[Product])
-def get_products(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+async def get_products(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    sort: str = Query("name", pattern="^(name|price|-price)$", description="price = preço de venda com impostos"),
+    filters: crud.CatalogFilters = Depends(catalog_filters),
+    db: AsyncSession = Depends(get_async_read_db),
+    tenant: Tenant = Depends(get_current_tenant),
+):
+    # Resposta montada pelo caminho de leitura enxuto; o response_model
+    # fica só para a documentação (Response pula a validação do FastAPI)
+    async def build():
+        page = await crud.get_catalog_page_async(
+            db, tenant, cursor=cursor, limit=limit, filters=filters, sort=sort
+        )
+        headers = {NEXT_CURSOR_HEADER: page.next_cursor} if page.next_cursor else {}
+        return catalog_json(page.items), headers
+
+    return await catalog_cache.respond(request, db, tenant, build)
+
+
+@router.get("/facets", response_model=CatalogFacets)
+async def get_product_facets(
+    request: Request,
+    filters: crud.CatalogFilters = Depends(catalog_filters),
+    db: AsyncSession = Depends(get_async_read_db),
+    tenant: Tenant = Depends(get_current_tenant),
+):
+    """
+    Contagens do painel de filtros (categoria, faixa de preço, promoção)
+    para os mesmos filtros de GET /products/: uma query agrupada, guardada
+    no cache do catálogo até a próxima alteração do tenant.
+    """
+    async def build():
+        facets = await crud.get_catalog_facets_async(db, tenant, filters=filters)
+        return to_json(facets), {}
+
+    return await catalog_cache.respond(request, db, tenant, build)
+
+
+@router.get("/search", response_model=List[Product])
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=200),
+    category_id: Optional[str] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    limit: int = Query(20, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_read_db),
+    tenant: Tenant = Depends(get_current_tenant),
 ):
-    products = crud.get_products(db=db, skip=skip, limit=limit)
+    """
+    Busca nos produtos ativos do tenant por nome, descrição e SKU, com
+    casamento por prefixo (autocomplete), ordenada por relevância.
+    """
+    hits = await product_search.search(
+        tenant, q, limit, category_id=category_id, min_price=min_price, max_price=max_price
+    )
+    products = await crud.get_products_by_ids_async(db, [hit.product_id for hit in hits], tenant)
     return [product_to_schema(p) for p in products]
 
 
 @router.get("/{product_id}", response_model=Product)
-def get_product(
+async def get_product(
+    request: Request,
     product_id: str,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db),
+    tenant: Tenant = Depends(get_current_tenant),
 ):
-    db_product = crud.get_product(db=db, product_id=product_id)
-    if not db_product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return product_to_schema(db_product)
+    async def build():
+        db_product = await crud.get_product_async(db, product_id, tenant)
+        if not db_product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        return product_to_schema(db_product).model_dump_json().encode(), {}
+
+    return await catalog_cache.respond(request, db, tenant, build)
 
 # ==============================
 # PRODUTOS (ROTAS ADMIN)
 # ==============================
 @router.post("/", response_model=Product)
-def create_product(
+async def create_product(
     product_data: ProductCreate,
-    db: Session = Depends(get_db),
-    user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(require_admin),
+    tenant: Tenant = Depends(get_current_tenant),
 ):
-    db_product = crud.create_product(db=db, product_data=product_data)
+    db_product = await crud.create_product_async(db, product_data, tenant)
     return product_to_schema(db_product)
 
 
 @router.put("/{product_id}", response_model=Product)
-def update_product(
+async def update_product(
     product_id: str,
     product_data: ProductUpdate,
-    db: Session = Depends(get_db),
-    user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(require_admin),
+    tenant: Tenant = Depends(get_current_tenant),
 ):
-    db_product = crud.update_product(db=db, product_id=product_id, product_data=product_data)
+    db_product = await crud.update_product_async(db, product_id, product_data, tenant)
     if not db_product:
         raise HTTPException(status_code=404, detail="Product not found")
     return product_to_schema(db_product)
 
 
 @router.delete("/{product_id}", response_model=Product)
-def delete_product(
+async def delete_product(
     product_id: str,
-    db: Session = Depends(get_db),
-    user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(require_admin),
+    tenant: Tenant = Depends(get_current_tenant),
 ):
-    db_product = crud.delete_product(db=db, product_id=product_id)
+    db_product = await crud.delete_product_async(db, product_id, tenant)
     if not db_product:
         raise HTTPException(status_code=404, detail="Product not found")
     return product_to_schema(db_product)
 
+@router.post("/import")
+def import_products(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|jsonl)$"),
+    db: Session = Depends(get_db),
+    user: Principal = Depends(require_admin),
+    tenant: Tenant = Depends(get_current_tenant),
+):
+    """
+    Importação em massa de um CSV (cabeçalho com os campos de ProductCreate,
+    `images` separadas por "|") ou JSONL (um ProductCreate por linha).
+    Cria ou atualiza por SKU; responde com o relatório por linha e a vazão.
+
+    Rota síncrona: o parse e a validação de arquivos grandes rodam no
+    threadpool, sem travar o event loop.
+    """
+    try:
+        fmt = product_import.detect_format(file.filename, format)
+        report = product_import.import_products(db, file.file, fmt, tenant)
+    except product_import.ImportFormatError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return report.as_dict()
+
 # ==============================
 # IMAGENS (ROTAS ADMIN)
 # ==============================
-@router.post("/{product_id}/images")
+@router.post("/{product_id}/images", status_code=202)
 async def upload_product_image(
     product_id: str,
+    response: Response,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
-    user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(require_admin),
+    tenant: Tenant = Depends(get_current_tenant),
 ):
-    product = crud.get_product(db=db, product_id=product_id)
+    """
+    Grava o arquivo bruto e responde na hora (202, status `pending`): a
+    validação completa, o WEBP, as variantes e o placeholder são gerados
+    pelo pool de imagens. Acompanhe em GET /products/images/{image_id}.
+
+    Os arquivos são por conteúdo (sha256): se a mesma imagem já foi
+    processada, para qualquer produto ou tenant do shard, a resposta é 201
+    já com o resultado, sem processar de novo.
+    """
+    product = await crud.get_product_async(db, product_id, tenant)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
@@ -125,73 +237,114 @@ async def upload_product_image(
     if len(file_content) > MAX_IMAGE_SIZE_MB * 1024 * 1024:
         raise HTTPException(status_code=400, detail=f"Arquivo muito grande. Máx {MAX_IMAGE_SIZE_MB}MB.")
 
-    # 🔒 Validação de imagem
-    try:
-        image = Image.open(BytesIO(file_content))
-        image.verify()
-        image = Image.open(BytesIO(file_content))  # reabrir após verify
-        if image.format not in ALLOWED_IMAGE_TYPES:
-            raise HTTPException(status_code=400, detail="Tipo de imagem não permitido")
-    except Exception:
+    # 🔒 Validação do tipo pelos bytes iniciais (decodificar fica com o worker)
+    if images.sniff_format(file_content[:16]) not in images.ALLOWED_IMAGE_TYPES:
         raise HTTPException(status_code=400, detail="Arquivo de imagem inválido")
 
-    # Hash único
-    hash_name = hashlib.sha256(file_content).hexdigest() + ".webp"
-    product_dir = os.path.join(UPLOAD_DIR, product_id)
-    os.makedirs(product_dir, exist_ok=True)
-    file_path = os.path.join(product_dir, hash_name)
+    # Hash do conteúdo: chave do blob (nome do WEBP e das variantes)
+    blob_hash = await run_in_threadpool(images.content_hash, file_content)
+    bind_tenant(db, tenant)
+    blob, claimed = await crud_blobs.register_upload_async(db, blob_hash)
+    if blob["status"] == IMAGE_FAILED:
+        # Mesmo conteúdo já recusado pelo worker (o rollback desfaz o registro)
+        raise HTTPException(status_code=400, detail="Arquivo de imagem inválido")
 
-    # Salva imagem
-    image.save(file_path, format="WEBP")
+    if claimed:
+        image_pipeline.reserve()  # 503 com a fila cheia
+    try:
+        if claimed:
+            await run_in_threadpool(images.store_raw, blob_hash, file_content)
+        new_image = ProductImage(
+            id=new_id(),
+            product_id=product_id,
+            image_url=images.blob_url(blob_hash),
+            blob_hash=blob_hash,
+            company_id=tenant.company_id,
+            store_id=tenant.store_id,
+            # Resultado do blob; em processamento, fica pending até o worker terminar
+            **{**blob, "status": IMAGE_PENDING if blob["status"] == BLOB_PROCESSING else blob["status"]},
+        )
+        db.add(new_image)
+        await db.commit()
+    except BaseException:
+        if claimed:
+            # Upload não aceito: devolve a vaga e apaga o bruto
+            image_pipeline.release()
+            images.discard_raw(blob_hash)
+        raise
 
-    # URL relativa para frontend
-    image_url = f"/{UPLOAD_DIR}/{product_id}/{hash_name}"
+    if claimed:
+        image_pipeline.submit(ImageJob(blob_hash, tenant.company_id, tenant.store_id))
+    if new_image.status == IMAGE_READY:
+        response.status_code = 201
+    return {
+        "id": new_image.id,
+        "image_url": new_image.image_url,
+        "status": new_image.status,
+        "status_url": f"/products/images/{new_image.id}",
+    }
 
-    new_image = ProductImage(
-        product_id=product_id,
-        image_url=image_url
-    )
-    db.add(new_image)
-    db.commit()
-    db.refresh(new_image)
 
+@router.get("/images/{image_id}")
+async def get_product_image(
+    image_id: str,
+    db: AsyncSession = Depends(get_async_read_db),
+    tenant: Tenant = Depends(get_current_tenant),
+):
+    """
+    Estado do processamento (pending, ready, failed) com as variantes e o
+    placeholder. Logo após o upload, envie `X-Read-Your-Writes: 1` para ler
+    do primário.
+    """
+    bind_tenant(db, tenant)
+    image = await db.scalar(select(ProductImage).where(ProductImage.id == image_id))
+    if not image:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return _image_payload(image)
+
+
+def _image_payload(image: ProductImage) -> dict:
     return {
-        "id": new_image.id,
-        "image_url": new_image.image_url
+        "id": image.id,
+        "image_url": image.image_url,
+        "status": image.status,
+        "variants": image.variants,
+        "placeholder": image.placeholder,
+        "width": image.width,
+        "height": image.height,
+        "error": image.error,
     }
 
 
 @router.get("/{product_id}/images")
-def list_product_images(
+async def list_product_images(
     product_id: str,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db),
+    tenant: Tenant = Depends(get_current_tenant),
 ):
-    product = crud.get_product(db=db, product_id=product_id)
+    product = await crud.get_product_async(db, product_id, tenant)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    return [
-        {"id": img.id, "image_url": img.image_url}
-        for img in product.images
-    ]
+    return [_image_payload(img) for img in product.images]
 
 
 @router.delete("/images/{image_id}")
-def delete_product_image(
+async def delete_product_image(
     image_id: str,
-    db: Session = Depends(get_db),
-    user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(require_admin),
+    tenant: Tenant = Depends(get_current_tenant),
 ):
-    image = db.query(ProductImage).filter(ProductImage.id == image_id).first()
+    # Só encontra imagens do tenant do usuário
+    bind_tenant(db, tenant)
+    image = await db.scalar(select(ProductImage).where(ProductImage.id == image_id))
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
 
-    # Remove arquivo físico
-    if os.path.exists(image.image_url.lstrip("/")):  # ajusta para path relativo
-        os.remove(image.image_url.lstrip("/"))
-
-    db.delete(image)
-    db.commit()
+    # Os arquivos são do blob, compartilhado: o flush decrementa o refcount
+    # e o coletor (app.services.image_gc) apaga quando ninguém mais usa
+    await db.delete(image)
+    await db.commit()
 
     return {"detail": "Image deleted"}
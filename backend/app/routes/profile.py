@@ -1,15 +1,16 @@
 # app/routes/profile.py
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
 from app.schemas.user import UserResponse, UserUpdate
 
 # ✅ Auth centralizada
 from app.dependencies import get_current_user
-from app.routes.users import hash_password  # reutiliza a função existente
+from app.services.passwords import password_hasher
 
 # ==============================
 # Router
@@ -20,7 +21,7 @@ router = APIRouter(prefix="/profiles", tags=["Profiles"])
 # OBTER MEU PERFIL
 # ==============================
 @router.get("/me", response_model=UserResponse)
-def get_my_profile(
+async def get_my_profile(
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -33,9 +34,9 @@ def get_my_profile(
 # ATUALIZAR MEU PERFIL
 # ==============================
 @router.put("/me", response_model=UserResponse)
-def update_my_profile(
+async def update_my_profile(
     data: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -47,10 +48,10 @@ def update_my_profile(
 
     if data.email is not None:
         # Verifica se email já existe em outro usuário
-        existing_user = db.query(User).filter(
+        existing_user = await db.scalar(select(User).where(
             User.email == data.email,
             User.id != current_user.id
-        ).first()
+        ))
         if existing_user:
             raise HTTPException(status_code=400, detail="E-mail já está em uso")
         current_user.email = data.email
@@ -59,9 +60,9 @@ def update_my_profile(
         current_user.avatar = data.avatar
 
     if data.password:
-        current_user.password = hash_password(data.password)
+        current_user.password = await password_hasher.hash(data.password)
 
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
 
     return current_user
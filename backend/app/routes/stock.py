@@ -1,17 +1,19 @@
 # app/routes/stock.py
 
-from typing import List
+from typing import List, Optional
 from enum import Enum
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_async_db, get_async_read_db
 from app.schemas.stock import Stock, StockCreate
 from app.crud import stock as crud
-from app.models.user import User
+from app.crud.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, page_response
+from app.services.principal_cache import Principal
 
 # ✅ AUTH CENTRALIZADA
 from app.dependencies import require_admin, require_staff
+from app.security.tenant import get_current_tenant, Tenant
 
 # ==============================
 # Enum para movimento de estoque
@@ -29,22 +31,24 @@ router = APIRouter(prefix="/stocks", tags=["Stocks"])
 # ADICIONAR ESTOQUE (ADMIN)
 # =========================
 @router.post("/{product_id}/add", response_model=Stock)
-def add_stock_route(
+async def add_stock_route(
     product_id: str,
     stock_data: StockCreate,
-    db: Session = Depends(get_db),
-    user: User = Depends(require_admin),  # 🔒 Só admin
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(require_admin),  # 🔒 Só admin
+    tenant: Tenant = Depends(get_current_tenant),
 ):
-    if stock_data.movement_type != MovementType.IN:
+    if stock_data.movement_type and stock_data.movement_type != MovementType.IN:
         raise HTTPException(
             status_code=400,
             detail="Use 'IN' movement_type for addition"
         )
 
-    movement = crud.add_stock(
-        db=db,
-        product_id=product_id,
-        quantity=stock_data.quantity
+    movement = await crud.add_stock_async(
+        db,
+        product_id,
+        stock_data.quantity,
+        tenant
     )
 
     return Stock.from_orm(movement)
@@ -54,22 +58,24 @@ def add_stock_route(
 # REMOVER ESTOQUE (ADMIN)
 # =========================
 @router.post("/{product_id}/remove", response_model=Stock)
-def remove_stock_route(
+async def remove_stock_route(
     product_id: str,
     stock_data: StockCreate,
-    db: Session = Depends(get_db),
-    user: User = Depends(require_admin),  # 🔒 Só admin
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(require_admin),  # 🔒 Só admin
+    tenant: Tenant = Depends(get_current_tenant),
 ):
-    if stock_data.movement_type != MovementType.OUT:
+    if stock_data.movement_type and stock_data.movement_type != MovementType.OUT:
         raise HTTPException(
             status_code=400,
             detail="Use 'OUT' movement_type for removal"
         )
 
-    movement = crud.remove_stock(
-        db=db,
-        product_id=product_id,
-        quantity=stock_data.quantity
+    movement = await crud.remove_stock_async(
+        db,
+        product_id,
+        stock_data.quantity,
+        tenant
     )
 
     return Stock.from_orm(movement)
@@ -79,10 +85,14 @@ def remove_stock_route(
 # LISTAR MOVIMENTOS (STAFF)
 # =========================
 @router.get("/{product_id}/movements", response_model=List[Stock])
-def list_stock_movements_route(
+async def list_stock_movements_route(
     product_id: str,
-    db: Session = Depends(get_db),
-    user: User = Depends(require_staff),  # 🔒 vendedor, admin, superadmin
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db),
+    user: Principal = Depends(require_staff),  # 🔒 vendedor, admin, superadmin
+    tenant: Tenant = Depends(get_current_tenant),
 ):
-    movements = crud.get_stock_movements(db=db, product_id=product_id)
-    return [Stock.from_orm(m) for m in movements]
+    page = await crud.get_stock_movements_async(db, product_id, tenant, cursor=cursor, limit=limit)
+    return [Stock.from_orm(m) for m in page_response(response, page)]
@@ -1,23 +1,32 @@
 # app/routes/users.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import datetime, timedelta
 from jose import jwt
-from passlib.context import CryptContext
 from PIL import Image
 import hashlib
+from uuid import uuid4
 import io
 import os
 
-from app.database import get_db
+from app.database import get_async_db
+from app.crud.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, page_response
+from app.crud.user_crud import list_users_async
 from app.models.user import User
 from app.schemas.user import UserCreate, UserResponse, UserUpdate, Token
+from app.services.principal_cache import Principal
+from app.services.passwords import password_hasher
+from app.services.revocation import revocation_list
 
 # ✅ AUTH E PERMISSÕES CENTRALIZADAS
 from app.dependencies import (
+    get_current_principal,
     get_current_user,
+    get_token_payload,
     require_admin,
     require_superadmin,
 )
@@ -27,20 +36,6 @@ from app.dependencies import (
 # ==============================
 router = APIRouter(prefix="/users", tags=["Users"])
 
-# ==============================
-# Password hashing
-# ==============================
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
-
-
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-
-
 # ==============================
 # JWT configuration
 # ==============================
@@ -68,15 +63,26 @@ os.makedirs(AVATAR_DIR, exist_ok=True)
 MAX_AVATAR_SIZE = 5 * 1024 * 1024  # 5MB
 AVATAR_MAX_DIM = (512, 512)
 
+
+def _save_avatar(content: bytes, file_path: str) -> None:
+    try:
+        image = Image.open(io.BytesIO(content))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Arquivo não é uma imagem válida.")
+
+    image.thumbnail(AVATAR_MAX_DIM)
+    image.save(file_path, "WEBP", quality=90)
+
 # ==============================
 # CRIAR USUÁRIO (PUBLICO)
 # ==============================
 @router.post("/", response_model=UserResponse)
-def create_user(user: UserCreate, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.email == user.email).first():
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    if await db.scalar(select(User).where(User.email == user.email)):
         raise HTTPException(status_code=400, detail="E-mail já cadastrado")
 
-    hashed_password = hash_password(user.password)
+    # Hash é CPU-bound: roda no pool de processos de hashing
+    hashed_password = await password_hasher.hash(user.password)
 
     db_user = User(
         name=user.name,
@@ -86,8 +92,8 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
     )
 
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
 
     return db_user
 
@@ -96,41 +102,81 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
 # LOGIN
 # ==============================
 @router.post("/login", response_model=Token)
-def login(
-    db: Session = Depends(get_db),
+async def login(
+    db: AsyncSession = Depends(get_async_db),
     username: str = Form(...),
     password: str = Form(...),
 ):
-    user = db.query(User).filter(User.email == username).first()
+    user = await db.scalar(select(User).where(User.email == username))
+
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="E-mail ou senha inválidos",
+        )
 
-    if not user or not verify_password(password, user.password):
+    valid, new_hash = await password_hasher.verify(password, user.password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="E-mail ou senha inválidos",
         )
 
+    # Hash legado (bcrypt) ou com parâmetros antigos: regrava em argon2
+    if new_hash:
+        user.password = new_hash
+        await db.commit()
+
+    # Claims assinadas: role/tenant/versão vão no token e o jti identifica
+    # o token no cache de Principal (ver app.dependencies)
     access_token = create_access_token(
         data={
             "sub": str(user.id),
             "role": user.role,
+            "company_id": user.company_id,
+            "store_id": user.store_id,
+            "ver": user.token_version or 0,
+            "jti": uuid4().hex,
         }
     )
 
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+# ==============================
+# LOGOUT
+# ==============================
+@router.post("/logout")
+async def logout(
+    db: AsyncSession = Depends(get_async_db),
+    payload: dict = Depends(get_token_payload),
+    principal: Principal = Depends(get_current_principal),
+):
+    """
+    Revoga o token atual (jti) até o seu "exp" em todos os workers.
+    """
+    jti = payload.get("jti")
+    if not jti:
+        # Tokens emitidos antes do jti não podem ser revogados um a um
+        raise HTTPException(status_code=400, detail="Token sem jti; faça login novamente")
+
+    expires_at = datetime.utcfromtimestamp(payload["exp"])
+    await revocation_list.revoke(db, jti, principal.id, expires_at)
+    return {"detail": "Logout bem-sucedido"}
+
+
 # ==============================
 # CURRENT USER
 # ==============================
 @router.get("/me", response_model=UserResponse)
-def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: User = Depends(get_current_user)):
     return current_user
 
 
 @router.put("/me", response_model=UserResponse)
-def update_me(
+async def update_me(
     user_update: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     if user_update.name is not None:
@@ -140,10 +186,10 @@ def update_me(
         current_user.email = user_update.email
 
     if user_update.password:
-        current_user.password = hash_password(user_update.password)
+        current_user.password = await password_hasher.hash(user_update.password)
 
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
 
     return current_user
 
@@ -152,29 +198,16 @@ def update_me(
 # UPLOAD DE AVATAR
 # ==============================
 @router.post("/me/avatar", response_model=UserResponse)
-def upload_avatar(
+async def upload_avatar(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    content = file.file.read()
+    content = await file.read()
 
     if len(content) > MAX_AVATAR_SIZE:
         raise HTTPException(status_code=400, detail="Arquivo muito grande. Máx 5MB.")
 
-    try:
-        image = Image.open(io.BytesIO(content))
-    except Exception:
-        raise HTTPException(status_code=400, detail="Arquivo não é uma imagem válida.")
-
-    image.thumbnail(AVATAR_MAX_DIM)
-
-    # Remove avatar antigo
-    if current_user.avatar:
-        old_path = os.path.join(BASE_DIR, current_user.avatar.lstrip("/"))
-        if os.path.exists(old_path):
-            os.remove(old_path)
-
     # Hash único
     file_hash = hashlib.sha256(
         (str(current_user.id) + file.filename + str(datetime.utcnow())).encode()
@@ -183,13 +216,20 @@ def upload_avatar(
     filename = f"{file_hash}.webp"
     file_path = os.path.join(AVATAR_DIR, filename)
 
-    image.save(file_path, "WEBP", quality=90)
+    # Decode/encode com Pillow é CPU-bound: roda fora do event loop
+    await run_in_threadpool(_save_avatar, content, file_path)
+
+    # Remove avatar antigo
+    if current_user.avatar:
+        old_path = os.path.join(BASE_DIR, current_user.avatar.lstrip("/"))
+        if os.path.exists(old_path):
+            os.remove(old_path)
 
     avatar_url = f"/assets/img/profile/{filename}"
     current_user.avatar = avatar_url
 
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
 
     return current_user
 
@@ -200,21 +240,25 @@ def upload_avatar(
 
 # 🔒 Lista todos usuários (admin ou superadmin)
 @router.get("/", response_model=List[UserResponse])
-def get_users(
-    db: Session = Depends(get_db),
-    _: User = Depends(require_admin),
+async def get_users(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    _: Principal = Depends(require_admin),
 ):
-    return db.query(User).all()
+    page = await list_users_async(db, cursor=cursor, limit=limit)
+    return page_response(response, page)
 
 
 # 🔒 Busca usuário por ID
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(
+async def get_user(
     user_id: str,
-    db: Session = Depends(get_db),
-    _: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db),
+    _: Principal = Depends(require_admin),
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
 
     if not user:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
@@ -1,10 +1,13 @@
 # app/schemas/product.py
 
 from pydantic import BaseModel, Field
+from pydantic_core import to_json
 from typing import Optional, List
 from uuid import UUID
 from datetime import datetime
 
+from app.models.product_image import IMAGE_READY
+
 # =========================
 # Base do Produto
 # =========================
@@ -72,6 +75,9 @@ class ProductResponse(ProductBase):
     created_at: datetime
     updated_at: datetime
 
+    # Preço de venda com impostos, calculado pelo banco (Product.effective_price)
+    effective_price: Optional[float] = None
+
     images: List[str] = Field(default_factory=list)
 
     model_config = {
@@ -112,5 +118,48 @@ def product_to_schema(product) -> ProductResponse:
         cofins=product.cofins,
         created_at=product.created_at,
         updated_at=product.updated_at,
-        images=[img.image_url for img in getattr(product, "images", []) or []],
+        effective_price=float(product.effective_price) if product.effective_price is not None else None,
+        # Uploads ainda em processamento (ou que falharam) não aparecem no catálogo
+        images=[img.image_url for img in getattr(product, "images", []) or [] if img.status == IMAGE_READY],
     )
+
+
+# =========================
+# Listagem do catálogo -> JSON
+# =========================
+
+def catalog_json(items: list[dict]) -> bytes:
+    """
+    Serializa direto para bytes os dicts de crud.product.get_catalog_page,
+    que já vêm com os campos e tipos de ProductResponse — sem montar um
+    modelo por produto nem validar de novo contra o response_model.
+    """
+    return to_json(items)
+
+
+# =========================
+# Facetas do catálogo (GET /products/facets)
+# =========================
+
+class CategoryFacet(BaseModel):
+    category_id: Optional[str] = None  # None = produtos sem categoria
+    name: Optional[str] = None
+    count: int
+
+
+class PriceBucketFacet(BaseModel):
+    min: float
+    max: Optional[float] = None  # None = sem limite superior
+    count: int
+
+
+class PromotionFacet(BaseModel):
+    value: bool
+    count: int
+
+
+class CatalogFacets(BaseModel):
+    total: int
+    categories: List[CategoryFacet]
+    price_buckets: List[PriceBucketFacet]
+    promotion: List[PromotionFacet]
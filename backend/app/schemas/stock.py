@@ -22,7 +22,7 @@ class StockBase(BaseModel):
 # =========================
 
 class StockCreate(StockBase):
-    pass
+    movement_type: Optional[str] = None  # opcional: a rota já define IN/OUT
 
 
 class StockUpdate(BaseModel):
@@ -3,16 +3,13 @@ from jose import JWTError, jwt
 from app.models.user import User
 from app.database import SessionLocal
 from typing import Optional
-from passlib.context import CryptContext
+from app.services.passwords import verify_password
 
 # Variáveis de configuração para o JWT
 SECRET_KEY = "YOUR_SECRET_KEY"  # Substitua por uma chave segura
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30  # O token expira em 30 minutos
 
-# Inicializando o gerenciador de senhas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Função para criar o token JWT
 def create_access_token(data: dict, expires_delta: timedelta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)):
     to_encode = data.copy()
@@ -40,10 +37,6 @@ def get_user_by_id(user_id: str) -> Optional[User]:
     finally:
         db.close()
 
-# Função para verificar a senha hashada
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
 # Função para buscar um usuário pelo e-mail
 def get_user_by_email(db, email: str) -> Optional[User]:
     return db.query(User).filter(User.email == email).first()
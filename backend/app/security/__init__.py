@@ -1,18 +1,22 @@
 # app/security/__init__.py
 
 from app.dependencies import (
+    get_current_principal,
     get_current_user,
     require_user,
     require_admin,
     require_superadmin
 )
 from app.security.tenant import get_current_tenant, Tenant
+from app.services.principal_cache import Principal
 
 __all__ = [
+    "get_current_principal",
     "get_current_user",
     "require_user",
     "require_admin",
     "require_superadmin",
     "get_current_tenant",
     "Tenant",
+    "Principal",
 ]
@@ -2,8 +2,8 @@
 
 from typing import Optional
 from fastapi import Depends, HTTPException
-from app.models.user import User
-from app.dependencies import get_current_user  # Importação unificada
+from app.dependencies import get_current_principal  # Importação unificada
+from app.services.principal_cache import Principal
 
 class Tenant:
     """
@@ -13,7 +13,7 @@ class Tenant:
         self.company_id = company_id
         self.store_id = store_id
 
-def get_current_tenant(user: User = Depends(get_current_user)) -> Tenant:
+async def get_current_tenant(user: Principal = Depends(get_current_principal)) -> Tenant:
     """
     Retorna o tenant (empresa + loja) do usuário logado.
     Lança erro se o usuário não tiver empresa atribuída.
@@ -0,0 +1,219 @@
+# app/services/catalog_cache.py
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, NamedTuple, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.tenant_scope import bind_tenant
+from app.database import shard_map
+from app.models.catalog_version import CatalogVersion
+from app.security.tenant import Tenant
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Configuração
+# =========================
+
+# Respostas em cache por processo (LRU), limitadas também pelo total de bytes
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", 10_000))
+CATALOG_CACHE_MAX_MB = float(os.getenv("CATALOG_CACHE_MAX_MB", 64))
+
+# Releitura das versões alteradas por outros workers: uma escrita feita em
+# outro processo leva no máximo esse tempo para invalidar o cache daqui
+CATALOG_VERSION_REFRESH_SECONDS = float(os.getenv("CATALOG_VERSION_REFRESH_SECONDS", 1))
+
+# Folga na marca d'água (relógios de workers diferentes, commits atrasados)
+_WATERMARK_OVERLAP = timedelta(seconds=30)
+
+# Clientes sempre revalidam (If-None-Match); nada fica em caches compartilhados
+_CACHE_CONTROL = "private, no-cache"
+
+
+class CachedResponse(NamedTuple):
+    version: int
+    etag: str
+    body: bytes
+    headers: dict
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Comparação fraca (RFC 9110): ignora o prefixo W/
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+class CatalogCache:
+    """
+    Cache de respostas de leitura do catálogo (produtos e categorias) por
+    tenant + rota + query string, com ETag.
+
+    Cada empresa tem uma versão de catálogo (tabela catalog_versions),
+    incrementada na transação de qualquer escrita em produtos, imagens ou
+    categorias. Uma entrada só é servida se foi montada com a versão atual;
+    conferir isso não vai ao banco: as versões ficam em memória, atualizadas
+    na hora pelos commits deste processo e por um thread que relê as
+    alteradas em cada shard a cada CATALOG_VERSION_REFRESH_SECONDS.
+
+    Numa falta, a versão é lida na mesma sessão (réplica, se houver) antes
+    de montar a resposta, então uma réplica atrasada nunca grava dados
+    antigos sob uma versão nova.
+    """
+    def __init__(
+        self,
+        maxsize: int = CATALOG_CACHE_SIZE,
+        max_bytes: int = int(CATALOG_CACHE_MAX_MB * 1024 * 1024),
+        refresh_interval: float = CATALOG_VERSION_REFRESH_SECONDS,
+    ):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.refresh_interval = refresh_interval
+        self._entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+        self._bytes = 0
+        self._versions: dict[str, int] = {}
+        self._watermarks: dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._monitor: Optional[threading.Thread] = None
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+        self.last_refresh: Optional[float] = None
+
+    # ---------- versões ----------
+    def observe(self, company_id: str, version: int) -> None:
+        """Registra uma versão vista no banco (nunca volta para trás)."""
+        with self._lock:
+            if version > self._versions.get(company_id, -1):
+                self._versions[company_id] = version
+
+    async def _read_version(self, db: AsyncSession, company_id: str) -> int:
+        version = await db.scalar(select(CatalogVersion.version).where(CatalogVersion.company_id == company_id))
+        return version or 0
+
+    # ---------- entradas ----------
+    def _get(self, key: tuple, version: Optional[int]) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or version is None or entry.version != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key: tuple, entry: CachedResponse) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+            self._entries[key] = entry
+            self._bytes += len(entry.body)
+            while len(self._entries) > self.maxsize or (self._bytes > self.max_bytes and len(self._entries) > 1):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+                self.evictions += 1
+
+    async def respond(
+        self,
+        request: Request,
+        db: AsyncSession,
+        tenant: Tenant,
+        build: Callable[[], Awaitable[tuple[bytes, dict]]],
+    ) -> Response:
+        """
+        Resposta JSON da rota, do cache se a versão do catálogo não mudou.
+        `build` monta (corpo, headers) em uma falta; exceções (404 etc.)
+        passam direto e não entram no cache. If-None-Match com o ETag atual
+        vira 304.
+        """
+        key = (
+            tenant.company_id,
+            tenant.store_id,
+            request.url.path,
+            tuple(sorted(request.query_params.multi_items())),
+        )
+        entry = self._get(key, self._versions.get(tenant.company_id))
+        if entry is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            bind_tenant(db, tenant)
+            version = await self._read_version(db, tenant.company_id)
+            self.observe(tenant.company_id, version)
+            body, headers = await build()
+            entry = CachedResponse(version, make_etag(body), body, headers)
+            self._put(key, entry)
+
+        headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": _CACHE_CONTROL}
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(entry.body, media_type="application/json", headers=headers)
+
+    # ---------- manutenção ----------
+    def refresh(self) -> None:
+        """Relê, em cada shard, as versões alteradas desde a última leitura."""
+        now = datetime.utcnow()
+        for shard in shard_map.shards.values():
+            watermark = self._watermarks.get(shard.name)
+            stmt = select(CatalogVersion.company_id, CatalogVersion.version, CatalogVersion.updated_at)
+            if watermark is not None:
+                stmt = stmt.where(CatalogVersion.updated_at >= watermark - _WATERMARK_OVERLAP)
+            with shard.engine.connect() as conn:
+                rows = conn.execute(stmt).all()
+            for company_id, version, updated_at in rows:
+                self.observe(company_id, version)
+                if watermark is None or updated_at > watermark:
+                    watermark = updated_at
+            self._watermarks[shard.name] = watermark or now
+        self.last_refresh = time.time()
+
+    def start_monitor(self) -> None:
+        if self._monitor is not None:
+            return
+
+        def loop():
+            while True:
+                try:
+                    self.refresh()
+                except Exception:
+                    # Banco fora do ar: vale o que já está em memória
+                    logger.exception("Falha ao atualizar as versões do catálogo")
+                time.sleep(self.refresh_interval)
+
+        self._monitor = threading.Thread(target=loop, name="catalog-version-refresh", daemon=True)
+        self._monitor.start()
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.maxsize,
+            "max_bytes": self.max_bytes,
+            "tenants_tracked": len(self._versions),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "not_modified": self.not_modified,
+            "evictions": self.evictions,
+            "last_refresh": self.last_refresh,
+        }
+
+
+catalog_cache = CatalogCache()
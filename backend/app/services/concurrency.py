@@ -0,0 +1,300 @@
+# app/services/concurrency.py
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Optional
+
+# =========================
+# Configuração
+# =========================
+
+CONCURRENCY_LIMIT_ENABLED = os.getenv("CONCURRENCY_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Requests em execução simultânea no processo: o limite começa em
+# CONCURRENCY_INITIAL_LIMIT e se ajusta entre MIN e MAX pela latência
+CONCURRENCY_INITIAL_LIMIT = int(os.getenv("CONCURRENCY_INITIAL_LIMIT", 32))
+CONCURRENCY_MIN_LIMIT = int(os.getenv("CONCURRENCY_MIN_LIMIT", 4))
+CONCURRENCY_MAX_LIMIT = int(os.getenv("CONCURRENCY_MAX_LIMIT", 128))
+
+# Latência alvo (média móvel): acima dela o limite cai, abaixo sobe
+CONCURRENCY_TARGET_LATENCY_MS = float(os.getenv("CONCURRENCY_TARGET_LATENCY_MS", 250))
+
+# Fila por tenant: profundidade máxima e espera máxima antes do 503
+CONCURRENCY_MAX_QUEUE = int(os.getenv("CONCURRENCY_MAX_QUEUE", 50))
+CONCURRENCY_MAX_QUEUE_WAIT_MS = float(os.getenv("CONCURRENCY_MAX_QUEUE_WAIT_MS", 2000))
+
+# Pesos por tenant: "company_id=3,company_id:store_id=2" (padrão 1)
+CONCURRENCY_DEFAULT_WEIGHT = float(os.getenv("CONCURRENCY_DEFAULT_WEIGHT", 1))
+
+# Rotas que nunca passam pelo limitador (prefixos; "/" só exato)
+CONCURRENCY_EXEMPT_PATHS = [
+    p.strip() for p in os.getenv(
+        "CONCURRENCY_EXEMPT_PATHS", "/,/health,/docs,/redoc,/openapi.json"
+    ).split(",") if p.strip()
+]
+
+# Rotas longas (streaming de exportação, importação em massa): ficam fora
+# do limite adaptativo, que mede latência de request curta, e têm um teto
+# fixo próprio de execuções simultâneas no processo
+CONCURRENCY_BULK_PATHS = [
+    p.strip() for p in os.getenv("CONCURRENCY_BULK_PATHS", "/exports,/products/import").split(",") if p.strip()
+]
+CONCURRENCY_BULK_LIMIT = int(os.getenv("CONCURRENCY_BULK_LIMIT", 4))
+# Retry-After (s) das rotas longas recusadas
+_BULK_RETRY_AFTER = 5
+
+# Chave usada para requests sem token válido (catálogo público, login)
+ANONYMOUS_TENANT = "anonymous"
+
+_MAX_TRACKED_TENANTS = 10_000
+_EWMA_ALPHA = 0.1
+
+
+def parse_weights(raw: str) -> dict[str, float]:
+    weights = {}
+    for item in raw.split(","):
+        key, sep, value = item.strip().partition("=")
+        if sep and key:
+            weights[key] = float(value)
+    return weights
+
+
+CONCURRENCY_TENANT_WEIGHTS = parse_weights(os.getenv("CONCURRENCY_TENANT_WEIGHTS", ""))
+
+
+def tenant_key(company_id: Optional[str], store_id: Optional[str]) -> str:
+    """Mesma granularidade de security/tenant.py: empresa + loja."""
+    if not company_id:
+        return ANONYMOUS_TENANT
+    return f"{company_id}:{store_id}" if store_id else str(company_id)
+
+
+class Overloaded(Exception):
+    """Request recusada pelo limitador; `retry_after` em segundos."""
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+# =========================
+# Estado por tenant
+# =========================
+class TenantSlots:
+    def __init__(self, key: str, weight: float):
+        self.key = key
+        self.weight = weight
+        self.inflight = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+        self.max_queue_depth = 0
+        self.total_queue_wait = 0.0
+        self.last_seen = time.monotonic()
+
+    @property
+    def active(self) -> bool:
+        return self.inflight > 0 or bool(self.waiters)
+
+    def snapshot(self) -> dict:
+        return {
+            "weight": self.weight,
+            "inflight": self.inflight,
+            "queue_depth": len(self.waiters),
+            "max_queue_depth": self.max_queue_depth,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": self.shed,
+            "avg_queue_wait_ms": round(self.total_queue_wait / self.queued * 1000, 2) if self.queued else None,
+        }
+
+
+# =========================
+# Limitador
+# =========================
+class AdaptiveConcurrencyLimiter:
+    """
+    Limite de concorrência do processo, ajustado por AIMD sobre a latência
+    média (sobe +1 por "janela" de `limit` requests rápidas, cai 10% no
+    máximo uma vez por latência-alvo quando a média passa do alvo).
+
+    As vagas são divididas entre os tenants ativos na proporção do peso:
+    um tenant abaixo da sua fatia entra direto enquanto houver vaga; acima
+    dela, só entra se ninguém estiver esperando. Na liberação de uma vaga,
+    a próxima vai para o tenant com fila e menor `inflight / peso`.
+
+    Recusa com Overloaded (503) quando a fila do tenant está cheia ou a
+    espera estimada/real passa de `max_queue_wait`. Roda no event loop,
+    então não precisa de lock.
+    """
+    def __init__(
+        self,
+        initial_limit: int = CONCURRENCY_INITIAL_LIMIT,
+        min_limit: int = CONCURRENCY_MIN_LIMIT,
+        max_limit: int = CONCURRENCY_MAX_LIMIT,
+        target_latency_ms: float = CONCURRENCY_TARGET_LATENCY_MS,
+        max_queue: int = CONCURRENCY_MAX_QUEUE,
+        max_queue_wait_ms: float = CONCURRENCY_MAX_QUEUE_WAIT_MS,
+        weights: Optional[dict[str, float]] = None,
+        default_weight: float = CONCURRENCY_DEFAULT_WEIGHT,
+        bulk_limit: int = CONCURRENCY_BULK_LIMIT,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency_ms / 1000
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait_ms / 1000
+        self.weights = CONCURRENCY_TENANT_WEIGHTS if weights is None else weights
+        self.default_weight = default_weight
+        self.inflight = 0
+        self.waiting = 0
+        self.latency_ewma: Optional[float] = None
+        self._last_decrease = 0.0
+        self._tenants: dict[str, TenantSlots] = {}
+        self.bulk_limit = bulk_limit
+        self.bulk_inflight = 0
+        self.bulk_shed = 0
+
+    # ---------- tenants ----------
+    def _weight(self, key: str) -> float:
+        if key in self.weights:
+            return self.weights[key]
+        company_id = key.split(":", 1)[0]
+        return self.weights.get(company_id, self.default_weight)
+
+    def _tenant(self, key: str) -> TenantSlots:
+        slots = self._tenants.get(key)
+        if slots is None:
+            if len(self._tenants) >= _MAX_TRACKED_TENANTS:
+                for idle in [k for k, s in self._tenants.items() if not s.active]:
+                    del self._tenants[idle]
+            slots = self._tenants[key] = TenantSlots(key, self._weight(key))
+        slots.last_seen = time.monotonic()
+        return slots
+
+    def _share(self, slots: TenantSlots) -> float:
+        """Fatia do limite que cabe ao tenant entre os ativos agora."""
+        active_weight = sum(s.weight for s in self._tenants.values() if s.active or s is slots)
+        return max(1.0, self.limit * slots.weight / active_weight)
+
+    # ---------- entrada ----------
+    def _estimated_wait(self, slots: TenantSlots) -> float:
+        latency = self.latency_ewma or self.target_latency
+        return (len(slots.waiters) + 1) * latency / self._share(slots)
+
+    def _retry_after(self, slots: TenantSlots) -> int:
+        return max(1, math.ceil(self._estimated_wait(slots)))
+
+    def _admit(self, slots: TenantSlots) -> None:
+        slots.inflight += 1
+        slots.admitted += 1
+        self.inflight += 1
+
+    async def acquire(self, key: str) -> None:
+        slots = self._tenant(key)
+        if self.inflight < int(self.limit) and (slots.inflight < self._share(slots) or self.waiting == 0):
+            self._admit(slots)
+            return
+
+        if len(slots.waiters) >= self.max_queue:
+            slots.shed += 1
+            raise Overloaded("Fila do tenant cheia", self._retry_after(slots))
+        if self._estimated_wait(slots) > self.max_queue_wait:
+            slots.shed += 1
+            raise Overloaded("Latência acima do alvo", self._retry_after(slots))
+
+        future = asyncio.get_running_loop().create_future()
+        slots.waiters.append(future)
+        slots.queued += 1
+        slots.max_queue_depth = max(slots.max_queue_depth, len(slots.waiters))
+        self.waiting += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, self.max_queue_wait)
+        except asyncio.TimeoutError:
+            slots.shed += 1
+            raise Overloaded("Tempo de espera na fila esgotado", self._retry_after(slots))
+        except asyncio.CancelledError:
+            # Cliente desconectou depois de receber a vaga: devolve
+            if future.done() and not future.cancelled():
+                self.release(key, None)
+            raise
+        finally:
+            if not future.done() or future.cancelled():
+                # Ainda na fila (se _dispatch já o descartou, já descontou)
+                try:
+                    slots.waiters.remove(future)
+                    self.waiting -= 1
+                except ValueError:
+                    pass
+            slots.total_queue_wait += time.perf_counter() - started
+
+    # ---------- saída ----------
+    def release(self, key: str, latency: Optional[float]) -> None:
+        slots = self._tenants.get(key)
+        if slots is not None:
+            slots.inflight -= 1
+        self.inflight -= 1
+        if latency is not None:
+            self._adapt(latency)
+        self._dispatch()
+
+    def _adapt(self, latency: float) -> None:
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma += _EWMA_ALPHA * (latency - self.latency_ewma)
+
+        now = time.monotonic()
+        if self.latency_ewma > self.target_latency:
+            if now - self._last_decrease >= self.target_latency:
+                self.limit = max(self.min_limit, self.limit * 0.9)
+                self._last_decrease = now
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def _dispatch(self) -> None:
+        """Entrega vagas livres aos tenants com fila, do mais atrasado (inflight/peso) ao menos."""
+        while self.waiting and self.inflight < int(self.limit):
+            candidates = [s for s in self._tenants.values() if s.waiters]
+            if not candidates:
+                return
+            slots = min(candidates, key=lambda s: s.inflight / s.weight)
+            future = slots.waiters.popleft()
+            self.waiting -= 1
+            if future.done():  # expirou ou foi cancelado
+                continue
+            self._admit(slots)
+            future.set_result(None)
+
+    # ---------- rotas longas ----------
+    def acquire_bulk(self) -> None:
+        """Vaga de rota longa (CONCURRENCY_BULK_PATHS): sem fila, recusa na hora."""
+        if self.bulk_inflight >= self.bulk_limit:
+            self.bulk_shed += 1
+            raise Overloaded("Muitas exportações/importações em andamento", _BULK_RETRY_AFTER)
+        self.bulk_inflight += 1
+
+    def release_bulk(self) -> None:
+        self.bulk_inflight -= 1
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "inflight": self.inflight,
+            "waiting": self.waiting,
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 2) if self.latency_ewma is not None else None,
+            "target_latency_ms": self.target_latency * 1000,
+            "tenants": {key: slots.snapshot() for key, slots in self._tenants.items()},
+            "bulk": {"limit": self.bulk_limit, "inflight": self.bulk_inflight, "shed": self.bulk_shed},
+        }
+
+
+concurrency_limiter = AdaptiveConcurrencyLimiter()
@@ -0,0 +1,201 @@
+# app/services/exports.py
+
+import csv
+import io
+import os
+from datetime import datetime
+from typing import AsyncIterator, NamedTuple
+
+from pydantic_core import to_json
+from sqlalchemy import Boolean, DateTime, Float, Integer, Numeric
+from starlette.concurrency import run_in_threadpool
+
+from app.crud import export as crud
+from app.crud.export import EXPORT_DATASETS, ExportFilters
+from app.database import AsyncSessionLocal
+from app.security.tenant import Tenant
+from app.services.product_import import CSV_IMAGE_SEPARATOR
+
+# =========================
+# Configuração
+# =========================
+
+# Linhas por lote: lidas do cursor, formatadas e enviadas de uma vez
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+class ExportUnavailable(Exception):
+    """Formato sem a dependência instalada (parquet sem pyarrow)."""
+
+
+# =========================
+# Formatos
+# =========================
+class CsvEncoder:
+    """CSV com BOM (planilhas) e imagens separadas como na importação."""
+    def __init__(self, names: list[str], columns: tuple):
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+        self.names = names
+        self.buffer.write("\ufeff")
+        self.writer.writerow(names)
+
+    @staticmethod
+    def _cell(value):
+        if value is None:
+            return ""
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if isinstance(value, list):
+            return CSV_IMAGE_SEPARATOR.join(value)
+        return value
+
+    def _drain(self) -> bytes:
+        data = self.buffer.getvalue().encode()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+    def encode(self, rows: list[dict]) -> bytes:
+        cell = self._cell
+        self.writer.writerows([cell(row[name]) for name in self.names] for row in rows)
+        return self._drain()
+
+    def close(self) -> bytes:
+        return self._drain()
+
+
+class NdjsonEncoder:
+    def __init__(self, names: list[str], columns: tuple):
+        pass
+
+    def encode(self, rows: list[dict]) -> bytes:
+        return b"".join(to_json(row) + b"\n" for row in rows)
+
+    def close(self) -> bytes:
+        return b""
+
+
+class _Sink(io.RawIOBase):
+    """Arquivo só de escrita que acumula o que o ParquetWriter gravou até o próximo drain."""
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _arrow_type(pa, column):
+    kind = column.type
+    if isinstance(kind, Boolean):
+        return pa.bool_()
+    if isinstance(kind, DateTime):
+        return pa.timestamp("us")
+    if isinstance(kind, Integer):
+        return pa.int64()
+    if isinstance(kind, (Float, Numeric)):
+        return pa.float64()
+    # String, Enum (valor), IdType (UUID em texto)
+    return pa.string()
+
+
+class ParquetEncoder:
+    """Um row group por lote; o rodapé (schema, estatísticas) sai no close."""
+    def __init__(self, names: list[str], columns: tuple):
+        pa, pq = _pyarrow()
+        fields = [pa.field(column.key, _arrow_type(pa, column)) for column in columns]
+        if len(names) > len(columns):
+            fields.append(pa.field("images", pa.list_(pa.string())))
+        self.pa = pa
+        self.schema = pa.schema(fields)
+        self.sink = _Sink()
+        self.writer = pq.ParquetWriter(self.sink, self.schema, compression="zstd")
+
+    def encode(self, rows: list[dict]) -> bytes:
+        self.writer.write_table(self.pa.Table.from_pylist(rows, schema=self.schema))
+        return self.sink.drain()
+
+    def close(self) -> bytes:
+        self.writer.close()
+        return self.sink.drain()
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ExportUnavailable("Exportação em parquet indisponível: instale o pyarrow") from exc
+    return pyarrow, pyarrow.parquet
+
+
+_ENCODERS = {"csv": CsvEncoder, "ndjson": NdjsonEncoder, "parquet": ParquetEncoder}
+
+
+# =========================
+# Exportação
+# =========================
+class Export(NamedTuple):
+    body: AsyncIterator[bytes]
+    media_type: str
+    filename: str
+
+
+async def _stream(dataset: str, encoder, tenant: Tenant, filters: ExportFilters, batch_size: int):
+    # Sessão própria, aberta só quando o primeiro byte é pedido: a conexão
+    # sai do pool durante o streaming e volta no fim ou quando o cliente
+    # desconecta (o cancelamento fecha o gerador e o `async with`)
+    async with AsyncSessionLocal() as db:
+        db.info["read_only"] = True
+        async for rows in crud.stream_export(db, tenant, dataset, filters, batch_size):
+            # Formatar é CPU: fora do event loop
+            chunk = await run_in_threadpool(encoder.encode, rows)
+            if chunk:
+                yield chunk
+    tail = encoder.close()
+    if tail:
+        yield tail
+
+
+def open_export(
+    dataset: str,
+    fmt: str,
+    tenant: Tenant,
+    filters: ExportFilters,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Export:
+    """
+    Prepara a exportação de um conjunto do tenant (products, orders,
+    order_items, stock_movements) em CSV, NDJSON ou Parquet. Filtros e
+    formato são validados aqui (ValueError, ExportUnavailable), antes de a
+    resposta começar; o banco só é lido quando o corpo é iterado, em lotes
+    de `batch_size` linhas por um cursor do lado do servidor.
+    """
+    crud.validate_filters(dataset, filters)
+    spec = EXPORT_DATASETS[dataset]
+    encoder = _ENCODERS[fmt](spec.names, spec.columns)
+    media_type, extension = EXPORT_FORMATS[fmt]
+    filename = f"{dataset}-{datetime.utcnow():%Y%m%d-%H%M%S}.{extension}"
+    return Export(_stream(dataset, encoder, tenant, filters, batch_size), media_type, filename)
@@ -0,0 +1,136 @@
+# app/services/image_gc.py
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app.crud import image_blob as crud
+from app.database import shard_map
+from app.services.images import remove_blob_files
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Configuração
+# =========================
+
+# Tempo mínimo sem referências antes de apagar um blob: um reupload do
+# mesmo conteúdo nesse intervalo reaproveita os arquivos
+IMAGE_BLOB_GC_GRACE_SECONDS = float(os.getenv("IMAGE_BLOB_GC_GRACE_SECONDS", 3600))
+IMAGE_BLOB_GC_INTERVAL_SECONDS = float(os.getenv("IMAGE_BLOB_GC_INTERVAL_SECONDS", 600))
+# Blobs examinados por shard em cada passada
+IMAGE_BLOB_GC_BATCH = int(os.getenv("IMAGE_BLOB_GC_BATCH", 500))
+
+
+class BlobCollector:
+    """
+    Apaga os blobs de imagem sem referência (refcount zerado há mais de
+    `grace` segundos). Antes de apagar confere as ProductImage de verdade:
+    um blob com referências que não foram contadas (escrita fora do ORM sem
+    adjust_refcounts) tem o refcount corrigido em vez de ser apagado. Os
+    arquivos são compartilhados entre shards, então só saem do disco quando
+    nenhum shard tem a linha do blob nem imagens apontando para ele.
+    """
+    def __init__(
+        self,
+        grace: float = IMAGE_BLOB_GC_GRACE_SECONDS,
+        interval: float = IMAGE_BLOB_GC_INTERVAL_SECONDS,
+        batch: int = IMAGE_BLOB_GC_BATCH,
+    ):
+        self.grace = grace
+        self.interval = interval
+        self.batch = batch
+        self._monitor = None
+        self.collected = 0
+        self.files_removed = 0
+        self.repaired = 0
+        self.last_run = None
+
+    @staticmethod
+    def _held(hashes: list[str]) -> set:
+        # Inclui o próprio shard: um reupload logo após o DELETE recria a linha
+        held = set()
+        for shard in shard_map.shards.values():
+            with shard.engine.connect() as conn:
+                held |= crud.existing_blobs(conn, hashes)
+                held |= set(crud.image_references(conn, hashes))
+        return held
+
+    def collect(self) -> int:
+        """Uma passada em todos os shards; devolve quantos blobs foram apagados."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.grace)
+        collected = 0
+        for shard in shard_map.shards.values():
+            with shard.engine.begin() as conn:
+                candidates = crud.collectable_blobs(conn, cutoff, self.batch)
+                if not candidates:
+                    continue
+                references = crud.image_references(conn, candidates)
+                if references:
+                    crud.repair_refcounts(conn, references)
+                    self.repaired += len(references)
+                deleted = crud.delete_blobs(
+                    conn, [blob_hash for blob_hash in candidates if blob_hash not in references], cutoff
+                )
+            if not deleted:
+                continue
+            # Arquivos depois do commit: se o DELETE não valeu, nada some do disco
+            held = self._held(deleted)
+            for blob_hash in deleted:
+                if blob_hash not in held:
+                    self.files_removed += remove_blob_files(blob_hash)
+            collected += len(deleted)
+        self.collected += collected
+        self.last_run = time.time()
+        return collected
+
+    def start_monitor(self) -> None:
+        if self._monitor is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(self.interval)
+                try:
+                    self.collect()
+                except Exception:
+                    logger.exception("Falha na coleta de imagens sem referência")
+
+        self._monitor = threading.Thread(target=loop, name="image-blob-gc", daemon=True)
+        self._monitor.start()
+
+    def snapshot(self) -> dict:
+        return {
+            "grace_seconds": self.grace,
+            "collected": self.collected,
+            "files_removed": self.files_removed,
+            "repaired": self.repaired,
+            "last_run_age": round(time.time() - self.last_run, 1) if self.last_run else None,
+        }
+
+
+blob_collector = BlobCollector()
+
+
+def main() -> None:
+    import argparse
+
+    from app import models  # noqa: F401  (registra todas as tabelas)
+
+    parser = argparse.ArgumentParser(description="Apaga os blobs de imagem sem referência")
+    parser.add_argument("--grace", type=float, default=IMAGE_BLOB_GC_GRACE_SECONDS, help="segundos")
+    args = parser.parse_args()
+
+    collector = BlobCollector(grace=args.grace)
+    while True:
+        repaired = collector.repaired
+        if not collector.collect() and collector.repaired == repaired:
+            break
+    print(f"✅ {collector.collected} blobs apagados, {collector.files_removed} arquivos, "
+          f"{collector.repaired} refcounts corrigidos")
+
+
+if __name__ == "__main__":
+    main()
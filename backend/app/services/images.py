@@ -0,0 +1,356 @@
+# app/services/images.py
+
+import asyncio
+import base64
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+from PIL import Image, ImageOps
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Configuração
+# =========================
+
+# Arquivos públicos (servidos em /static), por conteúdo: <sha256[:2]>/<sha256>[-variante].webp
+IMAGE_BLOB_DIR = "static/blobs"
+# Uploads brutos aguardando processamento (fora do /static); apagados ao concluir
+IMAGE_RAW_DIR = os.getenv("IMAGE_RAW_DIR", "uploads_raw")
+os.makedirs(IMAGE_BLOB_DIR, exist_ok=True)
+os.makedirs(IMAGE_RAW_DIR, exist_ok=True)
+
+ALLOWED_IMAGE_TYPES = ("JPEG", "PNG", "WEBP")
+
+# Processos que decodificam/redimensionam/codificam (0 = threadpool, sem processos)
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", os.cpu_count() or 1))
+# Imagens na fila + em processamento; acima disso o upload é recusado (503)
+IMAGE_MAX_PENDING = int(os.getenv("IMAGE_MAX_PENDING", max(1, IMAGE_WORKERS) * 16))
+
+# Variantes responsivas: nome:lado maior em px (nunca amplia o original)
+IMAGE_VARIANTS = {
+    name: int(size)
+    for name, size in (
+        item.split(":") for item in os.getenv("IMAGE_VARIANTS", "thumb:160,medium:480,large:1200").split(",")
+    )
+}
+IMAGE_WEBP_QUALITY = int(os.getenv("IMAGE_WEBP_QUALITY", 82))
+# Placeholder borrado enquanto a imagem carrega: lado maior em px
+IMAGE_PLACEHOLDER_SIZE = int(os.getenv("IMAGE_PLACEHOLDER_SIZE", 16))
+
+_MAGIC = (
+    (b"\xff\xd8\xff", "JPEG"),
+    (b"\x89PNG\r\n\x1a\n", "PNG"),
+)
+
+
+def sniff_format(head: bytes) -> Optional[str]:
+    """
+    Formato pelos bytes iniciais, sem decodificar: a validação completa
+    (verify + decode) acontece no worker.
+    """
+    for magic, fmt in _MAGIC:
+        if head.startswith(magic):
+            return fmt
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "WEBP"
+    return None
+
+
+_BLOB_URL = re.compile(rf"^/{re.escape(IMAGE_BLOB_DIR)}/[0-9a-f]{{2}}/([0-9a-f]{{64}})\.webp$")
+
+
+def content_hash(content: bytes) -> str:
+    """sha256 do upload: chave do blob. Para arquivos grandes, chame no threadpool."""
+    return hashlib.sha256(content).hexdigest()
+
+
+def raw_path(blob_hash: str) -> str:
+    return os.path.join(IMAGE_RAW_DIR, blob_hash)
+
+
+def blob_dir(blob_hash: str) -> str:
+    return os.path.join(IMAGE_BLOB_DIR, blob_hash[:2])
+
+
+def blob_url(blob_hash: str, filename: Optional[str] = None) -> str:
+    return f"/{IMAGE_BLOB_DIR}/{blob_hash[:2]}/{filename or blob_hash + '.webp'}"
+
+
+def blob_hash_from_url(url: str) -> Optional[str]:
+    """Hash do blob cujo WEBP original é `url`; None para outras URLs."""
+    match = _BLOB_URL.match(url or "")
+    return match.group(1) if match else None
+
+
+def store_raw(blob_hash: str, content: bytes) -> None:
+    """Grava o upload bruto para o worker (I/O: chame no threadpool)."""
+    with open(raw_path(blob_hash), "wb") as f:
+        f.write(content)
+
+
+def _discard(path: str) -> None:
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def discard_raw(blob_hash: str) -> None:
+    _discard(raw_path(blob_hash))
+
+
+def remove_blob_files(blob_hash: str) -> int:
+    """Apaga o original, as variantes (qualquer configuração) e o bruto de um blob."""
+    directory = blob_dir(blob_hash)
+    names = os.listdir(directory) if os.path.isdir(directory) else []
+    paths = [
+        os.path.join(directory, name) for name in names
+        if name == f"{blob_hash}.webp" or name.startswith(f"{blob_hash}-")
+    ]
+    for path in paths + [raw_path(blob_hash)]:
+        _discard(path)
+    return len(paths)
+
+
+# =========================
+# Processamento (roda nos processos do pool)
+# =========================
+def _save_webp(image: Image.Image, path: str, quality: int = IMAGE_WEBP_QUALITY) -> None:
+    # Grava ao lado e renomeia: quem serve /static nunca vê arquivo pela metade
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    image.save(tmp_path, format="WEBP", quality=quality)
+    os.replace(tmp_path, path)
+
+
+def process_image(source_path: str, out_dir: str, stem: str) -> dict:
+    """
+    Valida e decodifica o upload bruto e grava em `out_dir` o WEBP
+    original (`<stem>.webp`) e as variantes (`<stem>-<nome>.webp`). Cada
+    variante sai da anterior, maior, e não do original: o redimensionamento
+    custa proporcional ao tamanho de entrada. Devolve dimensões, nomes dos
+    arquivos e o placeholder em data URI. ValueError se o arquivo não é
+    uma imagem aceita.
+    """
+    try:
+        with Image.open(source_path) as probe:
+            fmt = probe.format
+            probe.verify()
+        if fmt not in ALLOWED_IMAGE_TYPES:
+            raise ValueError(f"Tipo de imagem não permitido: {fmt}")
+        with Image.open(source_path) as source:
+            # Orientação da câmera (EXIF) aplicada nos pixels
+            image = ImageOps.exif_transpose(source)
+            image.load()
+    except (OSError, SyntaxError, Image.DecompressionBombError) as exc:
+        raise ValueError(f"Arquivo de imagem inválido: {exc}") from exc
+
+    if image.mode not in ("RGB", "RGBA"):
+        transparent = "A" in image.getbands() or "transparency" in image.info
+        image = image.convert("RGBA" if transparent else "RGB")
+
+    os.makedirs(out_dir, exist_ok=True)
+    width, height = image.size
+    _save_webp(image, os.path.join(out_dir, f"{stem}.webp"))
+
+    variants = {}
+    current = image
+    for name, size in sorted(IMAGE_VARIANTS.items(), key=lambda item: -item[1]):
+        current = current.copy()
+        current.thumbnail((size, size), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        filename = f"{stem}-{name}.webp"
+        _save_webp(current, os.path.join(out_dir, filename))
+        variants[name] = filename
+
+    current.thumbnail((IMAGE_PLACEHOLDER_SIZE, IMAGE_PLACEHOLDER_SIZE), Image.Resampling.BILINEAR)
+    buffer = io.BytesIO()
+    current.save(buffer, format="WEBP", quality=30)
+    placeholder = "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+    return {"width": width, "height": height, "variants": variants, "placeholder": placeholder}
+
+
+# =========================
+# Serviço assíncrono
+# =========================
+class ImageProcessingBusy(RuntimeError):
+    """Fila de imagens cheia: o upload deve ser recusado (503)."""
+
+
+class ImageJob(NamedTuple):
+    blob_hash: str
+    # Tenant de um dos uploads: a sessão que grava o resultado vai para o shard dele
+    company_id: str
+    store_id: Optional[str]
+
+
+class ImagePipeline:
+    """
+    Processa uploads de imagem num ProcessPoolExecutor limitado, fora do
+    event loop e do GIL: a rota só grava o arquivo bruto e a linha
+    `pending`, e a vazão cresce com os núcleos (IMAGE_WORKERS). Cada
+    conteúdo (ImageBlob) é processado uma vez; ao terminar, o blob e as
+    ProductImage que esperam por ele passam a `ready` (ou `failed`), o que
+    também invalida o cache do catálogo das empresas afetadas.
+
+    A fila é limitada como no PasswordHasher: com `max_pending` imagens em
+    andamento, `reserve()` falha na hora com ImageProcessingBusy. Pendências
+    de um processo que caiu são retomadas no startup (`resume`); o
+    processamento é idempotente, então retomar em mais de um worker só
+    repete trabalho.
+    """
+    def __init__(self, workers: int = IMAGE_WORKERS, max_pending: int = IMAGE_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._tasks: set = set()
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.resumed = 0
+        self.total_seconds = 0.0
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0:
+            return None  # loop.run_in_executor(None) = threadpool padrão
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn: os workers só importam este módulo (sem herdar
+                    # threads/conexões do processo da API via fork)
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    # ---------- fila ----------
+    def reserve(self) -> None:
+        """
+        Reserva uma vaga antes de aceitar o upload; devolvida por `release`
+        se o upload não chegar a `submit`.
+        """
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise ImageProcessingBusy("Muitas imagens em processamento")
+            self.pending += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self.pending -= 1
+
+    def submit(self, job: ImageJob) -> None:
+        """Agenda o processamento de um upload já gravado e commitado (vaga reservada)."""
+        task = asyncio.get_running_loop().create_task(self._process(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, job: ImageJob) -> None:
+        started = time.perf_counter()
+        result, error = None, None
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self._get_executor(),
+                process_image,
+                raw_path(job.blob_hash),
+                blob_dir(job.blob_hash),
+                job.blob_hash,
+            )
+        except ValueError as exc:
+            error = str(exc)[:255]
+        except Exception:
+            # Pool encerrado/worker morto: fica pending, retomado no próximo startup
+            logger.exception("Falha ao processar a imagem %s", job.blob_hash)
+            self.release()
+            return
+
+        try:
+            await self._store(job, result, error)
+        except Exception:
+            # Banco fora do ar: o bruto continua em disco e a linha pending
+            logger.exception("Falha ao gravar a imagem processada %s", job.blob_hash)
+        else:
+            await run_in_threadpool(discard_raw, job.blob_hash)
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+                self.failed += error is not None
+                self.total_seconds += time.perf_counter() - started
+
+    async def _store(self, job: ImageJob, result: Optional[dict], error: Optional[str]) -> None:
+        # Imports do banco só aqui: os processos do pool (spawn) importam
+        # este módulo e não devem montar engines nem pools de conexão
+        from app.crud import image_blob as crud
+        from app.crud.tenant_scope import bind_tenant
+        from app.database import AsyncSessionLocal
+        from app.security.tenant import Tenant
+
+        if result is not None:
+            result = {
+                **result,
+                "variants": {name: blob_url(job.blob_hash, filename) for name, filename in result["variants"].items()},
+            }
+        async with AsyncSessionLocal() as db:
+            bind_tenant(db, Tenant(job.company_id, job.store_id))
+            stored = await db.run_sync(crud.finish_blob, job.blob_hash, result, error)
+            await db.commit()
+        if not stored:
+            # Blob coletado durante o processamento: descarta o que foi gerado
+            await run_in_threadpool(remove_blob_files, job.blob_hash)
+
+    # ---------- recuperação ----------
+    def _pending_jobs(self) -> list[ImageJob]:
+        from app.crud.image_blob import pending_blob_jobs
+        from app.database import shard_map
+
+        jobs = []
+        for shard in shard_map.shards.values():
+            with shard.engine.connect() as conn:
+                for blob_hash, company_id, store_id in pending_blob_jobs(conn):
+                    if not os.path.exists(raw_path(blob_hash)):
+                        continue  # bruto em outro host/volume: não há o que retomar aqui
+                    jobs.append(ImageJob(blob_hash, str(company_id), store_id and str(store_id)))
+        return jobs
+
+    async def resume(self) -> int:
+        """Reenfileira os blobs sem resultado cujo bruto está neste disco (startup)."""
+        jobs = await run_in_threadpool(self._pending_jobs)
+        for job in jobs:
+            # Fora do limite: são uploads já aceitos
+            with self._lock:
+                self.pending += 1
+            self.submit(job)
+        self.resumed += len(jobs)
+        return len(jobs)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def snapshot(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "resumed": self.resumed,
+            "avg_ms": round(self.total_seconds / self.completed * 1000, 1) if self.completed else None,
+        }
+
+
+image_pipeline = ImagePipeline()
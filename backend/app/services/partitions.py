@@ -0,0 +1,286 @@
+# app/services/partitions.py
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Engine
+
+from app import models  # noqa: F401  (registra as tabelas declaradas com partition_by)
+from app.database import Base, engine
+from app.models.partitioning import (
+    DB_PARTITION_MONTHS_AHEAD,
+    DB_PARTITION_RETENTION_MODE,
+    DB_PARTITION_RETENTION_MONTHS,
+    DB_PARTITIONING,
+    PartitionSpec,
+    add_months,
+    month_floor,
+    partition_name,
+    partitioned_tables,
+)
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Configuração
+# =========================
+
+# Intervalo entre rodadas de manutenção (criar à frente, aplicar retenção)
+DB_PARTITION_MAINTENANCE_SECONDS = float(os.getenv("DB_PARTITION_MAINTENANCE_SECONDS", 6 * 3600))
+
+# Lock nomeado do MySQL: só um worker executa DDL por vez
+_MAINTENANCE_LOCK = "renitech_partition_maintenance"
+
+MAXVALUE_PARTITION = "pmax"
+
+_CATALOG_SQL = text("""
+    SELECT TABLE_NAME, PARTITION_NAME, PARTITION_DESCRIPTION,
+           SUM(TABLE_ROWS) AS row_estimate,
+           SUM(DATA_LENGTH + INDEX_LENGTH) AS bytes
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE()
+      AND TABLE_NAME IN :tables
+      AND PARTITION_NAME IS NOT NULL
+    GROUP BY TABLE_NAME, PARTITION_NAME, PARTITION_DESCRIPTION, PARTITION_ORDINAL_POSITION
+    ORDER BY TABLE_NAME, PARTITION_ORDINAL_POSITION
+""").bindparams(bindparam("tables", expanding=True))
+
+
+@dataclass
+class Partition:
+    name: str
+    upper: Optional[datetime]  # None = MAXVALUE
+    row_estimate: int = 0
+    bytes: int = 0
+
+
+# =========================
+# DDL
+# =========================
+def _less_than(upper: Optional[datetime]) -> str:
+    if upper is None:
+        return "MAXVALUE"
+    return f"'{upper:%Y-%m-%d %H:%M:%S}'"
+
+
+def _partition_list(months: list[datetime]) -> str:
+    parts = [
+        f"PARTITION {partition_name(month)} VALUES LESS THAN ({_less_than(add_months(month, 1))})"
+        for month in months
+    ]
+    parts.append(f"PARTITION {MAXVALUE_PARTITION} VALUES LESS THAN (MAXVALUE)")
+    return ",\n    ".join(parts)
+
+
+def _month_range(first: datetime, last: datetime) -> list[datetime]:
+    months, month = [], month_floor(first)
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def conversion_ddl(table: str, spec: PartitionSpec, oldest: Optional[datetime], now: datetime) -> list[str]:
+    """
+    Particiona uma tabela existente: a PK passa a incluir as colunas de
+    partição (exigência do MySQL para chaves únicas) e uma partição por
+    mês cobre do registro mais antigo até DB_PARTITION_MONTHS_AHEAD à frente.
+    As FKs da tabela precisam ter sido removidas antes (o MySQL não
+    suporta FK em tabela particionada).
+    """
+    last = add_months(month_floor(now), DB_PARTITION_MONTHS_AHEAD)
+    months = _month_range(oldest or now, last)
+
+    key_columns = ["id", spec.column]
+    subpartition = ""
+    if spec.company_buckets:
+        key_columns.append(spec.key_column)
+        subpartition = f"\nSUBPARTITION BY KEY({spec.key_column}) SUBPARTITIONS {spec.company_buckets}"
+
+    return [
+        f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY ({', '.join(key_columns)})",
+        f"ALTER TABLE {table}\nPARTITION BY RANGE COLUMNS({spec.column}){subpartition} (\n"
+        f"    {_partition_list(months)}\n)",
+    ]
+
+
+def maintenance_ddl(table: str, spec: PartitionSpec, partitions: list[Partition], now: datetime) -> list[str]:
+    """
+    DDL de uma rodada de manutenção:
+    - cria as partições que faltam até DB_PARTITION_MONTHS_AHEAD meses à
+      frente, dividindo a `pmax` (vazia, então o REORGANIZE não copia dados);
+    - com DB_PARTITION_RETENTION_MONTHS, tira da tabela os meses vencidos:
+      "exchange" troca a partição por uma tabela `<tabela>_archive_pAAAAMM`
+      (só metadados), "drop" apaga.
+    """
+    bounded = [p for p in partitions if p.upper is not None]
+    if not bounded:
+        return []
+    ddl = []
+
+    last_upper = max(p.upper for p in bounded)
+    target = add_months(month_floor(now), DB_PARTITION_MONTHS_AHEAD + 1)
+    if last_upper < target:
+        months = _month_range(last_upper, add_months(target, -1))
+        ddl.append(
+            f"ALTER TABLE {table} REORGANIZE PARTITION {MAXVALUE_PARTITION} INTO (\n"
+            f"    {_partition_list(months)}\n)"
+        )
+
+    if DB_PARTITION_RETENTION_MONTHS > 0:
+        cutoff = add_months(month_floor(now), -DB_PARTITION_RETENTION_MONTHS)
+        # Sempre sobra ao menos uma partição com limite
+        for partition in [p for p in bounded if p.upper <= cutoff][: len(bounded) - 1]:
+            ddl.extend(_retire(table, spec, partition.name))
+    return ddl
+
+
+def _retire(table: str, spec: PartitionSpec, name: str) -> list[str]:
+    if DB_PARTITION_RETENTION_MODE == "drop":
+        return [f"ALTER TABLE {table} DROP PARTITION {name}"]
+
+    archive = f"{table}_archive_{name}"
+    ddl = [
+        f"CREATE TABLE IF NOT EXISTS {archive} LIKE {table}",
+        f"ALTER TABLE {archive} REMOVE PARTITIONING",
+    ]
+    if spec.company_buckets:
+        # EXCHANGE não aceita partição com subpartições: copia e apaga
+        ddl.append(f"INSERT INTO {archive} SELECT * FROM {table} PARTITION ({name})")
+    else:
+        ddl.append(f"ALTER TABLE {table} EXCHANGE PARTITION {name} WITH TABLE {archive}")
+    ddl.append(f"ALTER TABLE {table} DROP PARTITION {name}")
+    return ddl
+
+
+# =========================
+# Catálogo + manutenção
+# =========================
+class PartitionManager:
+    """
+    Partições das tabelas declaradas com `partition_by` (app.models).
+
+    Guarda em memória os limites de cada tabela, lidos de
+    information_schema; o CRUD usa esses limites para quebrar as listagens
+    em faixas podáveis (`boundaries`). Um thread em background cria as
+    partições à frente e aplica a retenção; com vários workers, o lock
+    nomeado do MySQL garante que só um executa DDL por vez.
+    """
+    def __init__(
+        self,
+        db_engine: Engine,
+        tables: dict,
+        enabled: bool = DB_PARTITIONING,
+        interval: float = DB_PARTITION_MAINTENANCE_SECONDS,
+    ):
+        self.engine = db_engine
+        self.tables = tables
+        self.enabled = enabled and db_engine.dialect.name == "mysql"
+        self.interval = interval
+        self._partitions: dict[str, list[Partition]] = {}
+        self._boundaries: dict[str, list[datetime]] = {}
+        self._monitor: Optional[threading.Thread] = None
+        self.ddl_applied = 0
+        self.last_maintenance: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def boundaries(self, table: str) -> Optional[list[datetime]]:
+        """Limites superiores das partições (crescente) ou None se a tabela não é particionada."""
+        return self._boundaries.get(table) if self.enabled else None
+
+    def refresh(self) -> None:
+        if not self.enabled:
+            return
+        partitions: dict[str, list[Partition]] = {}
+        with self.engine.connect() as conn:
+            for row in conn.execute(_CATALOG_SQL, {"tables": list(self.tables)}).mappings():
+                description = row["PARTITION_DESCRIPTION"]
+                upper = None if description == "MAXVALUE" else datetime.fromisoformat(description.strip("'"))
+                partitions.setdefault(row["TABLE_NAME"], []).append(
+                    Partition(row["PARTITION_NAME"], upper, int(row["row_estimate"] or 0), int(row["bytes"] or 0))
+                )
+        self._partitions = partitions
+        self._boundaries = {
+            table: [p.upper for p in parts if p.upper is not None]
+            for table, parts in partitions.items()
+        }
+
+    def plan(self, now: Optional[datetime] = None) -> list[str]:
+        now = now or datetime.utcnow()
+        ddl = []
+        for name, (_, spec) in self.tables.items():
+            if name in self._partitions:
+                ddl.extend(maintenance_ddl(name, spec, self._partitions[name], now))
+        return ddl
+
+    def maintain(self) -> list[str]:
+        """Uma rodada de manutenção; devolve o DDL executado."""
+        if not self.enabled:
+            return []
+        self.refresh()
+        ddl = self.plan()
+        if ddl:
+            with self.engine.connect() as conn:
+                if not conn.scalar(text("SELECT GET_LOCK(:name, 0)"), {"name": _MAINTENANCE_LOCK}):
+                    return []  # outro worker está mantendo
+                try:
+                    for statement in ddl:
+                        conn.exec_driver_sql(statement)
+                        self.ddl_applied += 1
+                finally:
+                    conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": _MAINTENANCE_LOCK})
+            self.refresh()
+        self.last_maintenance = time.time()
+        return ddl
+
+    def start_monitor(self) -> None:
+        if not self.enabled or self._monitor is not None:
+            return
+
+        def run():
+            try:
+                self.maintain()
+                self.last_error = None
+            except Exception as exc:
+                # Sem partição à frente os INSERTs caem na pmax: não perde dados
+                self.last_error = str(exc)
+                logger.exception("Falha na manutenção de partições")
+
+        run()
+
+        def loop():
+            while True:
+                time.sleep(self.interval)
+                run()
+
+        self._monitor = threading.Thread(target=loop, name="partition-maintenance", daemon=True)
+        self._monitor.start()
+
+    def snapshot(self) -> dict:
+        tables = {}
+        for name, parts in self._partitions.items():
+            bounded = [p.upper for p in parts if p.upper is not None]
+            tables[name] = {
+                "partitions": len(parts),
+                "oldest_upper": bounded[0].isoformat() if bounded else None,
+                "newest_upper": bounded[-1].isoformat() if bounded else None,
+                "rows_in_maxvalue": next((p.row_estimate for p in parts if p.upper is None), 0),
+                "row_estimate": sum(p.row_estimate for p in parts),
+                "largest_partition_bytes": max((p.bytes for p in parts), default=0),
+            }
+        return {
+            "enabled": self.enabled,
+            "tables": tables,
+            "ddl_applied": self.ddl_applied,
+            "last_maintenance": self.last_maintenance,
+            "last_error": self.last_error,
+        }
+
+
+partition_manager = PartitionManager(engine, partitioned_tables(Base.metadata))
@@ -0,0 +1,199 @@
+# app/services/passwords.py
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from passlib.context import CryptContext
+
+# =========================
+# Configuração
+# =========================
+
+# Parâmetros do argon2id (calibre com `python -m app.services.passwords --target-ms 250`)
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", 3))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", 65536))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", 4))
+
+# Processos dedicados a hash/verificação (0 = threadpool, sem processos)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+# Máximo de operações na fila + em execução; acima disso, recusa (backpressure)
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", max(1, PASSWORD_HASH_WORKERS) * 8))
+
+
+def build_context(
+    time_cost: int = ARGON2_TIME_COST,
+    memory_cost: int = ARGON2_MEMORY_COST,
+    parallelism: int = ARGON2_PARALLELISM,
+) -> CryptContext:
+    """
+    argon2id para hashes novos; bcrypt (legado de crud/user_crud e
+    security.py) ainda verifica, mas é marcado para rehash no login.
+    Hashes argon2 com parâmetros diferentes dos atuais também são refeitos.
+    """
+    return CryptContext(
+        schemes=["argon2", "bcrypt"],
+        deprecated=["bcrypt"],
+        argon2__type="ID",
+        argon2__time_cost=time_cost,
+        argon2__memory_cost=memory_cost,
+        argon2__parallelism=parallelism,
+    )
+
+
+pwd_context = build_context()
+
+
+# =========================
+# Funções síncronas (rodam nos processos do pool)
+# =========================
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    return verify_and_update(password, hashed)[0]
+
+
+def verify_and_update(password: str, hashed: str) -> tuple[bool, Optional[str]]:
+    """
+    (senha confere?, novo hash se o atual usa esquema/parâmetros antigos).
+    """
+    if not hashed:
+        return False, None
+    try:
+        return pwd_context.verify_and_update(password, hashed)
+    except ValueError:
+        # Hash em formato desconhecido: trata como senha inválida
+        return False, None
+
+
+# =========================
+# Serviço assíncrono
+# =========================
+class PasswordHashingBusy(RuntimeError):
+    """Fila de hashing cheia: a request deve ser recusada (503)."""
+
+
+class PasswordHasher:
+    """
+    Executa hash/verificação num ProcessPoolExecutor limitado, fora do
+    event loop e do GIL. A fila é limitada: com `max_pending` operações em
+    andamento, novas chamadas falham na hora com PasswordHashingBusy em vez
+    de acumular latência para todo mundo.
+    """
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0:
+            return None  # loop.run_in_executor(None) = threadpool padrão
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn: os workers só importam este módulo (sem herdar
+                    # threads/conexões do processo da API via fork)
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHashingBusy("Muitas operações de senha em andamento")
+            self.pending += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+                self.total_seconds += time.perf_counter() - started
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, hashed: str) -> tuple[bool, Optional[str]]:
+        """
+        Verifica a senha; o segundo item é o hash novo a gravar quando o
+        atual é bcrypt ou argon2 com parâmetros desatualizados.
+        """
+        return await self._run(verify_and_update, password, hashed)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def snapshot(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_ms": round(self.total_seconds / self.completed * 1000, 1) if self.completed else None,
+        }
+
+
+password_hasher = PasswordHasher()
+
+
+# =========================
+# Calibração
+# =========================
+def calibrate(target_ms: float, memory_cost: int, parallelism: int, samples: int = 3) -> dict:
+    """
+    Maior time_cost cujo hash fica dentro de `target_ms` nesta máquina,
+    com memória/paralelismo fixos.
+    """
+    chosen = None
+    for time_cost in range(1, 21):
+        context = build_context(time_cost, memory_cost, parallelism)
+        started = time.perf_counter()
+        for _ in range(samples):
+            context.hash("calibration-password")
+        elapsed_ms = (time.perf_counter() - started) / samples * 1000
+        print(f"  time_cost={time_cost:<3} {elapsed_ms:8.1f} ms")
+        if elapsed_ms > target_ms:
+            break
+        chosen = {"time_cost": time_cost, "ms": round(elapsed_ms, 1)}
+    if chosen is None:
+        chosen = {"time_cost": 1, "ms": round(elapsed_ms, 1)}
+    return {**chosen, "memory_cost": memory_cost, "parallelism": parallelism}
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Calibra o custo do argon2 para um tempo alvo por hash")
+    parser.add_argument("--target-ms", type=float, default=250)
+    parser.add_argument("--memory-cost", type=int, default=ARGON2_MEMORY_COST, help="KiB")
+    parser.add_argument("--parallelism", type=int, default=ARGON2_PARALLELISM)
+    args = parser.parse_args()
+
+    result = calibrate(args.target_ms, args.memory_cost, args.parallelism)
+    print(f"\n~{result['ms']} ms por hash. Configure:\n")
+    print(f"ARGON2_TIME_COST={result['time_cost']}")
+    print(f"ARGON2_MEMORY_COST={result['memory_cost']}")
+    print(f"ARGON2_PARALLELISM={result['parallelism']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# app/services/pool_metrics.py
+
+import os
+import threading
+import time
+import traceback
+from typing import Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+# =========================
+# Configuração
+# =========================
+
+# Limites (ms) do histograma de espera no checkout do pool
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Guarda a pilha de cada checkout para mostrar de onde vêm as conexões
+# presas. Custa um extract_stack por checkout: ligar só para diagnóstico
+DB_POOL_CAPTURE_STACKS = os.getenv("DB_POOL_CAPTURE_STACKS", "false").lower() in ("1", "true", "yes")
+
+# Quantos frames da pilha guardar para conexões presas
+STACK_LIMIT = 25
+
+
+class PoolMetrics:
+    """
+    Métricas de um pool de conexões: histograma do tempo de espera no
+    checkout e, para cada conexão emprestada, quando e (com
+    `capture_stacks`) de onde ela foi pega — para diagnosticar
+    esgotamento do pool em produção.
+    """
+    def __init__(self, name: str, capture_stacks: bool = DB_POOL_CAPTURE_STACKS):
+        self.name = name
+        self.capture_stacks = capture_stacks
+        self.pool: Optional[Pool] = None
+        self._lock = threading.Lock()
+        self._buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._wait_count = 0
+        self._wait_sum = 0.0
+        self._timeouts = 0
+        self._held: dict[int, tuple[float, Optional[list[str]]]] = {}
+
+    # ----------------------
+    # Coleta
+    # ----------------------
+    def observe_wait(self, seconds: float, timed_out: bool = False) -> None:
+        ms = seconds * 1000
+        index = next(
+            (i for i, limit in enumerate(WAIT_BUCKETS_MS) if ms <= limit),
+            len(WAIT_BUCKETS_MS),
+        )
+        with self._lock:
+            self._buckets[index] += 1
+            self._wait_count += 1
+            self._wait_sum += seconds
+            if timed_out:
+                self._timeouts += 1
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        stack = None
+        if self.capture_stacks:
+            stack = [
+                f"{frame.filename}:{frame.lineno} in {frame.name}"
+                for frame in traceback.extract_stack(limit=STACK_LIMIT)[:-1]
+                if "/sqlalchemy/" not in frame.filename
+            ]
+        with self._lock:
+            self._held[id(connection_record)] = (time.monotonic(), stack)
+
+    def on_checkin(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self._held.pop(id(connection_record), None)
+
+    # ----------------------
+    # Relatório
+    # ----------------------
+    def snapshot(self, long_held_seconds: float) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            # Histograma cumulativo (estilo Prometheus)
+            labels = [f"le_{limit}ms" for limit in WAIT_BUCKETS_MS] + ["le_inf"]
+            cumulative, histogram = 0, {}
+            for label, count in zip(labels, self._buckets):
+                cumulative += count
+                histogram[label] = cumulative
+
+            long_held = sorted(
+                (
+                    {"held_seconds": round(now - since, 3), "stack": stack}
+                    for since, stack in self._held.values()
+                    if now - since >= long_held_seconds
+                ),
+                key=lambda item: item["held_seconds"],
+                reverse=True,
+            )
+            wait = {
+                "count": self._wait_count,
+                "sum_seconds": round(self._wait_sum, 6),
+                "timeouts": self._timeouts,
+                "histogram": histogram,
+            }
+
+        pool = self.pool
+        return {
+            "name": self.name,
+            "size": pool.size() if isinstance(pool, QueuePool) else None,
+            "checked_out": pool.checkedout() if isinstance(pool, QueuePool) else len(self._held),
+            "idle": pool.checkedin() if isinstance(pool, QueuePool) else None,
+            "overflow": pool.overflow() if isinstance(pool, QueuePool) else None,
+            "checkout_wait": wait,
+            "long_held": long_held,
+        }
+
+
+# Registro global: um PoolMetrics por pool instrumentado
+registry: dict[str, PoolMetrics] = {}
+
+
+def instrument(pool: Pool, name: str) -> PoolMetrics:
+    """
+    Registra as métricas de um pool (eventos de checkout/checkin).
+    O tempo de espera é medido pelas classes Timed*QueuePool abaixo.
+    """
+    metrics = registry.setdefault(name, PoolMetrics(name))
+    metrics.pool = pool
+    pool._renitech_metrics = metrics
+    event.listen(pool, "checkout", metrics.on_checkout)
+    event.listen(pool, "checkin", metrics.on_checkin)
+    return metrics
+
+
+class _TimedCheckoutMixin:
+    """
+    Mede quanto tempo cada checkout esperou por uma conexão livre.
+    """
+    def _do_get(self):
+        metrics: Optional[PoolMetrics] = getattr(self, "_renitech_metrics", None)
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if metrics:
+                metrics.observe_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        if metrics:
+            metrics.observe_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # Os listeners são copiados pelo SQLAlchemy; só a referência às métricas não
+        new_pool = super().recreate()
+        metrics = getattr(self, "_renitech_metrics", None)
+        if metrics:
+            metrics.pool = new_pool
+            new_pool._renitech_metrics = metrics
+        return new_pool
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pools_report(long_held_seconds: float) -> list[dict]:
+    return [metrics.snapshot(long_held_seconds) for metrics in registry.values()]
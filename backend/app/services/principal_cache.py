@@ -0,0 +1,129 @@
+# app/services/principal_cache.py
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+# =========================
+# Configuração
+# =========================
+
+# Máximo de tokens em cache por processo (LRU) e por quanto tempo cada um
+# vale sem voltar ao banco. Mudanças de role/tenant e remoções valem antes
+# disso: as versões de token (app.services.token_versions) são conferidas
+# também nos acertos do cache.
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10_000))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", 60))
+
+# Campos do usuário que, ao mudar, invalidam os tokens já emitidos
+PRINCIPAL_FIELDS = ("role", "company_id", "store_id")
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    O que as checagens de permissão e de tenant precisam saber do usuário
+    logado, sem carregar a linha inteira de `users`.
+    """
+    id: str
+    role: str
+    company_id: Optional[str]
+    store_id: Optional[str]
+    token_version: int = 0
+
+    @property
+    def tenant_id(self):
+        return self.company_id
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=str(user.id),
+            role=user.role,
+            company_id=user.company_id,
+            store_id=user.store_id,
+            token_version=user.token_version or 0,
+        )
+
+
+class PrincipalCache:
+    """
+    Cache LRU com TTL de Principal por token (claim `jti`).
+
+    A revogação é por contador de versão: `users.token_version` vai no token
+    (`ver`) e é incrementado quando role/tenant mudam ou o usuário é
+    removido (app.services.token_versions, que também descarta as entradas
+    do usuário com `invalidate_user`).
+    """
+    def __init__(self, maxsize: int = PRINCIPAL_CACHE_SIZE, ttl: float = PRINCIPAL_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Principal]] = OrderedDict()
+        self._by_user: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Principal]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, principal = entry
+            if expires_at <= now:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return principal
+
+    def put(self, key: str, principal: Principal) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, principal)
+            self._by_user.setdefault(principal.id, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: str) -> None:
+        with self._lock:
+            for key in list(self._by_user.get(str(user_id), ())):
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def _remove(self, key: str) -> None:
+        _, principal = self._entries.pop(key)
+        keys = self._by_user.get(principal.id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[principal.id]
+
+    def snapshot(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+        }
+
+
+principal_cache = PrincipalCache()
@@ -0,0 +1,205 @@
+# app/services/product_import.py
+
+import csv
+import io
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import BinaryIO, Iterator, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import String
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.crud import product as crud
+from app.models.product import Product
+from app.schemas.product import ProductCreate
+from app.security.tenant import Tenant
+
+# =========================
+# Configuração
+# =========================
+
+# Linhas validadas e gravadas por transação (um INSERT de várias linhas)
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 1000))
+
+# Erros detalhados no relatório; além disso, só a contagem
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", 1000))
+
+IMPORT_FORMATS = ("csv", "jsonl")
+
+# Separador de URLs na coluna `images` do CSV
+CSV_IMAGE_SEPARATOR = "|"
+
+# Tamanho máximo das colunas de texto (o banco recusaria o lote inteiro)
+_MAX_LENGTHS = {
+    column.name: column.type.length
+    for column in Product.__table__.columns
+    if isinstance(column.type, String) and column.type.length
+}
+
+
+class ImportFormatError(ValueError):
+    """Arquivo ilegível no formato informado (cabeçalho, encoding)."""
+
+
+@dataclass
+class ImportReport:
+    format: str
+    rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+    seconds: float = 0.0
+
+    def error(self, row: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "format": self.format,
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.rows / self.seconds, 1) if self.seconds else None,
+        }
+
+
+def detect_format(filename: Optional[str], explicit: Optional[str] = None) -> str:
+    if explicit:
+        return explicit
+    extension = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    if extension in ("jsonl", "ndjson"):
+        return "jsonl"
+    if extension == "csv":
+        return "csv"
+    raise ImportFormatError("Formato não reconhecido: use .csv ou .jsonl, ou informe ?format=")
+
+
+# =========================
+# Leitura incremental
+# =========================
+def _text(file: BinaryIO) -> io.TextIOWrapper:
+    # utf-8-sig: planilhas exportadas costumam vir com BOM
+    return io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+
+
+def iter_csv(file: BinaryIO) -> Iterator[tuple[int, object]]:
+    """(linha, dict) por linha de dados; células vazias ficam de fora (default do schema)."""
+    reader = csv.DictReader(_text(file))
+    if not reader.fieldnames or "sku" not in reader.fieldnames:
+        raise ImportFormatError("CSV sem cabeçalho ou sem a coluna 'sku'")
+    for number, record in enumerate(reader, start=1):
+        data = {key: value for key, value in record.items() if key and value not in (None, "")}
+        if "images" in data:
+            data["images"] = [url.strip() for url in data["images"].split(CSV_IMAGE_SEPARATOR) if url.strip()]
+        yield number, data
+
+
+def iter_jsonl(file: BinaryIO) -> Iterator[tuple[int, object]]:
+    """(linha, dict) por linha não vazia; JSON inválido vem como a exceção."""
+    for number, line in enumerate(_text(file), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as exc:
+            yield number, exc
+
+
+_READERS = {"csv": iter_csv, "jsonl": iter_jsonl}
+
+
+def _validate(data: object) -> ProductCreate:
+    if isinstance(data, Exception):
+        raise ValueError(f"JSON inválido: {data}")
+    if not isinstance(data, dict):
+        raise ValueError("cada linha deve ser um objeto JSON")
+    product = ProductCreate.model_validate(data)
+    for name, limit in _MAX_LENGTHS.items():
+        value = getattr(product, name, None)
+        if isinstance(value, str) and len(value) > limit:
+            raise ValueError(f"{name}: máximo de {limit} caracteres")
+    return product
+
+
+def _describe(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or 'linha'}: {error['msg']}"
+            for error in exc.errors()
+        )
+    return str(exc)
+
+
+# =========================
+# Importação
+# =========================
+def _write(db: Session, chunk: list, tenant: Tenant, report: ImportReport) -> None:
+    try:
+        result = crud.upsert_products(db, chunk, tenant)
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        if len(chunk) == 1:
+            raise
+        # Isola a(s) linha(s) que o banco recusou: uma transação por linha
+        for row in chunk:
+            try:
+                _write(db, [row], tenant, report)
+            except SQLAlchemyError as exc:
+                report.error(row[0], f"banco recusou a linha: {getattr(exc, 'orig', exc)}")
+        return
+    report.inserted += result.inserted
+    report.updated += result.updated
+    for row_number, message in result.errors:
+        report.error(row_number, message)
+
+
+def import_products(
+    db: Session,
+    file: BinaryIO,
+    fmt: str,
+    tenant: Tenant,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> ImportReport:
+    """
+    Importa produtos de um CSV ou JSONL lido em streaming: valida cada
+    linha contra ProductCreate e grava em lotes de `chunk_size` (upsert por
+    company_id + sku), com commit por lote. A memória fica limitada a um
+    lote, qualquer que seja o tamanho do arquivo; linhas com erro não
+    impedem as demais e vão para o relatório.
+    """
+    if fmt not in _READERS:
+        raise ImportFormatError(f"Formato inválido: {fmt}")
+    report = ImportReport(fmt)
+    chunk: list = []
+    try:
+        for row_number, data in _READERS[fmt](file):
+            report.rows += 1
+            try:
+                chunk.append((row_number, _validate(data)))
+            except (ValidationError, ValueError) as exc:
+                report.error(row_number, _describe(exc))
+            if len(chunk) >= chunk_size:
+                _write(db, chunk, tenant, report)
+                chunk = []
+    except (UnicodeDecodeError, csv.Error) as exc:
+        if not report.rows:
+            raise ImportFormatError(f"Arquivo ilegível: {exc}") from exc
+        # Lotes anteriores já gravados: grava o atual e para aqui
+        report.error(report.rows + 1, f"arquivo ilegível a partir daqui: {exc}")
+    if chunk:
+        _write(db, chunk, tenant, report)
+    report.seconds = time.perf_counter() - report.started
+    return report
@@ -0,0 +1,230 @@
+# app/services/revocation.py
+
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.utils import upsert_statement
+from app.database import SessionLocal
+from app.models.revoked_token import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Configuração
+# =========================
+
+# Dimensionamento do Bloom filter: quantos jti revogados (ainda não
+# expirados) se espera ter e a taxa de falso positivo alvo nesse volume
+REVOCATION_EXPECTED_ITEMS = int(os.getenv("REVOCATION_EXPECTED_ITEMS", 100_000))
+REVOCATION_FP_RATE = float(os.getenv("REVOCATION_FP_RATE", 0.001))
+
+# Intervalo da atualização incremental a partir da tabela revoked_tokens
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", 5))
+
+# Folga na marca d'água (relógios de workers diferentes, commits atrasados)
+_WATERMARK_OVERLAP = timedelta(seconds=30)
+
+
+# =========================
+# Bloom filter
+# =========================
+class BloomFilter:
+    """
+    Bloom filter com `k` posições derivadas de um único blake2b (double
+    hashing). Nunca dá falso negativo; falsos positivos na taxa de projeto
+    enquanto `count <= capacity`.
+    """
+    def __init__(self, capacity: int, fp_rate: float):
+        self.capacity = max(1, capacity)
+        self.fp_rate = fp_rate
+        self.num_bits = max(8, math.ceil(-self.capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def estimated_fp_rate(self) -> float:
+        """Taxa teórica para o número de itens já inseridos."""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+# =========================
+# Lista de revogação
+# =========================
+class RevocationList:
+    """
+    jti revogados (logout), persistidos em `revoked_tokens` e espelhados em
+    memória em cada processo.
+
+    O caso comum — token não revogado — custa uma sondagem no Bloom filter.
+    Só um positivo consulta o conjunto exato (jti -> exp), que descarta os
+    falsos positivos. Um thread em background lê do banco, de forma
+    incremental, as revogações feitas por outros workers e remove as já
+    expiradas; o filtro é reconstruído quando acumula itens expirados ou
+    passa da capacidade.
+    """
+    def __init__(
+        self,
+        expected_items: int = REVOCATION_EXPECTED_ITEMS,
+        fp_rate: float = REVOCATION_FP_RATE,
+        refresh_interval: float = REVOCATION_REFRESH_SECONDS,
+    ):
+        self.expected_items = expected_items
+        self.fp_rate = fp_rate
+        self.refresh_interval = refresh_interval
+        self._bloom = BloomFilter(expected_items, fp_rate)
+        self._exact: dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._watermark: Optional[datetime] = None
+        self._monitor: Optional[threading.Thread] = None
+        self.checks = 0
+        self.bloom_positives = 0
+        self.false_positives = 0
+        self.rebuilds = 0
+        self.last_refresh: Optional[float] = None
+
+    # ---------- consulta ----------
+    def is_revoked(self, jti: str) -> bool:
+        self.checks += 1
+        if jti not in self._bloom:
+            return False
+        self.bloom_positives += 1
+        expires_at = self._exact.get(jti)
+        if expires_at is None:
+            self.false_positives += 1
+            return False
+        return True
+
+    # ---------- escrita ----------
+    def add(self, jti: str, expires_at: datetime) -> None:
+        with self._lock:
+            if jti in self._exact:
+                return
+            self._exact[jti] = expires_at
+            self._bloom.add(jti)
+            if self._bloom.count > self._bloom.capacity:
+                self._rebuild()
+
+    async def revoke(self, db: AsyncSession, jti: str, user_id: Optional[str], expires_at: datetime) -> None:
+        """
+        Grava a revogação e já aplica neste processo; os demais workers
+        veem na próxima atualização. Idempotente: logouts simultâneos do
+        mesmo token (jti único) não falham.
+        """
+        conn = await db.connection(bind_arguments={"mapper": RevokedToken.__mapper__})
+        await conn.execute(upsert_statement(
+            conn.dialect.name,
+            RevokedToken.__table__,
+            dict(jti=jti, user_id=user_id, expires_at=expires_at),
+            conflict_columns=["jti"],
+            update_columns=["jti"],  # já revogado: mantém a linha como está
+        ))
+        await db.commit()
+        self.add(jti, expires_at)
+
+    # ---------- manutenção ----------
+    def _rebuild(self) -> None:
+        """Recria o filtro só com os jti não expirados (chamar com o lock)."""
+        now = datetime.utcnow()
+        self._exact = {jti: exp for jti, exp in self._exact.items() if exp > now}
+        capacity = max(self.expected_items, len(self._exact) * 2)
+        bloom = BloomFilter(capacity, self.fp_rate)
+        for jti in self._exact:
+            bloom.add(jti)
+        self._bloom = bloom
+        self.rebuilds += 1
+
+    def refresh(self) -> None:
+        """
+        Carrega as revogações gravadas desde a última leitura (com folga na
+        marca d'água) e apaga do banco as que já expiraram.
+        """
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            stmt = select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at).where(
+                RevokedToken.expires_at > now
+            )
+            if self._watermark is not None:
+                stmt = stmt.where(RevokedToken.revoked_at >= self._watermark - _WATERMARK_OVERLAP)
+            rows = db.execute(stmt).all()
+
+            db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+            db.commit()
+
+        for jti, expires_at, revoked_at in rows:
+            self.add(jti, expires_at)
+            if self._watermark is None or revoked_at > self._watermark:
+                self._watermark = revoked_at
+        if self._watermark is None:
+            self._watermark = now
+
+        with self._lock:
+            # Metade do filtro ocupada por tokens já expirados: reconstrói
+            expired = sum(1 for exp in self._exact.values() if exp <= now)
+            if expired and expired * 2 >= self._bloom.count:
+                self._rebuild()
+        self.last_refresh = time.time()
+
+    def start_monitor(self) -> None:
+        if self._monitor is not None:
+            return
+
+        self.refresh()
+
+        def loop():
+            while True:
+                time.sleep(self.refresh_interval)
+                try:
+                    self.refresh()
+                except Exception:
+                    # Banco fora do ar: mantém o que já está em memória
+                    logger.exception("Falha ao atualizar revogações")
+
+        self._monitor = threading.Thread(target=loop, name="token-revocation-refresh", daemon=True)
+        self._monitor.start()
+
+    def snapshot(self) -> dict:
+        bloom = self._bloom
+        return {
+            "revoked": len(self._exact),
+            "bloom_bits": bloom.num_bits,
+            "bloom_bytes": len(bloom._bits),
+            "bloom_hashes": bloom.num_hashes,
+            "bloom_items": bloom.count,
+            "bloom_capacity": bloom.capacity,
+            "target_fp_rate": self.fp_rate,
+            "estimated_fp_rate": round(bloom.estimated_fp_rate(), 6),
+            "checks": self.checks,
+            "bloom_positives": self.bloom_positives,
+            "false_positives": self.false_positives,
+            "observed_fp_rate": round(self.false_positives / self.checks, 6) if self.checks else None,
+            "rebuilds": self.rebuilds,
+            "last_refresh": self.last_refresh,
+        }
+
+
+revocation_list = RevocationList()
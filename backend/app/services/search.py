@@ -0,0 +1,466 @@
+# app/services/search.py
+
+import bisect
+import heapq
+import logging
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from operator import itemgetter
+from typing import Iterable, NamedTuple, Optional
+
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+from app.crud.tenant_scope import bind_tenant
+from app.database import SessionLocal
+from app.models.product import Product
+from app.security.tenant import Tenant
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Configuração
+# =========================
+
+# Tenants com índice em memória por processo (LRU); os demais recarregam sob demanda
+SEARCH_MAX_TENANTS = int(os.getenv("SEARCH_MAX_TENANTS", 200))
+
+# Atualização incremental (updated_at) dos índices carregados, e recarga
+# completa periódica (remove produtos apagados por outros workers)
+SEARCH_REFRESH_SECONDS = float(os.getenv("SEARCH_REFRESH_SECONDS", 5))
+SEARCH_REBUILD_SECONDS = float(os.getenv("SEARCH_REBUILD_SECONDS", 600))
+
+# Termos com pelo menos esse tamanho casam por prefixo (autocomplete)
+SEARCH_MIN_PREFIX = int(os.getenv("SEARCH_MIN_PREFIX", 3))
+
+# Prefixo curto casa com muitos termos: usa só os N mais frequentes (entre
+# os primeiros 8N em ordem alfabética), até somar SEARCH_MAX_PREFIX_POSTINGS
+# produtos — limita o custo de uma busca por prefixo em catálogos grandes
+SEARCH_MAX_EXPANSIONS = int(os.getenv("SEARCH_MAX_EXPANSIONS", 64))
+SEARCH_MAX_PREFIX_POSTINGS = int(os.getenv("SEARCH_MAX_PREFIX_POSTINGS", 20000))
+
+# Peso de cada campo na relevância
+FIELD_WEIGHTS = {"sku": 4.0, "name": 3.0, "description": 1.0}
+# Casamento por prefixo vale menos que o termo completo
+PREFIX_FACTOR = 0.7
+# Bônus quando o nome começa com a busca inteira
+NAME_PREFIX_BONUS = 2.0
+
+# Folga na marca d'água (relógios de workers diferentes, commits atrasados)
+_WATERMARK_OVERLAP = timedelta(seconds=30)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+# =========================
+# Texto
+# =========================
+def normalize(text: Optional[str]) -> str:
+    """Minúsculas e sem acentos: "Café" e "cafe" são o mesmo termo."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def sku_terms(sku: Optional[str]) -> list[str]:
+    """Partes do SKU e o SKU inteiro sem separadores ("AB-12" -> ab, 12, ab12)."""
+    parts = tokenize(sku)
+    return parts + ["".join(parts)] if len(parts) > 1 else parts
+
+
+# =========================
+# Índice de um tenant
+# =========================
+class IndexedProduct(NamedTuple):
+    name: str  # normalizado, para o bônus de prefixo e desempate
+    category_id: Optional[str]
+    price: float
+    terms: dict  # termo -> peso no documento
+
+
+class SearchHit(NamedTuple):
+    product_id: str
+    score: float
+
+
+class TenantIndex:
+    """
+    Índice invertido dos produtos ativos de um tenant: termo -> {produto:
+    peso}, com o vocabulário e os nomes ordenados para achar prefixos por
+    bisect. A busca trabalha com operações de dict/set inteiras (sem laço
+    Python por produto onde dá) para ficar em poucos ms com 100 mil itens.
+    """
+    def __init__(self):
+        self.docs: dict[str, IndexedProduct] = {}
+        self.postings: dict[str, dict[str, float]] = {}
+        self.terms: list[str] = []
+        self.names: list[tuple[str, str]] = []  # (nome normalizado, produto)
+        self.categories: dict[Optional[str], set[str]] = {}
+        self.lock = threading.Lock()
+        self.watermark: Optional[datetime] = None
+        self.loaded_at = time.monotonic()
+
+    # ---------- escrita ----------
+    def load(self, rows: Iterable) -> None:
+        """Carga inicial: ordena vocabulário e nomes uma vez no fim, não a cada inserção."""
+        with self.lock:
+            for row in rows:
+                self._add(*row, keep_sorted=False)
+            self.terms = sorted(self.postings)
+            self.names.sort()
+
+    def upsert(self, product_id: str, name, description, sku, category_id, price, is_active=True) -> None:
+        with self.lock:
+            self._remove(product_id)
+            if is_active:
+                self._add(product_id, name, description, sku, category_id, price)
+
+    def _add(self, product_id: str, name, description, sku, category_id, price, keep_sorted: bool = True) -> None:
+        terms: dict[str, float] = {}
+        for field, tokens in (
+            ("name", tokenize(name)),
+            ("description", tokenize(description)),
+            ("sku", sku_terms(sku)),
+        ):
+            weight = FIELD_WEIGHTS[field]
+            for token in tokens:
+                terms[token] = max(terms.get(token, 0.0), weight)
+        doc = IndexedProduct(normalize(name), category_id, float(price or 0), terms)
+        self.docs[product_id] = doc
+        self.categories.setdefault(category_id, set()).add(product_id)
+        if keep_sorted:
+            bisect.insort(self.names, (doc.name, product_id))
+        else:
+            self.names.append((doc.name, product_id))
+        for term, weight in terms.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                if keep_sorted:
+                    bisect.insort(self.terms, term)
+            posting[product_id] = weight
+
+    def remove(self, product_id: str) -> None:
+        with self.lock:
+            self._remove(product_id)
+
+    def _remove(self, product_id: str) -> None:
+        doc = self.docs.pop(product_id, None)
+        if doc is None:
+            return
+        self.categories[doc.category_id].discard(product_id)
+        del self.names[bisect.bisect_left(self.names, (doc.name, product_id))]
+        for term in doc.terms:
+            posting = self.postings[term]
+            posting.pop(product_id, None)
+            if not posting:
+                del self.postings[term]
+                del self.terms[bisect.bisect_left(self.terms, term)]
+
+    # ---------- busca ----------
+    @staticmethod
+    def _prefix_range(items: list, prefix) -> tuple[int, int]:
+        """Faixa de `items` (ordenada) que começa com `prefix`."""
+        start = bisect.bisect_left(items, prefix)
+        # Primeiro valor depois de todos os que começam com `prefix`
+        if isinstance(prefix, tuple):
+            prefix = prefix[0]
+            upper = (prefix[:-1] + chr(ord(prefix[-1]) + 1),)
+        else:
+            upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return start, bisect.bisect_left(items, upper, start)
+
+    def _expand(self, token: str, total: int) -> list[tuple[float, dict[str, float]]]:
+        """
+        Termos do índice que casam com um termo da busca, com o fator de
+        cada um (idf, menor para prefixo), do menos para o mais relevante.
+        """
+        def idf(term: str) -> float:
+            return math.log(1 + total / len(self.postings[term]))
+
+        matched = []
+        if len(token) >= SEARCH_MIN_PREFIX:
+            start, end = self._prefix_range(self.terms, token)
+            # Olha no máximo 8N termos da faixa ("sku" pode ter um termo por produto)
+            expansions = [t for t in self.terms[start:min(end, start + 8 * SEARCH_MAX_EXPANSIONS)] if t != token]
+            expansions.sort(key=lambda t: len(self.postings[t]), reverse=True)
+            budget = SEARCH_MAX_PREFIX_POSTINGS
+            for term in expansions[:SEARCH_MAX_EXPANSIONS]:
+                if budget <= 0:
+                    break
+                matched.append((idf(term) * PREFIX_FACTOR, self.postings[term]))
+                budget -= len(self.postings[term])
+        if token in self.postings:
+            matched.append((idf(token), self.postings[token]))
+        # Termo mais raro por último: no produto que casa com vários, ele vence
+        matched.sort(key=lambda m: m[0])
+        return matched
+
+    @staticmethod
+    def _scores(matched: list) -> dict[str, float]:
+        scores: dict[str, float] = {}
+        for factor, posting in matched:
+            scores.update({pid: w * factor for pid, w in posting.items()})
+        return scores
+
+    @staticmethod
+    def _narrow(candidates: dict[str, float], matched: list) -> dict[str, float]:
+        """AND com mais um termo: soma o score dele nos candidatos que também casam."""
+        if len(candidates) * len(matched) < sum(len(p) for _, p in matched):
+            # Poucos candidatos: consulta as postings de cada um
+            narrowed = {}
+            for pid, score in candidates.items():
+                for factor, posting in reversed(matched):
+                    w = posting.get(pid)
+                    if w is not None:
+                        narrowed[pid] = score + w * factor
+                        break
+            return narrowed
+        other = TenantIndex._scores(matched)
+        return {pid: s + other[pid] for pid, s in candidates.items() if pid in other}
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        category_id: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> list[SearchHit]:
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        with self.lock:
+            total = len(self.docs)
+            # Todos os termos precisam casar (AND); começa pelo mais seletivo
+            per_token = sorted(
+                (self._expand(t, total) for t in tokens),
+                key=lambda matched: sum(len(p) for _, p in matched),
+            )
+            candidates = self._scores(per_token[0])
+            for matched in per_token[1:]:
+                if not candidates:
+                    break
+                candidates = self._narrow(candidates, matched)
+
+            if category_id is not None:
+                in_category = self.categories.get(category_id, set())
+                candidates = {pid: candidates[pid] for pid in candidates.keys() & in_category}
+            if min_price is not None or max_price is not None:
+                low = min_price if min_price is not None else -math.inf
+                high = max_price if max_price is not None else math.inf
+                docs = self.docs
+                candidates = {pid: s for pid, s in candidates.items() if low <= docs[pid].price <= high}
+            if not candidates:
+                return []
+
+            # Top-k sem o bônus + top-k dos que têm o bônus (nome começa com a
+            # busca) cobre o top-k final sem somar bônus produto a produto
+            best = dict(heapq.nlargest(limit, candidates.items(), key=itemgetter(1)))
+            phrase = normalize(query).strip()
+            start, end = self._prefix_range(self.names, (phrase,))
+            if end - start <= len(candidates):
+                boosted = {
+                    pid: candidates[pid] + NAME_PREFIX_BONUS
+                    for _, pid in self.names[start:end] if pid in candidates
+                }
+            else:
+                docs = self.docs
+                boosted = {
+                    pid: s + NAME_PREFIX_BONUS
+                    for pid, s in candidates.items() if docs[pid].name.startswith(phrase)
+                }
+            best.update(heapq.nlargest(limit, boosted.items(), key=itemgetter(1)))
+            ranked = sorted(best.items(), key=lambda h: (-h[1], self.docs[h[0]].name))[:limit]
+
+        return [SearchHit(pid, round(score, 4)) for pid, score in ranked]
+
+
+# =========================
+# Índices por tenant
+# =========================
+_INDEX_COLUMNS = (
+    Product.id, Product.name, Product.description, Product.sku,
+    Product.category_id, Product.effective_price, Product.is_active, Product.updated_at,
+)
+
+
+def tenant_key(tenant: Tenant) -> tuple:
+    return (tenant.company_id, tenant.store_id)
+
+
+class ProductSearch:
+    """
+    Busca de produtos por tenant com índices invertidos em memória.
+
+    O índice de um tenant é carregado do banco na primeira busca (só as
+    colunas indexadas) e mantido em LRU de SEARCH_MAX_TENANTS. O CRUD avisa
+    create/update/delete deste processo na hora; um thread em background
+    aplica as mudanças feitas por outros workers (updated_at) e recarrega
+    cada índice a cada SEARCH_REBUILD_SECONDS. Produtos apagados em outro
+    worker podem aparecer no índice até a recarga, mas a rota carrega os
+    resultados do banco e eles não voltam.
+    """
+    def __init__(
+        self,
+        max_tenants: int = SEARCH_MAX_TENANTS,
+        refresh_interval: float = SEARCH_REFRESH_SECONDS,
+        rebuild_interval: float = SEARCH_REBUILD_SECONDS,
+    ):
+        self.max_tenants = max_tenants
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self._indexes: OrderedDict[tuple, TenantIndex] = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: dict[tuple, threading.Lock] = {}
+        self._monitor: Optional[threading.Thread] = None
+        self.searches = 0
+        self.loads = 0
+        self.evictions = 0
+        self.last_refresh: Optional[float] = None
+
+    # ---------- carga ----------
+    def _fetch(self, tenant: Tenant, since: Optional[datetime] = None) -> list:
+        with SessionLocal() as db:
+            bind_tenant(db, tenant)
+            stmt = select(*_INDEX_COLUMNS)
+            if since is None:
+                stmt = stmt.where(Product.is_active == True)  # noqa: E712
+            else:
+                stmt = stmt.where(Product.updated_at >= since)
+            return db.execute(stmt).all()
+
+    @staticmethod
+    def _apply(index: TenantIndex, rows: Iterable) -> None:
+        for pid, name, description, sku, category_id, price, is_active, updated_at in rows:
+            index.upsert(pid, name, description, sku, category_id, price, is_active)
+            if index.watermark is None or updated_at > index.watermark:
+                index.watermark = updated_at
+
+    def _build(self, tenant: Tenant) -> TenantIndex:
+        index = TenantIndex()
+        started = datetime.utcnow()
+        rows = self._fetch(tenant)
+        index.load(row[:6] for row in rows)
+        index.watermark = max((row.updated_at for row in rows), default=started)
+        self.loads += 1
+        return index
+
+    def _store(self, key: tuple, index: TenantIndex) -> None:
+        with self._lock:
+            self._indexes[key] = index
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > self.max_tenants:
+                self._indexes.popitem(last=False)
+                self.evictions += 1
+
+    def _loaded(self, key: tuple) -> Optional[TenantIndex]:
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+            return index
+
+    def index_for(self, tenant: Tenant) -> TenantIndex:
+        """Índice do tenant, carregando do banco se preciso (bloqueante)."""
+        key = tenant_key(tenant)
+        index = self._loaded(key)
+        if index is not None:
+            return index
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            # Outra request pode ter carregado enquanto esperava
+            index = self._loaded(key)
+            if index is None:
+                index = self._build(tenant)
+                self._store(key, index)
+        return index
+
+    # ---------- busca ----------
+    def search_sync(self, tenant: Tenant, query: str, limit: int, **filters) -> list[SearchHit]:
+        """Carrega o índice se preciso e pontua a busca (bloqueante)."""
+        return self.index_for(tenant).search(query, limit, **filters)
+
+    async def search(self, tenant: Tenant, query: str, limit: int, **filters) -> list[SearchHit]:
+        # A pontuação é CPU: roda no threadpool para não travar o event loop
+        self.searches += 1
+        return await run_in_threadpool(self.search_sync, tenant, query, limit, **filters)
+
+    # ---------- avisos do CRUD ----------
+    def product_saved(self, tenant: Tenant, product: Product) -> None:
+        index = self._loaded(tenant_key(tenant))
+        if index is not None:
+            index.upsert(
+                product.id, product.name, product.description, product.sku,
+                product.category_id, product.effective_price, product.is_active,
+            )
+
+    def products_saved(self, tenant: Tenant, rows: Iterable) -> None:
+        """Escritas em lote: linhas (id, name, description, sku, category_id, effective_price, is_active)."""
+        index = self._loaded(tenant_key(tenant))
+        if index is not None:
+            for row in rows:
+                index.upsert(*row)
+
+    def product_deleted(self, tenant: Tenant, product_id: str) -> None:
+        index = self._loaded(tenant_key(tenant))
+        if index is not None:
+            index.remove(product_id)
+
+    # ---------- manutenção ----------
+    def refresh(self) -> None:
+        with self._lock:
+            loaded = list(self._indexes.items())
+        now = time.monotonic()
+        for (company_id, store_id), index in loaded:
+            tenant = Tenant(company_id, store_id)
+            if now - index.loaded_at >= self.rebuild_interval:
+                self._store((company_id, store_id), self._build(tenant))
+            else:
+                self._apply(index, self._fetch(tenant, since=index.watermark - _WATERMARK_OVERLAP))
+        self.last_refresh = time.time()
+
+    def start_monitor(self) -> None:
+        if self._monitor is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(self.refresh_interval)
+                try:
+                    self.refresh()
+                except Exception:
+                    # Banco fora do ar: as buscas seguem com o índice atual
+                    logger.exception("Falha ao atualizar o índice de busca")
+
+        self._monitor = threading.Thread(target=loop, name="product-search-refresh", daemon=True)
+        self._monitor.start()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            indexes = list(self._indexes.values())
+        return {
+            "tenants": len(indexes),
+            "max_tenants": self.max_tenants,
+            "products": sum(len(i.docs) for i in indexes),
+            "terms": sum(len(i.terms) for i in indexes),
+            "searches": self.searches,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "last_refresh": self.last_refresh,
+        }
+
+
+product_search = ProductSearch()
@@ -0,0 +1,202 @@
+# app/services/sql_metrics.py
+
+import contextvars
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger("app.sql")
+
+# =========================
+# Configuração
+# =========================
+
+# Coleta por request (contagem, tempo e formato das queries)
+SQL_METRICS_ENABLED = os.getenv("SQL_METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Devolve as métricas em headers X-DB-* (útil em dev/staging)
+SQL_METRICS_HEADERS = os.getenv("SQL_METRICS_HEADERS", "false").lower() in ("1", "true", "yes")
+# A partir de quantas repetições do mesmo SQL a request é marcada como N+1
+SQL_NPLUSONE_THRESHOLD = int(os.getenv("SQL_NPLUSONE_THRESHOLD", 5))
+# Modo estrito (testes/CI): estoura o orçamento de queries ou lazy load => erro
+SQL_STRICT = os.getenv("SQL_STRICT", "false").lower() in ("1", "true", "yes")
+SQL_STRICT_MAX_QUERIES = int(os.getenv("SQL_STRICT_MAX_QUERIES", 20))
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Request passou do limite de queries ou fez um lazy load implícito."""
+
+
+# =========================
+# Métricas de uma request
+# =========================
+class RequestSQLStats:
+    """
+    Queries executadas dentro de um `track_queries` (normalmente uma
+    request HTTP): quantidade, tempo total no banco, quantas vezes cada
+    formato de SQL se repetiu e quais relacionamentos foram carregados
+    por lazy load.
+    """
+    def __init__(
+        self,
+        label: str = "",
+        max_queries: Optional[int] = None,
+        allow_lazy_loads: bool = True,
+    ):
+        self.label = label
+        self.max_queries = max_queries
+        self.allow_lazy_loads = allow_lazy_loads
+        self.queries = 0
+        self.total_time = 0.0
+        self.shapes: Counter = Counter()
+        self.lazy_loads: list[str] = []
+
+    def repeated(self, threshold: int = SQL_NPLUSONE_THRESHOLD) -> list[tuple[str, int]]:
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def summary(self, threshold: int = SQL_NPLUSONE_THRESHOLD) -> dict:
+        return {
+            "label": self.label,
+            "queries": self.queries,
+            "db_time_ms": round(self.total_time * 1000, 2),
+            "repeated": [{"sql": shape[:200], "count": n} for shape, n in self.repeated(threshold)],
+            "lazy_loads": list(self.lazy_loads),
+        }
+
+
+_current: contextvars.ContextVar[Optional[RequestSQLStats]] = contextvars.ContextVar(
+    "sql_metrics", default=None
+)
+
+
+def current_stats() -> Optional[RequestSQLStats]:
+    return _current.get()
+
+
+@contextmanager
+def track_queries(
+    label: str = "",
+    max_queries: Optional[int] = None,
+    allow_lazy_loads: bool = True,
+) -> Iterator[RequestSQLStats]:
+    """
+    Mede as queries executadas no bloco (inclusive dentro de run_sync e do
+    threadpool, que herdam o contexto). Também serve para testes/scripts:
+
+        with track_queries(max_queries=3, allow_lazy_loads=False):
+            ...
+    """
+    stats = RequestSQLStats(label, max_queries, allow_lazy_loads)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+# =========================
+# Formato do SQL
+# =========================
+_IN_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Normaliza o SQL para agrupar execuções do "mesmo" comando: listas
+    IN (?, ?, ...) de tamanhos diferentes viram IN (...).
+    """
+    return _IN_LIST.sub("(...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+# =========================
+# Hooks do SQLAlchemy
+# =========================
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.queries += 1
+    if stats.max_queries is not None and stats.queries > stats.max_queries:
+        raise QueryBudgetExceeded(
+            f"{stats.label or 'bloco'} passou de {stats.max_queries} queries: {statement_shape(statement)[:200]}"
+        )
+    stats.shapes[statement_shape(statement)] += 1
+    context._sql_metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_sql_metrics_start", None)
+    if stats is not None and started is not None:
+        stats.total_time += time.perf_counter() - started
+
+
+def _lazy_relationship(orm_execute_state):
+    """
+    Relacionamento `lazy="select"` carregado por este SELECT, ou None. Os
+    `lazy="selectin"` também passam pelo LazyLoader quando o objeto é
+    recarregado (refresh, atributo expirado), mas são carregamentos
+    previstos no mapeamento, não N+1.
+    """
+    if orm_execute_state.lazy_loaded_from is None:
+        return None
+    path = orm_execute_state.loader_strategy_path
+    prop = path[-1] if path is not None and len(path) else None
+    if getattr(prop, "lazy", None) != "select":
+        return None
+    return prop
+
+
+def _on_orm_execute(orm_execute_state) -> None:
+    stats = _current.get()
+    if stats is None or _lazy_relationship(orm_execute_state) is None:
+        return
+    parent = orm_execute_state.lazy_loaded_from.class_.__name__
+    target = orm_execute_state.bind_mapper.class_.__name__ if orm_execute_state.bind_mapper else "?"
+    stats.lazy_loads.append(f"{parent} -> {target}")
+    if not stats.allow_lazy_loads:
+        raise QueryBudgetExceeded(
+            f"Lazy load implícito em {stats.label or 'bloco'}: {parent} -> {target}"
+        )
+
+
+def install() -> None:
+    """
+    Registra os hooks em todas as engines (inclusive as sync_engine das
+    engines assíncronas) e em todas as sessions. Idempotente.
+    """
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Session, "do_orm_execute", _on_orm_execute)
+
+
+# =========================
+# Relatório
+# =========================
+def report(stats: RequestSQLStats, threshold: int = SQL_NPLUSONE_THRESHOLD) -> None:
+    """
+    Log de debug por request; warning quando há cara de N+1
+    (mesmo SQL repetido >= threshold vezes) ou lazy loads.
+    """
+    repeated = stats.repeated(threshold)
+    if repeated or stats.lazy_loads:
+        logger.warning(
+            "N+1 suspeito em %s: %d queries, %.1f ms; repetidas=%s lazy_loads=%s",
+            stats.label,
+            stats.queries,
+            stats.total_time * 1000,
+            [(shape[:120], n) for shape, n in repeated],
+            stats.lazy_loads,
+        )
+    else:
+        logger.debug("%s: %d queries, %.1f ms", stats.label, stats.queries, stats.total_time * 1000)
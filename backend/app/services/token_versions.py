@@ -0,0 +1,192 @@
+# app/services/token_versions.py
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, event, select
+from sqlalchemy.orm import Session, attributes
+
+from app.crud.utils import upsert_statement
+from app.database import SessionLocal
+from app.models.types import new_id
+from app.models.user import User
+from app.models.user_token_version import UserTokenVersion
+from app.services.principal_cache import PRINCIPAL_FIELDS, principal_cache
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# Configuração
+# =========================
+
+# Releitura das versões alteradas por outros workers: um usuário rebaixado
+# ou removido em outro processo perde o acesso aqui em no máximo esse tempo
+TOKEN_VERSION_REFRESH_SECONDS = float(os.getenv("TOKEN_VERSION_REFRESH_SECONDS", 5))
+
+# Depois disso todos os tokens emitidos antes da mudança já expiraram
+TOKEN_VERSION_RETENTION_HOURS = float(os.getenv("TOKEN_VERSION_RETENTION_HOURS", 24))
+
+# Folga na marca d'água (relógios de workers diferentes, commits atrasados)
+_WATERMARK_OVERLAP = timedelta(seconds=30)
+
+# Chave em Session.info: usuário -> versão gravada na transação atual
+_BUMPED_INFO_KEY = "token_versions_bumped"
+
+
+class TokenVersions:
+    """
+    Versão mínima aceita dos tokens (claim "ver") de cada usuário cujo
+    role/tenant mudou ou que foi removido, espelhada de `user_token_versions`
+    em cada processo. Consultada a cada request, inclusive quando o
+    Principal sai do cache; um thread em background relê as mudanças feitas
+    por outros workers.
+    """
+    def __init__(
+        self,
+        refresh_interval: float = TOKEN_VERSION_REFRESH_SECONDS,
+        retention: timedelta = timedelta(hours=TOKEN_VERSION_RETENTION_HOURS),
+    ):
+        self.refresh_interval = refresh_interval
+        self.retention = retention
+        self._versions: dict[str, tuple[int, datetime]] = {}
+        self._lock = threading.Lock()
+        self._watermark: Optional[datetime] = None
+        self._monitor: Optional[threading.Thread] = None
+        self.rejected = 0
+        self.last_refresh: Optional[float] = None
+
+    # ---------- consulta ----------
+    def is_stale(self, user_id: str, token_version: int) -> bool:
+        entry = self._versions.get(str(user_id))
+        if entry is None or token_version >= entry[0]:
+            return False
+        self.rejected += 1
+        return True
+
+    # ---------- escrita ----------
+    def observe(self, user_id: str, version: int, changed_at: datetime) -> None:
+        user_id = str(user_id)
+        with self._lock:
+            current = self._versions.get(user_id)
+            if current is not None and current[0] >= version:
+                return
+            self._versions[user_id] = (version, changed_at)
+        principal_cache.invalidate_user(user_id)
+
+    # ---------- manutenção ----------
+    def refresh(self) -> None:
+        """
+        Carrega as versões gravadas desde a última leitura (com folga na
+        marca d'água) e apaga do banco e da memória as mais antigas que a
+        retenção.
+        """
+        now = datetime.utcnow()
+        expired = now - self.retention
+        with SessionLocal() as db:
+            stmt = select(UserTokenVersion.user_id, UserTokenVersion.version, UserTokenVersion.updated_at)
+            if self._watermark is not None:
+                stmt = stmt.where(UserTokenVersion.updated_at >= self._watermark - _WATERMARK_OVERLAP)
+            rows = db.execute(stmt).all()
+
+            db.execute(delete(UserTokenVersion).where(UserTokenVersion.updated_at <= expired))
+            db.commit()
+
+        for user_id, version, updated_at in rows:
+            self.observe(user_id, version, updated_at)
+            if self._watermark is None or updated_at > self._watermark:
+                self._watermark = updated_at
+        if self._watermark is None:
+            self._watermark = now
+
+        with self._lock:
+            self._versions = {
+                user_id: entry for user_id, entry in self._versions.items() if entry[1] > expired
+            }
+        self.last_refresh = time.time()
+
+    def start_monitor(self) -> None:
+        if self._monitor is not None:
+            return
+
+        self.refresh()
+
+        def loop():
+            while True:
+                time.sleep(self.refresh_interval)
+                try:
+                    self.refresh()
+                except Exception:
+                    # Banco fora do ar: mantém o que já está em memória
+                    logger.exception("Falha ao atualizar as versões de token")
+
+        self._monitor = threading.Thread(target=loop, name="token-version-refresh", daemon=True)
+        self._monitor.start()
+
+    def snapshot(self) -> dict:
+        return {
+            "users": len(self._versions),
+            "rejected": self.rejected,
+            "last_refresh": self.last_refresh,
+        }
+
+
+token_versions = TokenVersions()
+
+
+# =========================
+# Eventos da sessão
+# =========================
+def _principal_changed(user: User) -> bool:
+    return any(attributes.get_history(user, name).has_changes() for name in PRINCIPAL_FIELDS)
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_token_versions(session: Session, flush_context, instances) -> None:
+    """
+    Role/tenant alterado ou usuário removido pelo ORM: incrementa a versão
+    e grava em user_token_versions na mesma transação. Escritas em `users`
+    fora do ORM não passam por aqui.
+    """
+    bumped = {}
+    for obj in session.dirty:
+        if isinstance(obj, User) and _principal_changed(obj):
+            obj.token_version = (obj.token_version or 0) + 1
+            bumped[str(obj.id)] = obj.token_version
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            bumped[str(obj.id)] = (obj.token_version or 0) + 1
+    if not bumped:
+        return
+
+    now = datetime.utcnow()
+    # Conexão da transação no diretório; SQL core, sem eventos ORM
+    conn = session.connection(bind_arguments={"mapper": UserTokenVersion.__mapper__})
+    stmt = upsert_statement(
+        conn.dialect.name,
+        UserTokenVersion.__table__,
+        None,
+        conflict_columns=["user_id"],
+        update_columns=["version", "updated_at"],
+    )
+    conn.execute(stmt, [
+        dict(id=new_id(), user_id=user_id, version=version, created_at=now, updated_at=now)
+        for user_id, version in bumped.items()
+    ])
+    session.info.setdefault(_BUMPED_INFO_KEY, {}).update(bumped)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_token_versions(session: Session) -> None:
+    # Vale na hora neste processo; os outros workers veem na próxima releitura
+    now = datetime.utcnow()
+    for user_id, version in session.info.pop(_BUMPED_INFO_KEY, {}).items():
+        token_versions.observe(user_id, version, now)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_token_versions(session: Session) -> None:
+    session.info.pop(_BUMPED_INFO_KEY, None)
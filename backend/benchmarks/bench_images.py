@@ -0,0 +1,126 @@
+# benchmarks/bench_images.py
+"""
+Benchmark: processamento de imagens de produto (app.services.images).
+
+Gera N fotos JPEG sintéticas e produz o WEBP original, as variantes
+(IMAGE_VARIANTS) e o placeholder de cada uma:
+
+- inline: no event loop, como o upload fazia antes (referência);
+- pool: pelo ProcessPoolExecutor do ImagePipeline, com 1, 2, 4... processos.
+
+Mede imagens/s e o maior atraso do event loop (um timer de 10 ms) durante
+o lote: inline o atraso é o tempo de uma imagem inteira, que toda request
+concorrente esperaria; no pool fica perto de zero e a vazão cresce com os
+núcleos até IMAGE_WORKERS = os.cpu_count().
+
+Uso (a partir de backend/):
+
+    python -m benchmarks.bench_images --images 64
+    python -m benchmarks.bench_images --images 200 --workers 1,2,4,8 --size 3000x2000
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+from PIL import Image, ImageFilter
+
+from app.services.images import IMAGE_VARIANTS, ImagePipeline, process_image
+
+_TICK = 0.01
+
+
+def make_photos(directory: str, count: int, width: int, height: int) -> list[str]:
+    # Ruído suavizado: comprime e decodifica como uma foto, não como cor chapada
+    base = Image.effect_noise((width // 8, height // 8), 64).resize((width, height)).filter(ImageFilter.SMOOTH)
+    paths = []
+    for i in range(count):
+        photo = Image.merge("RGB", (base, base.rotate(90 * (i % 4), expand=False), base.transpose(Image.FLIP_LEFT_RIGHT)))
+        path = os.path.join(directory, f"photo-{i}.jpg")
+        photo.save(path, format="JPEG", quality=90)
+        paths.append(path)
+    return paths
+
+
+async def _watch_lag(stop: asyncio.Event) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(_TICK)
+        worst = max(worst, time.perf_counter() - started - _TICK)
+    return worst
+
+
+async def run_inline(paths: list[str], out_dir: str) -> tuple[float, float]:
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(_watch_lag(stop))
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    for i, path in enumerate(paths):
+        process_image(path, out_dir, f"inline-{i}")
+        await asyncio.sleep(0)  # uma "request" por imagem
+    elapsed = time.perf_counter() - started
+    stop.set()
+    return elapsed, await watcher
+
+
+async def run_pool(paths: list[str], out_dir: str, workers: int) -> tuple[float, float]:
+    pipeline = ImagePipeline(workers=workers, max_pending=len(paths))
+    executor = pipeline._get_executor()
+    loop = asyncio.get_running_loop()
+    # Sobe os processos antes de medir (spawn importa o módulo em cada um)
+    await asyncio.gather(*(
+        loop.run_in_executor(executor, process_image, paths[0], out_dir, f"warmup-{i}") for i in range(workers)
+    ))
+
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(_watch_lag(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        loop.run_in_executor(executor, process_image, path, out_dir, f"pool-{i}") for i, path in enumerate(paths)
+    ))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    lag = await watcher
+    pipeline.shutdown()
+    return elapsed, lag
+
+
+async def run(paths: list[str], out_dir: str, workers: list[int]) -> None:
+    print(f"{len(paths)} imagens, variantes {IMAGE_VARIANTS}, {os.cpu_count()} CPUs\n")
+    print(f"{'modo':<10} {'imagens/s':>10} {'atraso máx. do loop (ms)':>26}")
+    elapsed, lag = await run_inline(paths, out_dir)
+    print(f"{'inline':<10} {len(paths) / elapsed:>10.1f} {lag * 1000:>26.0f}")
+    for count in workers:
+        elapsed, lag = await run_pool(paths, out_dir, count)
+        print(f"{f'pool x{count}':<10} {len(paths) / elapsed:>10.1f} {lag * 1000:>26.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Processamento de imagens: vazão e atraso do event loop")
+    parser.add_argument("--images", type=int, default=64)
+    parser.add_argument("--size", default="2400x1600", help="LARGURAxALTURA das fotos geradas")
+    parser.add_argument("--workers", default=None, help="ex.: 1,2,4 (padrão: potências de 2 até os CPUs)")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split("x"))
+    cpus = os.cpu_count() or 1
+    workers = (
+        [int(v) for v in args.workers.split(",")]
+        if args.workers
+        else sorted({min(2 ** i, cpus) for i in range(cpus.bit_length() + 1)})
+    )
+
+    directory = tempfile.mkdtemp()
+    try:
+        paths = make_photos(directory, args.images, width, height)
+        asyncio.run(run(paths, os.path.join(directory, "out"), workers))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# benchmarks/bench_search.py
+"""
+Benchmark: latência da busca de produtos (app.services.search.TenantIndex).
+
+Monta em memória o índice de um tenant com N produtos sintéticos (nome =
+tipo + marca + atributos; descrição com termos de frequência Zipf) e mede
+p50/p95 de uma mistura de buscas: termo exato, prefixo (autocomplete),
+vários termos e com filtros de categoria/preço. Meta: p95 < 20 ms com
+100 mil produtos.
+
+Uso (a partir de backend/):
+
+    python -m benchmarks.bench_search --products 100000 --queries 2000
+"""
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+
+from app.services.search import TenantIndex
+
+TARGET_P95_MS = 20.0
+
+TYPES = [
+    "camiseta", "camisa", "calça", "bermuda", "tênis", "sandália", "boné", "meia",
+    "jaqueta", "moletom", "vestido", "saia", "cinto", "bolsa", "mochila", "carteira",
+    "chinelo", "bota", "regata", "blusa", "casaco", "pijama", "cueca", "sutiã",
+    "óculos", "relógio", "pulseira", "colar", "brinco", "chapéu", "luva", "cachecol",
+]
+ATTRIBUTES = [
+    "algodão", "couro", "linho", "jeans", "poliéster", "lã", "seda", "sintético",
+    "azul", "preto", "branco", "vermelho", "verde", "cinza", "bege", "rosa",
+    "infantil", "masculino", "feminino", "unissex", "esportivo", "social", "casual", "praia",
+    "slim", "oversize", "estampado", "listrado", "liso", "bordado", "básico", "premium",
+]
+
+
+def vocabulary(size: int, rnd: random.Random) -> list[str]:
+    """Palavras sintéticas pronunciáveis (marcas, modelos, termos de descrição)."""
+    syllables = ["ba", "ca", "da", "fe", "gi", "lo", "mu", "na", "pe", "ri", "so", "ta", "vi", "xo", "ze"]
+    words = set()
+    while len(words) < size:
+        words.add("".join(rnd.choices(syllables, k=rnd.randint(2, 4))))
+    return sorted(words)
+
+
+class Catalog:
+    def __init__(self, rnd: random.Random):
+        self.rnd = rnd
+        self.brands = vocabulary(300, rnd)
+        self.words = vocabulary(3000, rnd)
+        # Frequência de termos de catálogo real: poucos muito comuns, cauda longa
+        self.word_weights = [1 / (rank + 1) for rank in range(len(self.words))]
+
+    def name(self) -> str:
+        r = self.rnd
+        return " ".join([r.choice(TYPES), r.choice(self.brands), *r.sample(ATTRIBUTES, r.randint(1, 3))])
+
+    def description(self) -> str:
+        return " ".join(self.rnd.choices(self.words, self.word_weights, k=12))
+
+
+QUERIES = {
+    "exato": lambda c, r: r.choice(TYPES + c.brands),
+    "prefixo": lambda c, r: r.choice(TYPES + c.brands)[: r.randint(2, 4)],
+    "multi_termo": lambda c, r: f"{r.choice(TYPES)} {r.choice(ATTRIBUTES)[:3]}",
+    "sku": lambda c, r: f"SKU-{r.randint(0, 99999):05d}"[: r.randint(5, 9)],
+}
+
+
+def build(products: int, catalog: Catalog, categories: list[str], rnd: random.Random) -> TenantIndex:
+    rows = [
+        (
+            str(uuid.uuid4()), catalog.name(), catalog.description(), f"SKU-{i:05d}",
+            rnd.choice(categories), round(rnd.uniform(5, 500), 2),
+        )
+        for i in range(products)
+    ]
+    index = TenantIndex()
+    index.load(rows)
+    return index
+
+
+def percentile(samples: list[float], p: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Latência da busca de produtos em memória")
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000, help="buscas por tipo")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    categories = [str(uuid.uuid4()) for _ in range(30)]
+
+    started = time.perf_counter()
+    catalog = Catalog(rnd)
+    index = build(args.products, catalog, categories, rnd)
+    print(f"Índice: {args.products} produtos, {len(index.terms)} termos, "
+          f"carregado em {time.perf_counter() - started:.1f}s\n")
+
+    kinds = dict(QUERIES)
+    kinds["filtros"] = None
+    failed = False
+    print(f"{'tipo':<12} {'p50 ms':>8} {'p95 ms':>8} {'máx ms':>8}")
+    for kind, make in kinds.items():
+        samples = []
+        for _ in range(args.queries):
+            if make is None:
+                query = QUERIES["prefixo"](catalog, rnd)
+                filters = {
+                    "category_id": rnd.choice(categories),
+                    "min_price": 50.0,
+                    "max_price": 200.0,
+                }
+            else:
+                query, filters = make(catalog, rnd), {}
+            t0 = time.perf_counter()
+            index.search(query, args.limit, **filters)
+            samples.append((time.perf_counter() - t0) * 1000)
+        p95 = percentile(samples, 0.95)
+        failed |= p95 > TARGET_P95_MS
+        print(f"{kind:<12} {statistics.median(samples):>8.2f} {p95:>8.2f} {max(samples):>8.2f}")
+
+    print(f"\nMeta p95 < {TARGET_P95_MS:.0f} ms: {'❌ acima' if failed else '✅ ok'}")
+
+
+if __name__ == "__main__":
+    main()
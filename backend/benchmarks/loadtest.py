@@ -0,0 +1,286 @@
+# benchmarks/loadtest.py
+"""
+Teste de carga: replays de uma mistura realista de tráfego contra a API.
+
+Cada usuário virtual escolhe um tenant do manifesto gerado pelo
+`benchmarks.datagen`, faz login e executa ações sorteadas com pesos fixos
+(navegar no catálogo, ver produto, categorias, login, criar pedido,
+movimentar estoque, dashboard, listar pedidos). Ao final imprime
+req/s, erros e p50/p95/p99 por rota.
+
+Por padrão roda em processo contra `app.main:app` (httpx + ASGI, sem
+servidor); com --base-url, dispara contra um servidor de verdade.
+
+Uso (a partir de backend/, mesmo DATABASE_URL usado no datagen):
+
+    python -m benchmarks.datagen --companies 5 --products 2000
+    python -m benchmarks.loadtest --users 50 --duration 30 --output before.json
+    # ... alteração ...
+    python -m benchmarks.loadtest --users 50 --duration 30 --baseline before.json --fail-on-regression 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+from typing import Optional
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///bench.db"
+
+import httpx  # noqa: E402
+
+from benchmarks.datagen import DEFAULT_MANIFEST  # noqa: E402
+
+# Peso de cada ação na mistura de tráfego
+MIX = {
+    "browse_products": 35,
+    "product_detail": 15,
+    "list_categories": 10,
+    "list_orders": 8,
+    "create_order": 8,
+    "stock_move": 7,
+    "dashboard": 7,
+    "stock_movements": 5,
+    "login": 3,
+}
+
+
+# =========================
+# Coleta de latências
+# =========================
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+
+    def observe(self, route: str, seconds: float, ok: bool) -> None:
+        self.latencies[route].append(seconds)
+        if not ok:
+            self.errors[route] += 1
+
+    def report(self, elapsed: float) -> dict:
+        routes = {}
+        for route, values in sorted(self.latencies.items()):
+            quantiles = statistics.quantiles(values, n=100) if len(values) > 1 else values * 99
+            routes[route] = {
+                "count": len(values),
+                "errors": self.errors[route],
+                "req_s": len(values) / elapsed,
+                "p50_ms": quantiles[49] * 1000,
+                "p95_ms": quantiles[94] * 1000,
+                "p99_ms": quantiles[98] * 1000,
+            }
+        return routes
+
+
+# =========================
+# Usuário virtual
+# =========================
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, tenant: dict, password: str, rng: random.Random, recorder: Recorder):
+        self.client = client
+        self.tenant = tenant
+        self.user = tenant["users"]["admin"]
+        self.password = password
+        self.rng = rng
+        self.recorder = recorder
+        self.headers: dict[str, str] = {}
+        self.actions = list(MIX)
+        self.weights = list(MIX.values())
+
+    async def request(self, route: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        ok = response is not None and response.status_code < 400
+        self.recorder.observe(route, time.perf_counter() - started, ok)
+        return response
+
+    def product_id(self) -> str:
+        return self.rng.choice(self.tenant["products"])
+
+    # ----------------------
+    # Ações
+    # ----------------------
+    async def login(self) -> None:
+        response = await self.request(
+            "POST /users/login", "POST", "/users/login",
+            data={"username": self.user["email"], "password": self.password},
+        )
+        if response is not None and response.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def browse_products(self) -> None:
+        # Primeira página e, às vezes, as seguintes pelo cursor
+        params = {"limit": 24}
+        for _ in range(self.rng.choice((1, 1, 1, 2, 3))):
+            response = await self.request("GET /products/", "GET", "/products/", params=params)
+            cursor = response.headers.get("X-Next-Cursor") if response is not None else None
+            if not cursor:
+                break
+            params = {"limit": 24, "cursor": cursor}
+
+    async def product_detail(self) -> None:
+        await self.request("GET /products/{id}", "GET", f"/products/{self.product_id()}")
+
+    async def list_categories(self) -> None:
+        await self.request("GET /categories/", "GET", "/categories/")
+
+    async def list_orders(self) -> None:
+        await self.request("GET /orders/", "GET", "/orders/", params={"limit": 20})
+
+    async def create_order(self) -> None:
+        items = [
+            {"product_id": self.product_id(), "quantity": 1}
+            for _ in range(self.rng.randint(1, 3))
+        ]
+        await self.request(
+            "POST /orders/", "POST", "/orders/",
+            json={"user_id": self.user["id"], "items": items},
+        )
+
+    async def stock_move(self) -> None:
+        product_id = self.product_id()
+        direction = "add" if self.rng.random() < 0.6 else "remove"
+        await self.request(
+            f"POST /stocks/{{id}}/{direction}", "POST", f"/stocks/{product_id}/{direction}",
+            json={"product_id": product_id, "quantity": self.rng.randint(1, 5)},
+        )
+
+    async def stock_movements(self) -> None:
+        await self.request(
+            "GET /stocks/{id}/movements", "GET", f"/stocks/{self.product_id()}/movements",
+            params={"limit": 20},
+        )
+
+    async def dashboard(self) -> None:
+        await self.request("GET /dashboard/", "GET", "/dashboard/")
+
+    async def run(self, deadline: float, max_requests: Optional[int]) -> None:
+        await self.login()
+        done = 0
+        while time.perf_counter() < deadline and (max_requests is None or done < max_requests):
+            action = self.rng.choices(self.actions, self.weights)[0]
+            await getattr(self, action)()
+            done += 1
+
+
+# =========================
+# Execução
+# =========================
+async def run(args, manifest: dict) -> tuple[dict, float]:
+    recorder = Recorder()
+    tenants = manifest["tenants"]
+
+    if args.base_url:
+        transport, base_url, async_engine = None, args.base_url, None
+    else:
+        from app.database import async_engine
+        from app.main import app
+
+        # Erros 500 viram resposta (e contam como erro), não exceção
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        base_url = "http://loadtest"
+
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url=base_url, timeout=args.timeout, limits=limits
+        ) as client:
+            users = [
+                VirtualUser(
+                    client,
+                    tenants[i % len(tenants)],
+                    manifest["password"],
+                    random.Random(args.seed + i),
+                    recorder,
+                )
+                for i in range(args.users)
+            ]
+            started = time.perf_counter()
+            deadline = started + args.duration
+            await asyncio.gather(*(user.run(deadline, args.requests) for user in users))
+            elapsed = time.perf_counter() - started
+    finally:
+        if async_engine is not None:
+            # Fecha as conexões do pool assíncrono dentro deste event loop
+            await async_engine.dispose()
+
+    return recorder.report(elapsed), elapsed
+
+
+def print_report(routes: dict, baseline: Optional[dict]) -> None:
+    """
+    Imprime a tabela por rota; com baseline, mostra a variação do p95.
+    """
+    header = f"{'rota':<30}{'reqs':>8}{'erros':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    print(header + ("  Δp95" if baseline else ""))
+    for route, r in routes.items():
+        line = (
+            f"{route:<30}{r['count']:>8}{r['errors']:>8}{r['req_s']:>9.1f}"
+            f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+        )
+        if baseline and route in baseline:
+            before = baseline[route]["p95_ms"]
+            line += f"  {(r['p95_ms'] - before) / before * 100:+.0f}%" if before else ""
+        print(line)
+
+
+def regressions(routes: dict, baseline: dict, max_pct: float) -> list[str]:
+    return [
+        route
+        for route, r in routes.items()
+        if route in baseline
+        and baseline[route]["p95_ms"]
+        and (r["p95_ms"] - baseline[route]["p95_ms"]) / baseline[route]["p95_ms"] * 100 > max_pct
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Teste de carga com mistura realista de tráfego")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST)
+    parser.add_argument("--users", type=int, default=50, help="usuários virtuais concorrentes")
+    parser.add_argument("--duration", type=float, default=30, help="segundos")
+    parser.add_argument("--requests", type=int, default=None, help="máximo de ações por usuário")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--base-url", default=None, help="servidor real (padrão: app em processo)")
+    parser.add_argument("--output", default=None, help="grava o resultado em JSON")
+    parser.add_argument("--baseline", default=None, help="JSON de uma rodada anterior para comparar")
+    parser.add_argument("--fail-on-regression", type=float, default=None, metavar="PCT",
+                        help="sai com erro se o p95 de alguma rota piorar mais que PCT%%")
+    args = parser.parse_args()
+
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+
+    routes, elapsed = asyncio.run(run(args, manifest))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["routes"]
+
+    total = sum(r["count"] for r in routes.values())
+    print(f"{total} requests em {elapsed:.1f}s ({total / elapsed:.1f} req/s), {args.users} usuários")
+    print_report(routes, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "elapsed": elapsed, "routes": routes}, f, indent=2)
+
+    if baseline and args.fail_on_regression is not None:
+        worse = regressions(routes, baseline, args.fail_on_regression)
+        if worse:
+            raise SystemExit(f"❌ p95 piorou mais de {args.fail_on_regression}% em: {', '.join(worse)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# migrations/compact_ids.py
+"""
+Migração de chaves String(36) -> BINARY(16) (modo DB_COMPACT_IDS) no MySQL 8.
+
+1. para cada tabela do projeto, cria `<tabela>__compact` com o schema
+   compacto, ainda sem foreign keys, e copia os dados convertendo cada
+   coluna de ID com UUID_TO_BIN(col);
+2. troca todas as tabelas num único RENAME TABLE (atômico):
+   `<tabela>` -> `<tabela>__old` e `<tabela>__compact` -> `<tabela>`;
+3. recria todas as foreign keys;
+4. só então apaga as `<tabela>__old`.
+
+No MySQL cada DDL faz commit implícito, então a transação não protege
+nada: a segurança vem da ordem. Uma falha antes do RENAME deixa as tabelas
+originais intactas (rode de novo: as `__compact` são recriadas); depois
+dele, os dados já estão nas tabelas novas e as `__old` continuam lá até o
+fim.
+
+IDs antigos (UUIDv4) são preservados, apenas mudam de representação; novas
+linhas passam a receber UUIDv7. A migração é offline: pare a API antes e
+faça backup. Rode com DB_COMPACT_IDS=true, para que os models já descrevam
+o layout de destino:
+
+    DB_COMPACT_IDS=true python -m migrations.compact_ids --dry-run   # só imprime o SQL
+    DB_COMPACT_IDS=true python -m migrations.compact_ids             # executa
+"""
+
+import argparse
+
+from sqlalchemy import MetaData, Table, text
+from sqlalchemy.dialects import mysql
+from sqlalchemy.schema import AddConstraint, CreateIndex, CreateTable
+
+from app import models  # noqa: F401  (registra todas as tabelas)
+from app.database import Base, engine
+from app.models.types import DB_COMPACT_IDS, IdType
+
+SUFFIX = "__compact"
+OLD_SUFFIX = "__old"
+
+
+def _shadow_table(table: Table, metadata: MetaData) -> Table:
+    """
+    Cópia da tabela com nome temporário e sem foreign keys
+    (as FKs são recriadas depois que todas as tabelas foram trocadas).
+    """
+    shadow = table.to_metadata(metadata, name=f"{table.name}{SUFFIX}")
+    for constraint in list(shadow.foreign_key_constraints):
+        shadow.constraints.discard(constraint)
+    for column in shadow.columns:
+        column.foreign_keys.clear()
+    # Os índices levam o nome da tabela original: o to_metadata recalcula
+    # os nomes por convenção (ix_<tabela>_<coluna>) com o nome do shadow
+    names = {tuple(column.name for column in index.columns): index.name for index in table.indexes}
+    for index in shadow.indexes:
+        index.name = names[tuple(column.name for column in index.columns)]
+    return shadow
+
+
+def plan() -> list[str]:
+    """
+    Gera a lista de comandos SQL da migração, na ordem de execução.
+    """
+    dialect = mysql.dialect()
+    metadata = MetaData()
+    statements = ["SET FOREIGN_KEY_CHECKS = 0"]
+    renames, foreign_keys, drops = [], [], []
+
+    for table in Base.metadata.sorted_tables:
+        shadow = _shadow_table(table, metadata)
+        # Sobra de uma execução que falhou antes da troca
+        statements.append(f"DROP TABLE IF EXISTS `{shadow.name}`")
+        statements.append(str(CreateTable(shadow).compile(dialect=dialect)).strip())
+        statements.extend(
+            str(CreateIndex(index).compile(dialect=dialect)).strip()
+            for index in shadow.indexes
+        )
+
+        # Colunas geradas (ex.: products.effective_price) o MySQL calcula
+        copied = [c for c in table.columns if c.computed is None]
+        columns = ", ".join(f"`{c.name}`" for c in copied)
+        selects = ", ".join(
+            f"UUID_TO_BIN(`{c.name}`)" if isinstance(c.type, IdType) else f"`{c.name}`"
+            for c in copied
+        )
+        statements.append(
+            f"INSERT INTO `{shadow.name}` ({columns}) SELECT {selects} FROM `{table.name}`"
+        )
+
+        old = f"{table.name}{OLD_SUFFIX}"
+        renames.append(f"`{table.name}` TO `{old}`, `{shadow.name}` TO `{table.name}`")
+        foreign_keys.extend(
+            str(AddConstraint(fk).compile(dialect=dialect)).strip()
+            for fk in table.foreign_key_constraints
+        )
+        drops.append(f"DROP TABLE `{old}`")
+
+    statements.append("RENAME TABLE " + ", ".join(renames))
+    statements.extend(foreign_keys)
+    statements.extend(drops)
+    statements.append("SET FOREIGN_KEY_CHECKS = 1")
+    return statements
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migra IDs String(36) para BINARY(16)")
+    parser.add_argument("--dry-run", action="store_true", help="apenas imprime o SQL")
+    args = parser.parse_args()
+
+    if not DB_COMPACT_IDS:
+        raise SystemExit("Defina DB_COMPACT_IDS=true: os models precisam descrever o layout compacto.")
+
+    statements = plan()
+    if args.dry_run:
+        print(";\n\n".join(statements) + ";")
+        return
+
+    if engine.dialect.name != "mysql":
+        raise SystemExit("A migração usa UUID_TO_BIN e só roda no MySQL 8.")
+
+    # DDL no MySQL faz commit a cada comando (ver a ordem no docstring)
+    with engine.begin() as conn:
+        for statement in statements:
+            print(statement.splitlines()[0][:100])
+            conn.execute(text(statement))
+    print("✅ Migração concluída")
+
+
+if __name__ == "__main__":
+    main()
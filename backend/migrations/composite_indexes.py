@@ -0,0 +1,96 @@
+# migrations/composite_indexes.py
+"""
+Alinha os índices de um banco existente com os declarados nos models
+(o `create_all` do startup não altera tabelas existentes):
+
+1. cria os índices compostos que faltam (idx_product_category,
+   idx_customer_tenant, ...);
+2. remove os índices redundantes: o índice extra na PK (`ix_<tabela>_id`)
+   e os de coluna única já cobertos pelo prefixo de um composto — e o
+   único global em products.sku, substituído por uq_product_company_sku
+   (SKU único por empresa).
+
+Os compostos são criados antes das remoções, então toda FK continua com
+um índice que a atende. Confira depois com `python -m benchmarks.explain_queries`.
+
+    python -m migrations.composite_indexes --dry-run   # só imprime o SQL
+    python -m migrations.composite_indexes
+"""
+
+import argparse
+
+from sqlalchemy import Index, inspect
+from sqlalchemy.schema import CreateIndex, DropIndex
+
+from app import models  # noqa: F401  (registra todas as tabelas)
+from app.database import Base, engine
+
+# Índices de coluna única cobertos por um composto (tabela -> índices);
+# ix_products_sku era o único global de SKU, agora único por empresa
+REDUNDANT_INDEXES = {
+    "products": ["ix_products_company_id", "ix_products_sku"],
+    "orders": ["ix_orders_company_id", "idx_order_company_store"],
+    "order_items": ["ix_order_items_company_id"],
+    "stock_movements": ["ix_stock_movements_product_id"],
+    "customers": ["ix_customers_company_id"],
+}
+
+# Tabelas que tinham index=True na própria PK
+PK_INDEX_TABLES = [
+    "companies", "stores", "customers", "product_categories", "products",
+    "product_images", "orders", "order_items", "stock_movements",
+]
+
+
+def plan() -> list:
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    creates, drops = [], []
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue  # o create_all do startup cria com os índices certos
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            if index.name not in existing:
+                creates.append(CreateIndex(index))
+
+        redundant = REDUNDANT_INDEXES.get(table.name, [])
+        if table.name in PK_INDEX_TABLES:
+            redundant = [f"ix_{table.name}_id", *redundant]
+        declared = {ix.name for ix in table.indexes}
+        for name in redundant:
+            if name in existing and name not in declared:
+                drops.append(DropIndex(_reflected_index(table, name)))
+
+    return creates + drops
+
+
+def _reflected_index(table, name: str) -> Index:
+    # Só o nome e a tabela importam para o DROP INDEX
+    return Index(name, _table=table)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cria índices compostos e remove os redundantes")
+    parser.add_argument("--dry-run", action="store_true", help="apenas imprime o SQL")
+    args = parser.parse_args()
+
+    ddl = plan()
+    if not ddl:
+        print("Índices já estão de acordo com os models")
+        return
+
+    for statement in ddl:
+        print(str(statement.compile(dialect=engine.dialect)).strip() + ";")
+    if args.dry_run:
+        return
+
+    with engine.begin() as conn:
+        for statement in ddl:
+            conn.execute(statement)
+    print(f"✅ {len(ddl)} alterações de índice aplicadas")
+
+
+if __name__ == "__main__":
+    main()
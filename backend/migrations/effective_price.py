@@ -0,0 +1,83 @@
+# migrations/effective_price.py
+"""
+Adiciona `products.effective_price` (coluna gerada com o preço de venda,
+app.models.product.EFFECTIVE_PRICE_SQL) e o índice idx_product_tenant_price
+em bancos criados antes da coluna existir (o `create_all` do startup não
+altera tabelas existentes). Roda em todos os shards.
+
+No MySQL a coluna é STORED (o ALTER reescreve a tabela: rode fora do
+horário de pico). O SQLite só aceita adicionar coluna gerada VIRTUAL, que
+também pode ser indexada.
+
+Bancos MySQL que já têm a coluna como FLOAT (versão anterior) passam a
+DECIMAL(12, 2): com FLOAT de precisão simples, o valor lido não é igual
+ao gravado e o desempate do keyset (sort=price) pula ou repete produtos.
+
+    python -m migrations.effective_price --dry-run   # só imprime o SQL
+    python -m migrations.effective_price
+"""
+
+import argparse
+
+from sqlalchemy import Float, inspect, text
+from sqlalchemy.schema import CreateIndex
+
+from app import models  # noqa: F401  (registra todas as tabelas)
+from app.database import shard_map
+from app.models.product import EFFECTIVE_PRICE_SQL, Product
+
+INDEX_NAME = "idx_product_tenant_price"
+
+
+def plan(engine) -> list[str]:
+    inspector = inspect(engine)
+    if "products" not in inspector.get_table_names():
+        return []  # o create_all do startup cria com a coluna
+
+    ddl = []
+    columns = {c["name"]: c for c in inspector.get_columns("products")}
+    column_type = Product.__table__.c.effective_price.type.compile(dialect=engine.dialect)
+    if "effective_price" not in columns:
+        storage = "STORED" if engine.dialect.name == "mysql" else "VIRTUAL"
+        ddl.append(
+            f"ALTER TABLE products ADD COLUMN effective_price {column_type} "
+            f"GENERATED ALWAYS AS ({EFFECTIVE_PRICE_SQL}) {storage}"
+        )
+    elif engine.dialect.name == "mysql" and isinstance(columns["effective_price"]["type"], Float):
+        # No SQLite o tipo declarado não muda o armazenamento: Numeric já arredonda na leitura
+        ddl.append(
+            f"ALTER TABLE products MODIFY COLUMN effective_price {column_type} "
+            f"GENERATED ALWAYS AS ({EFFECTIVE_PRICE_SQL}) STORED"
+        )
+
+    indexes = {ix["name"] for ix in inspector.get_indexes("products")}
+    if INDEX_NAME not in indexes:
+        index = next(ix for ix in Product.__table__.indexes if ix.name == INDEX_NAME)
+        ddl.append(str(CreateIndex(index).compile(dialect=engine.dialect)).strip())
+    return ddl
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Coluna gerada products.effective_price + índice")
+    parser.add_argument("--dry-run", action="store_true", help="apenas imprime o SQL")
+    args = parser.parse_args()
+
+    for shard in shard_map.shards.values():
+        ddl = plan(shard.engine)
+        if not ddl:
+            print(f"[{shard.name}] products.effective_price já está atualizada")
+            continue
+
+        for statement in ddl:
+            print(f"[{shard.name}] {statement};")
+        if args.dry_run:
+            continue
+
+        with shard.engine.begin() as conn:
+            for statement in ddl:
+                conn.execute(text(statement))
+        print(f"[{shard.name}] ✅ {len(ddl)} alterações aplicadas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# migrations/image_blobs.py
+"""
+Prepara bancos existentes para o armazenamento de imagens por conteúdo
+(app.models.image_blob), em todos os shards:
+
+1. cria `product_images.blob_hash` e o índice (o `create_all` do startup
+   não altera tabelas existentes) e a tabela image_blobs, se faltar;
+2. adota os uploads antigos (`/static/uploads/<produto>/<sha256>.webp`, já
+   nomeados pelo hash do conteúdo): copia o arquivo para static/blobs/,
+   cria o blob com o refcount das imagens que o usam, aponta as imagens
+   para a URL nova e incrementa a versão do catálogo das empresas. Os
+   arquivos antigos só são apagados depois do commit. Imagens cujo arquivo
+   não está neste disco ficam como estão (URL externa, sem blob).
+
+Rode depois de migrations.product_image_variants.
+
+    python -m migrations.image_blobs --dry-run   # só imprime o que faria
+    python -m migrations.image_blobs
+"""
+
+import argparse
+import os
+import re
+import shutil
+from datetime import datetime
+
+from sqlalchemy import inspect, select, text, update
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+
+from app import models  # noqa: F401  (registra todas as tabelas)
+from app.crud.catalog_version import bump_catalog_version
+from app.crud.utils import upsert_statement
+from app.database import shard_map
+from app.models.image_blob import ImageBlob
+from app.models.product_image import IMAGE_READY, ProductImage
+from app.services.images import blob_dir, blob_url
+
+_LEGACY_URL = re.compile(r"^/static/uploads/[^/]+/([0-9a-f]{64})\.webp$")
+
+
+def plan_columns(engine) -> list[str]:
+    inspector = inspect(engine)
+    if "product_images" not in inspector.get_table_names():
+        return []  # o create_all do startup cria com a coluna
+
+    ddl = []
+    table = ProductImage.__table__
+    if "blob_hash" not in {c["name"] for c in inspector.get_columns("product_images")}:
+        column_type = table.c.blob_hash.type.compile(dialect=engine.dialect)
+        ddl.append(f"ALTER TABLE product_images ADD COLUMN blob_hash {column_type} NULL")
+    index = next(ix for ix in table.indexes if list(ix.columns) == [table.c.blob_hash])
+    if index.name not in {ix["name"] for ix in inspector.get_indexes("product_images")}:
+        ddl.append(str(CreateIndex(index).compile(dialect=engine.dialect)).strip())
+    return ddl
+
+
+def adopt_legacy(shard, dry_run: bool) -> int:
+    """Converte os uploads antigos do shard em blobs; devolve quantos blobs."""
+    images = ProductImage.__table__
+    blobs = ImageBlob.__table__
+    with Session(shard.engine) as db:
+        conn = db.connection()
+        rows = conn.execute(
+            select(images.c.id, images.c.image_url, images.c.company_id).where(
+                images.c.blob_hash.is_(None), images.c.image_url.like("/static/uploads/%")
+            )
+        ).all()
+
+        # hash -> (arquivos antigos, ids, empresas): o mesmo conteúdo pode
+        # estar em pastas de vários produtos
+        adopted: dict = {}
+        for image_id, image_url, company_id in rows:
+            match = _LEGACY_URL.match(image_url)
+            path = image_url.lstrip("/")
+            if not match or not os.path.exists(path):
+                continue
+            paths, ids, companies = adopted.setdefault(match.group(1), (set(), [], set()))
+            paths.add(path)
+            ids.append(image_id)
+            companies.add(company_id)
+
+        for blob_hash, (paths, ids, _) in adopted.items():
+            print(f"[{shard.name}] {blob_url(blob_hash)} <- {len(paths)} arquivos, {len(ids)} imagens")
+        if dry_run or not adopted:
+            return len(adopted)
+
+        now = datetime.utcnow()
+        legacy_paths = set()
+        for blob_hash, (paths, ids, _) in adopted.items():
+            target = os.path.join(blob_dir(blob_hash), f"{blob_hash}.webp")
+            if not os.path.exists(target):
+                os.makedirs(blob_dir(blob_hash), exist_ok=True)
+                shutil.copyfile(next(iter(paths)), target)
+            conn.execute(upsert_statement(
+                conn.dialect.name,
+                blobs,
+                dict(hash=blob_hash, status=IMAGE_READY, refcount=len(ids), created_at=now, updated_at=now),
+                conflict_columns=["hash"],
+                update_values={"refcount": blobs.c.refcount + len(ids), "updated_at": now},
+            ))
+            conn.execute(
+                update(images)
+                .where(images.c.id.in_(ids))
+                .values(blob_hash=blob_hash, image_url=blob_url(blob_hash), updated_at=now)
+            )
+            legacy_paths |= paths
+
+        for company_id in {c for _, _, companies in adopted.values() for c in companies} - {None}:
+            bump_catalog_version(db, company_id)
+        db.commit()
+
+    for path in legacy_paths:
+        if os.path.exists(path):
+            os.remove(path)
+    return len(adopted)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Coluna product_images.blob_hash + adoção dos uploads antigos")
+    parser.add_argument("--dry-run", action="store_true", help="apenas imprime o que faria")
+    args = parser.parse_args()
+
+    for shard in shard_map.shards.values():
+        ddl = plan_columns(shard.engine)
+        for statement in ddl:
+            print(f"[{shard.name}] {statement};")
+        if ddl and not args.dry_run:
+            with shard.engine.begin() as conn:
+                for statement in ddl:
+                    conn.execute(text(statement))
+        if ddl and args.dry_run:
+            continue  # sem a coluna não há o que consultar
+
+        if "image_blobs" not in inspect(shard.engine).get_table_names():
+            if args.dry_run:
+                print(f"[{shard.name}] criaria a tabela image_blobs")
+                continue
+            ImageBlob.__table__.create(shard.engine)
+        count = adopt_legacy(shard, args.dry_run)
+        print(f"[{shard.name}] ✅ {count} blobs {'a criar' if args.dry_run else 'criados'}")
+
+
+if __name__ == "__main__":
+    main()
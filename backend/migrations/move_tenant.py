@@ -0,0 +1,269 @@
+# migrations/move_tenant.py
+"""
+Move os dados de uma empresa para outro shard sem parar a aplicação.
+
+1. cópia em lotes (keyset por id) de todas as tabelas de tenant, com a
+   empresa ativa — leituras e escritas seguem no shard de origem;
+   Os blobs de imagem usados pelas product_images copiadas (image_blobs não
+   tem company_id) são criados no destino, e o refcount acompanha as
+   imagens inseridas, trocadas e removidas em cada shard;
+2. a empresa fica somente leitura em tenant_shards (escritas recebem 503
+   com Retry-After) e, depois de todos os workers relerem o mapa, copia o
+   que mudou desde o início (updated_at) e remove no destino o que foi
+   apagado na origem;
+3. troca o shard no mapa e libera as escritas;
+4. depois de mais uma releitura do mapa, apaga os dados da origem
+   (--keep-source mantém).
+
+Pode ser repetido: as linhas já copiadas são atualizadas, não duplicadas.
+
+    python -m migrations.move_tenant <company_id> <shard>
+    DB_SHARD_URLS="s1=sqlite:///./s1.db,s2=sqlite:///./s2.db" \\
+        python -m migrations.move_tenant <company_id> s2 --batch 500
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import Table, bindparam, delete, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app import models  # noqa: F401  (registra todas as tabelas)
+from app.crud.image_blob import adjust_refcounts
+from app.crud.utils import upsert_statement
+from app.database import (
+    DEFAULT_SHARD,
+    DIRECTORY_TABLES,
+    Base,
+    SessionLocal,
+    Shard,
+    create_shard_schema,
+    shard_map,
+)
+from app.models.image_blob import BLOB_PROCESSING, ImageBlob
+from app.models.product_image import IMAGE_PENDING, ProductImage
+from app.models.tenant_shard import TenantShard, TenantShardStatus
+
+# Folga no corte por updated_at (relógios de workers diferentes, commits atrasados)
+_DELTA_OVERLAP = timedelta(seconds=30)
+
+_IMAGES = ProductImage.__table__
+_BLOBS = ImageBlob.__table__
+
+
+def tenant_tables() -> list[Table]:
+    """Tabelas com dados de empresa, pais antes dos filhos (ordem das FKs)."""
+    return [
+        table for table in Base.metadata.sorted_tables
+        if table.name not in DIRECTORY_TABLES and "company_id" in table.c
+    ]
+
+
+# =========================
+# Cópia
+# =========================
+def _batches(conn: Connection, table: Table, company_id: str, batch: int, since=None):
+    """Linhas da empresa em lotes, por id crescente."""
+    # Colunas geradas (ex.: products.effective_price) o destino calcula
+    columns = [column for column in table.c if column.computed is None]
+    last_id = None
+    while True:
+        stmt = select(*columns).where(table.c.company_id == company_id)
+        if since is not None:
+            stmt = stmt.where(table.c.updated_at >= since)
+        if last_id is not None:
+            stmt = stmt.where(table.c.id > last_id)
+        rows = [dict(row) for row in conn.execute(stmt.order_by(table.c.id).limit(batch)).mappings()]
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1]["id"]
+
+
+def _upsert(conn: Connection, table: Table, rows: list[dict]) -> None:
+    ids = [row["id"] for row in rows]
+    existing = set(conn.scalars(select(table.c.id).where(table.c.id.in_(ids))))
+    new_rows = [row for row in rows if row["id"] not in existing]
+    changed = [{**row, "_id": row["id"]} for row in rows if row["id"] in existing]
+    if new_rows:
+        conn.execute(table.insert(), new_rows)
+    if changed:
+        conn.execute(update(table).where(table.c.id == bindparam("_id")), changed)
+
+
+# =========================
+# Blobs de imagem
+# =========================
+def _copy_blobs(src: Connection, dst: Connection, hashes: set) -> None:
+    """Cria no destino (refcount 0) os blobs que ainda não existem lá."""
+    rows = [dict(row) for row in src.execute(select(_BLOBS).where(_BLOBS.c.hash.in_(hashes))).mappings()]
+    for row in rows:
+        if row["status"] == BLOB_PROCESSING:
+            row["status"] = IMAGE_PENDING  # o processamento em andamento é da origem
+        row["refcount"] = 0
+        dst.execute(upsert_statement(
+            dst.dialect.name, _BLOBS, row, conflict_columns=["hash"], update_columns=["hash"],
+        ))
+
+
+def _reference_deltas(conn: Connection, ids: list, new_hashes: dict) -> dict:
+    """
+    hash -> variação do refcount ao trocar o blob_hash das imagens `ids` no
+    shard pelos de `new_hashes` (id -> hash; ausente = imagem apagada).
+    """
+    current = conn.execute(select(_IMAGES.c.id, _IMAGES.c.blob_hash).where(_IMAGES.c.id.in_(ids)))
+    deltas: dict = {}
+    for image_id, blob_hash in current:
+        if blob_hash is not None:
+            deltas[blob_hash] = deltas.get(blob_hash, 0) - 1
+    for blob_hash in new_hashes.values():
+        if blob_hash is not None:
+            deltas[blob_hash] = deltas.get(blob_hash, 0) + 1
+    return deltas
+
+
+def _copy_batch(src: Connection, target: Shard, table: Table, rows: list[dict]) -> None:
+    with Session(target.engine) as db:
+        dst = db.connection()
+        deltas = {}
+        if table is _IMAGES:
+            hashes = {row["blob_hash"] for row in rows if row["blob_hash"] is not None}
+            if hashes:
+                _copy_blobs(src, dst, hashes)
+            new_hashes = {row["id"]: row["blob_hash"] for row in rows}
+            deltas = _reference_deltas(dst, list(new_hashes), new_hashes)
+        _upsert(dst, table, rows)
+        # SQL core não passa pelo after_flush que conta as referências
+        adjust_refcounts(db, deltas)
+        db.commit()
+
+
+def copy_rows(source: Shard, target: Shard, company_id: str, batch: int, since=None) -> int:
+    copied = 0
+    with source.engine.connect() as src:
+        for table in tenant_tables():
+            table_rows = 0
+            for rows in _batches(src, table, company_id, batch, since):
+                _copy_batch(src, target, table, rows)
+                table_rows += len(rows)
+            if table_rows:
+                print(f"  {table.name}: {table_rows}")
+            copied += table_rows
+    return copied
+
+
+def _ids(conn: Connection, table: Table, company_id: str) -> set:
+    return set(conn.scalars(select(table.c.id).where(table.c.company_id == company_id)))
+
+
+def _delete_ids(db: Session, table: Table, ids: list) -> None:
+    conn = db.connection()
+    if table is _IMAGES:
+        adjust_refcounts(db, _reference_deltas(conn, ids, {}))
+    conn.execute(delete(table).where(table.c.id.in_(ids)))
+
+
+def remove_deleted(source: Shard, target: Shard, company_id: str, batch: int) -> int:
+    """Apaga no destino as linhas que não existem mais na origem (filhos primeiro)."""
+    removed = 0
+    with source.engine.connect() as src, Session(target.engine) as db:
+        dst = db.connection()
+        for table in reversed(tenant_tables()):
+            gone = list(_ids(dst, table, company_id) - _ids(src, table, company_id))
+            for start in range(0, len(gone), batch):
+                _delete_ids(db, table, gone[start:start + batch])
+            removed += len(gone)
+        db.commit()
+    return removed
+
+
+def delete_rows(shard: Shard, company_id: str, batch: int) -> int:
+    """Apaga os dados da empresa no shard; os blobs sem referência ficam para o coletor."""
+    deleted = 0
+    for table in reversed(tenant_tables()):
+        while True:
+            with Session(shard.engine) as db:
+                ids = list(db.connection().scalars(
+                    select(table.c.id).where(table.c.company_id == company_id).limit(batch)
+                ))
+                if not ids:
+                    break
+                _delete_ids(db, table, ids)
+                db.commit()
+            deleted += len(ids)
+    return deleted
+
+
+# =========================
+# Mapa de shards
+# =========================
+def set_assignment(company_id: str, shard: str, status: TenantShardStatus) -> None:
+    with SessionLocal() as db:
+        row = db.get(TenantShard, company_id)
+        if row is None:
+            row = TenantShard(company_id=company_id)
+            db.add(row)
+        row.shard = shard
+        row.status = status
+        db.commit()
+
+
+def wait_for_workers() -> None:
+    """Espera todos os workers relerem tenant_shards."""
+    seconds = shard_map.refresh_interval * 2 + 1
+    print(f"  aguardando {seconds:.0f}s para os workers relerem o mapa de shards...")
+    time.sleep(seconds)
+
+
+def move(company_id: str, target_name: str, batch: int, keep_source: bool) -> None:
+    shard_map.refresh()
+    if target_name not in shard_map.shards:
+        raise SystemExit(f"Shard desconhecido: {target_name} (configurados: {', '.join(shard_map.shards)})")
+    source = shard_map.shard_for(company_id)
+    target = shard_map.shards[target_name]
+    if source is target:
+        raise SystemExit(f"Empresa {company_id} já está no shard {target_name}")
+
+    if target.name != DEFAULT_SHARD:
+        with target.engine.begin() as conn:
+            create_shard_schema(conn)
+
+    print(f"Movendo empresa {company_id}: {source.name} -> {target.name}")
+    started = datetime.utcnow()
+    print(f"1/4 cópia inicial: {copy_rows(source, target, company_id, batch)} linhas")
+
+    set_assignment(company_id, source.name, TenantShardStatus.READ_ONLY)
+    try:
+        wait_for_workers()
+        delta = copy_rows(source, target, company_id, batch, since=started - _DELTA_OVERLAP)
+        removed = remove_deleted(source, target, company_id, batch)
+        print(f"2/4 alterações durante a cópia: {delta} linhas copiadas, {removed} removidas")
+    except BaseException:
+        # Falhou antes da troca: a empresa continua na origem, com escritas
+        set_assignment(company_id, source.name, TenantShardStatus.ACTIVE)
+        raise
+
+    set_assignment(company_id, target.name, TenantShardStatus.ACTIVE)
+    print(f"3/4 empresa {company_id} agora no shard {target.name}")
+
+    if keep_source:
+        print("4/4 dados da origem mantidos (--keep-source)")
+        return
+    wait_for_workers()
+    print(f"4/4 origem limpa: {delete_rows(source, company_id, batch)} linhas apagadas")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Move os dados de uma empresa para outro shard")
+    parser.add_argument("company_id")
+    parser.add_argument("shard", help="nome do shard de destino (DB_SHARD_URLS ou 'default')")
+    parser.add_argument("--batch", type=int, default=1000, help="linhas por lote")
+    parser.add_argument("--keep-source", action="store_true", help="não apaga os dados da origem")
+    args = parser.parse_args()
+    move(args.company_id, args.shard, args.batch, args.keep_source)
+
+
+if __name__ == "__main__":
+    main()
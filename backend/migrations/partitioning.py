@@ -0,0 +1,108 @@
+# migrations/partitioning.py
+"""
+Particiona no MySQL as tabelas declaradas com `partition_by` nos models
+(orders, order_items, stock_movements): uma partição por mês de
+created_at e, com DB_PARTITION_COMPANY_BUCKETS > 0, subpartições por
+hash de company_id.
+
+O MySQL não aceita FK em tabelas particionadas nem chave única sem as
+colunas de partição, então a migração:
+
+1. remove as FKs dessas tabelas e as que apontam para elas (a integridade
+   fica com o ORM: cascades dos relacionamentos e o RESTRICT de
+   order_items.product_id verificado em app.crud.product);
+2. iguala o created_at dos itens ao do pedido (mesma partição);
+3. troca a PK por (id, created_at[, company_id]) e particiona.
+
+Rode com a aplicação parada (reescreve as tabelas) e depois suba com
+DB_PARTITIONING=true; a manutenção (partições à frente e retenção) roda
+na própria aplicação (app.services.partitions).
+
+    DB_PARTITIONING=true python -m migrations.partitioning --dry-run
+    DB_PARTITIONING=true python -m migrations.partitioning
+"""
+
+import argparse
+from datetime import datetime
+
+from sqlalchemy import func, inspect, select, text
+
+from app import models  # noqa: F401  (registra todas as tabelas)
+from app.database import Base, engine
+from app.models.partitioning import partitioned_tables
+from app.services.partitions import conversion_ddl
+
+
+def already_partitioned(conn, table: str) -> bool:
+    return bool(conn.scalar(text(
+        "SELECT COUNT(*) FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL"
+    ), {"table": table}))
+
+
+def plan(conn) -> list[str]:
+    tables = partitioned_tables(Base.metadata)
+    pending = {name: entry for name, entry in tables.items() if not already_partitioned(conn, name)}
+    if not pending:
+        return []
+
+    inspector = inspect(conn)
+    ddl = []
+
+    # 1. FKs das tabelas particionadas e FKs de outras tabelas para elas
+    for table in inspector.get_table_names():
+        for fk in inspector.get_foreign_keys(table):
+            if fk.get("name") and (table in pending or fk["referred_table"] in pending):
+                ddl.append(f"ALTER TABLE {table} DROP FOREIGN KEY {fk['name']}")
+
+    # 2. Itens na mesma partição do pedido
+    if "orders" in pending and "order_items" in pending:
+        ddl.append(
+            "UPDATE order_items oi JOIN orders o ON o.id = oi.order_id "
+            "SET oi.created_at = o.created_at WHERE oi.created_at <> o.created_at"
+        )
+
+    # 3. PK com as colunas de partição + PARTITION BY
+    now = datetime.utcnow()
+    for name, (table, spec) in pending.items():
+        if spec.company_buckets:
+            nulls = conn.scalar(select(func.count()).select_from(table).where(table.c[spec.key_column].is_(None)))
+            if nulls:
+                raise SystemExit(
+                    f"{name}: {nulls} linhas sem {spec.key_column}; corrija antes de "
+                    "usar DB_PARTITION_COMPANY_BUCKETS (a coluna entra na PK)"
+                )
+            column = table.c[spec.key_column]
+            ddl.append(f"ALTER TABLE {name} MODIFY {column.name} {column.type.compile(dialect=engine.dialect)} NOT NULL")
+        oldest = conn.scalar(select(func.min(table.c[spec.column])))
+        ddl.extend(conversion_ddl(name, spec, oldest, now))
+    return ddl
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Particiona orders, order_items e stock_movements (MySQL)")
+    parser.add_argument("--dry-run", action="store_true", help="apenas imprime o SQL")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "mysql":
+        raise SystemExit(f"Particionamento só é suportado no MySQL (banco atual: {engine.dialect.name})")
+
+    with engine.connect() as conn:
+        ddl = plan(conn)
+    if not ddl:
+        print("Tabelas já particionadas")
+        return
+
+    for statement in ddl:
+        print(statement + ";")
+    if args.dry_run:
+        return
+
+    with engine.begin() as conn:
+        for statement in ddl:
+            conn.exec_driver_sql(statement)
+    print(f"✅ {len(ddl)} comandos aplicados")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# migrations/product_image_variants.py
+"""
+Adiciona a `product_images` as colunas do processamento em background
+(status, variants, placeholder, width, height, error) em bancos criados
+antes delas (o `create_all` do startup não altera tabelas existentes).
+Roda em todos os shards. As imagens existentes ficam `ready`: já foram
+gravadas em WEBP pelo upload síncrono, só não têm variantes.
+
+    python -m migrations.product_image_variants --dry-run   # só imprime o SQL
+    python -m migrations.product_image_variants
+"""
+
+import argparse
+
+from sqlalchemy import inspect, text
+
+from app import models  # noqa: F401  (registra todas as tabelas)
+from app.database import shard_map
+from app.models.product_image import IMAGE_READY, ProductImage
+
+COLUMNS = ("status", "variants", "placeholder", "width", "height", "error")
+
+
+def plan(engine) -> list[str]:
+    inspector = inspect(engine)
+    if "product_images" not in inspector.get_table_names():
+        return []  # o create_all do startup cria com as colunas
+
+    existing = {c["name"] for c in inspector.get_columns("product_images")}
+    ddl = []
+    for name in COLUMNS:
+        if name in existing:
+            continue
+        column_type = ProductImage.__table__.c[name].type.compile(dialect=engine.dialect)
+        if name == "status":
+            ddl.append(
+                f"ALTER TABLE product_images ADD COLUMN status {column_type} NOT NULL DEFAULT '{IMAGE_READY}'"
+            )
+        else:
+            ddl.append(f"ALTER TABLE product_images ADD COLUMN {name} {column_type} NULL")
+    return ddl
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Colunas de processamento de product_images")
+    parser.add_argument("--dry-run", action="store_true", help="apenas imprime o SQL")
+    args = parser.parse_args()
+
+    for shard in shard_map.shards.values():
+        ddl = plan(shard.engine)
+        if not ddl:
+            print(f"[{shard.name}] product_images já tem as colunas")
+            continue
+
+        for statement in ddl:
+            print(f"[{shard.name}] {statement};")
+        if args.dry_run:
+            continue
+
+        with shard.engine.begin() as conn:
+            for statement in ddl:
+                conn.execute(text(statement))
+        print(f"[{shard.name}] ✅ {len(ddl)} alterações aplicadas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+# migrations/user_token_version.py
+"""
+Adiciona `users.token_version` em bancos criados antes da coluna existir
+(o `create_all` do startup não altera tabelas existentes).
+
+    python -m migrations.user_token_version
+"""
+
+from sqlalchemy import inspect, text
+
+from app.database import engine
+
+
+def main() -> None:
+    columns = {c["name"] for c in inspect(engine).get_columns("users")}
+    if "token_version" in columns:
+        print("users.token_version já existe")
+        return
+
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0"))
+    print("✅ users.token_version criada")
+
+
+if __name__ == "__main__":
+    main()
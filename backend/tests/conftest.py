@@ -0,0 +1,105 @@
+# tests/conftest.py
+"""
+Fixtures da suíte: banco SQLite temporário, a API rodando com startup e
+shutdown (TestClient) e empresas com um admin logado.
+
+As variáveis de ambiente são lidas no import de app.*, então precisam
+estar definidas antes do primeiro import da aplicação. A suíte roda com
+SQL_STRICT: lazy load implícito ou excesso de queries quebra a request.
+"""
+
+import os
+import sys
+import tempfile
+import uuid
+
+_TMP_DIR = tempfile.mkdtemp(prefix="renitech-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_TMP_DIR, 'test.db')}")
+os.environ.setdefault("SQL_STRICT", "true")
+# Dois shards de tenants além do diretório: a suíte toda passa pelo roteamento
+os.environ.setdefault("DB_SHARD_URLS", ",".join(
+    f"{name}=sqlite:///{os.path.join(_TMP_DIR, name + '.db')}" for name in ("s1", "s2")
+))
+os.environ.setdefault("CONCURRENCY_LIMIT_ENABLED", "false")
+# Hash de senha barato e no threadpool (sem processos) nos testes
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+os.environ.setdefault("ARGON2_TIME_COST", "1")
+os.environ.setdefault("ARGON2_MEMORY_COST", "1024")
+os.environ.setdefault("ARGON2_PARALLELISM", "1")
+# Imagens processadas no threadpool, sem subir o pool de processos
+os.environ.setdefault("IMAGE_WORKERS", "0")
+
+# Uploads e blobs de imagem vão para a pasta temporária, fora do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(_TMP_DIR)
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.database import SessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.company import Company  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.security.tenant import Tenant  # noqa: E402
+from app.services.passwords import hash_password  # noqa: E402
+
+PASSWORD = "senha-de-teste"
+
+# Authorization -> Tenant dos admins criados por make_admin
+_TENANTS: dict = {}
+
+
+@pytest.fixture(scope="session")
+def client():
+    # Um único event loop para a sessão toda (pools assíncronos ficam presos a ele)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def make_admin(client):
+    """Cria uma empresa com um admin e devolve os headers de autenticação dele."""
+    def factory(company_name: str = "Empresa") -> dict:
+        email = f"admin-{uuid.uuid4().hex[:12]}@teste.com"
+        with SessionLocal() as db:
+            company = Company(name=company_name)
+            db.add(company)
+            db.flush()
+            db.add(User(
+                name="admin",
+                email=email,
+                password=hash_password(PASSWORD),
+                role="admin",
+                company_id=company.id,
+            ))
+            db.commit()
+        response = client.post("/users/login", data={"username": email, "password": PASSWORD})
+        assert response.status_code == 200, response.text
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        _TENANTS[headers["Authorization"]] = Tenant(company.id)
+        return headers
+
+    return factory
+
+
+@pytest.fixture
+def tenant_of():
+    """Tenant (empresa) do admin dono dos headers, para chamar o CRUD direto."""
+    return lambda headers: _TENANTS[headers["Authorization"]]
+
+
+@pytest.fixture
+def admin(make_admin) -> dict:
+    return make_admin()
+
+
+@pytest.fixture
+def make_product(client):
+    def factory(headers: dict, **fields) -> dict:
+        body = {"name": "Produto", "price": 10, "sku": f"SKU-{uuid.uuid4().hex[:8]}", "stock_quantity": 5}
+        body.update(fields)
+        response = client.post("/products/", json=body, headers=headers)
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return factory
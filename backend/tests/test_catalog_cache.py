@@ -0,0 +1,111 @@
+# tests/test_catalog_cache.py
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import update
+
+from app.database import engine
+from app.models.catalog_version import CatalogVersion
+from app.models.product import Product
+from app.services.catalog_cache import catalog_cache, etag_matches, make_etag
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, False),
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"x", "abc"', True),
+        ("*", True),
+        ('"abcd"', False),
+    ],
+)
+def test_etag_matches(header, expected):
+    assert etag_matches(header, '"abc"') is expected
+
+
+def test_make_etag_depends_on_body():
+    assert make_etag(b"[]") == make_etag(b"[]") != make_etag(b"[1]")
+
+
+def _revalidate(client, url: str, headers: dict, etag: str):
+    return client.get(url, headers={**headers, "If-None-Match": etag})
+
+
+def test_not_modified_until_a_write(client, admin, make_product):
+    make_product(admin, name="Primeiro")
+    first = client.get("/products/", headers=admin)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    hits = catalog_cache.hits
+    again = _revalidate(client, "/products/", admin, etag)
+    assert again.status_code == 304 and again.content == b""
+    assert again.headers["ETag"] == etag
+    assert catalog_cache.hits == hits + 1
+
+    make_product(admin, name="Segundo")
+    changed = _revalidate(client, "/products/", admin, etag)
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert [p["name"] for p in changed.json()] == ["Primeiro", "Segundo"]
+
+
+def test_stock_movement_invalidates_product(client, admin, make_product):
+    product = make_product(admin, stock_quantity=5)
+    url = f"/products/{product['id']}"
+    etag = client.get(url, headers=admin).headers["ETag"]
+    assert _revalidate(client, url, admin, etag).status_code == 304
+
+    response = client.post(
+        f"/stocks/{product['id']}/add", json={"product_id": product["id"], "quantity": 3}, headers=admin
+    )
+    assert response.status_code == 200, response.text
+    response = _revalidate(client, url, admin, etag)
+    assert response.status_code == 200
+    assert response.json()["stock_quantity"] == 8
+
+
+def test_category_update_invalidates_listing(client, admin):
+    category = client.post("/categories/", json={"name": "Antes"}, headers=admin).json()
+    etag = client.get("/categories/", headers=admin).headers["ETag"]
+    assert _revalidate(client, "/categories/", admin, etag).status_code == 304
+
+    response = client.put(f"/categories/{category['id']}", json={"name": "Depois"}, headers=admin)
+    assert response.status_code == 200, response.text
+    response = _revalidate(client, "/categories/", admin, etag)
+    assert response.status_code == 200
+    assert [c["name"] for c in response.json()] == ["Depois"]
+
+
+def test_entries_are_per_tenant(client, make_admin, make_product):
+    admin_a, admin_b = make_admin("A"), make_admin("B")
+    make_product(admin_a, name="Da A")
+    assert [p["name"] for p in client.get("/products/", headers=admin_a).json()] == ["Da A"]
+    assert client.get("/products/", headers=admin_b).json() == []
+
+
+def test_write_from_another_worker_invalidates_after_refresh(client, admin, make_product):
+    product = make_product(admin, name="Original")
+    etag = client.get("/products/", headers=admin).headers["ETag"]
+
+    # Outro processo: altera e incrementa a versão direto no banco, sem
+    # passar pelo commit (e pelo cache) deste processo
+    with engine.begin() as conn:
+        company_id = conn.execute(
+            Product.__table__.select().where(Product.id == product["id"])
+        ).one().company_id
+        conn.execute(update(Product).where(Product.id == product["id"]).values(name="Alterado"))
+        conn.execute(
+            update(CatalogVersion)
+            .where(CatalogVersion.company_id == company_id)
+            .values(version=CatalogVersion.version + 1, updated_at=datetime.utcnow())
+        )
+
+    catalog_cache.refresh()
+    response = _revalidate(client, "/products/", admin, etag)
+    assert response.status_code == 200
+    assert [p["name"] for p in response.json()] == ["Alterado"]
@@ -0,0 +1,61 @@
+# tests/test_concurrency.py
+
+import asyncio
+
+from app.middleware.concurrency import ConcurrencyLimitMiddleware
+from app.services.concurrency import AdaptiveConcurrencyLimiter
+
+
+def _streaming_app(body_delay: float, release: asyncio.Event = None):
+    """App ASGI que responde o início na hora e demora `body_delay` no corpo."""
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        if release is not None:
+            await release.wait()
+        await asyncio.sleep(body_delay)
+        await send({"type": "http.response.body", "body": b"ok"})
+    return app
+
+
+async def _call(middleware, path: str) -> list[dict]:
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware({"type": "http", "method": "GET", "path": path, "headers": []}, receive, send)
+    return sent
+
+
+def test_latency_is_measured_until_response_start():
+    limiter = AdaptiveConcurrencyLimiter(target_latency_ms=50)
+    middleware = ConcurrencyLimitMiddleware(_streaming_app(0.2), limiter=limiter, exempt_paths=[], bulk_paths=[])
+
+    asyncio.run(_call(middleware, "/products/"))
+    assert limiter.latency_ewma is not None and limiter.latency_ewma < 0.05
+    assert limiter.inflight == 0
+
+
+def test_bulk_routes_skip_the_adaptive_limit_and_have_their_own_cap():
+    limiter = AdaptiveConcurrencyLimiter(bulk_limit=1)
+    release = asyncio.Event()
+    middleware = ConcurrencyLimitMiddleware(
+        _streaming_app(0, release), limiter=limiter, exempt_paths=[], bulk_paths=["/exports", "/products/import"]
+    )
+
+    async def scenario():
+        running = asyncio.create_task(_call(middleware, "/exports/products"))
+        await asyncio.sleep(0.01)
+        rejected = await _call(middleware, "/products/import")
+        release.set()
+        return await running, rejected
+
+    accepted, rejected = asyncio.run(scenario())
+    assert accepted[0]["status"] == 200
+    assert rejected[0]["status"] == 503
+    assert (b"retry-after", b"5") in rejected[0]["headers"]
+    assert limiter.latency_ewma is None  # rotas longas não ajustam o limite
+    assert limiter.snapshot()["bulk"] == {"limit": 1, "inflight": 0, "shed": 1}
@@ -0,0 +1,120 @@
+# tests/test_exports.py
+
+import csv
+import io
+import json
+
+import pytest
+
+from app.crud import export as crud
+from app.crud.export import ExportFilters, validate_filters
+from app.crud.tenant_scope import bind_tenant
+from app.database import AsyncSessionLocal, SessionLocal
+from app.models.product_image import IMAGE_PENDING, IMAGE_READY, ProductImage
+from app.services.exports import open_export
+from app.services.product_import import CSV_IMAGE_SEPARATOR
+
+
+def _add_images(tenant, product_id: str, urls: list[str], status: str = IMAGE_READY) -> None:
+    with SessionLocal() as db:
+        bind_tenant(db, tenant)
+        db.add_all([
+            ProductImage(product_id=product_id, image_url=url, status=status, company_id=tenant.company_id)
+            for url in urls
+        ])
+        db.commit()
+
+
+def _batches(client, tenant, dataset: str, batch_size: int, filters: ExportFilters = ExportFilters()):
+    async def collect():
+        async with AsyncSessionLocal() as db:
+            return [batch async for batch in crud.stream_export(db, tenant, dataset, filters, batch_size)]
+
+    return client.portal.call(collect)
+
+
+def _body(client, export) -> bytes:
+    async def collect():
+        return b"".join([chunk async for chunk in export.body])
+
+    return client.portal.call(collect)
+
+# =========================
+# Validação
+# =========================
+@pytest.mark.parametrize("dataset, filters", [
+    ("products", ExportFilters(status="paid")),
+    ("orders", ExportFilters(status="active")),
+    ("orders", ExportFilters(category_id="x")),
+    ("products", ExportFilters(product_id="x")),
+])
+def test_invalid_filters(dataset, filters):
+    with pytest.raises(ValueError):
+        validate_filters(dataset, filters)
+
+
+@pytest.mark.parametrize("params", [
+    {"status": "paid"},
+    {"product_id": "x"},
+    {"created_from": "2024-02-01T00:00:00", "created_to": "2024-01-01T00:00:00"},
+])
+def test_invalid_filters_are_400_before_streaming(client, admin, monkeypatch, params):
+    def fail(*args, **kwargs):
+        raise AssertionError("o streaming não deveria começar")
+
+    monkeypatch.setattr(crud, "stream_export", fail)
+    response = client.get("/exports/products", params=params, headers=admin)
+    assert response.status_code == 400, response.text
+    assert "detail" in response.json()
+
+# =========================
+# Agrupamento das imagens
+# =========================
+def test_images_are_grouped_across_batches(client, admin, make_product, tenant_of):
+    tenant = tenant_of(admin)
+    first = make_product(admin, name="A")
+    second = make_product(admin, name="B")
+    plain = make_product(admin, name="C")
+    _add_images(tenant, first["id"], ["a1.webp", "a2.webp", "a3.webp"])
+    _add_images(tenant, first["id"], ["a4.webp"], status=IMAGE_PENDING)
+    _add_images(tenant, second["id"], ["b1.webp", "b2.webp"])
+
+    # 6 linhas do JOIN em lotes de 2: as imagens de A e de B caem em lotes diferentes
+    batches = _batches(client, tenant, "products", batch_size=2)
+    assert len(batches) > 1
+    rows = [row for batch in batches for row in batch]
+    assert [row["id"] for row in rows] == [first["id"], second["id"], plain["id"]]
+    assert sorted(rows[0]["images"]) == ["a1.webp", "a2.webp", "a3.webp"]
+    assert sorted(rows[1]["images"]) == ["b1.webp", "b2.webp"]
+    assert rows[2]["images"] == []
+
+# =========================
+# Formatos
+# =========================
+@pytest.fixture
+def products(admin, make_product, tenant_of) -> list[dict]:
+    """Cinco produtos, o primeiro com duas imagens: mais linhas que o lote de 2."""
+    created = [make_product(admin, name=f"P{i}", price=i + 1) for i in range(5)]
+    _add_images(tenant_of(admin), created[0]["id"], ["x.webp", "y.webp"])
+    return created
+
+
+def test_csv_export_over_several_batches(client, admin, tenant_of, products):
+    export = open_export("products", "csv", tenant_of(admin), ExportFilters(), batch_size=2)
+    body = _body(client, export).decode()
+    assert body.startswith("\ufeff")
+    rows = list(csv.DictReader(io.StringIO(body[1:])))
+    assert [row["id"] for row in rows] == [product["id"] for product in products]
+    assert [float(row["price"]) for row in rows] == [1, 2, 3, 4, 5]
+    assert sorted(rows[0]["images"].split(CSV_IMAGE_SEPARATOR)) == ["x.webp", "y.webp"]
+    assert rows[0]["is_active"] == "true"
+    assert rows[1]["images"] == ""
+
+
+def test_ndjson_export_over_several_batches(client, admin, tenant_of, products):
+    export = open_export("products", "ndjson", tenant_of(admin), ExportFilters(status="active"), batch_size=2)
+    lines = _body(client, export).decode().splitlines()
+    rows = [json.loads(line) for line in lines]
+    assert [row["id"] for row in rows] == [product["id"] for product in products]
+    assert sorted(rows[0]["images"]) == ["x.webp", "y.webp"]
+    assert rows[0]["price"] == 1.0 and rows[0]["is_active"] is True
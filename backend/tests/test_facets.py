@@ -0,0 +1,132 @@
+# tests/test_facets.py
+
+import pytest
+
+from app.crud.product import CatalogFilters, get_catalog_facets
+from app.database import SessionLocal
+
+
+@pytest.fixture
+def catalog(client, admin, make_product) -> dict:
+    """
+    Catálogo pequeno com duas categorias, um produto sem categoria, um
+    inativo e dois sem estoque (um deles sem controle de estoque).
+    Devolve nome -> produto criado, mais as categorias em "X" e "Y".
+    """
+    x = client.post("/categories/", json={"name": "X"}, headers=admin).json()
+    y = client.post("/categories/", json={"name": "Y"}, headers=admin).json()
+    specs = {
+        "x-promo": dict(category_id=x["id"], price=10, show_in_promotion=True),
+        "x-25": dict(category_id=x["id"], price=25),
+        "x-taxed": dict(category_id=x["id"], price=20, icms=25),  # 25,00 com impostos
+        "x-no-control": dict(category_id=x["id"], price=60, stock_quantity=0, no_stock_control=True),
+        "y-promo": dict(category_id=y["id"], price=24.99, show_in_promotion=True),
+        "y-1000": dict(category_id=y["id"], price=1000),
+        "none-out": dict(price=50, stock_quantity=0),
+        "x-inactive": dict(category_id=x["id"], price=10, is_active=False),
+    }
+    products = {name: make_product(admin, name=name, **fields) for name, fields in specs.items()}
+    products.update(X=x, Y=y)
+    return products
+
+
+def _facets(client, headers: dict, **params) -> dict:
+    response = client.get("/products/facets", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _listed(client, headers: dict, **params) -> set[str]:
+    response = client.get("/products/", params={"limit": 100, **params}, headers=headers)
+    assert response.status_code == 200, response.text
+    return {item["name"] for item in response.json()}
+
+
+def _categories(facets: dict) -> dict:
+    return {entry["name"]: entry["count"] for entry in facets["categories"]}
+
+
+def _buckets(facets: dict) -> dict:
+    return {(entry["min"], entry["max"]): entry["count"] for entry in facets["price_buckets"] if entry["count"]}
+
+
+def _promotion(facets: dict) -> dict:
+    return {entry["value"]: entry["count"] for entry in facets["promotion"]}
+
+
+def test_facets_without_filters(client, admin, catalog):
+    facets = _facets(client, admin)
+    assert facets["total"] == 7
+    assert _categories(facets) == {"X": 4, "Y": 2, None: 1}
+    assert _promotion(facets) == {True: 2, False: 5}
+
+
+def test_price_bucket_edges(client, admin, catalog):
+    # Limite inferior inclusivo, superior exclusivo; impostos entram no preço
+    assert _buckets(_facets(client, admin)) == {
+        (0.0, 25.0): 2,      # 10 e 24,99
+        (25.0, 50.0): 2,     # 25 e 20 + 25% de ICMS
+        (50.0, 100.0): 2,    # 50 e 60
+        (1000.0, None): 1,   # 1000
+    }
+
+
+def test_category_facet_ignores_its_own_filter(client, admin, catalog):
+    facets = _facets(client, admin, category_id=catalog["X"]["id"])
+    assert facets["total"] == 4
+    assert _categories(facets) == {"X": 4, "Y": 2, None: 1}
+    assert _buckets(facets) == {(0.0, 25.0): 1, (25.0, 50.0): 2, (50.0, 100.0): 1}
+    assert _promotion(facets) == {True: 1, False: 3}
+    assert _listed(client, admin, category_id=catalog["X"]["id"]) == {"x-promo", "x-25", "x-taxed", "x-no-control"}
+
+
+def test_promotion_facet_ignores_its_own_filter(client, admin, catalog):
+    facets = _facets(client, admin, show_in_promotion=True)
+    assert facets["total"] == 2
+    assert _promotion(facets) == {True: 2, False: 5}
+    assert _categories(facets) == {"X": 1, "Y": 1}
+    assert _buckets(facets) == {(0.0, 25.0): 2}
+    assert _listed(client, admin, show_in_promotion=True) == {"x-promo", "y-promo"}
+
+
+def test_price_facet_ignores_its_own_filter(client, admin, catalog):
+    # Faixa inclusiva nas duas pontas na listagem
+    facets = _facets(client, admin, min_price=25, max_price=50)
+    assert facets["total"] == 3
+    assert _buckets(facets) == _buckets(_facets(client, admin))
+    assert _categories(facets) == {"X": 2, None: 1}
+    assert _promotion(facets) == {True: 0, False: 3}
+    assert _listed(client, admin, min_price=25, max_price=50) == {"x-25", "x-taxed", "none-out"}
+
+
+def test_facets_combine_the_other_filters(client, admin, catalog):
+    facets = _facets(client, admin, category_id=catalog["Y"]["id"], show_in_promotion=False)
+    assert facets["total"] == 1
+    assert _categories(facets) == {"X": 3, "Y": 1, None: 1}
+    assert _promotion(facets) == {True: 1, False: 1}
+    assert _buckets(facets) == {(1000.0, None): 1}
+
+
+@pytest.mark.parametrize("in_stock, expected", [
+    (True, {"x-promo", "x-25", "x-taxed", "x-no-control", "y-promo", "y-1000"}),
+    (False, {"none-out"}),
+])
+def test_in_stock_respects_no_stock_control(client, admin, catalog, in_stock, expected):
+    assert _listed(client, admin, in_stock=in_stock) == expected
+    facets = _facets(client, admin, in_stock=in_stock)
+    assert facets["total"] == len(expected)
+    assert sum(_categories(facets).values()) == len(expected)
+
+
+def test_crud_facets_with_every_filter(admin, tenant_of, catalog):
+    filters = CatalogFilters(category_id=catalog["X"]["id"], in_stock=True, min_price=20)
+    with SessionLocal() as db:
+        facets = get_catalog_facets(db, tenant_of(admin), filters)
+    assert facets["total"] == 3
+    # Sem estoque e abaixo de 20 ficam de fora; a categoria não filtra a própria faceta
+    assert _categories(facets) == {"X": 3, "Y": 2}
+
+
+def test_min_price_above_max_price_is_400(client, admin):
+    response = client.get("/products/facets", params={"min_price": 10, "max_price": 5}, headers=admin)
+    assert response.status_code == 400
@@ -0,0 +1,83 @@
+# tests/test_ids.py
+
+import uuid
+
+import pytest
+from sqlalchemy import Column, MetaData, Table, create_engine, select
+
+from app.models import types
+from app.models.types import IdType, uuid7
+from migrations import compact_ids
+
+
+def test_uuid7_layout():
+    value = uuid7()
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+
+
+def test_uuid7_is_strictly_increasing():
+    ids = [uuid7() for _ in range(10_000)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    # A ordem dos bytes é a do índice BINARY(16)
+    assert [i.bytes for i in ids] == sorted(i.bytes for i in ids)
+
+
+def test_uuid7_counter_within_one_millisecond_and_clock_going_back(monkeypatch):
+    clock = iter([5_000_000_000] * 5000 + [4_000_000_000] * 10)
+    monkeypatch.setattr(types.time, "time_ns", lambda: next(clock))
+    monkeypatch.setattr(types, "_uuid7_last", (0, 0))
+
+    ids = [uuid7() for _ in range(5010)]
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+    # O contador de 12 bits estoura: o timestamp avança 1 ms em vez de repetir
+    assert ids[-1].int >> 80 > 5_000
+
+
+@pytest.mark.parametrize("compact, stored_type", [(False, str), (True, bytes)])
+def test_id_type_round_trip(compact, stored_type):
+    id_type = IdType(compact=compact)
+    value = str(uuid7())
+    stored = id_type.process_bind_param(value, None)
+    assert isinstance(stored, stored_type)
+    assert id_type.process_result_value(stored, None) == value
+    assert id_type.process_bind_param(uuid.UUID(value), None) == stored
+    assert id_type.process_bind_param(None, None) is None
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_id_type_in_a_table(compact):
+    engine = create_engine("sqlite://")
+    table = Table("items", MetaData(), Column("id", IdType(compact=compact), primary_key=True))
+    table.create(engine)
+    ids = [str(uuid7()) for _ in range(3)]
+    with engine.begin() as conn:
+        conn.execute(table.insert(), [{"id": i} for i in ids])
+        assert conn.scalars(select(table.c.id).order_by(table.c.id)).all() == ids
+        assert conn.scalar(select(table.c.id).where(table.c.id == ids[1])) == ids[1]
+        # ID malformado não casa com nada (e não quebra a query)
+        assert conn.scalar(select(table.c.id).where(table.c.id == "não-é-uuid")) is None
+
+
+def test_compact_ids_swaps_atomically_and_drops_old_tables_last():
+    statements = compact_ids.plan()
+    renames = [i for i, s in enumerate(statements) if s.startswith("RENAME TABLE")]
+    assert len(renames) == 1
+    rename = statements[renames[0]]
+    for table in compact_ids.Base.metadata.sorted_tables:
+        assert f"`{table.name}` TO `{table.name}__old`, `{table.name}__compact` TO `{table.name}`" in rename
+
+    # Nenhuma tabela original é apagada; as __old só depois de todas as FKs
+    drops = [i for i, s in enumerate(statements) if s.startswith("DROP TABLE `")]
+    assert all(statements[i].endswith("__old`") for i in drops)
+    foreign_keys = [i for i, s in enumerate(statements) if "FOREIGN KEY" in s and s.startswith("ALTER TABLE")]
+    assert foreign_keys and renames[0] < min(foreign_keys) and max(foreign_keys) < min(drops)
+    # Índices do shadow já nascem com o nome final
+    index_names = [s.split(" ON ")[0].split()[-1] for s in statements if s.startswith(("CREATE INDEX", "CREATE UNIQUE INDEX"))]
+    assert index_names and not any("__compact" in name for name in index_names)
+
+
+def test_compact_ids_does_not_copy_generated_columns():
+    copy = next(s for s in compact_ids.plan() if s.startswith("INSERT INTO `products__compact`"))
+    assert "effective_price" not in copy
@@ -0,0 +1,140 @@
+# tests/test_image_blobs.py
+
+import io
+import itertools
+import os
+import time
+
+import pytest
+from PIL import Image
+
+from app.database import SessionLocal
+from app.models.image_blob import ImageBlob
+from app.services.image_gc import BlobCollector
+from app.services.images import blob_dir, blob_hash_from_url
+
+
+# Blobs são compartilhados entre empresas: cada teste usa um conteúdo novo
+_seeds = itertools.count(1)
+
+
+def _jpeg(seed: int) -> bytes:
+    # Largura diferente por seed: cores próximas podem virar o mesmo JPEG
+    buffer = io.BytesIO()
+    Image.new("RGB", (640 + seed, 480), (20, 130, 30)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def _upload(client, headers: dict, product_id: str, content: bytes) -> dict:
+    response = client.post(
+        f"/products/{product_id}/images", files={"file": ("foto.jpg", content, "image/jpeg")}, headers=headers
+    )
+    assert response.status_code in (201, 202), response.text
+    return response.json()
+
+
+def _wait_ready(client, headers: dict, image_id: str) -> dict:
+    for _ in range(100):
+        image = client.get(f"/products/images/{image_id}", headers=headers).json()
+        if image["status"] != "pending":
+            return image
+        time.sleep(0.05)
+    pytest.fail("imagem não foi processada")
+
+
+def _blob(blob_hash: str):
+    with SessionLocal() as db:
+        return db.get(ImageBlob, blob_hash)
+
+
+def _files(blob_hash: str) -> list[str]:
+    directory = blob_dir(blob_hash)
+    if not os.path.isdir(directory):
+        return []
+    return [name for name in os.listdir(directory) if name.startswith(blob_hash)]
+
+
+@pytest.fixture
+def uploaded(client, admin, make_product):
+    """Mesmo conteúdo enviado para dois produtos: um blob com duas referências."""
+    seed = next(_seeds)
+    products = [make_product(admin, name=f"Foto {i}") for i in range(2)]
+    images = [_upload(client, admin, product["id"], _jpeg(seed)) for product in products]
+    images = [_wait_ready(client, admin, image["id"]) for image in images]
+    return products, images, seed
+
+
+def test_same_content_shares_one_blob(client, admin, uploaded):
+    _, images, _ = uploaded
+    assert [image["status"] for image in images] == ["ready", "ready"]
+    assert images[0]["image_url"] == images[1]["image_url"]
+
+    blob_hash = blob_hash_from_url(images[0]["image_url"])
+    blob = _blob(blob_hash)
+    assert (blob.status, blob.refcount) == ("ready", 2)
+    assert f"{blob_hash}.webp" in _files(blob_hash)
+
+
+def test_deleting_products_releases_references(client, admin, uploaded):
+    products, images, _ = uploaded
+    blob_hash = blob_hash_from_url(images[0]["image_url"])
+
+    assert client.delete(f"/products/{products[0]['id']}", headers=admin).status_code == 200
+    assert _blob(blob_hash).refcount == 1
+    assert client.delete(f"/products/{products[1]['id']}", headers=admin).status_code == 200
+    assert _blob(blob_hash).refcount == 0
+    # Arquivos continuam no disco até a coleta
+    assert _files(blob_hash)
+
+
+def test_collector_respects_grace_then_removes_files(client, admin, uploaded):
+    products, images, _ = uploaded
+    blob_hash = blob_hash_from_url(images[0]["image_url"])
+    for product in products:
+        client.delete(f"/products/{product['id']}", headers=admin)
+
+    BlobCollector(grace=3600).collect()
+    assert _blob(blob_hash) is not None and _files(blob_hash)
+
+    collector = BlobCollector(grace=-1)
+    assert collector.collect() >= 1
+    assert _blob(blob_hash) is None
+    assert _files(blob_hash) == []
+    assert collector.files_removed >= 1
+
+
+def test_collector_keeps_referenced_blobs(client, admin, uploaded):
+    products, images, _ = uploaded
+    blob_hash = blob_hash_from_url(images[0]["image_url"])
+    client.delete(f"/products/{products[0]['id']}", headers=admin)
+
+    BlobCollector(grace=-1).collect()
+    assert _blob(blob_hash).refcount == 1
+    assert _files(blob_hash)
+
+
+def test_product_linking_a_blob_url_counts_as_reference(client, admin, make_product, uploaded):
+    products, images, _ = uploaded
+    url, blob_hash = images[0]["image_url"], blob_hash_from_url(images[0]["image_url"])
+
+    # Ex.: CSV exportado e reimportado com as URLs das imagens
+    copy = make_product(admin, name="Cópia", images=[url, "https://cdn/outra.jpg"])
+    assert _blob(blob_hash).refcount == 3
+
+    for product in (*products, copy):
+        client.delete(f"/products/{product['id']}", headers=admin)
+    assert _blob(blob_hash).refcount == 0
+
+
+def test_reupload_after_collection_reprocesses(client, admin, make_product, uploaded):
+    products, images, seed = uploaded
+    blob_hash = blob_hash_from_url(images[0]["image_url"])
+    for product in products:
+        client.delete(f"/products/{product['id']}", headers=admin)
+    BlobCollector(grace=-1).collect()
+
+    product = make_product(admin, name="De novo")
+    image = _wait_ready(client, admin, _upload(client, admin, product["id"], _jpeg(seed))["id"])
+    assert (image["status"], blob_hash_from_url(image["image_url"])) == ("ready", blob_hash)
+    assert _blob(blob_hash).refcount == 1
+    assert f"{blob_hash}.webp" in _files(blob_hash)
@@ -0,0 +1,110 @@
+# tests/test_move_tenant.py
+
+import io
+import os
+import time
+from datetime import datetime
+
+from PIL import Image
+from sqlalchemy import delete, select, update
+
+from app.database import SessionLocal, shard_map
+from app.models.image_blob import ImageBlob
+from app.models.product import Product
+from app.models.product_image import ProductImage
+from app.models.tenant_shard import TenantShard, TenantShardStatus
+from app.services.image_gc import BlobCollector
+from app.services.images import blob_dir, blob_hash_from_url
+from migrations import move_tenant
+
+_PRODUCTS = Product.__table__
+_BLOBS = ImageBlob.__table__
+_IMAGES = ProductImage.__table__
+
+
+def _names(shard: str, company_id: str) -> list[str]:
+    with shard_map.shards[shard].engine.connect() as conn:
+        return sorted(conn.scalars(select(_PRODUCTS.c.name).where(_PRODUCTS.c.company_id == company_id)))
+
+
+def test_move_copies_the_delta_and_removes_deleted_rows(client, admin, tenant_of, make_product, monkeypatch):
+    company_id = tenant_of(admin).company_id
+    kept = make_product(admin, name="Mantido")
+    changed = make_product(admin, name="Antigo")
+    gone = make_product(admin, name="Apagado")
+
+    calls = []
+
+    def wait_for_workers():
+        shard_map.refresh()
+        calls.append(shard_map.is_read_only(company_id))
+        if len(calls) == 1:
+            # Escritas que chegaram à origem depois da cópia inicial
+            with shard_map.shards["default"].engine.begin() as conn:
+                conn.execute(
+                    update(_PRODUCTS).where(_PRODUCTS.c.id == changed["id"])
+                    .values(name="Novo", updated_at=datetime.utcnow())
+                )
+                conn.execute(delete(_PRODUCTS).where(_PRODUCTS.c.id == gone["id"]))
+
+    monkeypatch.setattr(move_tenant, "wait_for_workers", wait_for_workers)
+    move_tenant.move(company_id, "s2", batch=1, keep_source=False)
+
+    # Somente leitura durante o delta; liberada antes da limpeza da origem
+    assert calls == [True, False]
+    assert shard_map.shard_for(company_id).name == "s2"
+    with SessionLocal() as db:
+        assert db.get(TenantShard, company_id).status == TenantShardStatus.ACTIVE
+    assert _names("s2", company_id) == ["Mantido", "Novo"]
+    assert _names("default", company_id) == []
+
+    listed = {p["id"]: p["name"] for p in client.get("/products/", headers=admin).json()}
+    assert listed == {kept["id"]: "Mantido", changed["id"]: "Novo"}
+
+
+def _blob(shard: str, blob_hash: str):
+    with shard_map.shards[shard].engine.connect() as conn:
+        return conn.execute(select(_BLOBS).where(_BLOBS.c.hash == blob_hash)).first()
+
+
+def _ready_image(client, headers: dict, product_id: str) -> dict:
+    buffer = io.BytesIO()
+    Image.new("RGB", (320, 1234), (200, 40, 90)).save(buffer, "JPEG")
+    response = client.post(
+        f"/products/{product_id}/images", files={"file": ("foto.jpg", buffer.getvalue(), "image/jpeg")},
+        headers=headers,
+    )
+    assert response.status_code in (201, 202), response.text
+    for _ in range(100):
+        image = client.get(f"/products/images/{response.json()['id']}", headers=headers).json()
+        if image["status"] == "ready":
+            return image
+        time.sleep(0.05)
+    raise AssertionError("imagem não foi processada")
+
+
+def test_move_takes_image_blobs_and_refcounts_along(client, admin, tenant_of, make_product, monkeypatch):
+    company_id = tenant_of(admin).company_id
+    product = make_product(admin, name="Com foto")
+    image = _ready_image(client, admin, product["id"])
+    blob_hash = blob_hash_from_url(image["image_url"])
+    assert _blob("default", blob_hash).refcount == 1
+
+    monkeypatch.setattr(move_tenant, "wait_for_workers", shard_map.refresh)
+    move_tenant.move(company_id, "s1", batch=100, keep_source=False)
+
+    moved = _blob("s1", blob_hash)
+    assert (moved.status, moved.refcount) == ("ready", 1)
+    assert moved.variants == _blob("default", blob_hash).variants
+    # Imagens apagadas da origem com SQL core também descontam a referência
+    assert _blob("default", blob_hash).refcount == 0
+    with shard_map.shards["s1"].engine.connect() as conn:
+        assert conn.scalar(select(_IMAGES.c.blob_hash).where(_IMAGES.c.product_id == product["id"])) == blob_hash
+
+    # O coletor apaga o blob da origem, mas os arquivos seguem em uso no destino
+    BlobCollector(grace=-1).collect()
+    assert _blob("default", blob_hash) is None
+    assert _blob("s1", blob_hash).refcount == 1
+    assert os.path.exists(os.path.join(blob_dir(blob_hash), f"{blob_hash}.webp"))
+    served = client.get(f"/products/images/{image['id']}", headers=admin).json()
+    assert (served["status"], served["image_url"]) == ("ready", image["image_url"])
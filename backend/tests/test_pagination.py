@@ -0,0 +1,78 @@
+# tests/test_pagination.py
+
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.crud.pagination import NEXT_CURSOR_HEADER, InvalidCursor, decode_cursor, encode_cursor
+from app.models.order import Order
+from app.models.product import Product
+
+
+def _walk(client, headers: dict, sort: str, limit: int) -> list[dict]:
+    """Percorre todas as páginas de GET /products/ seguindo o X-Next-Cursor."""
+    items, cursor = [], None
+    while True:
+        params = {"sort": sort, "limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/products/", params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        assert len(response.json()) <= limit
+        items.extend(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return items
+
+
+@pytest.mark.parametrize(
+    "sort_value",
+    [datetime(2026, 3, 1, 12, 30, 15, 123456), Decimal("19.90"), "Café", None],
+)
+def test_cursor_round_trip(sort_value):
+    column = {
+        datetime: Order.created_at,
+        Decimal: Product.effective_price,
+    }.get(type(sort_value), Product.name)
+    assert decode_cursor(encode_cursor(sort_value, "abc"), column) == (sort_value, "abc")
+
+
+def test_decimal_cursor_keeps_exact_value():
+    decoded, _ = decode_cursor(encode_cursor(Decimal("0.10"), "x"), Product.effective_price)
+    assert isinstance(decoded, Decimal) and decoded == Decimal("0.10")
+
+
+@pytest.mark.parametrize("cursor", ["%%%", "bm90LWpzb24", encode_cursor("abc", "x")])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, Product.effective_price)
+
+
+@pytest.mark.parametrize("sort", ["name", "price", "-price"])
+@pytest.mark.parametrize("limit", [1, 2, 3])
+def test_pages_cover_ties_without_gaps_or_repeats(client, admin, make_product, sort, limit):
+    # Nomes e preços repetidos: só o desempate por id separa as linhas
+    for i, (name, price) in enumerate([("A", 10), ("B", 10), ("B", 10), ("B", 7.5), ("C", 10), ("A", 7.5)]):
+        make_product(admin, name=name, price=price, sku=f"T{i}")
+
+    items = _walk(client, admin, sort, limit)
+    assert sorted(p["sku"] for p in items) == [f"T{i}" for i in range(6)]
+
+    column, descending = {"name": ("name", False), "price": ("effective_price", False), "-price": ("effective_price", True)}[sort]
+    expected = sorted(items, key=lambda p: (p[column], p["id"]), reverse=descending)
+    assert [p["id"] for p in items] == [p["id"] for p in expected]
+
+
+def test_price_ties_with_taxes(client, admin, make_product):
+    # Preço com impostos arredondado em centavos: valores iguais empatam de verdade
+    for i in range(4):
+        make_product(admin, name=f"P{i}", price=9.99, icms=18, sku=f"X{i}")
+    items = _walk(client, admin, "price", 1)
+    assert len({p["id"] for p in items}) == 4
+    assert {p["effective_price"] for p in items} == {11.79}
+
+
+def test_invalid_cursor_is_400(client, admin):
+    response = client.get("/products/", params={"cursor": "lixo"}, headers=admin)
+    assert response.status_code == 400
@@ -0,0 +1,26 @@
+# tests/test_pool_metrics.py
+
+import pytest
+
+from app.services.pool_metrics import PoolMetrics
+
+
+class _Record:
+    pass
+
+
+@pytest.mark.parametrize("capture_stacks", [False, True])
+def test_long_held_connections(capture_stacks):
+    metrics = PoolMetrics("teste", capture_stacks=capture_stacks)
+    record = _Record()
+    metrics.on_checkout(None, record, None)
+
+    held = metrics.snapshot(long_held_seconds=0)["long_held"]
+    assert len(held) == 1
+    if capture_stacks:
+        assert any("test_pool_metrics.py" in frame for frame in held[0]["stack"])
+    else:
+        assert held[0]["stack"] is None
+
+    metrics.on_checkin(None, record)
+    assert metrics.snapshot(long_held_seconds=0)["long_held"] == []
@@ -0,0 +1,120 @@
+# tests/test_product_import.py
+
+import io
+
+import pytest
+
+from app.database import SessionLocal
+from app.services import product_import
+
+
+def _import(client, headers: dict, filename: str, body: str, **params):
+    return client.post(
+        "/products/import",
+        params=params,
+        files={"file": (filename, body.encode(), "text/plain")},
+        headers=headers,
+    )
+
+
+def _catalog(client, headers: dict) -> dict:
+    return {p["sku"]: p for p in client.get("/products/", headers=headers).json()}
+
+
+def test_csv_reports_each_bad_row_and_imports_the_rest(client, admin):
+    category = client.post("/categories/", json={"name": "Bebidas"}, headers=admin).json()
+    body = (
+        "sku,name,price,stock_quantity,category_id,images\n"
+        "C1,Um,10.5,3,,/a.webp|/b.webp\n"
+        "C2,Dois,abc,1,,\n"
+        "C3,Três,7,1,00000000-0000-0000-0000-000000000001,\n"
+        f"C4,Quatro,8,2,{category['id']},\n"
+        f"C5,{'x' * 300},1,1,,\n"
+        ",Sem sku,1,1,,\n"
+    )
+    response = _import(client, admin, "produtos.csv", body)
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert (report["rows"], report["inserted"], report["updated"], report["failed"]) == (6, 2, 0, 4)
+    errors = {error["row"]: error["error"] for error in report["errors"]}
+    assert sorted(errors) == [2, 3, 5, 6]
+    assert errors[2].startswith("price:")
+    assert errors[3] == "category_id: categoria não encontrada"
+    assert errors[5] == "name: máximo de 255 caracteres"
+    assert errors[6].startswith("sku:")
+    assert report["errors_truncated"] is False
+
+    catalog = _catalog(client, admin)
+    assert sorted(catalog) == ["C1", "C4"]
+    assert catalog["C1"]["images"] == ["/a.webp", "/b.webp"]
+    assert catalog["C4"]["category_id"] == category["id"]
+
+
+def test_jsonl_updates_by_sku_and_reports_invalid_lines(client, admin, make_product):
+    make_product(admin, sku="J1", name="Antigo", price=1)
+    body = (
+        '{"sku": "J1", "name": "Novo", "price": 12, "stock_quantity": 4}\n'
+        "{json quebrado\n"
+        "\n"
+        "[1, 2]\n"
+        '{"sku": "J2", "name": "Dois", "price": 1, "stock_quantity": 0}\n'
+    )
+    report = _import(client, admin, "produtos.jsonl", body).json()
+    assert (report["rows"], report["inserted"], report["updated"], report["failed"]) == (4, 1, 1, 2)
+    errors = {error["row"]: error["error"] for error in report["errors"]}
+    assert errors[2].startswith("JSON inválido")
+    assert errors[4] == "cada linha deve ser um objeto JSON"
+
+    catalog = _catalog(client, admin)
+    assert (catalog["J1"]["name"], catalog["J1"]["price"]) == ("Novo", 12.0)
+    assert sorted(catalog) == ["J1", "J2"]
+
+
+@pytest.mark.parametrize(
+    "filename, body, params",
+    [
+        ("produtos.txt", "sku\nX\n", {}),
+        ("produtos.csv", "name,price\nx,1\n", {}),
+        ("produtos.csv", "sku\nX\n", {"format": "xml"}),
+    ],
+)
+def test_unreadable_files_are_rejected(client, admin, filename, body, params):
+    response = _import(client, admin, filename, body, **params)
+    assert response.status_code in (400, 422)
+
+
+def test_errors_across_chunks_keep_row_numbers(client, admin, tenant_of, monkeypatch):
+    monkeypatch.setattr(product_import, "IMPORT_MAX_ERRORS", 2)
+    lines = ["sku,name,price,stock_quantity"]
+    for i in range(1, 8):
+        price = "x" if i % 2 == 0 else str(i)
+        lines.append(f"K{i},Produto {i},{price},1")
+    file = io.BytesIO("\n".join(lines).encode())
+
+    with SessionLocal() as db:
+        report = product_import.import_products(db, file, "csv", tenant_of(admin), chunk_size=2)
+
+    result = report.as_dict()
+    assert (result["inserted"], result["failed"]) == (4, 3)
+    assert [error["row"] for error in result["errors"]] == [2, 4]
+    assert result["errors_truncated"] is True
+    assert sorted(_catalog(client, admin)) == ["K1", "K3", "K5", "K7"]
+
+
+
+def test_import_updates_the_loaded_search_index(client, admin, make_product):
+    make_product(admin, sku="S1", name="Caneta azul")
+    assert len(client.get("/products/search", params={"q": "caneta"}, headers=admin).json()) == 1
+
+    body = (
+        "sku,name,price,stock_quantity\n"
+        "S1,Lápis preto,2,1\n"
+        "S2,Caneta vermelha,3,1\n"
+    )
+    assert _import(client, admin, "produtos.csv", body).status_code == 200
+
+    def search(q):
+        return [p["sku"] for p in client.get("/products/search", params={"q": q}, headers=admin).json()]
+
+    assert search("caneta") == ["S2"]
+    assert search("lapis") == ["S1"]
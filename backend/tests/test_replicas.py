@@ -0,0 +1,118 @@
+# tests/test_replicas.py
+
+from typing import Optional
+
+import pytest
+from sqlalchemy import insert, select, update
+from starlette.requests import Request
+
+from app import database
+from app.database import (
+    Base,
+    Replica,
+    ReplicaSet,
+    SessionLocal,
+    engine,
+    make_async_engine,
+    make_engine,
+    to_async_url,
+    wants_primary,
+)
+from app.models.company import Company
+
+
+@pytest.fixture(scope="module")
+def replica_engines(tmp_path_factory):
+    # Banco vazio com o schema: o que for lido dele não tem os dados do primário
+    url = f"sqlite:///{tmp_path_factory.mktemp('replica') / 'replica.db'}"
+    sync_engine = make_engine(url, "replica-test")
+    Base.metadata.create_all(sync_engine)
+    return sync_engine, make_async_engine(to_async_url(url), "replica-test-async")
+
+
+@pytest.fixture
+def replica(client, replica_engines, monkeypatch):
+    lag = {"seconds": 0.0}
+    sync_engine, async_engine = replica_engines
+    replica = Replica("replica-test", sync_engine, async_engine, lag_probe=lambda _: lag["seconds"])
+    replica_set = ReplicaSet([replica], max_lag=5, check_interval=60)
+    replica_set.refresh()
+    monkeypatch.setattr(database, "replicas", replica_set)
+    replica.set_lag = lambda seconds: (lag.update(seconds=seconds), replica_set.refresh())
+    return replica
+
+
+def _read_only_session():
+    db = SessionLocal()
+    db.info["read_only"] = True
+    return db
+
+
+def _request(method: str, headers: Optional[dict] = None) -> Request:
+    return Request({
+        "type": "http",
+        "method": method,
+        "path": "/",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    })
+
+
+def test_read_only_sessions_read_from_the_replica(replica):
+    with _read_only_session() as db:
+        assert db.get_bind(clause=select(Company)) is replica.engine
+    with SessionLocal() as db:
+        assert db.get_bind(clause=select(Company)) is engine
+
+
+def test_for_update_writes_and_reads_after_a_write_use_the_primary(replica):
+    with _read_only_session() as db:
+        assert db.get_bind(clause=select(Company).with_for_update()) is engine
+        assert db.get_bind(clause=select(Company)) is replica.engine
+
+        db.execute(update(Company).where(Company.id == "nenhuma").values(name="x"))
+        # Depois da primeira escrita a sessão fica no primário
+        assert db.get_bind(clause=select(Company)) is engine
+
+    with _read_only_session() as db:
+        assert db.get_bind(clause=insert(Company)) is engine
+        db.add(Company(name="Escrita pela sessão de leitura"))
+        db.flush()
+        assert db.get_bind(clause=select(Company)) is engine
+        db.rollback()
+
+
+def test_only_plain_gets_may_use_the_replica():
+    assert not wants_primary(_request("GET"))
+    assert not wants_primary(_request("HEAD"))
+    assert wants_primary(_request("POST"))
+    assert wants_primary(_request("GET", {"X-Read-Your-Writes": "1"}))
+
+
+def test_lagging_or_unreachable_replicas_are_skipped(replica):
+    replica.set_lag(30)
+    with _read_only_session() as db:
+        assert db.get_bind(clause=select(Company)) is engine
+
+    replica.set_lag(None)  # replicação parada
+    assert database.replicas.choose() is None
+
+    replica.lag_probe = lambda _: 1 / 0  # réplica fora do ar
+    database.replicas.refresh()
+    assert replica.lag is None and database.replicas.choose() is None
+
+    replica.set_lag(1)
+    replica.lag_probe = lambda _: 1.0
+    database.replicas.refresh()
+    assert database.replicas.choose() is replica
+
+
+def test_get_routes_read_from_the_replica(client, admin, make_product, replica):
+    product = make_product(admin, name="Só no primário")
+    url = f"/products/{product['id']}"
+
+    # A réplica (vazia) ainda não tem o produto recém-criado
+    assert client.get(url, headers=admin).status_code == 404
+    assert client.get(url, headers={**admin, "X-Read-Your-Writes": "1"}).status_code == 200
+
+    replica.set_lag(30)
+    assert client.get(url, headers=admin).status_code == 200
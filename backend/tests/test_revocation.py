@@ -0,0 +1,32 @@
+# tests/test_revocation.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+from jose import jwt
+
+from app.database import SessionLocal
+from app.dependencies import ALGORITHM, SECRET_KEY
+from app.models.revoked_token import RevokedToken
+from app.services.revocation import revocation_list
+
+
+def _jti(headers: dict) -> str:
+    token = headers["Authorization"].split(" ", 1)[1]
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])["jti"]
+
+
+def test_logout_revokes_the_token(client, admin):
+    assert client.post("/users/logout", headers=admin).status_code == 200
+    assert revocation_list.is_revoked(_jti(admin))
+    assert client.get("/users/me", headers=admin).status_code == 401
+
+
+def test_concurrent_logouts_of_the_same_token(client, admin):
+    # Todas passam pela autenticação antes de alguma gravar a revogação
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = list(pool.map(lambda _: client.post("/users/logout", headers=admin).status_code, range(8)))
+
+    assert 200 in statuses
+    assert set(statuses) <= {200, 401}
+    with SessionLocal() as db:
+        assert db.query(RevokedToken).filter(RevokedToken.jti == _jti(admin)).count() == 1
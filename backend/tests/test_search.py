@@ -0,0 +1,32 @@
+# tests/test_search.py
+
+import threading
+
+from app.services.search import TenantIndex, product_search
+
+
+def test_search_finds_created_product(client, admin, make_product):
+    product = make_product(admin, name="Parafuso sextavado", price=3)
+    make_product(admin, name="Martelo")
+
+    response = client.get("/products/search", params={"q": "sextavado"}, headers=admin)
+    assert response.status_code == 200, response.text
+    assert [item["id"] for item in response.json()] == [product["id"]]
+
+
+def test_search_is_scored_off_the_event_loop(client, admin, make_product, monkeypatch):
+    make_product(admin, name="Chave de fenda")
+    threads = []
+    original = TenantIndex.search
+
+    def spy(self, *args, **kwargs):
+        threads.append(threading.get_ident())
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(TenantIndex, "search", spy)
+    loop_thread = client.portal.call(threading.get_ident)
+
+    response = client.get("/products/search", params={"q": "fenda"}, headers=admin)
+    assert response.status_code == 200, response.text
+    assert threads and loop_thread not in threads
+    assert product_search.searches > 0
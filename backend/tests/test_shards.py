@@ -0,0 +1,64 @@
+# tests/test_shards.py
+
+import pytest
+from sqlalchemy import select
+
+from app.crud.tenant_scope import bind_tenant
+from app.database import SessionLocal, TenantMoving, shard_map
+from app.models.company import Company
+from app.models.product import Product
+from app.models.tenant_shard import TenantShardStatus
+from app.models.user import User
+from migrations.move_tenant import set_assignment
+
+
+def _assign(company_id: str, shard: str, status=TenantShardStatus.ACTIVE) -> None:
+    set_assignment(company_id, shard, status)
+    shard_map.refresh()
+
+
+def _count(shard: str, model, *where) -> int:
+    with shard_map.shards[shard].engine.connect() as conn:
+        return len(conn.execute(select(model.__table__.c.id).where(*where)).all())
+
+
+def test_tenant_models_go_to_the_shard_and_directory_tables_stay(client, admin, tenant_of, make_product):
+    company_id = tenant_of(admin).company_id
+    _assign(company_id, "s1")
+
+    product = make_product(admin, name="No shard")
+    assert _count("s1", Product, Product.id == product["id"]) == 1
+    assert _count("default", Product, Product.id == product["id"]) == 0
+    # Usuários e empresas ficam no diretório
+    assert _count("default", Company, Company.id == company_id) == 1
+    assert _count("default", User, User.company_id == company_id) == 1
+
+    listed = client.get("/products/", headers=admin).json()
+    assert [p["id"] for p in listed] == [product["id"]]
+
+
+def test_writes_are_refused_while_the_tenant_is_read_only(client, admin, tenant_of, make_product):
+    tenant = tenant_of(admin)
+    make_product(admin, name="Antes")
+    _assign(tenant.company_id, "default", TenantShardStatus.READ_ONLY)
+    try:
+        response = client.post("/products/", json={"name": "Durante", "price": 1, "sku": "RO-1", "stock_quantity": 0}, headers=admin)
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) >= 1
+        # Leituras continuam
+        assert [p["name"] for p in client.get("/products/", headers=admin).json()] == ["Antes"]
+
+        with SessionLocal() as db:
+            bind_tenant(db, tenant)
+            db.add(Product(name="Direto", price=1, sku="RO-2", company_id=tenant.company_id))
+            with pytest.raises(TenantMoving):
+                db.commit()
+    finally:
+        _assign(tenant.company_id, "default")
+
+
+def test_tenant_writes_need_a_bound_session(client, admin, tenant_of):
+    with SessionLocal() as db:
+        db.add(Product(name="Sem tenant", price=1, sku="NT-1", company_id=tenant_of(admin).company_id))
+        with pytest.raises(RuntimeError, match="bind_tenant"):
+            db.commit()
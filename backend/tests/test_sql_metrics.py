@@ -0,0 +1,68 @@
+# tests/test_sql_metrics.py
+
+import pytest
+from sqlalchemy import func, select
+
+from app.database import SessionLocal
+from app.models.product import Product
+from app.models.stock import StockMovement
+from app.services.sql_metrics import QueryBudgetExceeded, SQL_STRICT, track_queries
+
+
+def test_suite_runs_in_strict_mode():
+    assert SQL_STRICT
+
+
+def test_create_product_and_category_in_strict_mode(client, admin, make_product):
+    # refresh após o commit recarrega Product.images / ProductCategory.products
+    # (lazy="selectin") pelo LazyLoader: não é lazy load implícito
+    response = client.post("/categories/", json={"name": "Bebidas"}, headers=admin)
+    assert response.status_code == 200, response.text
+
+    product = make_product(admin, category_id=response.json()["id"], images=["https://cdn/x.webp"])
+    assert product["category_id"] == response.json()["id"]
+    assert product["images"] == ["https://cdn/x.webp"]
+
+
+def test_strict_mode_flags_lazy_select_relationship(client, admin, make_product):
+    product = make_product(admin)
+    with SessionLocal() as db:
+        loaded = db.get(Product, product["id"])
+        with track_queries("teste", allow_lazy_loads=False):
+            with pytest.raises(QueryBudgetExceeded, match="Product -> StockMovement"):
+                loaded.stock_movements  # lazy="select"
+
+
+def test_lazy_loads_are_recorded_when_allowed(client, admin, make_product):
+    product = make_product(admin)
+    with SessionLocal() as db:
+        loaded = db.get(Product, product["id"])
+        with track_queries("teste") as stats:
+            loaded.stock_movements
+            loaded.images  # já carregado (selectin) no get
+    assert stats.lazy_loads == ["Product -> StockMovement"]
+
+
+def test_query_budget(client, admin, make_product):
+    make_product(admin)
+    with SessionLocal() as db:
+        with track_queries("teste", max_queries=1):
+            db.scalar(select(func.count(Product.id)))
+            with pytest.raises(QueryBudgetExceeded):
+                db.scalar(select(func.count(Product.id)))
+
+
+def test_delete_product_with_stock_movements_in_strict_mode(client, admin, make_product):
+    product = make_product(admin)
+    response = client.post(
+        f"/stocks/{product['id']}/add",
+        json={"product_id": product["id"], "quantity": 3, "movement_type": "IN"},
+        headers=admin,
+    )
+    assert response.status_code == 200, response.text
+
+    response = client.delete(f"/products/{product['id']}", headers=admin)
+    assert response.status_code == 200, response.text
+    with SessionLocal() as db:
+        assert db.get(Product, product["id"]) is None
+        assert db.query(StockMovement).filter(StockMovement.product_id == product["id"]).count() == 0
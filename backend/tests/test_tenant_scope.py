@@ -0,0 +1,110 @@
+# tests/test_tenant_scope.py
+
+import pytest
+from sqlalchemy import delete, func, select, update
+
+from app.crud.tenant_scope import SKIP_TENANT_SCOPE, bind_tenant
+from app.database import SessionLocal
+from app.models.company import Company
+from app.models.product import Product
+from app.models.store import Store
+from app.security.tenant import Tenant
+
+
+@pytest.fixture
+def tenants(client):
+    """
+    Duas empresas; a primeira com uma loja. Cada tenant (empresa A, loja
+    de A, empresa B) tem dois produtos. Devolve (A, loja de A, B).
+    """
+    with SessionLocal() as db:
+        a, b = Company(name="A"), Company(name="B")
+        db.add_all([a, b])
+        db.flush()
+        store = Store(name="Loja A", company_id=a.id)
+        db.add(store)
+        db.commit()
+    tenants = Tenant(a.id), Tenant(a.id, store.id), Tenant(b.id)
+    for label, tenant in zip("asb", tenants):
+        with SessionLocal() as db:
+            bind_tenant(db, tenant)
+            for i in range(2):
+                db.add(Product(
+                    name=f"{label}{i}", price=1, sku=f"{label}{i}",
+                    company_id=tenant.company_id, store_id=tenant.store_id,
+                ))
+            db.commit()
+    return tenants
+
+
+def _names(db) -> list[str]:
+    return sorted(p.name for p in db.query(Product))
+
+
+def test_bound_session_only_sees_its_tenant(tenants):
+    company_a, store_a, company_b = tenants
+    for tenant, expected in ((company_a, ["a0", "a1"]), (store_a, ["s0", "s1"]), (company_b, ["b0", "b1"])):
+        with SessionLocal() as db:
+            bind_tenant(db, tenant)
+            assert _names(db) == expected
+            # select() 2.0 e contagens também passam pelo filtro
+            assert db.scalar(select(func.count(Product.id))) == 2
+
+
+def test_bulk_update_and_delete_are_scoped(tenants):
+    company_a, store_a, company_b = tenants
+    with SessionLocal() as db:
+        bind_tenant(db, company_b)
+        db.execute(update(Product).values(price=99))
+        db.execute(delete(Product).where(Product.name == "b0"))
+        db.commit()
+
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(Product.name, Product.price).where(Product.company_id.in_([company_a.company_id, company_b.company_id]))
+        ).all()
+    assert sorted(rows) == [("a0", 1), ("a1", 1), ("b1", 99), ("s0", 1), ("s1", 1)]
+
+
+def test_skip_tenant_scope(tenants):
+    company_a, _, company_b = tenants
+    with SessionLocal() as db:
+        bind_tenant(db, company_a)
+        names = db.scalars(
+            select(Product.name)
+            .where(Product.company_id.in_([company_a.company_id, company_b.company_id]))
+            .execution_options(**{SKIP_TENANT_SCOPE: True})
+        ).all()
+    assert sorted(names) == ["a0", "a1", "b0", "b1", "s0", "s1"]
+
+
+def test_unbound_session_is_not_filtered(tenants):
+    company_a, _, company_b = tenants
+    with SessionLocal() as db:
+        count = db.scalar(
+            select(func.count(Product.id)).where(Product.company_id.in_([company_a.company_id, company_b.company_id]))
+        )
+    assert count == 6
+
+
+def test_rebinding_to_another_tenant_fails(tenants):
+    company_a, store_a, _ = tenants
+    with SessionLocal() as db:
+        bind_tenant(db, company_a)
+        bind_tenant(db, Tenant(company_a.company_id))  # mesmo tenant: idempotente
+        with pytest.raises(RuntimeError):
+            bind_tenant(db, store_a)
+
+
+def test_api_does_not_leak_products_between_companies(client, make_admin, make_product):
+    admin_a, admin_b = make_admin("A"), make_admin("B")
+    product = make_product(admin_a, name="Só da A")
+
+    assert client.get(f"/products/{product['id']}", headers=admin_b).status_code == 404
+    assert client.get("/products/", headers=admin_b).json() == []
+    response = client.put(
+        f"/products/{product['id']}", json={"name": "invadido", "price": 1, "sku": product["sku"], "stock_quantity": 0}, headers=admin_b
+    )
+    assert response.status_code == 404
+    assert client.delete(f"/products/{product['id']}", headers=admin_b).status_code == 404
+    assert client.get(f"/products/{product['id']}", headers=admin_a).json()["name"] == "Só da A"
@@ -0,0 +1,73 @@
+# tests/test_token_versions.py
+
+from datetime import datetime
+
+from jose import jwt
+
+from app.database import SessionLocal, engine
+from app.dependencies import ALGORITHM, SECRET_KEY
+from app.models.types import new_id
+from app.models.user import User
+from app.models.user_token_version import UserTokenVersion
+from app.services.principal_cache import principal_cache
+from app.services.token_versions import token_versions
+
+
+def _user_id(headers: dict) -> str:
+    token = headers["Authorization"].split(" ", 1)[1]
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])["sub"]
+
+
+def _cached(client, headers: dict) -> None:
+    # /users/ só confere o Principal: a segunda request já sai do cache
+    for _ in range(2):
+        assert client.get("/users/", headers=headers).status_code == 200
+    assert principal_cache.get(jwt.decode(
+        headers["Authorization"].split(" ", 1)[1], SECRET_KEY, algorithms=[ALGORITHM]
+    )["jti"]) is not None
+
+
+def test_demotion_rejects_the_cached_token(client, admin):
+    _cached(client, admin)
+    with SessionLocal() as db:
+        user = db.get(User, _user_id(admin))
+        user.role = "cliente"
+        db.commit()
+        assert user.token_version == 1
+
+    assert client.get("/users/", headers=admin).status_code == 401
+
+
+def test_deletion_rejects_the_cached_token(client, admin):
+    _cached(client, admin)
+    with SessionLocal() as db:
+        db.delete(db.get(User, _user_id(admin)))
+        db.commit()
+
+    assert client.get("/users/", headers=admin).status_code == 401
+    with SessionLocal() as db:
+        row = db.query(UserTokenVersion).filter(UserTokenVersion.user_id == _user_id(admin)).one()
+        assert row.version == 1
+
+
+def test_unrelated_changes_keep_the_token(client, admin):
+    _cached(client, admin)
+    with SessionLocal() as db:
+        db.get(User, _user_id(admin)).name = "outro nome"
+        db.commit()
+
+    assert client.get("/users/", headers=admin).status_code == 200
+
+
+def test_change_from_another_worker_is_seen_on_refresh(client, admin):
+    _cached(client, admin)
+    # Gravado por outro processo: este só vê na releitura
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(UserTokenVersion.__table__.insert().values(
+            id=new_id(), user_id=_user_id(admin), version=1, created_at=now, updated_at=now,
+        ))
+    assert client.get("/users/", headers=admin).status_code == 200
+
+    token_versions.refresh()
+    assert client.get("/users/", headers=admin).status_code == 401